@@ -0,0 +1,33 @@
+"""Add keyset index for paginated feature children
+
+Revision ID: 002_feature_children_keyset
+Revises: 001_performance_indices
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "002_feature_children_keyset"
+down_revision = "001_performance_indices"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Index (parent_id, name, id) for the paginated subtree CTE."""
+
+    # Hijos de un nodo en orden (name, id): LATERAL ... ORDER BY ... LIMIT
+    op.create_index(
+        "idx_feature_parent_name_id",
+        "features",
+        ["parent_id", "name", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    """Remove keyset index."""
+
+    op.drop_index("idx_feature_parent_name_id", if_exists=True)
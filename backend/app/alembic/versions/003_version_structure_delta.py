@@ -0,0 +1,62 @@
+"""Add delta storage columns to feature model versions
+
+Revision ID: 003_version_structure_delta
+Revises: 002_feature_children_keyset
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "003_version_structure_delta"
+down_revision = "002_feature_children_keyset"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Base version and per-table delta for versions stored as deltas."""
+
+    op.add_column(
+        "feature_model_versions",
+        sa.Column("base_version_id", sa.Uuid(), nullable=True),
+    )
+    op.add_column(
+        "feature_model_versions",
+        sa.Column(
+            "structure_delta", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.create_foreign_key(
+        "fk_feature_model_versions_base_version_id",
+        "feature_model_versions",
+        "feature_model_versions",
+        ["base_version_id"],
+        ["id"],
+    )
+    # Descendientes de una versión (compactación y remapeo de deltas)
+    op.create_index(
+        op.f("ix_feature_model_versions_base_version_id"),
+        "feature_model_versions",
+        ["base_version_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    """Remove delta storage columns."""
+
+    op.drop_index(
+        op.f("ix_feature_model_versions_base_version_id"),
+        table_name="feature_model_versions",
+    )
+    op.drop_constraint(
+        "fk_feature_model_versions_base_version_id",
+        "feature_model_versions",
+        type_="foreignkey",
+    )
+    op.drop_column("feature_model_versions", "structure_delta")
+    op.drop_column("feature_model_versions", "base_version_id")
@@ -0,0 +1,184 @@
+"""
+Peticiones condicionales (ETag / If-None-Match) y Cache-Control por estado.
+
+Cada versión tiene en Redis una etiqueta de contenido (``fm:vtag:<id>``)
+derivada de su id, número, estado, fecha de actualización, UVL guardado y
+generación de cambios in situ. El ETag de una respuesta combina esa etiqueta
+con la variante servida (endpoint, formato, parámetros), así que es fuerte:
+la misma etiqueta y variante producen siempre el mismo contenido.
+
+La comprobación de ``If-None-Match`` solo lee esa clave de Redis: un 304 no
+toca la base de datos ni reconstruye nada. Las mutaciones in situ llaman a
+``CacheService.invalidate_version_tag``; las copy-on-write crean una versión
+nueva y, con ella, etiquetas nuevas. Los cambios de datos que se muestran en
+las respuestas sin ser columnas de la versión (nombre del modelo o del
+dominio, recursos de las features) renuevan también la etiqueta de las
+versiones afectadas con ``invalidate_version_tags``.
+"""
+
+import hashlib
+import uuid
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+from app.core.cache import CacheKeys, cache_service
+from app.core.logging import get_logger
+from app.enums import ModelStatus
+
+log = get_logger(__name__)
+
+# Política de caché del cliente según el estado de la versión. Las respuestas
+# son por usuario (``private``); DRAFT siempre revalida (un 304 es barato).
+CACHE_CONTROL_BY_STATUS = {
+    ModelStatus.DRAFT: "private, no-cache",
+    ModelStatus.IN_REVIEW: "private, max-age=60, must-revalidate",
+    ModelStatus.PUBLISHED: "private, max-age=3600, must-revalidate",
+    ModelStatus.ARCHIVED: "private, max-age=86400, must-revalidate",
+}
+
+
+def cache_control_for(version_status: Any) -> str:
+    """Cabecera Cache-Control para una versión en ``version_status``."""
+    try:
+        return CACHE_CONTROL_BY_STATUS[ModelStatus(version_status)]
+    except ValueError:
+        return CACHE_CONTROL_BY_STATUS[ModelStatus.DRAFT]
+
+
+def version_content_tag(version: Any, generation: int) -> str:
+    """Etiqueta de contenido de una versión (sin consultar su estructura)."""
+    uvl_digest = hashlib.sha256((version.uvl_content or "").encode("utf-8"))
+    raw = "|".join(
+        (
+            str(version.id),
+            str(version.version_number),
+            str(getattr(version.status, "value", version.status)),
+            str(version.updated_at or version.created_at),
+            uvl_digest.hexdigest(),
+            str(generation),
+        )
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_etag(version_tag: str, variant: str) -> str:
+    """ETag fuerte para una variante de respuesta de una versión."""
+    digest = hashlib.sha256(f"{version_tag}|{variant}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de ``If-None-Match`` (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+async def not_modified_response(
+    request: Request,
+    model_id: uuid.UUID,
+    version_id: Any,
+    variant: str,
+) -> Optional[Response]:
+    """
+    304 si el cliente ya tiene la variante vigente de la versión.
+
+    Solo consulta Redis. Devuelve None (seguir con la petición normal) si no
+    hay ``If-None-Match``, si la versión se pide como ``latest``, si no hay
+    etiqueta guardada o si el modelo está inactivo (requiere comprobar
+    permisos).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    try:
+        version_uuid = uuid.UUID(str(version_id))
+    except ValueError:
+        return None
+
+    try:
+        record = await cache_service.get_version_tag(version_uuid)
+    except Exception as exc:
+        log.warning(
+            "http_cache.read_failed", version_id=str(version_id), error=str(exc)
+        )
+        return None
+    if (
+        not record
+        or record.get("model_id") != str(model_id)
+        or not record.get("model_active")
+    ):
+        return None
+
+    etag = make_etag(record["tag"], variant)
+    if not etag_matches(if_none_match, etag):
+        return None
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control_for(record["status"])},
+    )
+
+
+async def conditional_headers(
+    version: Any, variant: str, model_active: bool
+) -> dict[str, str]:
+    """
+    Cabeceras ETag y Cache-Control de una respuesta recién construida.
+
+    Siembra la etiqueta de la versión en Redis si no existe. Si Redis falla
+    solo se devuelve Cache-Control.
+
+    Args:
+        version: Versión servida (solo se leen columnas propias)
+        variant: Endpoint y parámetros que determinan el contenido
+        model_active: Si el modelo está activo (solo entonces se aceptan 304
+            sin comprobar permisos)
+    """
+    status_value = getattr(version.status, "value", version.status)
+    headers = {"Cache-Control": cache_control_for(status_value)}
+    try:
+        record = await cache_service.get_version_tag(version.id)
+        if (
+            record is None
+            or record.get("status") != status_value
+            or record.get("model_active") != model_active
+        ):
+            generation = await cache_service.get_version_tag_generation(version.id)
+            record = {
+                "tag": version_content_tag(version, generation),
+                "status": status_value,
+                "model_id": str(version.feature_model_id),
+                "model_active": model_active,
+            }
+            ttl = CacheKeys.get_ttl_for_status(version.status)["tree"]
+            await cache_service.set_version_tag(version.id, record, ttl)
+    except Exception as exc:
+        log.warning(
+            "http_cache.write_failed", version_id=str(version.id), error=str(exc)
+        )
+        return headers
+
+    headers["ETag"] = make_etag(record["tag"], variant)
+    return headers
+
+
+async def invalidate_version_tags(*version_ids: Any) -> None:
+    """Renueva los ETag de versiones modificadas in situ (nunca lanza)."""
+    for version_id in version_ids:
+        try:
+            await cache_service.invalidate_version_tag(version_id)
+        except Exception as exc:
+            log.warning(
+                "http_cache.invalidate_failed",
+                version_id=str(version_id),
+                error=str(exc),
+            )
@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
 from app.api.deps import AsyncConfigurationRepoDep, AsyncFeatureModelVersionRepoDep
+from app.core.cache import CacheKeys
 from app.enums import GenerationStrategy
 from app.models.common import Message
 from app.models.configuration import (
@@ -18,6 +19,15 @@ from app.services.feature_model import (
     FeatureModelConfigurationGenerator,
     FeatureModelLogicalValidator,
 )
+from app.services.feature_model.fm_model_hash import (
+    canonicalize_model_payload,
+    compute_model_hash,
+)
+from app.services.feature_model.fm_sample_cache import get_or_generate_sample
+from app.services.feature_model.fm_statistics_store import (
+    configuration_delta,
+    publish_statistics_delta,
+)
 
 router = APIRouter(prefix="/configurations", tags=["configurations"])
 
@@ -39,6 +49,23 @@ class ConfigurationGenerationRequest(BaseModel):
     count: int = Field(default=1, ge=1, le=100)
     diverse: bool = True
     partial_selection: Optional[dict[uuid.UUID, bool]] = None
+    pool_size: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=10000,
+        description="Candidatos a muestrear antes de seleccionar (estrategia diverse).",
+    )
+    time_budget_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        le=60,
+        description="Tiempo máximo para construir el pool (estrategia diverse).",
+    )
+    seed: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Semilla del muestreo; con la misma semilla la muestra es reproducible y se sirve desde caché.",
+    )
 
 
 class ConfigurationOptimizationRequest(BaseModel):
@@ -46,6 +73,11 @@ class ConfigurationOptimizationRequest(BaseModel):
     strategy: GenerationStrategy = GenerationStrategy.NSGA2
     count: int = Field(default=5, ge=1, le=50)
     partial_selection: Optional[dict[uuid.UUID, bool]] = None
+    seed: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Semilla de la optimización para resultados reproducibles.",
+    )
     objective_hint: Optional[str] = Field(
         default=None,
         description="Descripción del objetivo (informativo).",
@@ -69,6 +101,7 @@ class ConfigurationOptimizationResponse(BaseModel):
 class ConfigurationGenerationResponse(BaseModel):
     results: list[ConfigurationGenerationItem] = Field(default_factory=list)
     quality: dict[str, Any] = Field(default_factory=dict)
+    cached: bool = False
 
 
 class StagedConfigurationRequest(BaseModel):
@@ -257,6 +290,10 @@ async def create_configuration(
         )
 
     configuration = await configuration_repo.create(data=configuration_in)
+    # Las configuraciones no crean versión: el contador se ajusta in situ
+    await publish_statistics_delta(
+        configuration.feature_model_version_id, None, configuration_delta()
+    )
     return configuration
 
 
@@ -443,7 +480,11 @@ async def activate_configuration(
     if db_configuration.is_active:
         raise HTTPException(status_code=400, detail="Configuration is already active")
 
-    return await configuration_repo.activate(db_configuration)
+    configuration = await configuration_repo.activate(db_configuration)
+    await publish_statistics_delta(
+        configuration.feature_model_version_id, None, configuration_delta()
+    )
+    return configuration
 
 
 @router.patch(
@@ -483,7 +524,11 @@ async def deactivate_configuration(
     if not db_configuration.is_active:
         raise HTTPException(status_code=400, detail="Configuration is already inactive")
 
-    return await configuration_repo.deactivate(db_configuration)
+    configuration = await configuration_repo.deactivate(db_configuration)
+    await publish_statistics_delta(
+        configuration.feature_model_version_id, None, configuration_delta(-1)
+    )
+    return configuration
 
 
 @router.delete(
@@ -520,7 +565,10 @@ async def delete_configuration(
     if not db_configuration:
         raise HTTPException(status_code=404, detail="Configuration not found")
 
+    version_id = db_configuration.feature_model_version_id
+    delta = configuration_delta(-1) if db_configuration.is_active else {}
     await configuration_repo.delete(db_configuration=db_configuration)
+    await publish_statistics_delta(version_id, None, delta)
     return Message(message="Configuration deleted")
 
 
@@ -600,7 +648,14 @@ async def validate_configuration(
     summary="Generar configuraciones",
     description="""
     Genera una o varias configuraciones válidas usando la estrategia indicada (greedy, random, beam_search,
-    genetic, sat_enum, pairwise, uniform, stratified, cp_sat, bdd, nsga2, etc.).
+    genetic, sat_enum, pairwise, uniform, stratified, cp_sat, bdd, nsga2, diverse, etc.).
+
+    La estrategia `diverse` muestrea un pool de candidatos (`pool_size`, `time_budget_seconds`)
+    y elige golosamente las configuraciones más lejanas entre sí (distancia de Jaccard).
+
+    Con `seed` la muestra es reproducible: se guarda en una caché direccionada por contenido
+    (hash del modelo + estrategia + parámetros + semilla) y las peticiones repetidas la leen
+    de Redis/MinIO (`cached: true`). Las estrategias deterministas se cachean sin semilla.
 
     Use cases: generación automática para pruebas, población inicial para optimización, y exploración de espacio.
     Performance: puede ser costoso según la estrategia y el tamaño del modelo; para conteos grandes usar límites razonables.
@@ -645,67 +700,78 @@ async def generate_configuration(
         raise HTTPException(status_code=404, detail="Feature model version not found")
 
     features_payload, relations_payload, constraints_payload = (
-        _build_configuration_payload(version)
+        canonicalize_model_payload(*_build_configuration_payload(version))
     )
+    feature_ids = [str(f["id"]) for f in features_payload]
 
-    generator = FeatureModelConfigurationGenerator()
+    generator = FeatureModelConfigurationGenerator(seed=payload.seed)
     partial_selection = (
         {str(k): v for k, v in payload.partial_selection.items()}
         if payload.partial_selection
         else None
     )
 
-    results: list[ConfigurationGenerationItem] = []
-    quality: dict[str, Any] = {}
-    if payload.count == 1:
-        generated = generator.generate_valid_configuration(
-            features=features_payload,
-            relations=relations_payload,
-            constraints=constraints_payload,
-            strategy=payload.strategy,
-            partial_selection=partial_selection,
-        )
-        results.append(
-            ConfigurationGenerationItem(
-                success=generated.success,
-                selected_features=[
-                    uuid.UUID(fid) for fid in generated.selected_features
-                ],
-                score=generated.score,
-                iterations=generated.iterations,
-                errors=generated.errors,
-            )
-        )
-        quality = generator.compute_quality_metrics(
-            [generated], [str(f["id"]) for f in features_payload]
-        )
-    else:
-        generated_list = generator.generate_multiple_configurations(
-            features=features_payload,
-            relations=relations_payload,
-            constraints=constraints_payload,
-            count=payload.count,
-            diverse=payload.diverse,
-            strategy=payload.strategy,
-            partial_selection=partial_selection,
-        )
-        quality = generator.compute_quality_metrics(
-            generated_list, [str(f["id"]) for f in features_payload]
-        )
-        for generated in generated_list:
-            results.append(
-                ConfigurationGenerationItem(
-                    success=generated.success,
-                    selected_features=[
-                        uuid.UUID(fid) for fid in generated.selected_features
-                    ],
-                    score=generated.score,
-                    iterations=generated.iterations,
-                    errors=generated.errors,
+    def _generate() -> dict[str, Any]:
+        if payload.count == 1:
+            generated_list = [
+                generator.generate_valid_configuration(
+                    features=features_payload,
+                    relations=relations_payload,
+                    constraints=constraints_payload,
+                    strategy=payload.strategy,
+                    partial_selection=partial_selection,
                 )
+            ]
+        else:
+            generated_list = generator.generate_multiple_configurations(
+                features=features_payload,
+                relations=relations_payload,
+                constraints=constraints_payload,
+                count=payload.count,
+                diverse=payload.diverse,
+                strategy=payload.strategy,
+                partial_selection=partial_selection,
+                pool_size=payload.pool_size,
+                time_budget_seconds=payload.time_budget_seconds,
             )
+        return {
+            "configurations": [generated.__dict__ for generated in generated_list],
+            "quality": generator.compute_quality_metrics(generated_list, feature_ids),
+        }
+
+    sample, cached = await get_or_generate_sample(
+        model_hash=compute_model_hash(
+            features_payload, relations_payload, constraints_payload
+        ),
+        strategy=payload.strategy,
+        params={
+            "count": payload.count,
+            "diverse": payload.diverse,
+            "partial_selection": partial_selection,
+            "pool_size": payload.pool_size,
+            "time_budget_seconds": payload.time_budget_seconds,
+        },
+        seed=payload.seed,
+        generate=_generate,
+        ttl=CacheKeys.get_ttl_for_status(version.status)["samples"],
+    )
 
-    return ConfigurationGenerationResponse(results=results, quality=quality)
+    results = [
+        ConfigurationGenerationItem(
+            success=generated["success"],
+            selected_features=[
+                uuid.UUID(fid) for fid in generated["selected_features"]
+            ],
+            score=generated["score"],
+            iterations=generated["iterations"],
+            errors=generated["errors"],
+        )
+        for generated in sample["configurations"]
+    ]
+
+    return ConfigurationGenerationResponse(
+        results=results, quality=sample["quality"], cached=cached
+    )
 
 
 @router.post(
@@ -758,7 +824,7 @@ async def optimize_configurations(
         _build_configuration_payload(version)
     )
 
-    generator = FeatureModelConfigurationGenerator()
+    generator = FeatureModelConfigurationGenerator(seed=payload.seed)
     partial = (
         {str(k): v for k, v in payload.partial_selection.items()}
         if payload.partial_selection
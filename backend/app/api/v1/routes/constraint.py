@@ -16,6 +16,11 @@ from app.models.constraint import (
     ConstraintUpdate,
     ConstraintReplace,
 )
+from app.services.feature_model.fm_statistics_store import (
+    constraint_delta,
+    publish_statistics_delta,
+)
+from app.services.feature_model.fm_version_delta import ensure_not_shared
 from app.exceptions import (
     ConstraintNotFoundException,
     ConstraintAccessDeniedException,
@@ -183,10 +188,14 @@ async def create_constraint(
             user=current_user,
             feature_model_version_repo=feature_model_version_repo,
         )
-        return constraint
     except (ValueError, RuntimeError) as e:
         raise InvalidConstraintOperationException(reason=str(e))
 
+    await publish_statistics_delta(
+        version.id, constraint.feature_model_version_id, constraint_delta()
+    )
+    return constraint
+
 
 @router.patch(
     "/{constraint_id}",
@@ -244,8 +253,9 @@ async def update_constraint(
     ):
         raise ConstraintAccessDeniedException(constraint_id=str(constraint_id))
 
+    source_version_id = db_constraint.feature_model_version_id
     try:
-        return await constraint_repo.update(
+        constraint = await constraint_repo.update(
             db_constraint=db_constraint,
             data=constraint_in,
             user=current_user,
@@ -254,6 +264,12 @@ async def update_constraint(
     except (ValueError, RuntimeError) as e:
         raise InvalidConstraintOperationException(reason=str(e))
 
+    # Editar una constraint no cambia los contadores: se copian a la nueva versión
+    await publish_statistics_delta(
+        source_version_id, constraint.feature_model_version_id, {}
+    )
+    return constraint
+
 
 @router.put(
     "/{constraint_id}",
@@ -311,12 +327,13 @@ async def replace_constraint(
     ):
         raise ConstraintAccessDeniedException(constraint_id=str(constraint_id))
 
+    source_version_id = db_constraint.feature_model_version_id
     try:
         update_data = ConstraintUpdate(
             description=constraint_in.description,
             expr_text=constraint_in.expr_text,
         )
-        return await constraint_repo.update(
+        constraint = await constraint_repo.update(
             db_constraint=db_constraint,
             data=update_data,
             user=current_user,
@@ -325,6 +342,12 @@ async def replace_constraint(
     except (ValueError, RuntimeError) as e:
         raise InvalidConstraintOperationException(reason=str(e))
 
+    # Editar una constraint no cambia los contadores: se copian a la nueva versión
+    await publish_statistics_delta(
+        source_version_id, constraint.feature_model_version_id, {}
+    )
+    return constraint
+
 
 @router.delete(
     "/{constraint_id}",
@@ -377,11 +400,15 @@ async def delete_constraint(
     ):
         raise ConstraintAccessDeniedException(constraint_id=str(constraint_id))
 
-    await constraint_repo.delete(
+    source_version_id = db_constraint.feature_model_version_id
+    # Una constraint inactiva no cuenta en las estadísticas de la versión de origen
+    delta = constraint_delta(-1) if db_constraint.is_active else {}
+    new_version_id = await constraint_repo.delete(
         db_constraint=db_constraint,
         user=current_user,
         feature_model_version_repo=feature_model_version_repo,
     )
+    await publish_statistics_delta(source_version_id, new_version_id, delta)
     return Message(
         message="Constraint deleted in new model version created successfully."
     )
@@ -435,7 +462,14 @@ async def activate_constraint(
     if db_constraint.is_active:
         raise HTTPException(status_code=400, detail="Constraint is already active")
 
-    return await constraint_repo.activate(db_constraint)
+    await ensure_not_shared(
+        constraint_repo.session, db_constraint.feature_model_version_id
+    )
+    constraint = await constraint_repo.activate(db_constraint)
+    await publish_statistics_delta(
+        constraint.feature_model_version_id, None, constraint_delta()
+    )
+    return constraint
 
 
 @router.patch(
@@ -486,4 +520,11 @@ async def deactivate_constraint(
     if not db_constraint.is_active:
         raise HTTPException(status_code=400, detail="Constraint is already inactive")
 
-    return await constraint_repo.deactivate(db_constraint)
+    await ensure_not_shared(
+        constraint_repo.session, db_constraint.feature_model_version_id
+    )
+    constraint = await constraint_repo.deactivate(db_constraint)
+    await publish_statistics_delta(
+        constraint.feature_model_version_id, None, constraint_delta(-1)
+    )
+    return constraint
@@ -3,8 +3,10 @@ import uuid
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi_cache.decorator import cache
 
+from app.api.http_cache import invalidate_version_tags
 from app.api.deps import (
     AsyncDomainRepoDep,
+    AsyncFeatureModelVersionRepoDep,
     get_verified_user,
     get_admin_user,
     AsyncCurrentUser,
@@ -172,6 +174,7 @@ async def update_domain(
     *,
     domain_id: uuid.UUID,
     domain_repo: AsyncDomainRepoDep,
+    version_repo: AsyncFeatureModelVersionRepoDep,
     domain_in: DomainUpdate,
 ) -> DomainPublic:
     """
@@ -182,6 +185,7 @@ async def update_domain(
     Args:
         domain_id: Domain ID to update
         domain_repo: Repositorio de dominios
+        version_repo: Repositorio de versiones (renovar sus ETag)
         domain_in: Domain update data
 
     Returns:
@@ -198,6 +202,8 @@ async def update_domain(
 
     try:
         updated_domain = await domain_repo.update(db_domain, domain_in)
+        # El nombre del dominio aparece en el árbol completo: renovar sus ETag
+        await invalidate_version_tags(*await version_repo.get_ids_by_domain(domain_id))
         return DomainPublic.model_validate(updated_domain)
 
     except ValueError as e:
@@ -13,6 +13,7 @@ from app.api.deps import (
     AsyncTagRepoDep,
     VerifiedUser,
 )
+from app.api.http_cache import invalidate_version_tags
 from app.models import (
     FeatureCreate,
     FeaturePublic,
@@ -24,6 +25,15 @@ from app.models import (
 from app.models.tag import TagPublic
 from app.enums import FeatureType
 from app.models.feature_relation import FeatureRelation
+from app.services.feature_model.fm_statistics_store import (
+    feature_delta,
+    feature_type_delta,
+    publish_statistics_delta,
+)
+from app.services.feature_model.fm_version_delta import (
+    discard_compiled_structure,
+    ensure_not_shared,
+)
 from app.exceptions import (
     FeatureNotFoundException,
     FeatureAccessDeniedException,
@@ -197,10 +207,18 @@ async def create_feature(
     try:
         # La creación sigue el patrón copy-on-write
         feature = await feature_repo.create(data=feature_in, user=current_user)
-        return feature
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # La nueva feature es una hoja: su profundidad es la del padre + 1
+    depth = await feature_repo.get_depth(feature.id, feature.feature_model_version_id)
+    await publish_statistics_delta(
+        feature_in.feature_model_version_id,
+        feature.feature_model_version_id,
+        feature_delta(feature.type, depth) if depth is not None else None,
+    )
+    return feature
+
 
 @router.get(
     "/{feature_id}",
@@ -358,11 +376,17 @@ async def add_tag_to_feature(
     if not tag:
         raise TagNotFoundException(tag_id=str(tag_id))
 
+    await ensure_not_shared(feature_repo.session, feature.feature_model_version_id)
     await feature_repo.session.refresh(feature, ["tags"])
     if tag not in feature.tags:
         feature.tags.append(tag)
         feature_repo.session.add(feature)
         await feature_repo.session.commit()
+        await discard_compiled_structure(
+            feature_repo.session, feature.feature_model_version_id
+        )
+        # Las tags se sirven en el árbol completo y en las exportaciones
+        await invalidate_version_tags(feature.feature_model_version_id)
 
     return Message(message="Tag associated with feature")
 
@@ -397,11 +421,17 @@ async def remove_tag_from_feature(
     if not tag:
         raise TagNotFoundException(tag_id=str(tag_id))
 
+    await ensure_not_shared(feature_repo.session, feature.feature_model_version_id)
     await feature_repo.session.refresh(feature, ["tags"])
     if tag in feature.tags:
         feature.tags.remove(tag)
         feature_repo.session.add(feature)
         await feature_repo.session.commit()
+        await discard_compiled_structure(
+            feature_repo.session, feature.feature_model_version_id
+        )
+        # Las tags se sirven en el árbol completo y en las exportaciones
+        await invalidate_version_tags(feature.feature_model_version_id)
 
     return Message(message="Tag removed from feature")
 
@@ -462,6 +492,11 @@ async def update_feature(
     # Por ahora, mantenemos la validación básica aquí
     # La validación completa de permisos y relaciones se hace en el repositorio
 
+    source_version_id = db_feature.feature_model_version_id
+    old_type = db_feature.type
+    reparented = "parent_id" in feature_in.model_fields_set and (
+        feature_in.parent_id != db_feature.parent_id
+    )
     try:
         # La función devuelve la feature en la *nueva* versión
         new_feature = await feature_repo.update(
@@ -469,10 +504,17 @@ async def update_feature(
             data=feature_in,
             user=current_user,
         )
-        return new_feature
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # Mover un subárbol cambia el histograma de profundidad: se recalcula al leer
+    await publish_statistics_delta(
+        source_version_id,
+        new_feature.feature_model_version_id,
+        None if reparented else feature_type_delta(old_type, new_feature.type),
+    )
+    return new_feature
+
 
 @router.put(
     "/{feature_id}",
@@ -547,16 +589,25 @@ async def replace_feature(
         group_id=feature_in.group_id,
     )
 
+    source_version_id = db_feature.feature_model_version_id
+    old_type = db_feature.type
+    reparented = feature_in.parent_id != db_feature.parent_id
     try:
         new_feature = await feature_repo.update(
             db_feature=db_feature,
             data=update_data,
             user=current_user,
         )
-        return new_feature
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    await publish_statistics_delta(
+        source_version_id,
+        new_feature.feature_model_version_id,
+        None if reparented else feature_type_delta(old_type, new_feature.type),
+    )
+    return new_feature
+
 
 @router.patch(
     "/{feature_id}/move",
@@ -618,16 +669,24 @@ async def move_feature(
                 detail="Parent feature not found or does not belong to the same model.",
             )
 
+    source_version_id = db_feature.feature_model_version_id
+    reparented = payload.parent_id != db_feature.parent_id
     try:
         new_feature = await feature_repo.update(
             db_feature=db_feature,
             data=FeatureUpdate(parent_id=payload.parent_id),
             user=current_user,
         )
-        return new_feature
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    await publish_statistics_delta(
+        source_version_id,
+        new_feature.feature_model_version_id,
+        None if reparented else {},
+    )
+    return new_feature
+
 
 @router.patch(
     "/{feature_id}/activate",
@@ -675,7 +734,11 @@ async def activate_feature(
     if db_feature.is_active:
         raise HTTPException(status_code=400, detail="Feature is already active")
 
-    return await feature_repo.activate(db_feature)
+    await ensure_not_shared(feature_repo.session, db_feature.feature_model_version_id)
+    feature = await feature_repo.activate(db_feature)
+    # Reactivar puede reenganchar un subárbol: se recalcula al leer
+    await publish_statistics_delta(feature.feature_model_version_id, None, None)
+    return feature
 
 
 @router.patch(
@@ -724,7 +787,10 @@ async def deactivate_feature(
     if not db_feature.is_active:
         raise HTTPException(status_code=400, detail="Feature is already inactive")
 
-    return await feature_repo.deactivate(db_feature)
+    await ensure_not_shared(feature_repo.session, db_feature.feature_model_version_id)
+    feature = await feature_repo.deactivate(db_feature)
+    await publish_statistics_delta(feature.feature_model_version_id, None, None)
+    return feature
 
 
 @router.delete(
@@ -775,5 +841,14 @@ async def delete_feature(
     if not db_feature:
         raise FeatureNotFoundException(feature_id=str(feature_id))
 
-    await feature_repo.delete(db_feature=db_feature, user=current_user)
+    # Solo el borrado de una hoja es expresable como delta
+    source_version_id = db_feature.feature_model_version_id
+    delta = None
+    if not await feature_repo.has_children(feature_id):
+        depth = await feature_repo.get_depth(feature_id, source_version_id)
+        if depth is not None:
+            delta = feature_delta(db_feature.type, depth, -1)
+
+    new_version_id = await feature_repo.delete(db_feature=db_feature, user=current_user)
+    await publish_statistics_delta(source_version_id, new_version_id, delta)
     return Message(message="Feature deleted in new model version created successfully.")
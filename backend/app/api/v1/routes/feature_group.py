@@ -18,6 +18,12 @@ from app.models.feature_group import (
     FeatureGroupReplace,
 )
 from app.enums import FeatureGroupType
+from app.services.feature_model.fm_statistics_store import (
+    group_delta,
+    merge_deltas,
+    publish_statistics_delta,
+)
+from app.services.feature_model.fm_version_delta import ensure_not_shared
 from app.exceptions import (
     FeatureGroupNotFoundException,
     FeatureGroupAccessDeniedException,
@@ -198,10 +204,16 @@ async def create_feature_group(
             feature_repo=feature_repo,
             feature_model_version_repo=feature_model_version_repo,
         )
-        return group
     except (ValueError, RuntimeError) as e:
         raise InvalidFeatureGroupException(reason=str(e))
 
+    await publish_statistics_delta(
+        parent_feature.feature_model_version_id,
+        group.feature_model_version_id,
+        group_delta(group.group_type),
+    )
+    return group
+
 
 @router.patch(
     "/{group_id}",
@@ -260,8 +272,10 @@ async def update_feature_group(
     ):
         raise FeatureGroupAccessDeniedException(group_id=str(group_id))
 
+    source_version_id = db_group.feature_model_version_id
+    old_group_type = db_group.group_type
     try:
-        return await feature_group_repo.update(
+        group = await feature_group_repo.update(
             db_group=db_group,
             data=group_in,
             user=current_user,
@@ -270,6 +284,13 @@ async def update_feature_group(
     except (ValueError, RuntimeError) as e:
         raise InvalidFeatureGroupException(reason=str(e))
 
+    await publish_statistics_delta(
+        source_version_id,
+        group.feature_model_version_id,
+        merge_deltas(group_delta(old_group_type, -1), group_delta(group.group_type)),
+    )
+    return group
+
 
 @router.put(
     "/{group_id}",
@@ -328,6 +349,8 @@ async def replace_feature_group(
     ):
         raise FeatureGroupAccessDeniedException(group_id=str(group_id))
 
+    source_version_id = db_group.feature_model_version_id
+    old_group_type = db_group.group_type
     try:
         update_data = FeatureGroupUpdate(
             group_type=group_in.group_type,
@@ -335,7 +358,7 @@ async def replace_feature_group(
             min_cardinality=group_in.min_cardinality,
             max_cardinality=group_in.max_cardinality,
         )
-        return await feature_group_repo.update(
+        group = await feature_group_repo.update(
             db_group=db_group,
             data=update_data,
             user=current_user,
@@ -344,6 +367,13 @@ async def replace_feature_group(
     except (ValueError, RuntimeError) as e:
         raise InvalidFeatureGroupException(reason=str(e))
 
+    await publish_statistics_delta(
+        source_version_id,
+        group.feature_model_version_id,
+        merge_deltas(group_delta(old_group_type, -1), group_delta(group.group_type)),
+    )
+    return group
+
 
 @router.delete(
     "/{group_id}",
@@ -396,11 +426,19 @@ async def delete_feature_group(
     ):
         raise FeatureGroupAccessDeniedException(group_id=str(group_id))
 
-    await feature_group_repo.delete(
+    source_version_id = db_group.feature_model_version_id
+    # Un grupo inactivo no cuenta en las estadísticas de la versión de origen
+    delta = group_delta(db_group.group_type, -1) if db_group.is_active else {}
+    new_version_id = await feature_group_repo.delete(
         db_group=db_group,
         user=current_user,
         feature_model_version_repo=feature_model_version_repo,
     )
+    await publish_statistics_delta(
+        source_version_id,
+        new_version_id,
+        delta,
+    )
     return Message(
         message="Feature group deleted in new model version created successfully."
     )
@@ -454,7 +492,14 @@ async def activate_feature_group(
     if db_group.is_active:
         raise HTTPException(status_code=400, detail="Feature group is already active")
 
-    return await feature_group_repo.activate(db_group)
+    await ensure_not_shared(
+        feature_group_repo.session, db_group.feature_model_version_id
+    )
+    group = await feature_group_repo.activate(db_group)
+    await publish_statistics_delta(
+        group.feature_model_version_id, None, group_delta(group.group_type)
+    )
+    return group
 
 
 @router.patch(
@@ -505,4 +550,11 @@ async def deactivate_feature_group(
     if not db_group.is_active:
         raise HTTPException(status_code=400, detail="Feature group is already inactive")
 
-    return await feature_group_repo.deactivate(db_group)
+    await ensure_not_shared(
+        feature_group_repo.session, db_group.feature_model_version_id
+    )
+    group = await feature_group_repo.deactivate(db_group)
+    await publish_statistics_delta(
+        group.feature_model_version_id, None, group_delta(group.group_type, -1)
+    )
+    return group
@@ -13,6 +13,7 @@ from app.api.deps import (
     get_verified_user,
     ModelDesignerUser,
 )
+from app.api.http_cache import invalidate_version_tags
 from app.exceptions import (
     FeatureModelNotFoundException,
     DomainNotFoundException,
@@ -398,6 +399,8 @@ async def update_feature_model(
         )
         # Recargar con domain y versiones
         model_with_domain = await feature_model_repo.get(updated_model.id)
+        # El nombre del modelo aparece en las exportaciones: renovar sus ETag
+        await invalidate_version_tags(*(v.id for v in model_with_domain.versions))
 
         # Construir lista de versiones
         versions = [
@@ -581,6 +584,8 @@ async def deactivate_feature_model(
     deactivated_model = await feature_model_repo.deactivate(db_model)
     # Recargar con domain y versiones
     model_with_domain = await feature_model_repo.get(deactivated_model.id)
+    # Sin ETag vigentes: las peticiones condicionales vuelven a pasar por permisos
+    await invalidate_version_tags(*(v.id for v in model_with_domain.versions))
 
     # Construir lista de versiones
     versions = [
@@ -687,5 +692,7 @@ async def delete_feature_model(
     if not can_delete:
         raise BusinessLogicException(detail=error_message)
 
+    version_ids = [version.id for version in db_model.versions]
     await feature_model_repo.delete(db_model)
+    await invalidate_version_tags(*version_ids)
     return Message(message="Feature Model deleted successfully.")
@@ -4,7 +4,7 @@ import uuid
 from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.api.deps import (
     AsyncCurrentUser,
@@ -13,12 +13,19 @@ from app.api.deps import (
     CeleryAvailableDep,
 )
 from app.api.utils import resolve_version_id_or_latest
+from app.core.s3 import minio_client
 from app.enums import AnalysisType
 from app.exceptions import FeatureModelVersionNotFoundException, ForbiddenException
 from app.services.feature_model.fm_analysis_facade import (
     analyze_version,
     compare_versions,
 )
+from app.services.feature_model.fm_version_warmup import (
+    analysis_params,
+    get_cached_cnf,
+    get_precached_analysis,
+    track_version_access,
+)
 
 router = APIRouter(
     prefix="/feature-models",
@@ -38,7 +45,7 @@ async def _get_complete_version(
         model_id,
         version_repo,
     )
-    version = await version_repo.get_complete_with_relations(
+    version = await version_repo.get_compiled(
         version_id=resolved_version_id,
         include_resources=False,
     )
@@ -92,10 +99,26 @@ class BatchAnalysisResponse(BaseModel):
     task_id: str
 
 
+BULK_MAX_COUNT = 1000
+BULK_MAX_ENUMERATION_COUNT = 1_000_000
+
+
 class BulkConfigurationsRequest(BaseModel):
-    count: int = Field(default=50, ge=1, le=1000)
+    count: int = Field(default=50, ge=1, le=BULK_MAX_ENUMERATION_COUNT)
     strategy: str = Field(default="sat_enum")
     partial_selection: Optional[dict[uuid.UUID, bool]] = None
+    pool_size: Optional[int] = Field(default=None, ge=1, le=100000)
+    time_budget_seconds: Optional[float] = Field(default=None, gt=0, le=600)
+    seed: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def _check_count_for_strategy(self) -> "BulkConfigurationsRequest":
+        # Solo la enumeración SAT (repartida en cubos) escala a conteos masivos
+        if self.strategy != "sat_enum" and self.count > BULK_MAX_COUNT:
+            raise ValueError(
+                f"count > {BULK_MAX_COUNT} solo está soportado con strategy=sat_enum"
+            )
+        return self
 
 
 class ExportBundleRequest(BaseModel):
@@ -169,11 +192,26 @@ async def feature_model_analysis_summary(
     ):
         raise ForbiddenException(detail="Not enough permissions to analyze model")
 
+    await track_version_access(version.id)
+
+    # Resumen precalculado al publicar (mismos parámetros)
+    precached = await get_precached_analysis(
+        version.id,
+        analysis_params(
+            payload.analysis_types,
+            payload.max_solutions,
+            payload.include_uvl_validation,
+        ),
+    )
+    if precached is not None:
+        return AnalysisSummaryResponse(**precached)
+
     summary = analyze_version(
         version=version,
         analysis_types=payload.analysis_types,
         max_solutions=payload.max_solutions,
         include_uvl_validation=payload.include_uvl_validation,
+        compiled_cnf=await get_cached_cnf(version),
     )
     return AnalysisSummaryResponse(**summary.__dict__)
 
@@ -225,7 +263,7 @@ async def feature_model_analysis_compare(
         version_identifier=version_id,
         version_repo=version_repo,
     )
-    target_version = await version_repo.get_complete_with_relations(
+    target_version = await version_repo.get_compiled(
         version_id=payload.target_version_id,
         include_resources=False,
     )
@@ -325,6 +363,9 @@ async def feature_model_analysis_batch(
 
     Use cases: generación por lotes para dataset/benchmarking o export masivo.
     Performance: operación intensiva; controlar `count` para evitar sobrecarga.
+    Con `sat_enum` y conteos grandes el espacio se divide en cubos disjuntos (elecciones
+    de grupos XOR cerca de la raíz) que se enumeran en subtareas paralelas; el progreso
+    por cubo se publica en `/tasks/{task_id}/progress`.
     Permissions required: authenticated (owner) o superuser.
     """,
     responses={
@@ -378,6 +419,9 @@ async def feature_model_bulk_configurations(
         count=payload.count,
         strategy=payload.strategy,
         partial_selection=partial,
+        pool_size=payload.pool_size,
+        time_budget_seconds=payload.time_budget_seconds,
+        seed=payload.seed,
     )
 
     return TaskLaunchResponse(task_id=str(task.id))
@@ -579,3 +623,50 @@ async def feature_model_analysis_task_status(
     elif async_result.failed():
         response["error"] = str(async_result.result)
     return response
+
+
+class BulkConfigurationsDownloadResponse(BaseModel):
+    task_id: str
+    object_name: str
+    format: str
+    count: int
+    download_url: str
+
+
+@router.get(
+    "/analysis/tasks/{task_id}/bulk-configurations/download",
+    response_model=BulkConfigurationsDownloadResponse,
+    summary="Descarga de una generación masiva",
+    description="""
+    Devuelve una URL firmada al fichero NDJSON comprimido (`ndjson.gz`) producido por
+    una tarea de generación masiva. Cada línea es `{"selected": [feature_id, ...]}`.
+    """,
+    responses={
+        404: {"description": "Tarea no encontrada o sin fichero de resultados"},
+        409: {"description": "La tarea aún no ha terminado"},
+    },
+)
+async def feature_model_bulk_configurations_download(
+    *,
+    task_id: str,
+    _celery_check: CeleryAvailableDep,
+) -> BulkConfigurationsDownloadResponse:
+    from app.core.celery import celery_app
+
+    async_result = celery_app.AsyncResult(task_id)
+    if not async_result.ready():
+        raise HTTPException(status_code=409, detail="Task not finished")
+
+    outcome = async_result.result if async_result.successful() else None
+    summary = outcome.get("result") if isinstance(outcome, dict) else None
+    object_name = (summary or {}).get("object_name") or ""
+    if not object_name.startswith("bulk-configurations/"):
+        raise HTTPException(status_code=404, detail="Bulk configurations not found")
+
+    return BulkConfigurationsDownloadResponse(
+        task_id=task_id,
+        object_name=object_name,
+        format=summary.get("format", "ndjson.gz"),
+        count=summary.get("count", 0),
+        download_url=await minio_client.get_bulk_configurations_url(object_name),
+    )
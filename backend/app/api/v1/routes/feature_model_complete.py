@@ -6,20 +6,37 @@ Optimizado para renderizado de árbol en frontend.
 import uuid
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from fastapi_cache.decorator import cache
 
 from app.api.deps import (
     AsyncCurrentUser,
     get_verified_user,
     AsyncFeatureModelVersionRepoDep,
+    AsyncFeatureRepoDep,
 )
+from app.api.http_cache import conditional_headers, not_modified_response
 from app.api.utils import resolve_version_id_or_latest
-from app.schemas import FeatureModelCompleteResponse
+from app.schemas import FeatureModelCompleteResponse, FeatureSubtreeResponse
 from app.services.feature_model import FeatureModelTreeBuilder
+from app.services.feature_model.fm_subtree import (
+    SUBTREE_DEFAULT_DEPTH,
+    SUBTREE_DEFAULT_PAGE_SIZE,
+    SUBTREE_MAX_DEPTH,
+    SUBTREE_MAX_PAGE_SIZE,
+    build_subtree,
+    decode_cursor,
+)
+from app.services.feature_model.fm_complete_fields import (
+    COMPLETE_SECTIONS,
+    TREE_NODE_FIELDS,
+    CompleteFieldSet,
+)
 from app.enums import ModelStatus
 from app.exceptions import (
     FeatureModelVersionNotFoundException,
+    FeatureNotFoundException,
+    MissingRootFeatureException,
     InvalidTreeStructureException,
     UnauthorizedException,
     ForbiddenException,
@@ -62,20 +79,26 @@ router = APIRouter(
 )
 async def get_latest_complete_feature_model(
     *,
+    request: Request,
     model_id: uuid.UUID,
     version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: AsyncCurrentUser,
     include_resources: bool = Query(default=True),
     include_statistics: bool = Query(default=True),
-) -> FeatureModelCompleteResponse:
+    include: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
+) -> Response:
     """Get the complete structure of the latest published version."""
     return await get_complete_feature_model(
+        request=request,
         model_id=model_id,
         version_id="latest",
         version_repo=version_repo,
         current_user=current_user,
         include_resources=include_resources,
         include_statistics=include_statistics,
+        include=include,
+        fields=fields,
     )
 
 
@@ -112,6 +135,11 @@ async def get_latest_complete_feature_model(
     - PUBLISHED versions: Cached for 1 hour (immutable)
     - IN_REVIEW versions: Cached for 30 minutes
     - DRAFT versions: Cached for 5 minutes
+    - Use `include` / `fields` for a sparse response (e.g.
+      `?include=statistics&fields=name,type`): unrequested sections and node
+      fields are neither loaded nor serialized
+    - Responses carry a strong `ETag` and a `Cache-Control` policy per version
+      status; send `If-None-Match` to get `304 Not Modified` without a rebuild
     
     **When to use this endpoint:**
     - Initial load of feature model tree viewer
@@ -150,6 +178,7 @@ async def get_latest_complete_feature_model(
 )
 async def get_complete_feature_model(
     *,
+    request: Request,
     model_id: uuid.UUID,
     version_id: str,
     version_repo: AsyncFeatureModelVersionRepoDep,
@@ -162,7 +191,23 @@ async def get_complete_feature_model(
         default=True,
         description="Include pre-computed statistics. Set to false for faster response.",
     ),
-) -> FeatureModelCompleteResponse:
+    include: str | None = Query(
+        default=None,
+        description=(
+            "Comma-separated optional sections to return: "
+            f"{', '.join(COMPLETE_SECTIONS)}. Omitted sections are left out "
+            "of the document. Defaults to all."
+        ),
+    ),
+    fields: str | None = Query(
+        default=None,
+        description=(
+            "Comma-separated tree node fields to return "
+            f"({', '.join(TREE_NODE_FIELDS)}); `id` and `children` are always "
+            "present. Defaults to all."
+        ),
+    ),
+) -> Response:
     """
     Get complete feature model structure for tree rendering.
 
@@ -174,22 +219,134 @@ async def get_complete_feature_model(
     - Eager loading de todas las relaciones (reduce N+1 queries)
     - Caching inteligente por ModelStatus
     - Serialización eficiente con caché pre-computado
+    - Selección de campos (``include``/``fields``): se omiten al construir y
+      se carga un plan de eager loading más ligero
     """
+    try:
+        fieldset = CompleteFieldSet.parse(include=include, fields=fields)
+    except ValueError as exc:
+        raise BusinessLogicException(detail=str(exc))
+
     # 1. Resolver latest/UUID y obtener la versión completa con eager loading
     resolved_version_id = await resolve_version_id_or_latest(
         version_id,
         model_id,
         version_repo,
     )
+
+    # 2. Petición condicional: 304 solo con Redis, sin cargar la versión
+    variant = f"complete:{int(include_resources)}:{int(include_statistics)}"
+    if not fieldset.is_full:
+        variant += ":" + fieldset.cache_variant()
+    not_modified = await not_modified_response(
+        request, model_id, resolved_version_id, variant
+    )
+    if not_modified is not None:
+        return not_modified
+
     version = await version_repo.get_complete_with_relations(
         version_id=resolved_version_id,
+        include_resources=include_resources and fieldset.wants_node_field("resource"),
+        load=fieldset.load_plan(),
+    )
+
+    if not version or version.feature_model_id != model_id:
+        raise FeatureModelVersionNotFoundException(version_id=str(version_id))
+
+    # 3. Verificar permisos
+    feature_model = version.feature_model
+    if not feature_model.is_active:
+        if feature_model.owner_id != current_user.id and not current_user.is_superuser:
+            raise ForbiddenException(
+                detail="This feature model is inactive and you don't have permission to access it"
+            )
+
+    # 4. Construir respuesta con caché Redis: en un hit los bytes guardados
+    #    se envían tal cual, sin re-validar con Pydantic
+    builder = FeatureModelTreeBuilder(
+        version,
         include_resources=include_resources,
+        include_statistics=include_statistics,
+        fieldset=fieldset,
     )
+    content = await builder.get_complete_response_json_with_cache()
+    headers = await conditional_headers(version, variant, feature_model.is_active)
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/{model_id}/versions/{version_id}/tree",
+    response_model=FeatureSubtreeResponse,
+    summary="Get a depth-limited, paginated subtree for lazy tree rendering",
+    description="""
+    Return the subtree under a feature (the version root by default) limited to
+    `depth` levels, with at most `page_size` children per node.
+
+    Each node carries `children_count`, `has_more_children` and, when its
+    children were truncated, a `next_cursor`. To expand a node, call this
+    endpoint again with `root_id` set to that node (and `cursor` to fetch the
+    next page of its children).
+
+    **Performance Characteristics:**
+    - Single recursive-CTE query; the full version graph is never loaded
+    - Cost depends on the returned page, not on the model size
+
+    **When to use this endpoint:**
+    - Very large models (>5000 features) where `/complete` is too heavy
+    - Tree viewers that expand nodes on demand
+    """,
+    responses={
+        200: {"description": "Subtree page"},
+        400: {"description": "Invalid cursor"},
+        404: {"description": "Feature model, version or root feature not found"},
+        403: {"description": "Not enough permissions to view this model"},
+    },
+)
+async def get_feature_subtree(
+    *,
+    model_id: uuid.UUID,
+    version_id: str,
+    version_repo: AsyncFeatureModelVersionRepoDep,
+    feature_repo: AsyncFeatureRepoDep,
+    current_user: AsyncCurrentUser,
+    root_id: uuid.UUID | None = Query(
+        default=None,
+        description="Feature whose subtree is returned. Defaults to the version root.",
+    ),
+    depth: int = Query(
+        default=SUBTREE_DEFAULT_DEPTH,
+        ge=0,
+        le=SUBTREE_MAX_DEPTH,
+        description="Levels returned below the root feature.",
+    ),
+    page_size: int = Query(
+        default=SUBTREE_DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=SUBTREE_MAX_PAGE_SIZE,
+        description="Maximum children returned per node.",
+    ),
+    cursor: str | None = Query(
+        default=None,
+        description="`next_cursor` of the root node to fetch its next page of children.",
+    ),
+) -> FeatureSubtreeResponse:
+    """
+    Subárbol paginado para carga perezosa del árbol.
 
+    Los datos vienen de un CTE recursivo limitado en profundidad y en hijos
+    por nodo, en lugar de cargar la versión completa.
+    """
+    resolved_version_id = await resolve_version_id_or_latest(
+        version_id,
+        model_id,
+        version_repo,
+    )
+    version = await version_repo.get(resolved_version_id)
     if not version or version.feature_model_id != model_id:
         raise FeatureModelVersionNotFoundException(version_id=str(version_id))
 
-    # 2. Verificar permisos
+    await version_repo.session.refresh(version, ["feature_model"])
     feature_model = version.feature_model
     if not feature_model.is_active:
         if feature_model.owner_id != current_user.id and not current_user.is_superuser:
@@ -197,12 +354,35 @@ async def get_complete_feature_model(
                 detail="This feature model is inactive and you don't have permission to access it"
             )
 
-    # 3. Construir respuesta con caché Redis (NUEVO)
-    builder = FeatureModelTreeBuilder(version, include_resources=include_resources)
-    response = await builder.build_complete_response_with_cache()
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as exc:
+            raise BusinessLogicException(detail=str(exc))
 
-    # 4. Opcionalmente, excluir estadísticas si no se solicitan
-    if not include_statistics:
-        response.statistics = None
+    if root_id is None:
+        root_id = await feature_repo.get_root_id(resolved_version_id)
+        if root_id is None:
+            raise MissingRootFeatureException()
+        base_depth = 0
+    else:
+        base_depth = await feature_repo.get_depth(root_id, resolved_version_id) or 0
 
-    return response
+    rows = await feature_repo.get_subtree_rows(
+        resolved_version_id,
+        root_id,
+        depth=depth,
+        page_limit=page_size + 1,
+        after=after,
+    )
+    root = build_subtree(rows, root_id, page_size, depth, base_depth=base_depth)
+    if root is None:
+        raise FeatureNotFoundException(feature_id=str(root_id))
+
+    return FeatureSubtreeResponse(
+        version_id=resolved_version_id,
+        root=root,
+        depth=depth,
+        page_size=page_size,
+    )
@@ -2,13 +2,13 @@
 Endpoint para exportar Feature Models a diferentes formatos estándar.
 """
 
+import itertools
 import json
-import time
 import uuid
-from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator
 
-from fastapi import APIRouter, Depends, Path
-from fastapi.responses import Response, StreamingResponse
+from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 from fastapi_cache.decorator import cache
 from pydantic import BaseModel
 
@@ -19,13 +19,21 @@ from app.api.deps import (
     get_verified_user,
     AsyncFeatureModelVersionRepoDep,
 )
+from app.api.http_cache import conditional_headers, not_modified_response
 from app.api.utils import resolve_version_id_or_latest
 from app.models import FeatureModelVersion
 from app.services.feature_model import FeatureModelExportService
+from app.services.feature_model.fm_export_artifacts import (
+    ExportStream,
+    build_export_key,
+    open_export,
+    record_export,
+)
 from app.services.feature_model.fm_tree_builder import FeatureModelTreeBuilder
+from app.services.feature_model.fm_version_warmup import track_version_access
 from app.core.s3 import minio_client
 from app.core.redis import redis_client
-from app.core.cache import CacheKeys, user_key_builder
+from app.core.cache import CacheKeys, cache_service, user_key_builder
 from app.enums import ExportFormat, ModelStatus
 from app.exceptions import (
     NoPublishedVersionException,
@@ -124,6 +132,9 @@ class ExportCacheListResponse(BaseModel):
     **Performance:**
     - Typical export time: 50-200ms for models with <1000 features
     - Large models (>2000 features) may take 500ms-1s
+    - Exports are cached by content: repeated downloads of an unchanged
+      version are served from object storage without rebuilding
+    - `?redirect=true` answers with a 307 to a presigned download URL
     
     **Use cases:**
     - Integration with external SPL tools (FeatureIDE, SPLOT)
@@ -152,10 +163,12 @@ class ExportCacheListResponse(BaseModel):
 )
 async def export_latest_feature_model(
     *,
+    request: Request,
     model_id: uuid.UUID = Path(..., description="Feature Model UUID"),
     format: ExportFormat = Path(..., description="Export format"),
     version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: AsyncCurrentUser,
+    redirect: bool = Query(default=False),
 ) -> Response:
     """Export the latest published version to the specified format."""
     # Buscar la última versión publicada
@@ -177,11 +190,13 @@ async def export_latest_feature_model(
 
     # Redirigir a la función principal
     return await export_feature_model(
+        request=request,
         model_id=model_id,
         version_id=latest_version.id,
         format=format,
         version_repo=version_repo,
         current_user=current_user,
+        redirect=redirect,
     )
 
 
@@ -246,6 +261,9 @@ async def export_latest_feature_model(
     **Performance:**
     - Typical export time: 50-200ms for models with <1000 features
     - Large models (>2000 features) may take 500ms-1s
+    - Exports are cached by content: repeated downloads of an unchanged
+      version are served from object storage without rebuilding
+    - `?redirect=true` answers with a 307 to a presigned download URL
     
     **Examples:**
     ```bash
@@ -274,109 +292,110 @@ async def export_latest_feature_model(
 )
 async def export_feature_model(
     *,
+    request: Request,
     model_id: uuid.UUID = Path(..., description="Feature Model UUID"),
     version_id: str = Path(..., description="Version UUID or the literal 'latest'"),
     format: ExportFormat = Path(..., description="Export format"),
     version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: AsyncCurrentUser,
+    redirect: bool = Query(
+        default=False,
+        description="Redirect (307) to a presigned download URL instead of returning the file.",
+    ),
 ) -> Response:
     """Export a specific version to the specified format."""
     # Resolver version_id (acepta UUID o 'latest') y obtener la versión
     resolved_version_id = await resolve_version_id_or_latest(
         version_id, model_id, version_repo
     )
+    # Popularidad de la versión (también cuentan las revalidaciones 304)
+    await track_version_access(resolved_version_id)
 
-    # Obtener la versión con todas las relaciones cargadas
-    version = await version_repo.get_version_with_full_structure(resolved_version_id)
+    # Petición condicional: 304 solo con Redis, sin cargar la versión
+    variant = f"export:{format.value}"
+    not_modified = await not_modified_response(
+        request, model_id, resolved_version_id, variant
+    )
+    if not_modified is not None:
+        return not_modified
+
+    # Fila de la versión y del modelo: basta para la clave de contenido
+    version = await version_repo.get(resolved_version_id)
 
     if not version or version.feature_model_id != model_id:
         raise FeatureModelVersionNotFoundException(version_id=str(version_id))
+    await version_repo.session.refresh(version, ["feature_model"])
+    feature_model = version.feature_model
 
     # Verificar que el usuario tenga acceso a esta versión
     # TODO: Implementar lógica de permisos según el status de la versión
 
-    # Crear el servicio de exportación
+    async def produce_export() -> Iterator[bytes]:
+        # Solo en un miss: cargar el grafo completo y exportar por trozos
+        full_version = await version_repo.get_compiled(resolved_version_id)
+        try:
+            export_service = FeatureModelExportService(full_version)
+            chunks = export_service.iter_export_bytes(format)
+            # El primer trozo valida la exportación antes de responder
+            first = next(chunks, b"")
+        except ValueError:
+            raise UnsupportedExportFormatException(format=format.value)
+        except Exception as e:
+            raise ExportFailedException(format=format.value, reason=str(e))
+        return itertools.chain((first,), chunks)
+
+    # Exportación direccionada por contenido: un hit no reconstruye ni sube
     try:
-        export_service = FeatureModelExportService(version)
-        content = export_service.export(format)
-    except ValueError as e:
-        raise UnsupportedExportFormatException(format=format.value)
-    except Exception as e:
-        raise ExportFailedException(format=format.value, reason=str(e))
-
-    # Determinar content type y nombre de archivo
-    content_types = {
-        ExportFormat.XML: "application/xml",
-        ExportFormat.SPLOT_XML: "application/xml",
-        ExportFormat.JSON: "application/json",
-        ExportFormat.TVL: "text/plain",
-        ExportFormat.DIMACS: "text/plain",
-        ExportFormat.UVL: "text/plain",
-        ExportFormat.DOT: "text/plain",
-        ExportFormat.MERMAID: "text/plain",
-    }
-
-    file_extensions = {
-        ExportFormat.XML: "xml",
-        ExportFormat.SPLOT_XML: "xml",
-        ExportFormat.JSON: "json",
-        ExportFormat.TVL: "tvl",
-        ExportFormat.DIMACS: "cnf",
-        ExportFormat.UVL: "uvl",
-        ExportFormat.DOT: "dot",
-        ExportFormat.MERMAID: "mmd",
-    }
-
-    content_type = content_types.get(format, "text/plain")
-    extension = file_extensions.get(format, "txt")
-
-    # Generar nombre de archivo seguro
-    model_name = version.feature_model.name.replace(" ", "_").replace("/", "_")
-    filename = f"{model_name}_v{version.version_number}.{extension}"
+        generation = await cache_service.get_version_tag_generation(version.id)
+    except Exception:
+        generation = 0
+    artifact_key = build_export_key(version, feature_model, generation, format)
+    export = await open_export(
+        artifact_key, format, produce_export, open_stored=not redirect
+    )
+    artifact = export.artifact
+
+    # Nombre de archivo seguro
+    model_name = feature_model.name.replace(" ", "_").replace("/", "_")
+    filename = f"{model_name}_v{version.version_number}.{artifact.extension}"
+
+    headers = await conditional_headers(version, variant, feature_model.is_active)
+    if redirect:
+        if export.chunks is not None:
+            # Miss: completar la subida antes de redirigir
+            async for _ in export.chunks:
+                pass
+        if artifact.object_name is not None:
+            await record_export(model_id, version, artifact, filename, export.built)
+            url = await minio_client.get_export_artifact_url(
+                artifact.object_name, filename
+            )
+            return RedirectResponse(url, status_code=307, headers=headers)
+        # No se pudo guardar: responder con el contenido
+        export = await open_export(artifact_key, format, produce_export)
 
-    # Persistir export en MinIO
-    try:
-        object_name = await minio_client.upload_feature_model_export(
-            version_id=str(version.id),
-            export_bytes=content.encode("utf-8"),
-            fmt=extension,
-            content_type=content_type,
-        )
-        cache_key = CacheKeys.feature_model_export_item(
-            model_id=str(model_id),
-            version_id=str(version.id),
-            fmt=extension,
-        )
-        index_key = CacheKeys.feature_model_export_index(model_id=str(model_id))
-        created_at = datetime.now(timezone.utc).isoformat()
-        payload = {
-            "model_id": str(model_id),
-            "version_id": str(version.id),
-            "format": extension,
-            "content_type": content_type,
-            "object_name": object_name,
-            "filename": filename,
-            "created_at": created_at,
-        }
-        await redis_client.setex(
-            cache_key,
-            CacheKeys.TTL_EXPORT_CACHE,
-            json.dumps(payload),
-        )
-        await redis_client.zadd(index_key, {cache_key: time.time()})
-        await redis_client.expire(index_key, CacheKeys.TTL_EXPORT_CACHE)
-    except Exception as e:
-        raise ExportFailedException(format=format.value, reason=str(e))
-
-    return Response(
-        content=content,
-        media_type=content_type,
+    return StreamingResponse(
+        _send_and_record(export, model_id, version, filename),
+        media_type=export.artifact.content_type,
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"',
+            **headers,
         },
     )
 
 
+async def _send_and_record(
+    export: ExportStream,
+    model_id: uuid.UUID,
+    version: FeatureModelVersion,
+    filename: str,
+) -> AsyncIterator[bytes]:
+    """Envía la exportación y la registra en ``GET /exports`` al terminar."""
+    async for chunk in export.chunks:
+        yield chunk
+    await record_export(model_id, version, export.artifact, filename, export.built)
+
+
 @router.get(
     "/{model_id}/versions/{version_id}/export-stream/json",
     summary="Stream complete feature model tree as JSON",
@@ -384,17 +403,26 @@ async def export_feature_model(
 )
 async def stream_feature_model_tree_json(
     *,
+    request: Request,
     model_id: uuid.UUID = Path(..., description="Feature Model UUID"),
     version_id: str = Path(..., description="Version UUID or the literal 'latest'"),
     version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: AsyncCurrentUser,
-) -> StreamingResponse:
+) -> Response:
     """Stream the complete tree as JSON using FeatureModelTreeBuilder.stream_complete_response_with_cache."""
     # Resolver version_id (acepta UUID o 'latest') y obtener la versión
     resolved_version_id = await resolve_version_id_or_latest(
         version_id, model_id, version_repo
     )
 
+    # Petición condicional: 304 solo con Redis, sin cargar la versión
+    variant = "export-stream:json"
+    not_modified = await not_modified_response(
+        request, model_id, resolved_version_id, variant
+    )
+    if not_modified is not None:
+        return not_modified
+
     # Obtener la versión con todas las relaciones cargadas
     version = await version_repo.get_version_with_full_structure(resolved_version_id)
 
@@ -408,10 +436,16 @@ async def stream_feature_model_tree_json(
     builder = FeatureModelTreeBuilder(version, include_resources=True)
     generator = builder.stream_complete_response_with_cache()
 
+    headers = await conditional_headers(
+        version, variant, version.feature_model.is_active
+    )
     return StreamingResponse(
         generator,
         media_type="application/json",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            **headers,
+        },
     )
 
 
@@ -441,10 +475,15 @@ async def list_feature_model_exports(
         except json.JSONDecodeError:
             continue
 
-        download_url = await minio_client.get_feature_model_export_url(
-            version_id=payload["version_id"],
-            fmt=payload.get("format", "txt"),
-        )
+        if payload.get("artifact_key"):
+            download_url = await minio_client.get_export_artifact_url(
+                payload["object_name"], payload.get("filename") or "export"
+            )
+        else:
+            download_url = await minio_client.get_feature_model_export_url(
+                version_id=payload["version_id"],
+                fmt=payload.get("format", "txt"),
+            )
         items.append(
             ExportCacheItem(
                 model_id=payload["model_id"],
@@ -5,7 +5,8 @@ Endpoint para obtener estadísticas en tiempo real de un feature model.
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi_cache.decorator import cache
 
 from app.api.deps import (
@@ -13,6 +14,7 @@ from app.api.deps import (
     AsyncFeatureModelRepoDep,
     get_verified_user,
 )
+from app.api.http_cache import conditional_headers, not_modified_response
 from app.api.utils import resolve_version_id_or_latest
 from app.core.cache import user_key_builder
 from app.schemas.feature_model_complete import FeatureModelStatistics
@@ -107,11 +109,12 @@ async def get_latest_feature_model_statistics(
 )
 async def get_feature_model_statistics(
     *,
+    request: Request,
     model_id: uuid.UUID,
     version_id: str,
     feature_model_repo: AsyncFeatureModelRepoDep,
     version_repo: AsyncFeatureModelVersionRepoDep,
-) -> FeatureModelStatistics:
+) -> Response:
     """
     Obtener estadísticas en tiempo real de un feature model.
 
@@ -181,11 +184,17 @@ async def get_feature_model_statistics(
         ```
 
     Note:
-        Este endpoint NO usa caché ya que las estadísticas deben reflejar
-        el estado actual del modelo en tiempo real. Si necesitas estadísticas
-        pre-computadas y cacheadas, usa el endpoint `/complete` con
-        `include_statistics=true`.
+        Este endpoint NO usa caché de respuesta ya que las estadísticas deben
+        reflejar el estado actual del modelo en tiempo real. Sí devuelve
+        `ETag`: con `If-None-Match` responde 304 mientras la versión no cambie.
     """
+    # Petición condicional: 304 solo con Redis, sin consultar la base de datos
+    not_modified = await not_modified_response(
+        request, model_id, version_id, "statistics"
+    )
+    if not_modified is not None:
+        return not_modified
+
     # Verificar que el feature model existe y está activo
     feature_model = await feature_model_repo.get(model_id)
     if not feature_model:
@@ -219,4 +228,8 @@ async def get_feature_model_statistics(
     if stats is None:
         raise FeatureModelVersionNotFoundException(version_id=str(version_id))
 
-    return FeatureModelStatistics(**stats)
+    headers = await conditional_headers(version, "statistics", feature_model.is_active)
+    return JSONResponse(
+        content=FeatureModelStatistics(**stats).model_dump(mode="json"),
+        headers=headers,
+    )
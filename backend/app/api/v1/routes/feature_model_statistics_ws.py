@@ -13,7 +13,7 @@ Casos de uso:
 import uuid
 import asyncio
 import json
-from typing import Any, Set
+from typing import Any
 from datetime import datetime
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status, Depends
@@ -24,6 +24,7 @@ from app.repositories.feature_model import FeatureModelRepository
 from app.repositories.feature_model_version import (
     FeatureModelVersionRepository,
 )
+from app.services.feature_model.fm_statistics_broadcast import manager
 
 router = APIRouter(
     prefix="/ws",
@@ -32,87 +33,6 @@ router = APIRouter(
 )
 
 
-# ============================================================================
-# GESTOR DE CONEXIONES WEBSOCKET
-# ============================================================================
-
-
-class StatisticsConnectionManager:
-    """
-    Gestor de conexiones WebSocket para estadísticas en tiempo real.
-
-    Mantiene un registro de conexiones activas por version_id y permite
-    broadcast de actualizaciones a todos los clientes suscritos.
-    """
-
-    def __init__(self):
-        # version_id -> Set[WebSocket]
-        self.active_connections: dict[uuid.UUID, Set[WebSocket]] = {}
-        self._lock = asyncio.Lock()
-
-    async def connect(self, websocket: WebSocket, version_id: uuid.UUID):
-        """Conectar un cliente a las actualizaciones de una versión."""
-        await websocket.accept()
-
-        async with self._lock:
-            if version_id not in self.active_connections:
-                self.active_connections[version_id] = set()
-            self.active_connections[version_id].add(websocket)
-
-    async def disconnect(self, websocket: WebSocket, version_id: uuid.UUID):
-        """Desconectar un cliente."""
-        async with self._lock:
-            if version_id in self.active_connections:
-                self.active_connections[version_id].discard(websocket)
-
-                # Limpiar si no hay más conexiones
-                if not self.active_connections[version_id]:
-                    del self.active_connections[version_id]
-
-    async def broadcast_statistics(self, version_id: uuid.UUID, statistics: dict):
-        """
-        Enviar estadísticas actualizadas a todos los clientes suscritos.
-
-        Args:
-            version_id: ID de la versión actualizada
-            statistics: Diccionario con las estadísticas
-        """
-        if version_id not in self.active_connections:
-            return
-
-        # Preparar mensaje
-        message = {
-            "type": "statistics_update",
-            "version_id": str(version_id),
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": statistics,
-        }
-        message_json = json.dumps(message)
-
-        # Enviar a todos los clientes conectados
-        disconnected = set()
-
-        for connection in self.active_connections[version_id]:
-            try:
-                await connection.send_text(message_json)
-            except Exception:
-                # Marcar para desconexión
-                disconnected.add(connection)
-
-        # Limpiar conexiones muertas
-        async with self._lock:
-            for connection in disconnected:
-                self.active_connections[version_id].discard(connection)
-
-    def get_connection_count(self, version_id: uuid.UUID) -> int:
-        """Obtener número de conexiones activas para una versión."""
-        return len(self.active_connections.get(version_id, set()))
-
-
-# Instancia global del gestor
-manager = StatisticsConnectionManager()
-
-
 # ============================================================================
 # ENDPOINT WEBSOCKET
 # ============================================================================
@@ -170,6 +90,18 @@ async def websocket_statistics(
     }
     ```
 
+    Delta tras una mutación (copy-on-write, ``data`` puede ser null):
+    ```json
+    {
+        "type": "statistics_delta",
+        "version_id": "uuid",
+        "new_version_id": "uuid",
+        "timestamp": "2025-12-10T15:30:00Z",
+        "delta": {"total_features": 1, "optional_features": 1},
+        "data": {"total_features": 46, "...": "..."}
+    }
+    ```
+
     Ping (mantener conexión):
     ```json
     {
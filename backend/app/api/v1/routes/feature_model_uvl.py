@@ -4,9 +4,20 @@ Permite trabajar en paralelo modelo visual + texto UVL.
 """
 
 import uuid
-
-from fastapi import APIRouter, Depends, HTTPException, Path, status
-from fastapi_cache.decorator import cache
+from typing import Literal
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import JSONResponse, Response
 
 from app.api.deps import (
     AsyncCurrentUser,
@@ -14,7 +25,14 @@ from app.api.deps import (
     get_verified_user,
     CeleryAvailableDep,
 )
+from app.api.http_cache import (
+    conditional_headers,
+    invalidate_version_tags,
+    not_modified_response,
+)
 from app.api.utils import resolve_version_id_or_latest
+from app.core.cache import cache_service
+from app.core.s3 import minio_client
 from app.exceptions import FeatureModelVersionNotFoundException, ForbiddenException
 from app.models import FeatureModelVersionUVLPublic, FeatureModelVersionUVLUpdate
 from pydantic import BaseModel
@@ -23,7 +41,6 @@ from app.services.feature_model import (
     FeatureModelUVLImporter,
 )
 from app.tasks.feature_model_analysis import run_feature_model_analysis
-from app.core.cache import feature_model_detail_key_builder
 
 router = APIRouter(
     prefix="/feature-models",
@@ -51,6 +68,12 @@ async def _get_version_with_structure(
     return version
 
 
+class FeatureModelUVLImportJob(BaseModel):
+    job_id: str
+    task_id: str
+    status: str
+
+
 class FeatureModelUVLDiff(BaseModel):
     features_added: list[str]
     features_removed: list[str]
@@ -77,14 +100,23 @@ def _validate_uvl_content(uvl_content: str) -> str:
     response_model=FeatureModelVersionUVLPublic,
     summary="Get effective UVL for a feature model version",
 )
-@cache(expire=300, key_builder=feature_model_detail_key_builder)
 async def get_feature_model_version_uvl(
     *,
+    request: Request,
     model_id: uuid.UUID = Path(..., description="Feature Model UUID"),
     version_id: str = Path(..., description="Version UUID or the literal 'latest'"),
     version_repo: AsyncFeatureModelVersionRepoDep,
-) -> FeatureModelVersionUVLPublic:
-    """Obtiene el UVL efectivo (guardado o generado desde estructura)."""
+) -> Response:
+    """
+    Obtiene el UVL efectivo (guardado o generado desde estructura).
+
+    Responde con ETag; con `If-None-Match` vigente devuelve 304 sin cargar
+    la versión.
+    """
+    not_modified = await not_modified_response(request, model_id, version_id, "uvl")
+    if not_modified is not None:
+        return not_modified
+
     version = await _get_version_with_structure(
         model_id=model_id,
         version_identifier=version_id,
@@ -92,20 +124,23 @@ async def get_feature_model_version_uvl(
     )
 
     if version.uvl_content and version.uvl_content.strip():
-        return FeatureModelVersionUVLPublic(
+        payload = FeatureModelVersionUVLPublic(
             version_id=version.id,
             feature_model_id=version.feature_model_id,
             uvl_content=version.uvl_content,
             source="stored",
         )
+    else:
+        generated_uvl = FeatureModelExportService(version).export_to_uvl()
+        payload = FeatureModelVersionUVLPublic(
+            version_id=version.id,
+            feature_model_id=version.feature_model_id,
+            uvl_content=generated_uvl,
+            source="generated",
+        )
 
-    generated_uvl = FeatureModelExportService(version).export_to_uvl()
-    return FeatureModelVersionUVLPublic(
-        version_id=version.id,
-        feature_model_id=version.feature_model_id,
-        uvl_content=generated_uvl,
-        source="generated",
-    )
+    headers = await conditional_headers(version, "uvl", version.feature_model.is_active)
+    return JSONResponse(content=payload.model_dump(mode="json"), headers=headers)
 
 
 @router.put(
@@ -148,6 +183,7 @@ async def save_feature_model_version_uvl(
     version_repo.session.add(version)
     await version_repo.session.commit()
     await version_repo.session.refresh(version)
+    await invalidate_version_tags(version.id)
 
     task = run_feature_model_analysis.delay(
         model_id=str(model_id),
@@ -196,6 +232,7 @@ async def sync_feature_model_version_uvl_from_structure(
     version_repo.session.add(version)
     await version_repo.session.commit()
     await version_repo.session.refresh(version)
+    await invalidate_version_tags(version.id)
 
     task = run_feature_model_analysis.delay(
         model_id=str(model_id),
@@ -226,11 +263,26 @@ async def apply_feature_model_uvl_to_structure(
         ..., description="Source Version UUID or the literal 'latest'"
     ),
     data: FeatureModelVersionUVLUpdate,
+    mode: Literal["rebuild", "delta"] = Query(
+        "rebuild",
+        description=(
+            "rebuild: recreate the whole structure; delta: clone the source "
+            "version and apply only the differences"
+        ),
+    ),
     version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: AsyncCurrentUser,
     _celery_check: CeleryAvailableDep,
 ) -> FeatureModelVersionUVLPublic:
-    """Aplicar UVL para crear una nueva versión estructurada del modelo."""
+    """
+    Aplicar UVL para crear una nueva versión estructurada del modelo.
+
+    Con ``mode=delta`` el coste es proporcional al cambio: si el UVL no
+    difiere de la versión origen no se crea versión ni se relanza el
+    análisis. Cualquier versión nueva se analiza, también tras renombrados
+    o cambios de atributos: los resultados se guardan por versión y
+    nombran las features.
+    """
     version = await _get_version_with_structure(
         model_id=model_id,
         version_identifier=version_id,
@@ -248,22 +300,87 @@ async def apply_feature_model_uvl_to_structure(
         feature_model=version.feature_model,
         user=current_user,
     )
-    new_version = await importer.apply_uvl(data.uvl_content)
-
-    task = run_feature_model_analysis.delay(
-        model_id=str(model_id),
-        version_id=str(new_version.id),
-        analysis_types=None,
-        max_solutions=100,
-    )
+    if mode == "delta":
+        new_version, _ = await importer.apply_uvl_delta(data.uvl_content, version)
+        source = "unchanged" if new_version.id == version.id else "delta"
+        run_analysis = source == "delta"
+    else:
+        new_version = await importer.apply_uvl(data.uvl_content)
+        source = "applied"
+        run_analysis = True
+
+    task_id = None
+    if run_analysis:
+        task = run_feature_model_analysis.delay(
+            model_id=str(model_id),
+            version_id=str(new_version.id),
+            analysis_types=None,
+            max_solutions=100,
+        )
+        task_id = str(task.id)
 
     return FeatureModelVersionUVLPublic(
         version_id=new_version.id,
         feature_model_id=new_version.feature_model_id,
         uvl_content=new_version.uvl_content or "",
-        source="applied",
-        analysis_task_id=str(task.id),
+        source=source,
+        analysis_task_id=task_id,
+    )
+
+
+@router.post(
+    "/{model_id}/versions/{version_id}/uvl/import",
+    response_model=FeatureModelUVLImportJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Import a UVL file asynchronously",
+)
+async def import_feature_model_uvl(
+    *,
+    model_id: uuid.UUID = Path(..., description="Feature Model UUID"),
+    version_id: str = Path(
+        ..., description="Source Version UUID or the literal 'latest'"
+    ),
+    file: UploadFile = File(..., description="UVL file"),
+    version_repo: AsyncFeatureModelVersionRepoDep,
+    current_user: AsyncCurrentUser,
+    _celery_check: CeleryAvailableDep,
+) -> FeatureModelUVLImportJob:
+    """
+    Importa un fichero UVL como nueva versión sin bloquear la petición.
+
+    El fichero se sube a MinIO y una tarea de la cola ``import`` lo parsea,
+    valida e inserta. El progreso se consulta en ``/tasks/{job_id}/progress``
+    y la importación se cancela con ``/tasks/{job_id}/cancel``.
+    """
+    version = await _get_version_with_structure(
+        model_id=model_id,
+        version_identifier=version_id,
+        version_repo=version_repo,
+    )
+
+    if (
+        version.feature_model.owner_id != current_user.id
+        and not current_user.is_superuser
+    ):
+        raise ForbiddenException(detail="Not enough permissions to import UVL")
+    if file.size == 0:
+        raise HTTPException(status_code=400, detail="UVL content cannot be empty")
+
+    job_id = str(uuid.uuid4())
+    object_name = await minio_client.upload_uvl_import(job_id, file.file)
+    await cache_service.set_import_status(job_id, "queued")
+
+    from app.tasks.feature_model import import_feature_model
+
+    import_feature_model.apply_async(
+        kwargs={
+            "model_id": str(model_id),
+            "object_name": object_name,
+            "user_id": str(current_user.id),
+        },
+        task_id=job_id,
     )
+    return FeatureModelUVLImportJob(job_id=job_id, task_id=job_id, status="queued")
 
 
 @router.post(
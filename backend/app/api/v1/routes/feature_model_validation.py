@@ -100,7 +100,7 @@ async def _get_version_for_validation(
         version_repo=version_repo,
     )
 
-    version = await version_repo.get_complete_with_relations(
+    version = await version_repo.get_compiled(
         version_id=resolved_version_id,
         include_resources=False,
     )
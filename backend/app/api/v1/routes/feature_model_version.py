@@ -25,6 +25,9 @@ from app.models.feature_model_version import (
 )
 from app.services.feature_model import FeatureModelVersionManager
 from app.core.cache import user_key_builder
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
 
 router = APIRouter(
     prefix="/feature-models",
@@ -140,7 +143,12 @@ async def publish_feature_model_version(
     version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: ModelDesignerUser,
 ) -> FeatureModelVersionPublic:
-    """Publicar una versión (cambia estado a PUBLISHED y genera snapshot)."""
+    """
+    Publicar una versión (cambia estado a PUBLISHED y genera snapshot).
+
+    Tras publicar se lanza en background el precálculo de sus artefactos
+    (árbol, CNF, análisis y exportaciones estándar).
+    """
     model = await feature_model_repo.get(model_id)
     if not model:
         raise FeatureModelNotFoundException(model_id=str(model_id))
@@ -157,7 +165,20 @@ async def publish_feature_model_version(
         feature_model=model,
         user=current_user,
     )
-    return await manager.publish_version(version=version, validate=True)
+    published = await manager.publish_version(version=version, validate=True)
+
+    from app.tasks.version_warmup import warm_published_version
+
+    try:
+        warm_published_version.delay(version_id=str(published.id))
+    except Exception as exc:
+        # Sin broker la versión queda publicada; se calentará bajo demanda
+        log.warning(
+            "version.warmup_enqueue_failed",
+            version_id=str(published.id),
+            error=str(exc),
+        )
+    return published
 
 
 @router.patch(
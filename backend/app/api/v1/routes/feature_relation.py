@@ -18,6 +18,12 @@ from app.models.feature_relation import (
     FeatureRelationReplace,
 )
 from app.enums import FeatureRelationType
+from app.services.feature_model.fm_statistics_store import (
+    merge_deltas,
+    publish_statistics_delta,
+    relation_delta,
+)
+from app.services.feature_model.fm_version_delta import ensure_not_shared
 from app.exceptions import (
     FeatureRelationNotFoundException,
     FeatureRelationAccessDeniedException,
@@ -203,10 +209,16 @@ async def create_feature_relation(
             feature_repo=feature_repo,
             feature_model_version_repo=feature_model_version_repo,
         )
-        return relation
     except ValueError as e:
         raise InvalidFeatureRelationException(reason=str(e))
 
+    await publish_statistics_delta(
+        source_feature.feature_model_version_id,
+        relation.feature_model_version_id,
+        relation_delta(relation.type),
+    )
+    return relation
+
 
 @router.patch(
     "/{relation_id}",
@@ -265,8 +277,10 @@ async def update_feature_relation(
     ):
         raise FeatureRelationAccessDeniedException(relation_id=str(relation_id))
 
+    source_version_id = db_relation.feature_model_version_id
+    old_type = db_relation.type
     try:
-        return await feature_relation_repo.update(
+        relation = await feature_relation_repo.update(
             db_relation=db_relation,
             data=relation_in,
             user=current_user,
@@ -275,6 +289,13 @@ async def update_feature_relation(
     except (ValueError, RuntimeError) as e:
         raise InvalidFeatureRelationException(reason=str(e))
 
+    await publish_statistics_delta(
+        source_version_id,
+        relation.feature_model_version_id,
+        merge_deltas(relation_delta(old_type, -1), relation_delta(relation.type)),
+    )
+    return relation
+
 
 @router.put(
     "/{relation_id}",
@@ -333,13 +354,15 @@ async def replace_feature_relation(
     ):
         raise FeatureRelationAccessDeniedException(relation_id=str(relation_id))
 
+    source_version_id = db_relation.feature_model_version_id
+    old_type = db_relation.type
     try:
         update_data = FeatureRelationUpdate(
             type=relation_in.type,
             source_feature_id=relation_in.source_feature_id,
             target_feature_id=relation_in.target_feature_id,
         )
-        return await feature_relation_repo.update(
+        relation = await feature_relation_repo.update(
             db_relation=db_relation,
             data=update_data,
             user=current_user,
@@ -348,6 +371,13 @@ async def replace_feature_relation(
     except (ValueError, RuntimeError) as e:
         raise InvalidFeatureRelationException(reason=str(e))
 
+    await publish_statistics_delta(
+        source_version_id,
+        relation.feature_model_version_id,
+        merge_deltas(relation_delta(old_type, -1), relation_delta(relation.type)),
+    )
+    return relation
+
 
 @router.delete(
     "/{relation_id}",
@@ -400,11 +430,15 @@ async def delete_feature_relation(
     ):
         raise FeatureRelationAccessDeniedException(relation_id=str(relation_id))
 
-    await feature_relation_repo.delete(
+    source_version_id = db_relation.feature_model_version_id
+    # Una relación inactiva no cuenta en las estadísticas de la versión de origen
+    delta = relation_delta(db_relation.type, -1) if db_relation.is_active else {}
+    new_version_id = await feature_relation_repo.delete(
         db_relation=db_relation,
         user=current_user,
         feature_model_version_repo=feature_model_version_repo,
     )
+    await publish_statistics_delta(source_version_id, new_version_id, delta)
     return Message(
         message="Feature relation deleted in new model version created successfully."
     )
@@ -460,7 +494,14 @@ async def activate_feature_relation(
             status_code=400, detail="Feature relation is already active"
         )
 
-    return await feature_relation_repo.activate(db_relation)
+    await ensure_not_shared(
+        feature_relation_repo.session, db_relation.feature_model_version_id
+    )
+    relation = await feature_relation_repo.activate(db_relation)
+    await publish_statistics_delta(
+        relation.feature_model_version_id, None, relation_delta(relation.type)
+    )
+    return relation
 
 
 @router.patch(
@@ -513,4 +554,11 @@ async def deactivate_feature_relation(
             status_code=400, detail="Feature relation is already inactive"
         )
 
-    return await feature_relation_repo.deactivate(db_relation)
+    await ensure_not_shared(
+        feature_relation_repo.session, db_relation.feature_model_version_id
+    )
+    relation = await feature_relation_repo.deactivate(db_relation)
+    await publish_statistics_delta(
+        relation.feature_model_version_id, None, relation_delta(relation.type, -1)
+    )
+    return relation
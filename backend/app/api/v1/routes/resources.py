@@ -1,7 +1,13 @@
 import uuid
 from fastapi import APIRouter, Depends
 
-from app.api.deps import AsyncResourceRepoDep, ModelDesignerUser, VerifiedUser
+from app.api.deps import (
+    AsyncFeatureModelVersionRepoDep,
+    AsyncResourceRepoDep,
+    ModelDesignerUser,
+    VerifiedUser,
+)
+from app.api.http_cache import invalidate_version_tags
 from app.models.resource import ResourceCreate, ResourcePublic, ResourceUpdate
 from app.exceptions import (
     ResourceNotFoundException,
@@ -64,6 +70,7 @@ async def update_resource(
     resource_id: uuid.UUID,
     resource_in: ResourceUpdate,
     resource_repo: AsyncResourceRepoDep,
+    version_repo: AsyncFeatureModelVersionRepoDep,
     current_user: ModelDesignerUser,
 ) -> ResourcePublic:
     """Actualizar un recurso existente."""
@@ -80,4 +87,9 @@ async def update_resource(
             reason="Only superusers can change owner_id"
         )
 
-    return await resource_repo.update(resource=resource, data=resource_in)
+    updated = await resource_repo.update(resource=resource, data=resource_in)
+    # Las features muestran un resumen del recurso: renovar el ETag de sus versiones
+    await invalidate_version_tags(
+        *await version_repo.get_ids_using_resource(resource_id)
+    )
+    return updated
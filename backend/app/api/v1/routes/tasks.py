@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from app.api.deps import get_verified_user, require_celery_available
+from app.core.cache import cache_service
 from app.core.celery import celery_app
 
 router = APIRouter(
@@ -60,7 +61,11 @@ async def get_task_status(task_id: str) -> TaskStatusResponse:
     "/{task_id}/cancel",
     response_model=TaskCancelResponse,
     summary="Cancelar tarea",
-    description="Revoca una tarea Celery si aún está en cola o en ejecución.",
+    description=(
+        "Revoca una tarea Celery si aún está en cola; las tareas en ejecución "
+        "que lo soportan (p. ej. importaciones UVL) se detienen en su siguiente "
+        "punto de control."
+    ),
 )
 async def cancel_task(task_id: str) -> TaskCancelResponse:
     async_result = celery_app.AsyncResult(task_id)
@@ -68,6 +73,7 @@ async def cancel_task(task_id: str) -> TaskCancelResponse:
         raise HTTPException(status_code=404, detail="Task not found")
 
     async_result.revoke(terminate=False)
+    await cache_service.request_task_cancel(task_id)
     return TaskCancelResponse(task_id=task_id, status="revoked")
 
 
@@ -37,6 +37,12 @@ BEAT_SCHEDULE: dict = {
         "schedule": crontab(hour=3, minute=0),
         "options": {"queue": "maintenance", "expires": 3600},
     },
+    # ── Compactación de cadenas de versiones delta (diario 03:30) ──────────
+    "compact-version-chains": {
+        "task": "app.tasks.maintenance.compact_version_chains",
+        "schedule": crontab(hour=3, minute=30),
+        "options": {"queue": "maintenance", "expires": 3600},
+    },
     # ── Verificación de integridad (diario 04:00) ──────────────────────────
     "verify-models-integrity": {
         "task": "app.tasks.maintenance.verify_models_integrity",
@@ -19,6 +19,7 @@ from __future__ import annotations
 
 import hashlib
 import json
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from uuid import UUID
 
@@ -29,6 +30,7 @@ from redis.asyncio import ConnectionPool, Redis
 from redis.asyncio.retry import Retry
 from redis.backoff import ExponentialBackoff
 
+from app.core.cache_codec import codec_settings, decode_value, encode_value
 from app.core.config import settings
 from app.core.logging import get_logger
 
@@ -77,10 +79,18 @@ class CacheKeys:
     TTL_IMPORT_LOCK = 300  # Lock de importación
     TTL_ANALYSIS_STATUS = 30  # Polling de análisis
     TTL_ANALYSIS_LOCK = 300  # Lock de análisis
+    TTL_EXPORT_BUILD_LOCK = 120  # Lock de construcción de una exportación
     TTL_TASK_STATUS = 3600  # Estado genérico de tareas
     TTL_TASK_PROGRESS = 3600  # Progreso genérico de tareas
     TTL_HEALTH = 15  # Health check
     TTL_EXPORT_CACHE = 604800  # Cache de exportaciones (7 días)
+    TTL_SAMPLE_CACHE = 604800  # Muestras de configuraciones (7 días)
+    TTL_VERSION_STATISTICS = 604800  # Contadores de estadísticas por versión
+    TTL_ANALYSIS_PRECACHE = 43200  # Análisis precalculado (publicación y populares)
+    TTL_COMPILED_CNF = 604800  # CNF compilada por contenido (7 días)
+    TTL_VERSION_WARMUP = 43200  # Marca "warm" de una versión (como el análisis)
+    TTL_VERSION_ROWS = 3600  # Estructura resuelta de una versión delta
+    TTL_VERSION_ACCESS = 691200  # Contador diario de lecturas (ventana de 7 días + 1)
 
     # ── Prefijos ──────────────────────────────────────────────────────────────
     _PFX_FM = "fm:"
@@ -93,6 +103,9 @@ class CacheKeys:
     _PFX_TASK_PROGRESS = "task_progress:"
     _PFX_LOCK = "lock:"
     _PFX_EXPORT = "export:"
+    _PFX_EXPORT_ARTIFACT = "export_artifact:"
+    _PFX_SAMPLE = "sample:"
+    _PFX_CNF = "cnf:"
 
     # ── Claves compuestas ─────────────────────────────────────────────────────
 
@@ -136,6 +149,21 @@ class CacheKeys:
         """Progreso genérico de tareas Celery."""
         return f"{CacheKeys._PFX_TASK_PROGRESS}{task_id}"
 
+    @staticmethod
+    def task_cancel(task_id: str | UUID) -> str:
+        """Petición de cancelación cooperativa de una tarea en ejecución."""
+        return f"{CacheKeys._PFX_TASK}cancel:{task_id}"
+
+    @staticmethod
+    def task_enumerated_count(task_id: str | UUID) -> str:
+        """Contador global de soluciones de una enumeración repartida en cubos."""
+        return f"{CacheKeys._PFX_TASK_PROGRESS}{task_id}:enumerated"
+
+    @staticmethod
+    def task_cube_progress(task_id: str | UUID) -> str:
+        """Hash con el progreso de cada cubo de una enumeración paralela."""
+        return f"{CacheKeys._PFX_TASK_PROGRESS}{task_id}:cubes"
+
     @staticmethod
     def user_feature_models(user_id: str | UUID) -> str:
         """Clave de caché para el listado de feature models de un usuario."""
@@ -151,6 +179,46 @@ class CacheKeys:
         """Clave de caché para el árbol completo de una versión."""
         return f"{CacheKeys._PFX_FM}tree:{version_id}"
 
+    @staticmethod
+    def feature_model_tree_variant(version_id: str | UUID, variant: str) -> str:
+        """Respuesta completa serializada de una versión (una por variante)."""
+        return f"{CacheKeys._PFX_FM}tree:{version_id}:{variant}"
+
+    @staticmethod
+    def analysis_precache(version_id: str | UUID) -> str:
+        """Resumen de análisis precalculado de una versión."""
+        return f"{CacheKeys._PFX_FM}precache:{version_id}"
+
+    @staticmethod
+    def version_warmup(version_id: str | UUID) -> str:
+        """Estado del precálculo de artefactos de una versión publicada."""
+        return f"{CacheKeys._PFX_FM}warm:{version_id}"
+
+    @staticmethod
+    def version_rows(version_id: str | UUID) -> str:
+        """Filas resueltas (base + deltas) de una versión con almacenamiento delta."""
+        return f"{CacheKeys._PFX_FM}vrows:{version_id}"
+
+    @staticmethod
+    def compiled_cnf(model_hash: str) -> str:
+        """CNF compilada (mapeo de variables y cláusulas) por huella del modelo."""
+        return f"{CacheKeys._PFX_CNF}{model_hash}"
+
+    @staticmethod
+    def version_access(day: str) -> str:
+        """Lecturas (exportaciones y análisis) por versión de un día (``YYYYMMDD``)."""
+        return f"{CacheKeys._PFX_FM}vaccess:{day}"
+
+    @staticmethod
+    def version_tag(version_id: str | UUID) -> str:
+        """Etiqueta de contenido (base de los ETag) de una versión."""
+        return f"{CacheKeys._PFX_FM}vtag:{version_id}"
+
+    @staticmethod
+    def version_tag_generation(version_id: str | UUID) -> str:
+        """Contador de cambios in situ de una versión (renueva sus ETag)."""
+        return f"{CacheKeys._PFX_FM}vgen:{version_id}"
+
     @staticmethod
     def feature_model_export_item(
         model_id: str | UUID,
@@ -166,6 +234,26 @@ class CacheKeys:
         """Índice (sorted set) de exportaciones por modelo."""
         return f"{CacheKeys._PFX_EXPORT}index:{model_id}"
 
+    @staticmethod
+    def export_artifact(artifact_key: str) -> str:
+        """Puntero a una exportación en MinIO direccionada por contenido."""
+        return f"{CacheKeys._PFX_EXPORT_ARTIFACT}{artifact_key}"
+
+    @staticmethod
+    def export_build_lock(artifact_key: str) -> str:
+        """Lock para construir una sola vez una exportación (single-flight)."""
+        return f"{CacheKeys._PFX_LOCK}export:{artifact_key}"
+
+    @staticmethod
+    def configuration_sample(sample_key: str) -> str:
+        """Muestra de configuraciones direccionada por contenido."""
+        return f"{CacheKeys._PFX_SAMPLE}{sample_key}"
+
+    @staticmethod
+    def version_statistics(version_id: str | UUID) -> str:
+        """Hash de contadores de estadísticas de una versión."""
+        return f"{CacheKeys._PFX_FM}stats:{version_id}"
+
     @staticmethod
     def get_ttl_for_status(status: "ModelStatus") -> dict[str, int]:
         """
@@ -185,24 +273,28 @@ class CacheKeys:
                 "detail": CacheKeys.TTL_FM_DETAIL_PUBLISHED,
                 "statistics": 3600,
                 "export": CacheKeys.TTL_EXPORT_CACHE,
+                "samples": CacheKeys.TTL_SAMPLE_CACHE,
             },
             ModelStatus.DRAFT: {
                 "tree": CacheKeys.TTL_FM_TREE_DRAFT,
                 "detail": CacheKeys.TTL_FM_DETAIL_DRAFT,
                 "statistics": 300,
                 "export": 600,
+                "samples": 600,
             },
             ModelStatus.IN_REVIEW: {
                 "tree": CacheKeys.TTL_FM_TREE_IN_REVIEW,
                 "detail": CacheKeys.TTL_FM_DETAIL_IN_REVIEW,
                 "statistics": 600,
                 "export": 1200,
+                "samples": 1200,
             },
             ModelStatus.ARCHIVED: {
                 "tree": CacheKeys.TTL_FM_TREE_ARCHIVED,
                 "detail": CacheKeys.TTL_FM_DETAIL_ARCHIVED,
                 "statistics": 7200,
                 "export": CacheKeys.TTL_EXPORT_CACHE,
+                "samples": CacheKeys.TTL_SAMPLE_CACHE,
             },
         }
         return ttl_map.get(status, ttl_map[ModelStatus.DRAFT])  # Default to DRAFT TTLs
@@ -230,8 +322,14 @@ class CacheKeys:
         """
         keys_to_delete = []
 
-        # 1. Invalidar caché del árbol
+        # 1. Invalidar caché del árbol (y sus variantes serializadas)
         keys_to_delete.append(CacheKeys.feature_model_tree(version_id))
+        tree_variant_keys = await redis_client.keys(
+            CacheKeys.feature_model_tree_variant(version_id, "*")
+        )
+        keys_to_delete.extend(tree_variant_keys or [])
+        keys_to_delete.append(CacheKeys.analysis_precache(version_id))
+        keys_to_delete.append(CacheKeys.version_tag(version_id))
 
         # 2. Invalidar exportaciones de esta versión (todas las versiones del modelo)
         # Patrón: export:{model_id}:{version_id}:*
@@ -239,7 +337,8 @@ class CacheKeys:
         export_keys = await redis_client.keys(export_pattern)
         keys_to_delete.extend(export_keys or [])
 
-        # 3. Invalidar estados de trabajos
+        # 3. Invalidar estados de trabajos y contadores de estadísticas
+        keys_to_delete.append(CacheKeys.version_statistics(version_id))
         keys_to_delete.append(CacheKeys.feature_model_validation_status(version_id))
         keys_to_delete.append(CacheKeys.feature_model_analysis_status(version_id))
 
@@ -314,7 +413,7 @@ class CacheKeys:
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def _build_pool(db: int) -> ConnectionPool:
+def _build_pool(db: int, decode_responses: bool = True) -> ConnectionPool:
     """Pool Redis con reintentos exponenciales y health check."""
     base_url = (
         f"redis://"
@@ -324,7 +423,7 @@ def _build_pool(db: int) -> ConnectionPool:
     return ConnectionPool.from_url(
         base_url,
         max_connections=20,
-        decode_responses=True,
+        decode_responses=decode_responses,
         retry=Retry(ExponentialBackoff(cap=10, base=0.5), retries=3),
         retry_on_error=[ConnectionError, TimeoutError],
         socket_connect_timeout=5,
@@ -337,6 +436,8 @@ def _build_pool(db: int) -> ConnectionPool:
 # (misma DB Redis, distinto pool para no bloquear entre sí)
 _http_cache_pool = _build_pool(settings.REDIS_DB_CACHE)
 _service_pool = _build_pool(settings.REDIS_DB_CACHE)
+# Valores binarios del codec de caché (ver app.core.cache_codec)
+_binary_service_pool = _build_pool(settings.REDIS_DB_CACHE, decode_responses=False)
 
 
 async def _close_pool(pool: ConnectionPool) -> None:
@@ -384,12 +485,19 @@ async def setup_cache() -> None:
     )
     log.info("cache.initialized", backend="redis")
 
+    codec = codec_settings()
+    if codec["compression"] != codec["configured_compression"]:
+        log.warning("cache.compression.fallback", **codec)
+    else:
+        log.info("cache.codec", **codec)
+
 
 async def teardown_cache() -> None:
     """Libera pools Redis. Llamar en el lifespan shutdown de FastAPI."""
     await FastAPICache.clear()
     await _close_pool(_http_cache_pool)
     await _close_pool(_service_pool)
+    await _close_pool(_binary_service_pool)
     log.info("cache.shutdown")
 
 
@@ -457,6 +565,21 @@ def template_key_builder(
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+# Aplica HINCRBY por par (campo, cambio) si el hash existe; borra los campos
+# que quedan a cero o menos y devuelve el hash resultante
+_INCREMENT_HASH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+for i = 1, #ARGV, 2 do
+    if redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1]) <= 0 then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
 class CacheService:
     """
     Caché Redis de bajo nivel para operaciones internas del dominio Feature Model.
@@ -465,6 +588,7 @@ class CacheService:
 
     def __init__(self) -> None:
         self._redis = get_redis_client()
+        self._binary_redis = Redis(connection_pool=_binary_service_pool)
 
     # ── Estado de jobs (importación / validación) ───────────────────────────
 
@@ -566,6 +690,270 @@ class CacheService:
         value = await self._redis.get(key)
         return json.loads(value) if value else None
 
+    async def request_task_cancel(self, task_id: str | UUID) -> None:
+        """Marca la tarea para que se detenga en su próximo punto de control."""
+        key = CacheKeys.task_cancel(task_id)
+        await self._redis.setex(key, CacheKeys.TTL_TASK_STATUS, "1")
+
+    async def is_task_cancel_requested(self, task_id: str | UUID) -> bool:
+        key = CacheKeys.task_cancel(task_id)
+        return bool(await self._redis.exists(key))
+
+    async def add_enumerated_solutions(self, task_id: str | UUID, count: int) -> int:
+        """Suma soluciones al contador global de la tarea y devuelve el total."""
+        key = CacheKeys.task_enumerated_count(task_id)
+        total = await self._redis.incrby(key, count)
+        await self._redis.expire(key, CacheKeys.TTL_TASK_PROGRESS)
+        return int(total)
+
+    async def set_cube_progress(
+        self,
+        task_id: str | UUID,
+        cube_index: int,
+        progress: dict,
+    ) -> None:
+        key = CacheKeys.task_cube_progress(task_id)
+        await self._redis.hset(key, str(cube_index), json.dumps(progress))
+        await self._redis.expire(key, CacheKeys.TTL_TASK_PROGRESS)
+
+    async def get_cube_progress(self, task_id: str | UUID) -> dict[str, dict]:
+        key = CacheKeys.task_cube_progress(task_id)
+        values = await self._redis.hgetall(key)
+        return {index: json.loads(value) for index, value in values.items()}
+
+    # ── Muestras de configuraciones ───────────────────────────────────────────
+
+    async def set_configuration_sample(
+        self,
+        sample_key: str,
+        entry: dict,
+        ttl: int = CacheKeys.TTL_SAMPLE_CACHE,
+    ) -> None:
+        """Persiste una muestra (inline o puntero a MinIO) bajo su clave de contenido."""
+        key = CacheKeys.configuration_sample(sample_key)
+        await self._redis.setex(key, ttl, json.dumps(entry))
+        log.debug("cache.sample.set", sample_key=sample_key)
+
+    async def get_configuration_sample(self, sample_key: str) -> dict | None:
+        key = CacheKeys.configuration_sample(sample_key)
+        value = await self._redis.get(key)
+        return json.loads(value) if value else None
+
+    # ── Exportaciones direccionadas por contenido ─────────────────────────────
+
+    async def set_export_artifact(
+        self,
+        artifact_key: str,
+        entry: dict,
+        ttl: int = CacheKeys.TTL_EXPORT_CACHE,
+    ) -> None:
+        """Guarda el puntero (objeto en MinIO, tipo, tamaño) de una exportación."""
+        key = CacheKeys.export_artifact(artifact_key)
+        await self._redis.setex(key, ttl, json.dumps(entry))
+        log.debug("cache.export_artifact.set", artifact_key=artifact_key)
+
+    async def get_export_artifact(self, artifact_key: str) -> dict | None:
+        key = CacheKeys.export_artifact(artifact_key)
+        value = await self._redis.get(key)
+        return json.loads(value) if value else None
+
+    async def delete_export_artifact(self, artifact_key: str) -> None:
+        """Descarta un puntero cuyo objeto ya no está en MinIO."""
+        await self._redis.delete(CacheKeys.export_artifact(artifact_key))
+
+    # ── Estadísticas incrementales por versión ────────────────────────────────
+
+    async def set_version_statistics(
+        self,
+        version_id: str | UUID,
+        fields: dict[str, int],
+        ttl: int = CacheKeys.TTL_VERSION_STATISTICS,
+    ) -> None:
+        """Reemplaza el hash de contadores de una versión."""
+        key = CacheKeys.version_statistics(version_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if fields:
+                pipe.hset(key, mapping=fields)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def increment_version_statistics(
+        self, version_id: str | UUID, delta: dict[str, int]
+    ) -> dict[str, int] | None:
+        """
+        Aplica ``delta`` al hash de contadores de una versión in situ.
+
+        Un script Lua hace los ``HINCRBY`` de forma atómica, solo si el hash
+        existe (si no, se recalculará al leerse), y elimina los campos que
+        quedan a cero o menos. Devuelve los contadores resultantes o None si
+        el hash no existía.
+        """
+        key = CacheKeys.version_statistics(version_id)
+        args = [value for field, change in delta.items() for value in (field, change)]
+        values = await self._redis.eval(_INCREMENT_HASH_SCRIPT, 1, key, *args)
+        if values is None:
+            return None
+        return {field: int(value) for field, value in zip(values[::2], values[1::2])}
+
+    async def get_version_statistics(
+        self, version_id: str | UUID
+    ) -> dict[str, int] | None:
+        """Contadores de estadísticas de una versión o None si no existen."""
+        key = CacheKeys.version_statistics(version_id)
+        values = await self._redis.hgetall(key)
+        if not values:
+            return None
+        return {field: int(value) for field, value in values.items()}
+
+    async def delete_version_statistics(self, version_id: str | UUID) -> None:
+        await self._redis.delete(CacheKeys.version_statistics(version_id))
+
+    # ── Etiquetas de versión (ETag) ───────────────────────────────────────────
+
+    async def set_version_tag(
+        self, version_id: str | UUID, record: dict, ttl: int
+    ) -> None:
+        """Guarda la etiqueta de contenido de una versión con su estado."""
+        key = CacheKeys.version_tag(version_id)
+        await self._redis.setex(key, ttl, json.dumps(record))
+
+    async def get_version_tag(self, version_id: str | UUID) -> dict | None:
+        key = CacheKeys.version_tag(version_id)
+        value = await self._redis.get(key)
+        return json.loads(value) if value else None
+
+    async def get_version_tag_generation(self, version_id: str | UUID) -> int:
+        value = await self._redis.get(CacheKeys.version_tag_generation(version_id))
+        return int(value) if value else 0
+
+    async def invalidate_version_tag(self, version_id: str | UUID) -> None:
+        """
+        Renueva los ETag de una versión modificada in situ (estado, UVL,
+        activación de features): descarta la etiqueta, sube la generación y
+        elimina las respuestas completas serializadas, que si no se servirían
+        con el ETag nuevo.
+        """
+        tree_keys = [
+            key
+            async for key in self._redis.scan_iter(
+                match=CacheKeys.feature_model_tree_variant(version_id, "*")
+            )
+        ]
+        # Sin TTL: si el contador volviera a 0 se repetirían ETag antiguos
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(
+                CacheKeys.version_tag(version_id),
+                CacheKeys.version_warmup(version_id),
+                *tree_keys,
+            )
+            pipe.incr(CacheKeys.version_tag_generation(version_id))
+            await pipe.execute()
+
+    # ── Análisis precalculado ─────────────────────────────────────────────────
+
+    async def set_analysis_precache(
+        self,
+        version_id: str | UUID,
+        summary: dict[str, Any],
+        ttl: int = CacheKeys.TTL_ANALYSIS_PRECACHE,
+    ) -> None:
+        """Guarda el resumen de análisis de una versión (msgpack/JSON comprimido)."""
+        key = CacheKeys.analysis_precache(version_id)
+        await self._binary_redis.setex(key, ttl, encode_value(summary))
+
+    async def get_analysis_precache(
+        self, version_id: str | UUID
+    ) -> dict[str, Any] | None:
+        key = CacheKeys.analysis_precache(version_id)
+        value = await self._binary_redis.get(key)
+        return decode_value(value) if value else None
+
+    # ── Precálculo al publicar ────────────────────────────────────────────────
+
+    async def set_version_warmup(
+        self,
+        version_id: str | UUID,
+        record: dict,
+        ttl: int = CacheKeys.TTL_VERSION_WARMUP,
+    ) -> None:
+        """Guarda el estado del precálculo de una versión (warming, warm, partial)."""
+        key = CacheKeys.version_warmup(version_id)
+        await self._redis.setex(key, ttl, json.dumps(record))
+
+    async def get_version_warmup(self, version_id: str | UUID) -> dict | None:
+        key = CacheKeys.version_warmup(version_id)
+        value = await self._redis.get(key)
+        return json.loads(value) if value else None
+
+    async def set_compiled_cnf(
+        self,
+        model_hash: str,
+        cnf: dict[str, Any],
+        ttl: int = CacheKeys.TTL_COMPILED_CNF,
+    ) -> None:
+        """Guarda la CNF compilada de un modelo (msgpack/JSON comprimido)."""
+        key = CacheKeys.compiled_cnf(model_hash)
+        await self._binary_redis.setex(key, ttl, encode_value(cnf))
+
+    async def get_compiled_cnf(self, model_hash: str) -> dict[str, Any] | None:
+        key = CacheKeys.compiled_cnf(model_hash)
+        value = await self._binary_redis.get(key)
+        return decode_value(value) if value else None
+
+    # ── Popularidad de versiones ─────────────────────────────────────────────
+
+    async def record_version_access(self, version_id: str | UUID) -> None:
+        """Suma una lectura de la versión al contador del día (ZINCRBY)."""
+        key = CacheKeys.version_access(datetime.now(timezone.utc).strftime("%Y%m%d"))
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zincrby(key, 1, str(version_id))
+            pipe.expire(key, CacheKeys.TTL_VERSION_ACCESS)
+            await pipe.execute()
+
+    async def get_most_accessed_versions(
+        self, days: int, limit: int
+    ) -> list[tuple[str, int]]:
+        """
+        Versiones más leídas de los últimos ``days`` días (incluido hoy).
+
+        Returns:
+            ``[(version_id, lecturas), ...]`` de mayor a menor
+        """
+        today = datetime.now(timezone.utc)
+        keys = [
+            CacheKeys.version_access(
+                (today - timedelta(days=offset)).strftime("%Y%m%d")
+            )
+            for offset in range(days)
+        ]
+        ranked = await self._redis.zunion(keys, withscores=True)
+        ranked.sort(key=lambda item: -item[1])
+        return [(version_id, int(score)) for version_id, score in ranked[:limit]]
+
+    # ── Estructura resuelta de versiones delta ───────────────────────────────
+
+    async def set_version_rows(
+        self,
+        version_id: str | UUID,
+        rows: dict[str, Any],
+        ttl: int = CacheKeys.TTL_VERSION_ROWS,
+    ) -> None:
+        """Guarda las filas resueltas de una versión (msgpack/JSON comprimido)."""
+        key = CacheKeys.version_rows(version_id)
+        await self._binary_redis.setex(key, ttl, encode_value(rows))
+
+    async def get_version_rows(self, version_id: str | UUID) -> dict[str, Any] | None:
+        key = CacheKeys.version_rows(version_id)
+        value = await self._binary_redis.get(key)
+        return decode_value(value) if value else None
+
+    async def delete_version_rows(self, *version_ids: str | UUID) -> None:
+        if version_ids:
+            await self._binary_redis.delete(
+                *(CacheKeys.version_rows(version_id) for version_id in version_ids)
+            )
+
     # ── Locks distribuidos ────────────────────────────────────────────────────
 
     async def acquire_import_lock(self, feature_model_id: str | UUID) -> bool:
@@ -584,6 +972,11 @@ class CacheService:
             )
         return bool(acquired)
 
+    async def extend_import_lock(self, feature_model_id: str | UUID) -> None:
+        """Renueva el TTL del lock mientras la importación sigue avanzando."""
+        key = CacheKeys.import_lock(feature_model_id)
+        await self._redis.expire(key, CacheKeys.TTL_IMPORT_LOCK)
+
     async def release_import_lock(self, feature_model_id: str | UUID) -> None:
         """Libera lock de importación."""
         key = CacheKeys.import_lock(feature_model_id)
@@ -616,6 +1009,20 @@ class CacheService:
             log.warning("cache.analysis_lock.already_held", version_id=str(version_id))
         return bool(acquired)
 
+    async def acquire_export_build_lock(self, artifact_key: str) -> bool:
+        """Adquiere el lock de construcción de una exportación."""
+        key = CacheKeys.export_build_lock(artifact_key)
+        acquired = await self._redis.set(
+            key, "1", nx=True, ex=CacheKeys.TTL_EXPORT_BUILD_LOCK
+        )
+        if acquired:
+            log.debug("cache.export_lock.acquired", artifact_key=artifact_key)
+        return bool(acquired)
+
+    async def release_export_build_lock(self, artifact_key: str) -> None:
+        """Libera el lock de construcción de una exportación."""
+        await self._redis.delete(CacheKeys.export_build_lock(artifact_key))
+
     async def release_analysis_lock(self, version_id: str | UUID) -> None:
         """Libera lock de análisis."""
         key = CacheKeys.analysis_lock(version_id)
@@ -0,0 +1,263 @@
+"""
+app/core/cache_codec.py
+
+Codec de las entradas grandes de caché (árbol completo, análisis precalculado).
+
+Cada entrada lleva una cabecera de 6 bytes que la describe, de modo que se
+puede cambiar la compresión o el formato sin invalidar lo ya guardado::
+
+    b"\\x00FMC" + <serialización> + <compresión> + payload
+
+    serialización: b"j" JSON | b"m" msgpack
+    compresión:    b"n" ninguna | b"g" gzip | b"z" zstd
+
+Los valores sin cabecera se leen como JSON plano (entradas antiguas).
+
+Las entradas JSON se devuelven como bytes ya serializados para enviarlos tal
+cual en la respuesta HTTP, sin volver a validarlos con Pydantic.
+
+``zstandard`` y ``msgpack`` son opcionales: sin ellos se usa gzip y JSON.
+Requieren un cliente Redis binario (``decode_responses=False``).
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from typing import Any, Iterator, List
+
+from app.core.config import settings
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+MAGIC = b"\x00FMC"
+HEADER_SIZE = len(MAGIC) + 2
+
+SERIALIZER_JSON = "json"
+SERIALIZER_MSGPACK = "msgpack"
+
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+_SERIALIZER_CODES = {SERIALIZER_JSON: b"j", SERIALIZER_MSGPACK: b"m"}
+_COMPRESSION_CODES = {
+    COMPRESSION_NONE: b"n",
+    COMPRESSION_GZIP: b"g",
+    COMPRESSION_ZSTD: b"z",
+}
+_SERIALIZERS = {code: name for name, code in _SERIALIZER_CODES.items()}
+_COMPRESSIONS = {code: name for name, code in _COMPRESSION_CODES.items()}
+
+# wbits para zlib con cabecera gzip
+_GZIP_WBITS = 31
+_GZIP_LEVEL = 6
+_ZSTD_LEVEL = 3
+
+
+class CacheCodecError(ValueError):
+    """Entrada de caché con cabecera o formato desconocido."""
+
+
+def default_compression() -> str:
+    """Compresión configurada, degradada a gzip si zstd no está disponible."""
+    compression = settings.CACHE_COMPRESSION.lower()
+    if compression == COMPRESSION_ZSTD and not ZSTD_AVAILABLE:
+        return COMPRESSION_GZIP
+    if compression not in _COMPRESSION_CODES:
+        return COMPRESSION_GZIP
+    return compression
+
+
+def default_serializer() -> str:
+    """msgpack si está instalado; si no, JSON."""
+    return SERIALIZER_MSGPACK if MSGPACK_AVAILABLE else SERIALIZER_JSON
+
+
+def codec_settings() -> dict[str, str]:
+    """Compresión configurada y la que se usa realmente (para el log de arranque)."""
+    return {
+        "configured_compression": settings.CACHE_COMPRESSION.lower(),
+        "compression": default_compression(),
+        "serializer": default_serializer(),
+    }
+
+
+# ── Codificación ──────────────────────────────────────────────────────────────
+
+
+def encode_json_bytes(data: bytes, compression: str | None = None) -> bytes:
+    """Empaqueta un documento JSON ya serializado."""
+    return _pack(SERIALIZER_JSON, data, compression)
+
+
+def encode_value(
+    value: Any, serializer: str | None = None, compression: str | None = None
+) -> bytes:
+    """Serializa y empaqueta un valor (dict/list con tipos JSON)."""
+    serializer = serializer or default_serializer()
+    if serializer == SERIALIZER_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise CacheCodecError("msgpack is not installed")
+        try:
+            data = msgpack.packb(value, use_bin_type=True)
+        except (OverflowError, TypeError, ValueError):
+            # Enteros de más de 64 bits o tipos no soportados: JSON
+            serializer = SERIALIZER_JSON
+    if serializer == SERIALIZER_JSON:
+        data = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+    return _pack(serializer, data, compression)
+
+
+def _pack(serializer: str, data: bytes, compression: str | None) -> bytes:
+    compression = compression or default_compression()
+    if len(data) < settings.CACHE_COMPRESSION_MIN_SIZE:
+        compression = COMPRESSION_NONE
+    if compression == COMPRESSION_GZIP:
+        data = gzip.compress(data, compresslevel=_GZIP_LEVEL, mtime=0)
+    elif compression == COMPRESSION_ZSTD:
+        data = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    return (
+        MAGIC + _SERIALIZER_CODES[serializer] + _COMPRESSION_CODES[compression] + data
+    )
+
+
+class StreamEncoder:
+    """
+    Empaqueta un documento JSON que se produce por trozos.
+
+    Se usa como *tee* de una respuesta en streaming: cada trozo enviado al
+    cliente se comprime a la vez y ``finish`` devuelve la entrada completa.
+    """
+
+    def __init__(self, compression: str | None = None):
+        self.compression = compression or default_compression()
+        if self.compression == COMPRESSION_ZSTD:
+            self._compressor: Any = zstandard.ZstdCompressor(
+                level=_ZSTD_LEVEL
+            ).compressobj()
+        elif self.compression == COMPRESSION_GZIP:
+            self._compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, _GZIP_WBITS)
+        else:
+            self._compressor = None
+        self._parts: List[bytes] = [
+            MAGIC
+            + _SERIALIZER_CODES[SERIALIZER_JSON]
+            + _COMPRESSION_CODES[self.compression]
+        ]
+        self.raw_size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.raw_size += len(chunk)
+        if self._compressor is None:
+            self._parts.append(chunk)
+            return
+        compressed = self._compressor.compress(chunk)
+        if compressed:
+            self._parts.append(compressed)
+
+    def finish(self) -> bytes:
+        """Cierra el flujo y devuelve la entrada completa."""
+        if self._compressor is not None:
+            self._parts.append(self._compressor.flush())
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+# ── Decodificación ────────────────────────────────────────────────────────────
+
+
+def decode_value(blob: bytes | str) -> Any:
+    """Desempaqueta y deserializa una entrada (o JSON plano sin cabecera)."""
+    serializer, compression, payload = _unpack(blob)
+    data = _decompress(compression, payload)
+    if serializer == SERIALIZER_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise CacheCodecError("msgpack is not installed")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def decode_json_bytes(blob: bytes | str) -> bytes:
+    """
+    Documento JSON de una entrada, listo para enviarse sin re-serializar.
+
+    Las entradas msgpack se convierten a JSON.
+    """
+    serializer, compression, payload = _unpack(blob)
+    data = _decompress(compression, payload)
+    if serializer == SERIALIZER_MSGPACK:
+        return json.dumps(decode_value(blob), separators=(",", ":")).encode("utf-8")
+    return data
+
+
+def iter_json_bytes(blob: bytes | str, chunk_size: int) -> Iterator[bytes]:
+    """Como ``decode_json_bytes`` pero descomprimiendo por trozos."""
+    serializer, compression, payload = _unpack(blob)
+    if serializer == SERIALIZER_MSGPACK or compression == COMPRESSION_NONE:
+        data = decode_json_bytes(blob)
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+        return
+
+    if compression == COMPRESSION_ZSTD:
+        _require_zstd()
+        yield from zstandard.ZstdDecompressor().read_to_iter(
+            payload, read_size=chunk_size, write_size=chunk_size
+        )
+        return
+
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    view = memoryview(payload)
+    for start in range(0, len(view), chunk_size):
+        pending = view[start : start + chunk_size].tobytes()
+        while pending:
+            chunk = decompressor.decompress(pending, chunk_size)
+            if chunk:
+                yield chunk
+            pending = decompressor.unconsumed_tail
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def _unpack(blob: bytes | str) -> tuple[str, str, bytes]:
+    if isinstance(blob, str):
+        return SERIALIZER_JSON, COMPRESSION_NONE, blob.encode("utf-8")
+    if not blob.startswith(MAGIC):
+        return SERIALIZER_JSON, COMPRESSION_NONE, blob
+    try:
+        serializer = _SERIALIZERS[blob[len(MAGIC) : len(MAGIC) + 1]]
+        compression = _COMPRESSIONS[blob[len(MAGIC) + 1 : HEADER_SIZE]]
+    except KeyError as exc:
+        raise CacheCodecError("Unknown cache entry header") from exc
+    return serializer, compression, blob[HEADER_SIZE:]
+
+
+def _decompress(compression: str, payload: bytes) -> bytes:
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(payload)
+    if compression == COMPRESSION_ZSTD:
+        _require_zstd()
+        # decompressobj: los frames en streaming no llevan el tamaño final
+        return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+    return payload
+
+
+def _require_zstd() -> None:
+    if not ZSTD_AVAILABLE:
+        raise CacheCodecError("zstandard is not installed")
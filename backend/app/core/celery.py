@@ -39,8 +39,10 @@ celery_app = Celery(
     backend=settings.REDIS_URL_BACKEND,
     include=[
         "app.tasks.backfill",
+        "app.tasks.feature_model",
         "app.tasks.feature_model_analysis",
         "app.tasks.maintenance",
+        "app.tasks.version_warmup",
     ],
 )
 
@@ -101,6 +103,14 @@ celery_app.conf.update(
             "queue": "default",
             "routing_key": "default",
         },
+        "app.tasks.feature_model_analysis.enumerate_configuration_cube": {
+            "queue": "default",
+            "routing_key": "default",
+        },
+        "app.tasks.feature_model_analysis.merge_enumerated_cubes": {
+            "queue": "default",
+            "routing_key": "default",
+        },
         "app.tasks.feature_model_analysis.export_feature_model_bundle": {
             "queue": "import",
             "routing_key": "import",
@@ -117,6 +127,19 @@ celery_app.conf.update(
             "queue": "validation",
             "routing_key": "validation",
         },
+        # Precálculo al publicar (los pasos SAT se envían a validation)
+        "app.tasks.version_warmup.warm_published_version": {
+            "queue": "default",
+            "routing_key": "default",
+        },
+        "app.tasks.version_warmup.warm_version_step": {
+            "queue": "default",
+            "routing_key": "default",
+        },
+        "app.tasks.version_warmup.finalize_version_warmup": {
+            "queue": "default",
+            "routing_key": "default",
+        },
         "app.tasks.maintenance.refresh_active_models_metrics": {
             "queue": "maintenance",
             "routing_key": "maintenance",
@@ -113,6 +113,14 @@ class Settings(BaseSettings):
     )  # 30 min — evita conexiones muertas
     DB_ECHO: bool = False
 
+    # Almacenamiento delta de versiones (opcional): una versión derivada guarda
+    # solo sus cambios respecto a la versión base y comparte el resto de filas
+    VERSION_DELTA_STORAGE: bool = False
+    # Saltos delta máximos al escribir; más allá la versión se guarda completa
+    VERSION_DELTA_MAX_CHAIN: int = Field(default=32, ge=1)
+    # El mantenimiento compacta las cadenas más largas que esto
+    VERSION_DELTA_COMPACT_CHAIN: int = Field(default=8, ge=1)
+
     # --- S3/MinIO Settings ---
     MINIO_ENDPOINT: str
     MINIO_ACCESS_KEY: str
@@ -179,6 +187,12 @@ class Settings(BaseSettings):
     CACHE_TTL_SHORT: int = 60  # 1 min  — datos muy volátiles
     CACHE_TTL_DEFAULT: int = 300  # 5 min  — listados, etc.
     CACHE_TTL_LONG: int = 3600  # 1 hora — plantillas, config estática
+    # Compresión de entradas grandes de caché (árbol, análisis): zstd | gzip | none.
+    # zstd requiere el paquete opcional ``zstandard``; si no está instalado se usa
+    # gzip (se avisa al arrancar).
+    CACHE_COMPRESSION: str = "gzip"
+    # Entradas más pequeñas que esto se guardan sin comprimir (bytes)
+    CACHE_COMPRESSION_MIN_SIZE: int = 1024
     # GZIP middleware minimum size (bytes). Responses smaller than this won't be compressed.
     GZIP_MINIMUM_SIZE: int = 500
 
@@ -6,6 +6,7 @@ Cliente Redis centralizado para el dominio de Feature Models.
 Provee:
     - Dos pools independientes: uno para `CacheService` y otro
         disponible para uso directo en servicios/tareas.
+  - Un cliente binario (`redis_binary_client`) para valores comprimidos.
   - Dependency de FastAPI (get_redis) para inyección en rutas.
   - Health check.
   - Función de inicialización/cierre para el lifespan.
@@ -39,13 +40,16 @@ log = get_logger(__name__)
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def _build_pool(db: int, max_connections: int = 20) -> ConnectionPool:
+def _build_pool(
+    db: int, max_connections: int = 20, decode_responses: bool = True
+) -> ConnectionPool:
     """
     Construye un ConnectionPool Redis con:
       - Reintentos exponenciales (3 intentos, cap 10 s)
       - Health check cada 30 s para descartar conexiones muertas
       - Timeout de conexión y socket de 5 s
       - decode_responses=True → todos los valores son str, no bytes
+        (False solo en el pool binario)
     """
     password = settings.REDIS_PASSWORD
     auth = f":{password.get_secret_value()}@" if password else ""
@@ -54,7 +58,7 @@ def _build_pool(db: int, max_connections: int = 20) -> ConnectionPool:
     return ConnectionPool.from_url(
         url,
         max_connections=max_connections,
-        decode_responses=True,
+        decode_responses=decode_responses,
         retry=Retry(
             ExponentialBackoff(cap=10, base=0.5),
             retries=3,
@@ -84,6 +88,13 @@ _request_pool: ConnectionPool = _build_pool(
     max_connections=10,
 )
 
+# Pool binario — valores comprimidos (gzip) que no son texto
+_binary_pool: ConnectionPool = _build_pool(
+    db=settings.REDIS_DB_CACHE,
+    max_connections=10,
+    decode_responses=False,
+)
+
 
 async def _close_pool(pool: ConnectionPool) -> None:
     """Cierra un pool Redis compatible con distintas versiones de redis-py."""
@@ -107,6 +118,10 @@ async def _close_pool(pool: ConnectionPool) -> None:
 #   from app.core.redis import redis_client
 redis_client: Redis = Redis(connection_pool=_cache_pool)
 
+# Mismo DB, pero devuelve bytes: para entradas comprimidas
+#   from app.core.redis import redis_binary_client
+redis_binary_client: Redis = Redis(connection_pool=_binary_pool)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Dependency FastAPI
@@ -157,6 +172,7 @@ async def teardown_redis() -> None:
     """Cierra los pools al apagar la app."""
     await _close_pool(_cache_pool)
     await _close_pool(_request_pool)
+    await _close_pool(_binary_pool)
     log.info("redis.pools_closed")
 
 
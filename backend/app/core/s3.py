@@ -17,7 +17,9 @@ from __future__ import annotations
 
 import asyncio
 import io
+import shutil
 from datetime import timedelta
+from typing import IO, Any, AsyncIterator
 from uuid import UUID
 
 from minio import Minio
@@ -28,6 +30,13 @@ from app.core.logging import get_logger
 
 log = get_logger(__name__)
 
+# Tamaño de parte del multipart upload (mínimo S3: 5 MiB)
+BULK_UPLOAD_PART_SIZE = 16 * 1024 * 1024
+
+# Las exportaciones se suben mientras se generan: la parte en curso es lo
+# único que se retiene en memoria, así que se usa el mínimo de S3
+EXPORT_UPLOAD_PART_SIZE = 5 * 1024 * 1024
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers internos
@@ -46,6 +55,27 @@ def _export_object_name(version_id: str | UUID, fmt: str = "json") -> str:
     return f"exports/{version_id}.{normalized_fmt}"
 
 
+def _export_artifact_object_name(artifact_key: str, fmt: str = "json") -> str:
+    """Export direccionado por contenido. Ej: 'exports/artifacts/<sha256>.uvl'."""
+    normalized_fmt = fmt.lstrip(".") or "json"
+    return f"exports/artifacts/{artifact_key}.{normalized_fmt}"
+
+
+def _sample_object_name(sample_key: str) -> str:
+    """Muestra de configuraciones comprimida. Ej: 'samples/<sha256>.json.gz'."""
+    return f"samples/{sample_key}.json.gz"
+
+
+def _bulk_configurations_object_name(key: str) -> str:
+    """Configuraciones masivas. Ej: 'bulk-configurations/<key>.ndjson.gz'."""
+    return f"bulk-configurations/{key}.ndjson.gz"
+
+
+def _uvl_import_object_name(job_id: str | UUID) -> str:
+    """UVL subido para importación asíncrona. Ej: 'imports/uvl/<job>.uvl'."""
+    return f"imports/uvl/{job_id}.uvl"
+
+
 def _avatar_object_name(user_id: str | UUID) -> str:
     """Nombre del objeto avatar en MinIO. Ej: 'avatars/abc123.jpg'"""
     return f"avatars/{user_id}.jpg"
@@ -317,6 +347,229 @@ class MinIOClient:
             },
         )
 
+    async def upload_export_artifact(
+        self,
+        artifact_key: str,
+        fileobj: IO[bytes],
+        *,
+        fmt: str = "json",
+        content_type: str = "application/json",
+        metadata: dict[str, str] | None = None,
+    ) -> str:
+        """
+        Sube una exportación bajo su clave de contenido.
+
+        ``fileobj`` se lee por partes de ``EXPORT_UPLOAD_PART_SIZE`` (multipart
+        si supera una parte), así que puede ser un flujo que se va llenando
+        mientras la exportación se genera.
+        """
+        object_name = _export_artifact_object_name(artifact_key, fmt)
+        await asyncio.to_thread(
+            self._client.put_object,
+            self._bucket_primary,
+            object_name,
+            fileobj,
+            -1,
+            content_type=content_type,
+            part_size=EXPORT_UPLOAD_PART_SIZE,
+            metadata={"artifact-key": artifact_key, **(metadata or {})},
+        )
+        log.info("minio.export_artifact.uploaded", object_name=object_name)
+        return object_name
+
+    async def find_export_artifact(
+        self, artifact_key: str, *, fmt: str = "json"
+    ) -> tuple[str, int] | None:
+        """(nombre de objeto, tamaño) de una exportación; None si no existe."""
+        object_name = _export_artifact_object_name(artifact_key, fmt)
+        try:
+            stat = await asyncio.to_thread(
+                self._client.stat_object, self._bucket_primary, object_name
+            )
+        except S3Error:
+            return None
+        return object_name, stat.size
+
+    async def open_export_artifact(self, object_name: str) -> Any | None:
+        """Abre la descarga de una exportación; None si no existe."""
+        try:
+            return await asyncio.to_thread(
+                self._client.get_object, self._bucket_primary, object_name
+            )
+        except S3Error:
+            return None
+
+    async def iter_object(self, response: Any, chunk_size: int) -> AsyncIterator[bytes]:
+        """Lee por trozos una descarga abierta y libera la conexión al acabar."""
+        try:
+            while True:
+                chunk = await asyncio.to_thread(response.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def get_export_artifact_url(self, object_name: str, filename: str) -> str:
+        """URL firmada de descarga de una exportación con su nombre de archivo."""
+        return await asyncio.to_thread(
+            self._client.presigned_get_object,
+            self._bucket_primary,
+            object_name,
+            expires=timedelta(seconds=settings.MINIO_PRESIGN_TTL),
+            response_headers={
+                "response-content-disposition": f'attachment; filename="{filename}"',
+            },
+        )
+
+    async def upload_configuration_sample(
+        self,
+        sample_key: str,
+        sample_bytes: bytes,
+    ) -> str:
+        """Sube una muestra de configuraciones (JSON comprimido con gzip)."""
+        object_name = _sample_object_name(sample_key)
+        await asyncio.to_thread(
+            self._client.put_object,
+            self._bucket_primary,
+            object_name,
+            io.BytesIO(sample_bytes),
+            len(sample_bytes),
+            content_type="application/json",
+            metadata={"content-encoding": "gzip", "sample-key": sample_key},
+        )
+        log.info("minio.sample.uploaded", object_name=object_name)
+        return object_name
+
+    async def download_configuration_sample(self, sample_key: str) -> bytes | None:
+        """Descarga una muestra de configuraciones; None si no existe."""
+        object_name = _sample_object_name(sample_key)
+        return await asyncio.to_thread(self._download_sync, object_name)
+
+    def _download_sync(self, object_name: str) -> bytes | None:
+        try:
+            response = self._client.get_object(self._bucket_primary, object_name)
+        except S3Error:
+            return None
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Configuraciones masivas (NDJSON comprimido, multipart)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    async def upload_bulk_configurations(
+        self,
+        key: str,
+        fileobj: IO[bytes],
+        *,
+        metadata: dict[str, str] | None = None,
+    ) -> str:
+        """
+        Sube un fichero NDJSON comprimido de configuraciones.
+
+        Con ``length=-1`` el SDK lee el fichero por partes de ``BULK_UPLOAD_PART_SIZE``
+        y hace multipart upload, sin cargarlo entero en memoria.
+        """
+        object_name = _bulk_configurations_object_name(key)
+        await asyncio.to_thread(
+            self._client.put_object,
+            self._bucket_primary,
+            object_name,
+            fileobj,
+            -1,
+            content_type="application/x-ndjson",
+            part_size=BULK_UPLOAD_PART_SIZE,
+            metadata={"content-encoding": "gzip", **(metadata or {})},
+        )
+        log.info("minio.bulk_configurations.uploaded", object_name=object_name)
+        return object_name
+
+    async def download_bulk_configurations(
+        self, object_name: str, fileobj: IO[bytes]
+    ) -> None:
+        """Descarga en streaming un fichero de configuraciones sobre ``fileobj``."""
+        await asyncio.to_thread(self._copy_object_sync, object_name, fileobj)
+
+    def _copy_object_sync(self, object_name: str, fileobj: IO[bytes]) -> None:
+        response = self._client.get_object(self._bucket_primary, object_name)
+        try:
+            shutil.copyfileobj(response, fileobj)
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def delete_bulk_configurations(self, object_names: list[str]) -> None:
+        """Elimina ficheros intermedios (p. ej. partes por cubo)."""
+        for object_name in object_names:
+            try:
+                await asyncio.to_thread(
+                    self._client.remove_object, self._bucket_primary, object_name
+                )
+            except S3Error as exc:
+                log.warning(
+                    "minio.bulk_configurations.delete_failed",
+                    object_name=object_name,
+                    error=str(exc),
+                )
+
+    async def get_bulk_configurations_url(self, object_name: str) -> str:
+        """URL firmada de descarga de un fichero de configuraciones."""
+        filename = object_name.rsplit("/", 1)[-1]
+        return await asyncio.to_thread(
+            self._client.presigned_get_object,
+            self._bucket_primary,
+            object_name,
+            expires=timedelta(seconds=settings.MINIO_PRESIGN_TTL),
+            response_headers={
+                "response-content-disposition": f'attachment; filename="{filename}"',
+            },
+        )
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Importaciones UVL asíncronas
+    # ─────────────────────────────────────────────────────────────────────────
+
+    async def upload_uvl_import(self, job_id: str | UUID, fileobj: IO[bytes]) -> str:
+        """
+        Sube el UVL de un job de importación.
+
+        Se sube en streaming (``length=-1``) desde el fichero temporal de la
+        petición, sin leerlo entero en memoria.
+        """
+        object_name = _uvl_import_object_name(job_id)
+        await asyncio.to_thread(
+            self._client.put_object,
+            self._bucket_primary,
+            object_name,
+            fileobj,
+            -1,
+            content_type="text/plain; charset=utf-8",
+            part_size=EXPORT_UPLOAD_PART_SIZE,
+        )
+        log.info("minio.uvl_import.uploaded", object_name=object_name)
+        return object_name
+
+    async def download_uvl_import(self, object_name: str, fileobj: IO[bytes]) -> None:
+        """Descarga en streaming el UVL de un job sobre ``fileobj``."""
+        await asyncio.to_thread(self._copy_object_sync, object_name, fileobj)
+
+    async def delete_uvl_import(self, object_name: str) -> None:
+        try:
+            await asyncio.to_thread(
+                self._client.remove_object, self._bucket_primary, object_name
+            )
+        except S3Error as exc:
+            log.warning(
+                "minio.uvl_import.delete_failed",
+                object_name=object_name,
+                error=str(exc),
+            )
+
     # ─────────────────────────────────────────────────────────────────────────
     # Avatares — bucket de assets
     # ─────────────────────────────────────────────────────────────────────────
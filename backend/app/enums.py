@@ -129,3 +129,4 @@ class GenerationStrategy(str, Enum):
     CP_SAT = "cp_sat"  # CSP/CP-SAT con OR-Tools
     BDD = "bdd"  # BDD/ROBDD para conteo/muestreo
     NSGA2 = "nsga2"  # Multiobjetivo (NSGA-II/MOEA)
+    DIVERSE = "diverse"  # Farthest-point (max-min Jaccard/Hamming) sobre un pool
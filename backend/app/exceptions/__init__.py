@@ -28,6 +28,7 @@ from .feature_model_exceptions import (
     # Version management
     InvalidVersionStateException,
     VersionAlreadyPublishedException,
+    SharedVersionRowsException,
     NoPublishedVersionException,
     # Structural validation
     InvalidTreeStructureException,
@@ -153,6 +154,7 @@ __all__ = [
     "FeatureNotFoundException",
     "InvalidVersionStateException",
     "VersionAlreadyPublishedException",
+    "SharedVersionRowsException",
     "NoPublishedVersionException",
     "InvalidTreeStructureException",
     "MissingRootFeatureException",
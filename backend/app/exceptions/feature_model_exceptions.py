@@ -68,6 +68,17 @@ class VersionAlreadyPublishedException(ConflictException):
         )
 
 
+class SharedVersionRowsException(ConflictException):
+    """Intento de modificar filas que comparten versiones delta."""
+
+    def __init__(self, version_id: str):
+        super().__init__(
+            detail=f"Version '{version_id}' shared its features with delta versions, "
+            "which now store their own copies under new ids. Reload the model "
+            "tree and retry the change."
+        )
+
+
 class NoPublishedVersionException(NotFoundException):
     """No existe ninguna versión publicada del Feature Model."""
 
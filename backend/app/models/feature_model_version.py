@@ -51,6 +51,17 @@ class FeatureModelVersion(BaseTable, FeatureModelVersionBase, table=True):
 
     __tablename__ = "feature_model_versions"
 
+    # ------------------ ALMACENAMIENTO DELTA --------------------------------
+
+    # Versión de la que derivan las filas compartidas (solo versiones delta)
+    base_version_id: Optional[uuid.UUID] = Field(
+        default=None, foreign_key="feature_model_versions.id", index=True
+    )
+    # Cambios por tabla respecto a la base (ver ``fm_version_delta``)
+    structure_delta: Optional[dict[str, Any]] = Field(
+        default=None, sa_column=Column(JSONB)
+    )
+
     # ------------------ RELATIONSHIP ----------------------------------------
 
     feature_model: "FeatureModel" = Relationship(back_populates="versions")
@@ -11,6 +11,7 @@ from app.models import (
     User,
 )
 from app.repositories.base import BaseConstraintRepository
+from app.repositories.feature_model_version import FeatureModelVersionRepository
 
 
 class ConstraintRepository(BaseConstraintRepository):
@@ -23,150 +24,139 @@ class ConstraintRepository(BaseConstraintRepository):
         self,
         data: ConstraintCreate,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_model_version_repo: FeatureModelVersionRepository,
     ) -> Constraint:
         """
         Crea una nueva constraint usando la estrategia "copy-on-write".
         Crea una nueva versión del modelo y añade la constraint en esa versión.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
         """
-
-        def _create_constraint_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Obtener la versión de origen
-            source_version = sync_version_repo.get(
-                version_id=data.feature_model_version_id
-            )
-            self.validate_feature_model_version_exists(source_version)
-
-            # 2. Crear una nueva versión clonando la de origen
-            new_version, _, _ = sync_version_repo.create_new_version_from_existing(
-                source_version=source_version,
-                user=user,
-                return_id_map=True,
-            )
-
-            # 3. Crear la nueva constraint en la nueva versión
-            new_constraint = Constraint(
-                description=data.description,
-                expr_text=data.expr_text,
-                feature_model_version_id=new_version.id,
-                created_by_id=user.id,
-            )
-
-            sync_session.add(new_constraint)
-            sync_session.commit()
-            sync_session.refresh(new_constraint)
-
-            return new_constraint
-
-        # Ejecutar la lógica sync dentro del contexto async
-        result = await self.session.run_sync(_create_constraint_sync)
-        return result
+        # 1. Obtener la versión de origen
+        source_version = await feature_model_version_repo.get(
+            data.feature_model_version_id
+        )
+        self.validate_feature_model_version_exists(source_version)
+
+        # 2. Crear una nueva versión clonando la de origen
+        (
+            new_version,
+            _,
+            _,
+        ) = await feature_model_version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
+
+        # 3. Crear la nueva constraint en la nueva versión
+        new_constraint = Constraint(
+            description=data.description,
+            expr_text=data.expr_text,
+            feature_model_version_id=new_version.id,
+            created_by_id=user.id,
+        )
+
+        self.session.add(new_constraint)
+        await self.session.commit()
+        await self.session.refresh(new_constraint)
+        return new_constraint
 
     async def get(self, constraint_id: UUID) -> Constraint | None:
         """Obtener una constraint por su ID."""
         stmt = select(Constraint).where(Constraint.id == constraint_id)
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        row = result.scalar_one_or_none()
+        if row is None:
+            from app.services.feature_model.fm_version_delta import compact_row_owner
+
+            # Si lo añadió una versión delta, al compactarla tiene fila propia
+            if await compact_row_owner(self.session, "constraints", constraint_id):
+                result = await self.session.execute(stmt)
+                row = result.scalar_one_or_none()
+        return row
 
     async def update(
         self,
         db_constraint: Constraint,
         data: ConstraintUpdate,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_model_version_repo: FeatureModelVersionRepository,
     ) -> Constraint:
         """
         Actualiza una constraint usando estrategia copy-on-write.
         """
-
-        def _update_constraint_sync(sync_session):
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            source_version = db_constraint.feature_model_version
-            new_version, _, _ = sync_version_repo.create_new_version_from_existing(
-                source_version=source_version,
-                user=user,
-                return_id_map=True,
+        _, constraint_to_update = await self._clone_for(
+            db_constraint, user, feature_model_version_repo
+        )
+        if not constraint_to_update:
+            raise RuntimeError(
+                "Could not fetch the cloned constraint from the database."
             )
 
-            statement = select(Constraint).where(
-                Constraint.feature_model_version_id == new_version.id,
-                Constraint.expr_text == db_constraint.expr_text,
-            )
-            constraint_to_update = sync_session.exec(statement).first()
-
-            if not constraint_to_update:
-                raise RuntimeError(
-                    "Could not fetch the cloned constraint from the database."
-                )
-
-            update_data = data.model_dump(exclude_unset=True)
-            constraint_to_update.sqlmodel_update(update_data)
-            constraint_to_update.updated_at = datetime.utcnow()
-            constraint_to_update.updated_by_id = user.id
-            sync_session.add(constraint_to_update)
-            sync_session.commit()
-            sync_session.refresh(constraint_to_update)
-            return constraint_to_update
-
-        result = await self.session.run_sync(_update_constraint_sync)
-        return result
+        update_data = data.model_dump(exclude_unset=True)
+        constraint_to_update.sqlmodel_update(update_data)
+        constraint_to_update.updated_at = datetime.utcnow()
+        constraint_to_update.updated_by_id = user.id
+        self.session.add(constraint_to_update)
+        await self.session.commit()
+        await self.session.refresh(constraint_to_update)
+        return constraint_to_update
 
     async def delete(
         self,
         db_constraint: Constraint,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
-    ) -> None:
+        feature_model_version_repo: FeatureModelVersionRepository,
+    ) -> UUID:
         """
         Elimina una constraint usando la estrategia "copy-on-write".
-        Crea una nueva versión del modelo sin la constraint especificada.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
+        Crea una nueva versión del modelo sin la constraint especificada y devuelve su ID.
         """
+        new_version_id, constraint_to_delete = await self._clone_for(
+            db_constraint, user, feature_model_version_repo
+        )
+        if constraint_to_delete:
+            # Lógica de Soft Delete
+            constraint_to_delete.is_active = False
+            constraint_to_delete.deleted_at = datetime.utcnow()
+            constraint_to_delete.updated_by_id = user.id
+            self.session.add(constraint_to_delete)
 
-        def _delete_constraint_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Crear una nueva versión a partir de la versión actual de la constraint
-            source_version = db_constraint.feature_model_version
-            new_version, _, _ = sync_version_repo.create_new_version_from_existing(
-                source_version=source_version,
-                user=user,
-                return_id_map=True,
-            )
-
-            # 2. Encontrar y eliminar la constraint correspondiente en la nueva versión
-            statement = select(Constraint).where(
-                Constraint.feature_model_version_id == new_version.id,
-                Constraint.expr_text == db_constraint.expr_text,
-            )
-            constraint_to_delete = sync_session.exec(statement).first()
-
-            if constraint_to_delete:
-                # Lógica de Soft Delete
-                constraint_to_delete.is_active = False
-                constraint_to_delete.deleted_at = datetime.utcnow()
-                constraint_to_delete.updated_by_id = user.id
-                sync_session.add(constraint_to_delete)
-                sync_session.commit()
-            else:
-                sync_session.commit()
+        await self.session.commit()
+        return new_version_id
 
-        # Ejecutar la lógica sync dentro del contexto async
-        await self.session.run_sync(_delete_constraint_sync)
+    async def _clone_for(
+        self,
+        db_constraint: Constraint,
+        user: User,
+        feature_model_version_repo: FeatureModelVersionRepository,
+    ) -> tuple[UUID, Constraint | None]:
+        """
+        Clona la versión de la constraint y devuelve el ID de la nueva versión
+        y la copia de la constraint en esa versión.
+        """
+        await feature_model_version_repo.ensure_not_shared(
+            db_constraint.feature_model_version_id
+        )
+        source_version = await feature_model_version_repo.get(
+            db_constraint.feature_model_version_id
+        )
+        self.validate_feature_model_version_exists(source_version)
+        (
+            new_version,
+            _,
+            _,
+        ) = await feature_model_version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
+
+        statement = select(Constraint).where(
+            Constraint.feature_model_version_id == new_version.id,
+            Constraint.expr_text == db_constraint.expr_text,
+        )
+        result = await self.session.execute(statement)
+        return new_version.id, result.scalars().first()
 
     async def exists(self, constraint_id: UUID) -> bool:
         """Verificar si una constraint existe."""
@@ -178,6 +168,9 @@ class ConstraintRepository(BaseConstraintRepository):
         db_constraint.is_active = True
         self.session.add(db_constraint)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_constraint.feature_model_version_id
+        )
         await self.session.refresh(db_constraint)
         return db_constraint
 
@@ -186,5 +179,8 @@ class ConstraintRepository(BaseConstraintRepository):
         db_constraint.is_active = False
         self.session.add(db_constraint)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_constraint.feature_model_version_id
+        )
         await self.session.refresh(db_constraint)
         return db_constraint
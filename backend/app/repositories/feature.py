@@ -1,17 +1,23 @@
 from uuid import UUID
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import delete, literal, or_, true, tuple_, update
+from sqlalchemy.orm import aliased
 from sqlmodel import select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models import (
     Feature,
+    FeatureGroup,
     FeatureCreate,
+    FeatureRelation,
+    FeatureTagLink,
     FeatureUpdate,
     FeaturePublicWithChildren,
     User,
 )
 from app.repositories.base import BaseFeatureRepository
+from app.repositories.feature_model_version import FeatureModelVersionRepository
 
 
 class FeatureRepository(BaseFeatureRepository):
@@ -24,59 +30,53 @@ class FeatureRepository(BaseFeatureRepository):
         self,
         data: FeatureCreate,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_model_version_repo: Optional[FeatureModelVersionRepository] = None,
     ) -> Feature:
         """
         Crea una nueva feature usando la estrategia "copy-on-write".
         Crea una nueva versión del modelo y añade la nueva feature en esa versión.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
         """
+        version_repo = feature_model_version_repo or FeatureModelVersionRepository(
+            self.session
+        )
 
-        def _create_feature_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            # Crear instancia del repositorio sync
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Obtener la versión de origen
-            source_version = sync_version_repo.get(
-                version_id=data.feature_model_version_id
-            )
-            if not source_version:
-                raise ValueError("Source Feature Model Version not found.")
-
-            # 2. Crear una nueva versión clonando la de origen
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            # 3. Preparar los datos de la nueva feature
-            new_feature_data = data.model_dump()
-            new_feature_data["feature_model_version_id"] = new_version.id
-
-            # 4. Si hay un parent_id, re-mapearlo al ID correspondiente en la nueva versión
-            if data.parent_id:
-                if data.parent_id not in old_to_new_id_map:
-                    raise ValueError("Parent feature not found in the source version.")
-                new_feature_data["parent_id"] = old_to_new_id_map[data.parent_id]
+        # 1. Obtener la versión de origen
+        source_version = await version_repo.get(data.feature_model_version_id)
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+
+        # 2. Crear una nueva versión clonando la de origen
+        (
+            new_version,
+            old_to_new_feature_id_map,
+            old_to_new_group_id_map,
+        ) = await version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
 
-            # 5. Crear la nueva feature y guardarla
-            db_obj = Feature.model_validate(new_feature_data)
-            db_obj.created_by_id = user.id
-            sync_session.add(db_obj)
-            sync_session.commit()
-            sync_session.refresh(db_obj)
-            return db_obj
+        # 3. Preparar los datos de la nueva feature
+        new_feature_data = data.model_dump()
+        new_feature_data["feature_model_version_id"] = new_version.id
 
-        # Ejecutar la lógica sync dentro del contexto async
-        result = await self.session.run_sync(_create_feature_sync)
-        return result
+        # 4. Re-mapear padre y grupo a los IDs correspondientes en la nueva versión
+        if data.parent_id:
+            if data.parent_id not in old_to_new_feature_id_map:
+                raise ValueError("Parent feature not found in the source version.")
+            new_feature_data["parent_id"] = old_to_new_feature_id_map[data.parent_id]
+        if data.group_id:
+            if data.group_id not in old_to_new_group_id_map:
+                raise ValueError("Group not found in the source version.")
+            new_feature_data["group_id"] = old_to_new_group_id_map[data.group_id]
+
+        # 5. Crear la nueva feature y guardarla
+        db_obj = Feature.model_validate(new_feature_data)
+        db_obj.created_by_id = user.id
+        self.session.add(db_obj)
+        await self.session.commit()
+        await self.session.refresh(db_obj)
+        return db_obj
 
     async def get(self, feature_id: UUID) -> Feature | None:
         """Obtener una feature por ID (solo activas)."""
@@ -84,16 +84,42 @@ class FeatureRepository(BaseFeatureRepository):
             Feature.id == feature_id, Feature.is_active == True
         )
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        feature = result.scalar_one_or_none()
+        if feature is None and await self.ensure_row_stored(feature_id):
+            result = await self.session.execute(stmt)
+            feature = result.scalar_one_or_none()
+        return feature
+
+    async def ensure_stored(self, feature_model_version_id: UUID) -> None:
+        """
+        Compacta la versión si es delta antes de consultarla por SQL: sus
+        features no están en la tabla, las comparte con su versión base.
+        """
+        from app.services.feature_model.fm_version_delta import ensure_full_version
+
+        await ensure_full_version(self.session, feature_model_version_id)
+
+    async def ensure_row_stored(self, feature_id: UUID) -> bool:
+        """
+        Compacta la versión delta que añadió la feature si no tiene fila:
+        su id aparece en el árbol de esa versión.
+        """
+        from app.services.feature_model.fm_version_delta import compact_row_owner
+
+        return await compact_row_owner(self.session, "features", feature_id)
 
     async def get_any(self, feature_id: UUID) -> Feature | None:
         """Obtener una feature por ID incluyendo inactivas."""
-        return await self.session.get(Feature, feature_id)
+        feature = await self.session.get(Feature, feature_id)
+        if feature is None and await self.ensure_row_stored(feature_id):
+            feature = await self.session.get(Feature, feature_id)
+        return feature
 
     async def get_by_version(
         self, feature_model_version_id: UUID, skip: int = 0, limit: int = 100
     ) -> list[Feature]:
         """Obtener todas las features de una versión de modelo específica."""
+        await self.ensure_stored(feature_model_version_id)
         stmt = (
             select(Feature)
             .where(Feature.is_active == True)
@@ -131,6 +157,7 @@ class FeatureRepository(BaseFeatureRepository):
             stmt = stmt.where(Feature.is_active == True)
 
         if feature_model_version_id:
+            await self.ensure_stored(feature_model_version_id)
             stmt = stmt.where(
                 Feature.feature_model_version_id == feature_model_version_id
             )
@@ -152,139 +179,156 @@ class FeatureRepository(BaseFeatureRepository):
         db_feature: Feature,
         data: FeatureUpdate,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
-        feature_group_repo: "FeatureGroupRepository",
+        feature_model_version_repo: Optional[FeatureModelVersionRepository] = None,
     ) -> Feature:
         """
         Actualiza una feature usando la estrategia "copy-on-write".
         Crea una nueva versión del modelo y aplica el cambio en esa nueva versión.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
         """
         # Validar parent_id no sea el mismo feature
         if data.parent_id:
             self.validate_parent_not_self(db_feature.id, data.parent_id)
 
-        def _update_feature_sync(sync_session):
-            # Importar repositorios sync dentro de la función sync
-            from app.repositories import (
-                FeatureModelVersionRepository,
-                FeatureGroupRepository,
-            )
-
-            # Crear instancias de repositorios sync
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-            sync_group_repo = FeatureGroupRepository(sync_session)
-
-            # 1. Crear una nueva versión a partir de la versión actual de la feature
-            source_version = db_feature.feature_model_version
-            (
-                new_version,
-                old_to_new_feature_id_map,
-                old_to_new_group_id_map,
-            ) = sync_version_repo.create_new_version_from_existing(
-                source_version=source_version,
-                user=user,
-                return_id_map=True,
-            )
-
-            # 2. Encontrar la feature correspondiente en la nueva versión
-            new_feature_id = old_to_new_feature_id_map.get(db_feature.id)
-            if not new_feature_id:
-                raise RuntimeError(
-                    "Failed to find the corresponding feature in the new version."
-                )
+        version_repo = feature_model_version_repo or FeatureModelVersionRepository(
+            self.session
+        )
 
-            # Obtener la feature de la nueva versión usando una query sync
+        # 1. Crear una nueva versión a partir de la versión actual de la feature
+        source_version_id = db_feature.feature_model_version_id
+        await version_repo.ensure_not_shared(source_version_id)
+        source_version = await version_repo.get(source_version_id)
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+        (
+            new_version,
+            old_to_new_feature_id_map,
+            old_to_new_group_id_map,
+        ) = await version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
 
-            stmt = select(Feature).where(
-                Feature.id == new_feature_id, Feature.is_active == True
+        # 2. Encontrar la feature correspondiente en la nueva versión
+        new_feature_id = old_to_new_feature_id_map.get(db_feature.id)
+        if not new_feature_id:
+            raise RuntimeError(
+                "Failed to find the corresponding feature in the new version."
             )
-            new_feature_to_update = sync_session.exec(stmt).first()
+        new_feature_to_update = await self.session.get(Feature, new_feature_id)
+        if not new_feature_to_update:
+            raise RuntimeError("Could not fetch the cloned feature from the database.")
 
-            if not new_feature_to_update:
-                raise RuntimeError(
-                    "Could not fetch the cloned feature from the database."
-                )
-
-            # 3. Aplicar la actualización
-            update_data = data.model_dump(exclude_unset=True)
+        # 3. Aplicar la actualización
+        update_data = data.model_dump(exclude_unset=True)
 
-            # 3.1. Re-mapear parent_id si se está cambiando
-            if "parent_id" in update_data and update_data["parent_id"]:
-                update_data["parent_id"] = old_to_new_feature_id_map.get(
-                    update_data["parent_id"]
-                )
+        # 3.1. Re-mapear parent_id si se está cambiando
+        if "parent_id" in update_data and update_data["parent_id"]:
+            update_data["parent_id"] = old_to_new_feature_id_map.get(
+                update_data["parent_id"]
+            )
 
-            # 3.2. Re-mapear group_id si se está cambiando
-            if "group_id" in update_data and update_data["group_id"]:
-                old_group = sync_group_repo.get(group_id=update_data["group_id"])
-                if (
-                    not old_group
-                    or old_group.feature_model_version_id != source_version.id
-                ):
-                    raise ValueError(
-                        "Group not found or does not belong to the same model version."
-                    )
-                update_data["group_id"] = old_to_new_group_id_map.get(
-                    update_data["group_id"]
+        # 3.2. Re-mapear group_id si se está cambiando
+        if "group_id" in update_data and update_data["group_id"]:
+            old_group = await self.session.get(FeatureGroup, update_data["group_id"])
+            if not old_group or old_group.feature_model_version_id != source_version_id:
+                raise ValueError(
+                    "Group not found or does not belong to the same model version."
                 )
+            update_data["group_id"] = old_to_new_group_id_map.get(
+                update_data["group_id"]
+            )
 
-            # 4. Aplicar los datos actualizados y guardar
-            new_feature_to_update.sqlmodel_update(update_data)
-            new_feature_to_update.updated_at = datetime.utcnow()
-            new_feature_to_update.updated_by_id = user.id
-            sync_session.add(new_feature_to_update)
-            sync_session.commit()
-            sync_session.refresh(new_feature_to_update)
-
-            return new_feature_to_update
-
-        # Ejecutar la lógica sync dentro del contexto async
-        result = await self.session.run_sync(_update_feature_sync)
-        return result
+        # 4. Aplicar los datos actualizados y guardar
+        new_feature_to_update.sqlmodel_update(update_data)
+        new_feature_to_update.updated_at = datetime.utcnow()
+        new_feature_to_update.updated_by_id = user.id
+        self.session.add(new_feature_to_update)
+        await self.session.commit()
+        await self.session.refresh(new_feature_to_update)
+        return new_feature_to_update
 
     async def delete(
         self,
         db_feature: Feature,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
-    ) -> None:
+        feature_model_version_repo: Optional[FeatureModelVersionRepository] = None,
+    ) -> UUID:
         """
         Elimina una feature usando la estrategia "copy-on-write".
-        Crea una nueva versión del modelo sin la feature especificada.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
+        Crea una nueva versión del modelo sin la feature (ni su subárbol) y
+        devuelve su ID.
         """
+        version_repo = feature_model_version_repo or FeatureModelVersionRepository(
+            self.session
+        )
 
-        def _delete_feature_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
+        await version_repo.ensure_not_shared(db_feature.feature_model_version_id)
+        source_version = await version_repo.get(db_feature.feature_model_version_id)
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+        (
+            new_version,
+            old_to_new_feature_id_map,
+            _,
+        ) = await version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
 
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
+        # Eliminar la copia de la feature en la nueva versión
+        new_feature_id = old_to_new_feature_id_map.get(db_feature.id)
+        if new_feature_id:
+            await self._delete_subtree(new_feature_id)
 
-            source_version = db_feature.feature_model_version
-            new_version = sync_version_repo.create_new_version_from_existing(
-                source_version=source_version, user=user
-            )
+        await self.session.commit()
+        return new_version.id
 
-            # Encontrar y eliminar la feature correspondiente en la nueva versión
-            feature_to_delete = next(
-                (f for f in new_version.features if f.name == db_feature.name), None
+    async def _delete_subtree(self, feature_id: UUID) -> None:
+        """
+        Borra una feature y sus descendientes, con sus grupos, relaciones y
+        tags. Cada tabla se borra en una sola sentencia, así que las claves
+        padre-hijo dentro del subárbol nunca quedan colgando.
+        """
+        subtree = (
+            select(Feature.id)
+            .where(Feature.id == feature_id)
+            .cte(name="deleted_subtree", recursive=True)
+        )
+        subtree = subtree.union_all(
+            select(Feature.id).where(Feature.parent_id == subtree.c.id)
+        )
+        result = await self.session.execute(select(subtree.c.id))
+        ids = list(result.scalars().all())
+
+        await self.session.execute(
+            delete(FeatureRelation).where(
+                or_(
+                    FeatureRelation.source_feature_id.in_(ids),
+                    FeatureRelation.target_feature_id.in_(ids),
+                )
             )
-            if feature_to_delete:
-                sync_session.delete(feature_to_delete)
-
-            sync_session.commit()
-
-        # Ejecutar la lógica sync dentro del contexto async
-        await self.session.run_sync(_delete_feature_sync)
+        )
+        await self.session.execute(
+            delete(FeatureTagLink).where(FeatureTagLink.feature_id.in_(ids))
+        )
+        await self.session.execute(
+            update(Feature).where(Feature.id.in_(ids)).values(group_id=None)
+        )
+        await self.session.execute(
+            delete(FeatureGroup).where(FeatureGroup.parent_feature_id.in_(ids))
+        )
+        await self.session.execute(delete(Feature).where(Feature.id.in_(ids)))
 
     async def activate(self, db_feature: Feature) -> Feature:
         """Activar una feature."""
         db_feature.is_active = True
         self.session.add(db_feature)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_feature.feature_model_version_id
+        )
         await self.session.refresh(db_feature)
         return db_feature
 
@@ -293,6 +337,9 @@ class FeatureRepository(BaseFeatureRepository):
         db_feature.is_active = False
         self.session.add(db_feature)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_feature.feature_model_version_id
+        )
         await self.session.refresh(db_feature)
         return db_feature
 
@@ -301,12 +348,159 @@ class FeatureRepository(BaseFeatureRepository):
         feature = await self.get(feature_id)
         return feature is not None
 
+    async def get_depth(
+        self, feature_id: UUID, feature_model_version_id: UUID
+    ) -> int | None:
+        """
+        Profundidad de una feature en el árbol (la raíz tiene profundidad 0).
+
+        Sube por ``parent_id`` con un CTE recursivo en una sola consulta,
+        limitado a las filas de ``feature_model_version_id``. None si la
+        feature no pertenece a la versión.
+        """
+        await self.ensure_stored(feature_model_version_id)
+        ancestors = (
+            select(Feature.id, Feature.parent_id, literal(0).label("depth"))
+            .where(
+                Feature.id == feature_id,
+                Feature.feature_model_version_id == feature_model_version_id,
+            )
+            .cte(name="ancestors", recursive=True)
+        )
+        ancestors = ancestors.union_all(
+            select(Feature.id, Feature.parent_id, (ancestors.c.depth + 1)).where(
+                Feature.id == ancestors.c.parent_id,
+                Feature.feature_model_version_id == feature_model_version_id,
+            )
+        )
+        result = await self.session.execute(select(func.max(ancestors.c.depth)))
+        return result.scalar_one_or_none()
+
+    async def get_root_id(self, feature_model_version_id: UUID) -> UUID | None:
+        """ID de la feature raíz activa de una versión."""
+        await self.ensure_stored(feature_model_version_id)
+        stmt = (
+            select(Feature.id)
+            .where(
+                Feature.feature_model_version_id == feature_model_version_id,
+                Feature.parent_id == None,
+                Feature.is_active == True,
+            )
+            .limit(1)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_subtree_rows(
+        self,
+        feature_model_version_id: UUID,
+        root_id: UUID,
+        depth: int,
+        page_limit: int,
+        after: Optional[tuple[str, UUID]] = None,
+    ) -> list[dict]:
+        """
+        Filas planas del subárbol de ``root_id`` con un CTE recursivo.
+
+        Cada nivel baja como máximo ``depth`` veces y trae, por nodo, los
+        primeros ``page_limit`` hijos activos en orden ``(name, id)`` mediante
+        un ``LATERAL ... LIMIT``, sin cargar el grafo completo de la versión.
+
+        Args:
+            feature_model_version_id: Versión a la que pertenece la raíz
+            root_id: Feature raíz del subárbol
+            depth: Niveles a bajar bajo la raíz
+            page_limit: Hijos por nodo (página + 1 para detectar si hay más)
+            after: Keyset ``(name, id)`` a partir del cual paginar los hijos
+                de la raíz
+
+        Returns:
+            Filas con ``level``, ``position`` entre hermanos, ``children_count``
+            y datos del grupo de cada feature
+        """
+        await self.ensure_stored(feature_model_version_id)
+        anchor = select(
+            Feature.id,
+            Feature.parent_id,
+            Feature.name,
+            literal(0).label("level"),
+        ).where(
+            Feature.id == root_id,
+            Feature.feature_model_version_id == feature_model_version_id,
+            Feature.is_active == True,
+        )
+        subtree = anchor.cte(name="subtree", recursive=True)
+
+        child = aliased(Feature)
+        page = select(child.id, child.parent_id, child.name).where(
+            child.parent_id == subtree.c.id, child.is_active == True
+        )
+        if after is not None:
+            page = page.where(
+                or_(
+                    subtree.c.level > 0,
+                    tuple_(child.name, child.id) > tuple_(*after),
+                )
+            )
+        page = page.order_by(child.name, child.id).limit(page_limit).lateral("page")
+
+        subtree = subtree.union_all(
+            select(page.c.id, page.c.parent_id, page.c.name, subtree.c.level + 1)
+            .select_from(subtree.join(page, true()))
+            .where(subtree.c.level < depth)
+        )
+
+        counted = aliased(Feature)
+        children_count = (
+            select(func.count())
+            .select_from(counted)
+            .where(counted.parent_id == subtree.c.id, counted.is_active == True)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                Feature.id,
+                Feature.parent_id,
+                Feature.name,
+                Feature.type,
+                Feature.properties,
+                subtree.c.level,
+                func.row_number()
+                .over(
+                    partition_by=subtree.c.parent_id,
+                    order_by=(subtree.c.name, subtree.c.id),
+                )
+                .label("position"),
+                children_count.label("children_count"),
+                FeatureGroup.id.label("group_id"),
+                FeatureGroup.group_type,
+                FeatureGroup.min_cardinality,
+                FeatureGroup.max_cardinality,
+            )
+            .select_from(subtree)
+            .join(Feature, Feature.id == subtree.c.id)
+            .outerjoin(FeatureGroup, FeatureGroup.id == Feature.group_id)
+        )
+        result = await self.session.execute(stmt)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def has_children(self, feature_id: UUID) -> bool:
+        """Indica si una feature tiene hijas activas."""
+        stmt = (
+            select(Feature.id)
+            .where(Feature.parent_id == feature_id, Feature.is_active == True)
+            .limit(1)
+        )
+        result = await self.session.execute(stmt)
+        return result.first() is not None
+
     async def count(self, feature_model_version_id: Optional[UUID] = None) -> int:
         """Contar el número total de features activas, opcionalmente filtrando por versión."""
         stmt = (
             select(func.count()).select_from(Feature).where(Feature.is_active == True)
         )
         if feature_model_version_id:
+            await self.ensure_stored(feature_model_version_id)
             stmt = stmt.where(
                 Feature.feature_model_version_id == feature_model_version_id
             )
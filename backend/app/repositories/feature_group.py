@@ -9,9 +9,10 @@ from app.models import (
     FeatureGroupCreate,
     FeatureGroupUpdate,
     User,
-    Feature,
 )
 from app.repositories.base import BaseFeatureGroupRepository
+from app.repositories.feature import FeatureRepository
+from app.repositories.feature_model_version import FeatureModelVersionRepository
 
 
 class FeatureGroupRepository(BaseFeatureGroupRepository):
@@ -24,190 +25,155 @@ class FeatureGroupRepository(BaseFeatureGroupRepository):
         self,
         data: FeatureGroupCreate,
         user: User,
-        feature_repo: "FeatureRepository",
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_repo: FeatureRepository,
+        feature_model_version_repo: FeatureModelVersionRepository,
     ) -> FeatureGroup:
         """
         Crea un nuevo grupo de características usando la estrategia "copy-on-write".
         Crea una nueva versión del modelo y añade el grupo en esa versión.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
         """
-
-        def _create_group_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Validar que la feature padre existe (usando get síncrono dentro del contexto)
-            stmt = select(Feature).where(
-                Feature.id == data.parent_feature_id, Feature.is_active == True
-            )
-            parent_feature = sync_session.exec(stmt).first()
-            self.validate_parent_feature_exists(parent_feature)
-
-            # 2. Crear una nueva versión clonando la de origen (la de la feature padre)
-            source_version = parent_feature.feature_model_version
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            # 3. Obtener el nuevo ID de la feature padre en la versión clonada
-            new_parent_feature_id = old_to_new_id_map.get(data.parent_feature_id)
-            if not new_parent_feature_id:
-                raise RuntimeError("Cloned parent feature could not be found.")
-
-            # 4. Crear el nuevo grupo en la nueva versión
-            new_group = FeatureGroup(
-                group_type=data.group_type,
-                parent_feature_id=new_parent_feature_id,
-                min_cardinality=data.min_cardinality,
-                max_cardinality=data.max_cardinality,
-                feature_model_version_id=new_version.id,
-                created_by_id=user.id,
-            )
-
-            sync_session.add(new_group)
-            sync_session.commit()
-            sync_session.refresh(new_group)
-
-            return new_group
-
-        # Ejecutar la lógica sync dentro del contexto async
-        result = await self.session.run_sync(_create_group_sync)
-        return result
+        # 1. Validar que la feature padre existe
+        parent_feature = await feature_repo.get(data.parent_feature_id)
+        self.validate_parent_feature_exists(parent_feature)
+
+        # 2. Crear una nueva versión clonando la de origen (la de la feature padre)
+        source_version = await feature_model_version_repo.get(
+            parent_feature.feature_model_version_id
+        )
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+        (
+            new_version,
+            old_to_new_id_map,
+            _,
+        ) = await feature_model_version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
+
+        # 3. Obtener el nuevo ID de la feature padre en la versión clonada
+        new_parent_feature_id = old_to_new_id_map.get(data.parent_feature_id)
+        if not new_parent_feature_id:
+            raise RuntimeError("Cloned parent feature could not be found.")
+
+        # 4. Crear el nuevo grupo en la nueva versión
+        new_group = FeatureGroup(
+            group_type=data.group_type,
+            parent_feature_id=new_parent_feature_id,
+            min_cardinality=data.min_cardinality,
+            max_cardinality=data.max_cardinality,
+            feature_model_version_id=new_version.id,
+            created_by_id=user.id,
+        )
+
+        self.session.add(new_group)
+        await self.session.commit()
+        await self.session.refresh(new_group)
+        return new_group
 
     async def get(self, group_id: UUID) -> FeatureGroup | None:
         """Obtener un grupo de características por su ID."""
         stmt = select(FeatureGroup).where(FeatureGroup.id == group_id)
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        row = result.scalar_one_or_none()
+        if row is None:
+            from app.services.feature_model.fm_version_delta import compact_row_owner
+
+            # Si lo añadió una versión delta, al compactarla tiene fila propia
+            if await compact_row_owner(self.session, "feature_groups", group_id):
+                result = await self.session.execute(stmt)
+                row = result.scalar_one_or_none()
+        return row
 
     async def update(
         self,
         db_group: FeatureGroup,
         data: FeatureGroupUpdate,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_model_version_repo: FeatureModelVersionRepository,
     ) -> FeatureGroup:
         """
         Actualiza un grupo usando estrategia copy-on-write.
         """
-
-        def _update_group_sync(sync_session):
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            source_version = db_group.feature_model_version
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            original_parent_id = db_group.parent_feature_id
-            new_parent_id = old_to_new_id_map.get(original_parent_id)
-            if not new_parent_id:
-                raise RuntimeError("Could not map old parent feature ID to a new one.")
-
-            statement = select(FeatureGroup).where(
-                FeatureGroup.feature_model_version_id == new_version.id,
-                FeatureGroup.parent_feature_id == new_parent_id,
-                FeatureGroup.group_type == db_group.group_type,
-            )
-            group_to_update = sync_session.exec(statement).first()
-
-            if not group_to_update:
-                raise RuntimeError(
-                    "Could not fetch the cloned group from the database."
-                )
-
-            update_data = data.model_dump(exclude_unset=True)
-
-            if "parent_feature_id" in update_data and update_data["parent_feature_id"]:
-                mapped_parent_id = old_to_new_id_map.get(
-                    update_data["parent_feature_id"]
-                )
-                if not mapped_parent_id:
-                    raise ValueError("Parent feature not found in the source version.")
-                update_data["parent_feature_id"] = mapped_parent_id
-
-            group_to_update.sqlmodel_update(update_data)
-            group_to_update.updated_at = datetime.utcnow()
-            group_to_update.updated_by_id = user.id
-            sync_session.add(group_to_update)
-            sync_session.commit()
-            sync_session.refresh(group_to_update)
-            return group_to_update
-
-        result = await self.session.run_sync(_update_group_sync)
-        return result
+        new_version_id, old_to_new_id_map, new_group_id = await self._clone_for(
+            db_group, user, feature_model_version_repo
+        )
+        group_to_update = await self.session.get(FeatureGroup, new_group_id)
+        if not group_to_update:
+            raise RuntimeError("Could not fetch the cloned group from the database.")
+
+        update_data = data.model_dump(exclude_unset=True)
+
+        if "parent_feature_id" in update_data and update_data["parent_feature_id"]:
+            mapped_parent_id = old_to_new_id_map.get(update_data["parent_feature_id"])
+            if not mapped_parent_id:
+                raise ValueError("Parent feature not found in the source version.")
+            update_data["parent_feature_id"] = mapped_parent_id
+
+        group_to_update.sqlmodel_update(update_data)
+        group_to_update.updated_at = datetime.utcnow()
+        group_to_update.updated_by_id = user.id
+        self.session.add(group_to_update)
+        await self.session.commit()
+        await self.session.refresh(group_to_update)
+        return group_to_update
 
     async def delete(
         self,
         db_group: FeatureGroup,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
-    ) -> None:
+        feature_model_version_repo: FeatureModelVersionRepository,
+    ) -> UUID:
         """
         Elimina un grupo de características usando la estrategia "copy-on-write".
-        Crea una nueva versión del modelo sin el grupo especificado.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
+        Crea una nueva versión del modelo sin el grupo especificado y devuelve su ID.
         """
+        new_version_id, _, new_group_id = await self._clone_for(
+            db_group, user, feature_model_version_repo
+        )
+        group_to_delete = await self.session.get(FeatureGroup, new_group_id)
+        if group_to_delete:
+            # Lógica de Soft Delete
+            group_to_delete.is_active = False
+            group_to_delete.deleted_at = datetime.utcnow()
+            group_to_delete.updated_by_id = user.id
+            self.session.add(group_to_delete)
 
-        def _delete_group_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Crear una nueva versión a partir de la versión actual del grupo
-            source_version = db_group.feature_model_version
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            # 2. Encontrar el grupo correspondiente en la nueva versión para eliminarlo.
-            # Para ello, buscamos un grupo con el mismo tipo y cuyo padre sea el clon del padre original.
-            original_parent_id = db_group.parent_feature_id
-            new_parent_id = old_to_new_id_map.get(original_parent_id)
-
-            if not new_parent_id:
-                raise RuntimeError("Could not map old parent feature ID to a new one.")
-
-            statement = select(FeatureGroup).where(
-                FeatureGroup.feature_model_version_id == new_version.id,
-                FeatureGroup.parent_feature_id == new_parent_id,
-                FeatureGroup.group_type == db_group.group_type,
-            )
-            group_to_delete = sync_session.exec(statement).first()
-
-            if group_to_delete:
-                # Lógica de Soft Delete
-                group_to_delete.is_active = False
-                group_to_delete.deleted_at = datetime.utcnow()
-                group_to_delete.updated_by_id = user.id
-                sync_session.add(group_to_delete)
-                sync_session.commit()
-            else:
-                # Esto no debería pasar. Hacemos commit de la nueva versión de todas formas.
-                sync_session.commit()
-
-        # Ejecutar la lógica sync dentro del contexto async
-        await self.session.run_sync(_delete_group_sync)
+        await self.session.commit()
+        return new_version_id
+
+    async def _clone_for(
+        self,
+        db_group: FeatureGroup,
+        user: User,
+        feature_model_version_repo: FeatureModelVersionRepository,
+    ) -> tuple[UUID, dict[UUID, UUID], UUID]:
+        """
+        Clona la versión del grupo y devuelve el ID de la nueva versión, el mapa
+        de features y el ID de la copia del grupo.
+        """
+        await feature_model_version_repo.ensure_not_shared(
+            db_group.feature_model_version_id
+        )
+        source_version = await feature_model_version_repo.get(
+            db_group.feature_model_version_id
+        )
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+        (
+            new_version,
+            old_to_new_id_map,
+            old_to_new_group_id_map,
+        ) = await feature_model_version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
+        new_group_id = old_to_new_group_id_map.get(db_group.id)
+        if not new_group_id:
+            raise RuntimeError("Could not map old group ID to a new one.")
+        return new_version.id, old_to_new_id_map, new_group_id
 
     async def exists(self, group_id: UUID) -> bool:
         """Verificar si un grupo existe."""
@@ -219,6 +185,9 @@ class FeatureGroupRepository(BaseFeatureGroupRepository):
         db_group.is_active = True
         self.session.add(db_group)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_group.feature_model_version_id
+        )
         await self.session.refresh(db_group)
         return db_group
 
@@ -227,5 +196,8 @@ class FeatureGroupRepository(BaseFeatureGroupRepository):
         db_group.is_active = False
         self.session.add(db_group)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_group.feature_model_version_id
+        )
         await self.session.refresh(db_group)
         return db_group
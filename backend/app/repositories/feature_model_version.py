@@ -1,19 +1,66 @@
 import uuid
-from typing import Optional
-from sqlalchemy.orm import selectinload
+from datetime import datetime
+from typing import Collection, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models import (
+    Constraint,
     Feature,
+    FeatureGroup,
     FeatureModel,
     FeatureModelVersion,
     FeatureRelation,
+    FeatureTagLink,
     User,
 )
 from app.enums import ModelStatus
 from app.repositories.base import BaseFeatureModelVersionRepository
 
+# Partes opcionales de la carga completa de una versión
+COMPLETE_LOAD_PARTS = frozenset(
+    {"hierarchy", "tags", "groups", "relations", "constraints", "configurations"}
+)
+
+# Tablas que se copian al clonar una versión, en orden de inserción
+CLONED_TABLES = {
+    "features": Feature,
+    "feature_groups": FeatureGroup,
+    "feature_relations": FeatureRelation,
+    "constraints": Constraint,
+}
+
+# Columnas que referencian filas de la propia versión (tabla de su id). El
+# ``group_id`` de las features se asigna después de copiar los grupos.
+CLONE_REMAPPED_COLUMNS = {
+    "features": {"parent_id": "features"},
+    "feature_groups": {"parent_feature_id": "features"},
+    "feature_relations": {
+        "source_feature_id": "features",
+        "target_feature_id": "features",
+    },
+    "constraints": {},
+}
+
+# Columnas que no se copian: se rellenan para la fila nueva o quedan a NULL
+CLONE_RESET_COLUMNS = frozenset({"updated_at", "updated_by_id", "group_id"})
+
+# Tabla temporal de remapeo id origen -> id copia (vive hasta el commit)
+CLONE_ID_MAP_DDL = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS version_clone_id_map ("
+    "kind varchar NOT NULL, old_id uuid NOT NULL, new_id uuid NOT NULL, "
+    "PRIMARY KEY (kind, old_id)) ON COMMIT DROP"
+)
+clone_id_map = sa.table(
+    "version_clone_id_map",
+    sa.column("kind", sa.String),
+    sa.column("old_id", sa.Uuid),
+    sa.column("new_id", sa.Uuid),
+)
+
 
 class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
     """Implementación asíncrona del repositorio de versiones de feature models."""
@@ -58,6 +105,26 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def ensure_not_shared(self, version_id: uuid.UUID) -> None:
+        """
+        Rechaza un cambio sobre filas de ``version_id`` que comparten
+        versiones delta, tras compactarlas (ver ``fm_version_delta``).
+        """
+        from app.services.feature_model.fm_version_delta import ensure_not_shared
+
+        await ensure_not_shared(self.session, version_id)
+
+    async def discard_compiled_structure(self, version_id: uuid.UUID) -> None:
+        """
+        Descarta la estructura compilada de ``version_id`` tras modificar en
+        sitio sus filas (ver ``fm_version_delta``).
+        """
+        from app.services.feature_model.fm_version_delta import (
+            discard_compiled_structure,
+        )
+
+        await discard_compiled_structure(self.session, version_id)
+
     async def create_new_version_from_existing(
         self,
         source_version: FeatureModelVersion,
@@ -73,32 +140,242 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
         Crea una nueva versión de un modelo de características, clonando todas las
         features y relaciones de una versión de origen. (Copy-On-Write)
 
-        Nota: Utiliza run_sync para ejecutar la lógica sync del repositorio.
+        La copia se hace en la base de datos (ver ``clone_version_structure``)
+        dentro de la transacción de la sesión, sin confirmarla.
+
+        Returns:
+            La versión nueva o, con ``return_id_map``, la versión y los mapas
+            id origen -> id copia de features y de grupos
         """
+        new_version = FeatureModelVersion(
+            feature_model_id=source_version.feature_model_id,
+            version_number=(
+                await self.get_latest_version_number(source_version.feature_model_id)
+                + 1
+            ),
+            status=ModelStatus.DRAFT,
+            uvl_content=source_version.uvl_content,
+            created_by_id=user.id if user else None,
+        )
+        self.session.add(new_version)
+        await self.session.flush()
+
+        id_maps = await self.clone_version_structure(
+            source_version_id=source_version.id,
+            target_version_id=new_version.id,
+            user_id=user.id if user else None,
+            return_id_map=return_id_map,
+        )
+        if not return_id_map:
+            return new_version
+        return new_version, id_maps["features"], id_maps["feature_groups"]
+
+    async def clone_version_structure(
+        self,
+        source_version_id: uuid.UUID,
+        target_version_id: uuid.UUID,
+        user_id: Optional[uuid.UUID] = None,
+        return_id_map: bool = False,
+    ) -> dict[str, dict[uuid.UUID, uuid.UUID]] | None:
+        """
+        Copia features, grupos, relaciones, constraints y tags de features de
+        una versión a otra con ``INSERT ... SELECT``.
+
+        Los ids nuevos se generan en el servidor (``gen_random_uuid()``) en
+        una tabla temporal de remapeo que traduce también las referencias
+        entre filas (padre, grupo, extremos de relaciones). El número de
+        sentencias no depende del tamaño de la versión.
+
+        Returns:
+            Con ``return_id_map``, mapas id origen -> id copia por tabla
+            (claves de ``CLONED_TABLES``); si no, None
+        """
+        source_version = await self.session.get(FeatureModelVersion, source_version_id)
+        if source_version is not None and source_version.base_version_id is not None:
+            return await self._clone_delta_version_structure(
+                source_version_id, target_version_id, user_id, return_id_map
+            )
 
-        def _create_version_sync(sync_session):
-            from app.repositories.feature_model_version import (
-                FeatureModelVersionRepository,
+        await self.session.execute(sa.text(CLONE_ID_MAP_DDL))
+        await self.session.execute(sa.delete(clone_id_map))
+
+        for kind, model in CLONED_TABLES.items():
+            table = model.__table__
+            await self.session.execute(
+                sa.insert(clone_id_map).from_select(
+                    ["kind", "old_id", "new_id"],
+                    sa.select(
+                        sa.literal(kind), table.c.id, sa.func.gen_random_uuid()
+                    ).where(table.c.feature_model_version_id == source_version_id),
+                )
             )
 
-            sync_repo = FeatureModelVersionRepository(sync_session)
-            return sync_repo.create_new_version_from_existing(
-                source_version=source_version,
-                user=user,
-                return_id_map=return_id_map,
+        now = datetime.utcnow()
+        for kind in CLONED_TABLES:
+            await self.session.execute(
+                self._clone_rows_statement(
+                    kind, source_version_id, target_version_id, user_id, now
+                )
             )
 
-        # Ejecutar la lógica sync dentro del contexto async
-        result = await self.session.run_sync(_create_version_sync)
-        return result
+        # Pertenencia a grupos: las features se copiaron antes que los grupos
+        features = Feature.__table__
+        source = features.alias("source_feature")
+        feature_ids = clone_id_map.alias("feature_ids")
+        group_ids = clone_id_map.alias("group_ids")
+        await self.session.execute(
+            sa.update(features)
+            .where(
+                feature_ids.c.kind == "features",
+                feature_ids.c.new_id == features.c.id,
+                source.c.id == feature_ids.c.old_id,
+                group_ids.c.kind == "feature_groups",
+                group_ids.c.old_id == source.c.group_id,
+            )
+            .values(group_id=group_ids.c.new_id)
+        )
+
+        tags = FeatureTagLink.__table__
+        await self.session.execute(
+            sa.insert(tags).from_select(
+                ["feature_id", "tag_id"],
+                sa.select(feature_ids.c.new_id, tags.c.tag_id).join(
+                    feature_ids,
+                    sa.and_(
+                        feature_ids.c.kind == "features",
+                        feature_ids.c.old_id == tags.c.feature_id,
+                    ),
+                ),
+            )
+        )
+
+        if not return_id_map:
+            return None
+        id_maps: dict[str, dict[uuid.UUID, uuid.UUID]] = {
+            kind: {} for kind in CLONED_TABLES
+        }
+        result = await self.session.execute(
+            sa.select(clone_id_map.c.kind, clone_id_map.c.old_id, clone_id_map.c.new_id)
+        )
+        for kind, old_id, new_id in result.all():
+            id_maps[kind][old_id] = new_id
+        return id_maps
+
+    async def _clone_delta_version_structure(
+        self,
+        source_version_id: uuid.UUID,
+        target_version_id: uuid.UUID,
+        user_id: Optional[uuid.UUID],
+        return_id_map: bool,
+    ) -> dict[str, dict[uuid.UUID, uuid.UUID]] | None:
+        """Clona una versión delta escribiendo su estructura resuelta."""
+        from app.services.feature_model.fm_version_delta import (
+            resolve_version_rows,
+            write_full_rows,
+        )
+
+        rows = await resolve_version_rows(self.session, source_version_id)
+        id_map = await write_full_rows(
+            self.session, target_version_id, rows, user_id=user_id
+        )
+        if not return_id_map:
+            return None
+        return {
+            kind: {
+                uuid.UUID(row_id): uuid.UUID(id_map[row_id]) for row_id in rows[kind]
+            }
+            for kind in CLONED_TABLES
+        }
+
+    @staticmethod
+    def _clone_rows_statement(
+        kind: str,
+        source_version_id: uuid.UUID,
+        target_version_id: uuid.UUID,
+        user_id: Optional[uuid.UUID],
+        now: datetime,
+    ) -> sa.Insert:
+        """``INSERT ... SELECT`` que copia las filas de una tabla clonada."""
+        table = CLONED_TABLES[kind].__table__
+        own_ids = clone_id_map.alias(f"{kind}_ids")
+        source = table.join(
+            own_ids, sa.and_(own_ids.c.kind == kind, own_ids.c.old_id == table.c.id)
+        )
+        remapped = CLONE_REMAPPED_COLUMNS[kind]
+
+        values = []
+        for column in table.columns:
+            name = column.name
+            if name == "id":
+                value = own_ids.c.new_id
+            elif name == "feature_model_version_id":
+                value = sa.literal(target_version_id, column.type)
+            elif name == "created_at":
+                value = sa.literal(now, column.type)
+            elif name == "created_by_id":
+                value = sa.literal(user_id, column.type)
+            elif name in CLONE_RESET_COLUMNS:
+                value = sa.null()
+            elif name in remapped:
+                ref_ids = clone_id_map.alias(f"{name}_ids")
+                source = source.outerjoin(
+                    ref_ids,
+                    sa.and_(
+                        ref_ids.c.kind == remapped[name],
+                        ref_ids.c.old_id == table.c[name],
+                    ),
+                )
+                value = ref_ids.c.new_id
+            else:
+                value = table.c[name]
+            values.append(value.label(name))
+
+        return sa.insert(table).from_select(
+            [column.name for column in table.columns],
+            sa.select(*values)
+            .select_from(source)
+            .where(table.c.feature_model_version_id == source_version_id),
+        )
 
     async def exists(self, version_id: uuid.UUID) -> bool:
         """Verificar si una versión existe."""
         version = await self.get(version_id)
         return version is not None
 
+    async def get_ids_by_domain(self, domain_id: uuid.UUID) -> list[uuid.UUID]:
+        """IDs de las versiones de los modelos de un dominio."""
+        stmt = (
+            select(FeatureModelVersion.id)
+            .join(FeatureModel, FeatureModel.id == FeatureModelVersion.feature_model_id)
+            .where(FeatureModel.domain_id == domain_id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_ids_using_resource(self, resource_id: uuid.UUID) -> list[uuid.UUID]:
+        """
+        IDs de las versiones con alguna feature asociada al recurso.
+
+        Incluye las versiones delta que derivan de ellas (comparten sus filas),
+        con un CTE recursivo sobre ``base_version_id``.
+        """
+        versions = FeatureModelVersion.__table__
+        using = (
+            sa.select(Feature.feature_model_version_id.label("id"))
+            .where(Feature.resource_id == resource_id)
+            .cte(name="using_resource", recursive=True)
+        )
+        using = using.union(
+            sa.select(versions.c.id).where(versions.c.base_version_id == using.c.id)
+        )
+        result = await self.session.execute(sa.select(using.c.id))
+        return list(result.scalars().all())
+
     async def get_complete_with_relations(
-        self, version_id: uuid.UUID, include_resources: bool = True
+        self,
+        version_id: uuid.UUID,
+        include_resources: bool = True,
+        load: Optional[Collection[str]] = None,
     ) -> FeatureModelVersion | None:
         """
         Obtener una versión completa con TODAS sus relaciones cargadas (eager loading).
@@ -113,6 +390,9 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
         Args:
             version_id: UUID de la versión
             include_resources: Si debe cargar los recursos asociados a features
+            load: Partes a cargar además de las features y el modelo (ver
+                ``COMPLETE_LOAD_PARTS``); None carga todas. Las respuestas con
+                selección de campos usan un plan más ligero.
 
         Returns:
             FeatureModelVersion con todas las relaciones cargadas, o None si no existe
@@ -122,37 +402,35 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
             - Con índices + eager loading: ~3-5 queries
             - Esperado: 500ms -> 50-100ms
         """
-        from sqlalchemy.orm import joinedload, contains_eager
-
-        # Construir query con eager loading de todas las relaciones
-        # Usar joinedload + contains_eager para optimizar jerarquía padre-hijo
-        stmt = (
-            select(FeatureModelVersion)
-            .options(
-                # Feature Model y Domain (carga inmediata)
-                selectinload(FeatureModelVersion.feature_model).selectinload(
-                    FeatureModel.domain
-                ),
-                # Features con jerarquía padre-hijo optimizada
+        parts = COMPLETE_LOAD_PARTS if load is None else frozenset(load)
+
+        # Feature Model y Domain (carga inmediata) y features: siempre
+        options = [
+            selectinload(FeatureModelVersion.feature_model).selectinload(
+                FeatureModel.domain
+            ),
+            selectinload(FeatureModelVersion.features),
+        ]
+        if "hierarchy" in parts:
+            # Features con jerarquía padre-hijo optimizada
+            options += [
                 selectinload(FeatureModelVersion.features).selectinload(Feature.parent),
                 selectinload(FeatureModelVersion.features).selectinload(
                     Feature.children
                 ),
-                # Features con tags
-                selectinload(FeatureModelVersion.features).selectinload(Feature.tags),
-                # Features con grupos
+            ]
+        if "tags" in parts:
+            # Features con tags
+            options.append(
+                selectinload(FeatureModelVersion.features).selectinload(Feature.tags)
+            )
+        if "groups" in parts:
+            # Features con grupos y grupos de la versión
+            options += [
                 selectinload(FeatureModelVersion.features).selectinload(Feature.group),
                 selectinload(FeatureModelVersion.features).selectinload(
                     Feature.child_groups
                 ),
-                # Feature Relations con features de origen y destino
-                selectinload(FeatureModelVersion.feature_relations).selectinload(
-                    FeatureRelation.source_feature
-                ),
-                selectinload(FeatureModelVersion.feature_relations).selectinload(
-                    FeatureRelation.target_feature
-                ),
-                # Feature Groups con parent feature
                 (
                     selectinload(FeatureModelVersion.feature_groups).selectinload(
                         FeatureModelVersion.feature_groups.__dict__.get(
@@ -162,11 +440,25 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
                     if hasattr(FeatureModelVersion.feature_groups, "__dict__")
                     else selectinload(FeatureModelVersion.feature_groups)
                 ),
-                # Constraints
-                selectinload(FeatureModelVersion.constraints),
-                # Configurations
-                selectinload(FeatureModelVersion.configurations),
-            )
+            ]
+        if "relations" in parts:
+            # Feature Relations con features de origen y destino
+            options += [
+                selectinload(FeatureModelVersion.feature_relations).selectinload(
+                    FeatureRelation.source_feature
+                ),
+                selectinload(FeatureModelVersion.feature_relations).selectinload(
+                    FeatureRelation.target_feature
+                ),
+            ]
+        if "constraints" in parts:
+            options.append(selectinload(FeatureModelVersion.constraints))
+        if "configurations" in parts:
+            options.append(selectinload(FeatureModelVersion.configurations))
+
+        stmt = (
+            select(FeatureModelVersion)
+            .options(*options)
             .where(FeatureModelVersion.id == version_id)
         )
 
@@ -181,6 +473,16 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
         result = await self.session.execute(stmt)
         version = result.scalar_one_or_none()
 
+        # Versión delta: la estructura se resuelve desde su cadena de bases
+        if version is not None and version.base_version_id is not None:
+            from app.services.feature_model.fm_version_delta import (
+                materialize_version,
+            )
+
+            await materialize_version(
+                self.session, version, include_resources=include_resources
+            )
+
         # Agregar métrica de caché para debugging
         if version:
             version._loaded_at = __import__("datetime").datetime.utcnow()
@@ -188,20 +490,36 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
 
         return version
 
-    async def get_statistics(self, version_id: uuid.UUID) -> dict[str, int] | None:
+    async def get_statistics(
+        self, version_id: uuid.UUID, refresh: bool = False
+    ) -> dict[str, int] | None:
         """
         Calcular estadísticas de una versión de feature model de forma eficiente.
 
+        Las estadísticas se mantienen de forma incremental en Redis al mutar el
+        modelo; solo se recalculan si el hash no existe o con ``refresh``.
+
         Returns:
             Diccionario con las estadísticas o None si la versión no existe
         """
-        from app.enums import FeatureType, FeatureRelationType, FeatureGroupType
+        from app.services.feature_model.fm_statistics import get_version_statistics
+        from app.services.feature_model.fm_statistics_store import (
+            get_cached_statistics,
+            statistics_from_fields,
+            statistics_fields,
+            store_statistics,
+        )
 
         # Verificar que la versión existe
         version = await self.get(version_id)
         if not version:
             return None
 
+        if not refresh:
+            cached = await get_cached_statistics(version_id)
+            if cached is not None:
+                return cached
+
         # Cargar la versión con todas las relaciones necesarias
         stmt = (
             select(FeatureModelVersion)
@@ -219,92 +537,65 @@ class FeatureModelVersionRepository(BaseFeatureModelVersionRepository):
 
         if not version:
             return None
+        if version.base_version_id is not None:
+            from app.services.feature_model.fm_version_delta import (
+                materialize_version,
+            )
 
-        # Calcular estadísticas en memoria (más eficiente para conjuntos pequeños-medianos)
-        features = version.features
-        relations = version.feature_relations
-        groups = version.feature_groups
-
-        # Contar features por tipo
-        mandatory_count = sum(1 for f in features if f.type == FeatureType.MANDATORY)
-        optional_count = sum(1 for f in features if f.type == FeatureType.OPTIONAL)
-
-        # Contar grupos por tipo
-        xor_count = sum(
-            1 for g in groups if g.group_type == FeatureGroupType.ALTERNATIVE
-        )
-        or_count = sum(1 for g in groups if g.group_type == FeatureGroupType.OR)
-
-        # Contar relaciones por tipo
-        requires_count = sum(
-            1 for r in relations if r.type == FeatureRelationType.REQUIRED
-        )
-        excludes_count = sum(
-            1 for r in relations if r.type == FeatureRelationType.EXCLUDES
-        )
+            await materialize_version(self.session, version, include_resources=False)
 
-        # Calcular profundidad máxima del árbol
-        max_depth = self._calculate_tree_depth(features)
+        # Motor único de estadísticas (una pasada, cacheado por huella)
+        stats = get_version_statistics(version)
+        await store_statistics(version_id, stats)
 
-        return {
-            "total_features": len(features),
-            "mandatory_features": mandatory_count,
-            "optional_features": optional_count,
-            "total_groups": len(groups),
-            "xor_groups": xor_count,
-            "or_groups": or_count,
-            "total_relations": len(relations),
-            "requires_relations": requires_count,
-            "excludes_relations": excludes_count,
-            "total_constraints": len(version.constraints),
-            "total_configurations": len(version.configurations),
-            "max_tree_depth": max_depth,
-        }
+        return statistics_from_fields(statistics_fields(stats))
 
-    def _calculate_tree_depth(self, features: list[Feature]) -> int:
+    async def get_compiled(
+        self, version_id: uuid.UUID, include_resources: bool = False
+    ) -> FeatureModelVersion | None:
         """
-        Calcular la profundidad máxima del árbol de features.
+        Versión con su estructura cargada para análisis y exportación.
+
+        Las versiones publicadas o archivadas con estructura compilada en el
+        snapshot se cargan en una sola consulta (versión, modelo y dominio)
+        y sus features, grupos, relaciones y constraints se construyen desde
+        el snapshot, sin ``selectinload``. No incluye las configuraciones.
+        El resto usa ``get_complete_with_relations``.
 
         Args:
-            features: Lista de features
+            version_id: UUID de la versión
+            include_resources: Si debe cargar los recursos de las features
 
         Returns:
-            Profundidad máxima (0 si solo hay raíz, 1 si hay un nivel, etc.)
+            FeatureModelVersion con la estructura cargada, o None si no existe
         """
-        if not features:
-            return 0
-
-        # Crear mapa de parent_id -> children
-        children_map = {}
-        root_features = []
-
-        for feature in features:
-            if feature.parent_id is None:
-                root_features.append(feature)
-            else:
-                if feature.parent_id not in children_map:
-                    children_map[feature.parent_id] = []
-                children_map[feature.parent_id].append(feature)
-
-        # Función recursiva para calcular profundidad
-        def get_depth(feature_id: uuid.UUID, current_depth: int) -> int:
-            if feature_id not in children_map:
-                return current_depth
-
-            max_child_depth = current_depth
-            for child in children_map[feature_id]:
-                child_depth = get_depth(child.id, current_depth + 1)
-                max_child_depth = max(max_child_depth, child_depth)
-
-            return max_child_depth
+        from app.services.feature_model.fm_version_delta import (
+            compiled_rows,
+            hydrate_version,
+        )
 
-        # Calcular profundidad desde cada raíz
-        max_depth = 0
-        for root in root_features:
-            depth = get_depth(root.id, 0)
-            max_depth = max(max_depth, depth)
+        result = await self.session.execute(
+            select(FeatureModelVersion)
+            .options(
+                joinedload(FeatureModelVersion.feature_model).joinedload(
+                    FeatureModel.domain
+                )
+            )
+            .where(FeatureModelVersion.id == version_id)
+        )
+        version = result.scalar_one_or_none()
+        if version is None:
+            return None
 
-        return max_depth
+        rows = compiled_rows(version)
+        if rows is None:
+            return await self.get_complete_with_relations(
+                version_id=version_id, include_resources=include_resources
+            )
+        await hydrate_version(
+            self.session, version, rows, include_resources=include_resources
+        )
+        return version
 
     async def get_version_with_full_structure(
         self, version_id: uuid.UUID
@@ -11,6 +11,8 @@ from app.models import (
     User,
 )
 from app.repositories.base import BaseFeatureRelationRepository
+from app.repositories.feature import FeatureRepository
+from app.repositories.feature_model_version import FeatureModelVersionRepository
 
 
 class FeatureRelationRepository(BaseFeatureRelationRepository):
@@ -23,204 +25,169 @@ class FeatureRelationRepository(BaseFeatureRelationRepository):
         self,
         data: FeatureRelationCreate,
         user: User,
-        feature_repo: "FeatureRepository",
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_repo: FeatureRepository,
+        feature_model_version_repo: FeatureModelVersionRepository,
     ) -> FeatureRelation:
         """
         Crea una nueva relación usando la estrategia "copy-on-write".
         Crea una nueva versión del modelo y añade la relación en esa versión.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
         """
-
-        def _create_relation_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Validar que las features de origen y destino existen (usando el método sync)
-            # Necesitamos obtener las features de forma síncrona dentro de run_sync
-            from sqlmodel import select
-            from app.models import Feature
-
-            source_stmt = select(Feature).where(
-                Feature.id == data.source_feature_id, Feature.is_active == True
-            )
-            source_feature = sync_session.exec(source_stmt).first()
-
-            target_stmt = select(Feature).where(
-                Feature.id == data.target_feature_id, Feature.is_active == True
-            )
-            target_feature = sync_session.exec(target_stmt).first()
-
-            self.validate_features_exist(source_feature, target_feature)
-
-            # 2. Validar que ambas features pertenecen a la misma versión del modelo
-            self.validate_same_version(source_feature, target_feature)
-
-            # 3. Crear una nueva versión clonando la de origen
-            source_version = source_feature.feature_model_version
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            # 4. Crear la nueva relación en la nueva versión, usando los IDs re-mapeados
-            new_relation = FeatureRelation(
-                type=data.type,
-                source_feature_id=old_to_new_id_map[data.source_feature_id],
-                target_feature_id=old_to_new_id_map[data.target_feature_id],
-                feature_model_version_id=new_version.id,
-                created_by_id=user.id,
-            )
-
-            sync_session.add(new_relation)
-            sync_session.commit()
-            sync_session.refresh(new_relation)
-
-            return new_relation
-
-        # Ejecutar la lógica sync dentro del contexto async
-        result = await self.session.run_sync(_create_relation_sync)
-        return result
+        # 1. Validar que las features de origen y destino existen
+        source_feature = await feature_repo.get(data.source_feature_id)
+        target_feature = await feature_repo.get(data.target_feature_id)
+        self.validate_features_exist(source_feature, target_feature)
+
+        # 2. Validar que ambas features pertenecen a la misma versión del modelo
+        self.validate_same_version(source_feature, target_feature)
+
+        # 3. Crear una nueva versión clonando la de origen
+        source_version = await feature_model_version_repo.get(
+            source_feature.feature_model_version_id
+        )
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+        (
+            new_version,
+            old_to_new_id_map,
+            _,
+        ) = await feature_model_version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
+
+        # 4. Crear la nueva relación en la nueva versión, usando los IDs re-mapeados
+        new_relation = FeatureRelation(
+            type=data.type,
+            source_feature_id=old_to_new_id_map[data.source_feature_id],
+            target_feature_id=old_to_new_id_map[data.target_feature_id],
+            feature_model_version_id=new_version.id,
+            created_by_id=user.id,
+        )
+
+        self.session.add(new_relation)
+        await self.session.commit()
+        await self.session.refresh(new_relation)
+        return new_relation
 
     async def get(self, relation_id: UUID) -> FeatureRelation | None:
         """Obtener una relación por su ID."""
         stmt = select(FeatureRelation).where(FeatureRelation.id == relation_id)
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        row = result.scalar_one_or_none()
+        if row is None:
+            from app.services.feature_model.fm_version_delta import compact_row_owner
+
+            # Si lo añadió una versión delta, al compactarla tiene fila propia
+            if await compact_row_owner(self.session, "feature_relations", relation_id):
+                result = await self.session.execute(stmt)
+                row = result.scalar_one_or_none()
+        return row
 
     async def update(
         self,
         db_relation: FeatureRelation,
         data: FeatureRelationUpdate,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
+        feature_model_version_repo: FeatureModelVersionRepository,
     ) -> FeatureRelation:
         """
         Actualiza una relación usando estrategia copy-on-write.
         """
-
-        def _update_relation_sync(sync_session):
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            source_version = db_relation.feature_model_version
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            new_source_id = old_to_new_id_map.get(db_relation.source_feature_id)
-            new_target_id = old_to_new_id_map.get(db_relation.target_feature_id)
-            if not new_source_id or not new_target_id:
-                raise RuntimeError("Could not map old feature IDs to new ones.")
-
-            statement = select(FeatureRelation).where(
-                FeatureRelation.feature_model_version_id == new_version.id,
-                FeatureRelation.source_feature_id == new_source_id,
-                FeatureRelation.target_feature_id == new_target_id,
-                FeatureRelation.type == db_relation.type,
-            )
-            relation_to_update = sync_session.exec(statement).first()
-
-            if not relation_to_update:
-                raise RuntimeError(
-                    "Could not fetch the cloned relation from the database."
-                )
-
-            update_data = data.model_dump(exclude_unset=True)
-
-            if "source_feature_id" in update_data and update_data["source_feature_id"]:
-                mapped_source = old_to_new_id_map.get(update_data["source_feature_id"])
-                if not mapped_source:
-                    raise ValueError("Source feature not found in the source version.")
-                update_data["source_feature_id"] = mapped_source
-
-            if "target_feature_id" in update_data and update_data["target_feature_id"]:
-                mapped_target = old_to_new_id_map.get(update_data["target_feature_id"])
-                if not mapped_target:
-                    raise ValueError("Target feature not found in the source version.")
-                update_data["target_feature_id"] = mapped_target
-
-            relation_to_update.sqlmodel_update(update_data)
-            relation_to_update.updated_at = datetime.utcnow()
-            relation_to_update.updated_by_id = user.id
-            sync_session.add(relation_to_update)
-            sync_session.commit()
-            sync_session.refresh(relation_to_update)
-            return relation_to_update
-
-        result = await self.session.run_sync(_update_relation_sync)
-        return result
+        _, old_to_new_id_map, relation_to_update = await self._clone_for(
+            db_relation, user, feature_model_version_repo
+        )
+        if not relation_to_update:
+            raise RuntimeError("Could not fetch the cloned relation from the database.")
+
+        update_data = data.model_dump(exclude_unset=True)
+
+        if "source_feature_id" in update_data and update_data["source_feature_id"]:
+            mapped_source = old_to_new_id_map.get(update_data["source_feature_id"])
+            if not mapped_source:
+                raise ValueError("Source feature not found in the source version.")
+            update_data["source_feature_id"] = mapped_source
+
+        if "target_feature_id" in update_data and update_data["target_feature_id"]:
+            mapped_target = old_to_new_id_map.get(update_data["target_feature_id"])
+            if not mapped_target:
+                raise ValueError("Target feature not found in the source version.")
+            update_data["target_feature_id"] = mapped_target
+
+        relation_to_update.sqlmodel_update(update_data)
+        relation_to_update.updated_at = datetime.utcnow()
+        relation_to_update.updated_by_id = user.id
+        self.session.add(relation_to_update)
+        await self.session.commit()
+        await self.session.refresh(relation_to_update)
+        return relation_to_update
 
     async def delete(
         self,
         db_relation: FeatureRelation,
         user: User,
-        feature_model_version_repo: "FeatureModelVersionRepository",
-    ) -> None:
+        feature_model_version_repo: FeatureModelVersionRepository,
+    ) -> UUID:
         """
         Elimina una relación usando la estrategia "copy-on-write".
-        Crea una nueva versión del modelo sin la relación especificada.
-
-        Nota: Utiliza funciones sync del CRUD ya que no existe versión async de create_new_version_from_existing.
+        Crea una nueva versión del modelo sin la relación especificada y devuelve su ID.
         """
+        new_version_id, _, relation_to_delete = await self._clone_for(
+            db_relation, user, feature_model_version_repo
+        )
+        if relation_to_delete:
+            # Lógica de Soft Delete
+            relation_to_delete.is_active = False
+            relation_to_delete.deleted_at = datetime.utcnow()
+            relation_to_delete.updated_by_id = user.id
+            self.session.add(relation_to_delete)
 
-        def _delete_relation_sync(sync_session):
-            # Importar repositorio sync dentro de la función sync
-            from app.repositories import FeatureModelVersionRepository
-
-            sync_version_repo = FeatureModelVersionRepository(sync_session)
-
-            # 1. Crear una nueva versión a partir de la versión actual de la relación
-            source_version = db_relation.feature_model_version
-            new_version, old_to_new_id_map = (
-                sync_version_repo.create_new_version_from_existing(
-                    source_version=source_version,
-                    user=user,
-                    return_id_map=True,
-                )
-            )
-
-            # 2. Encontrar y eliminar la relación correspondiente en la nueva versión
-            # Necesitamos los nuevos IDs de las features para encontrar la relación clonada
-            new_source_id = old_to_new_id_map.get(db_relation.source_feature_id)
-            new_target_id = old_to_new_id_map.get(db_relation.target_feature_id)
-
-            if not new_source_id or not new_target_id:
-                # Esto no debería pasar si la clonación fue exitosa
-                raise RuntimeError("Could not map old feature IDs to new ones.")
-
-            statement = select(FeatureRelation).where(
-                FeatureRelation.feature_model_version_id == new_version.id,
-                FeatureRelation.source_feature_id == new_source_id,
-                FeatureRelation.target_feature_id == new_target_id,
-                FeatureRelation.type == db_relation.type,
-            )
-            relation_to_delete = sync_session.exec(statement).first()
-
-            if relation_to_delete:
-                # Lógica de Soft Delete
-                relation_to_delete.is_active = False
-                relation_to_delete.deleted_at = datetime.utcnow()
-                relation_to_delete.updated_by_id = user.id
-                sync_session.add(relation_to_delete)
-                sync_session.commit()
-            else:
-                # Esto tampoco debería pasar. Podríamos loggear una advertencia.
-                sync_session.commit()  # Hacemos commit de la nueva versión aunque no se borre nada
-
-        # Ejecutar la lógica sync dentro del contexto async
-        await self.session.run_sync(_delete_relation_sync)
+        await self.session.commit()
+        return new_version_id
+
+    async def _clone_for(
+        self,
+        db_relation: FeatureRelation,
+        user: User,
+        feature_model_version_repo: FeatureModelVersionRepository,
+    ) -> tuple[UUID, dict[UUID, UUID], FeatureRelation | None]:
+        """
+        Clona la versión de la relación y devuelve el ID de la nueva versión,
+        el mapa de features y la copia de la relación en esa versión.
+        """
+        await feature_model_version_repo.ensure_not_shared(
+            db_relation.feature_model_version_id
+        )
+        source_version = await feature_model_version_repo.get(
+            db_relation.feature_model_version_id
+        )
+        if not source_version:
+            raise ValueError("Source Feature Model Version not found.")
+        (
+            new_version,
+            old_to_new_id_map,
+            _,
+        ) = await feature_model_version_repo.create_new_version_from_existing(
+            source_version=source_version,
+            user=user,
+            return_id_map=True,
+        )
+
+        # Las relaciones no entran en el mapa de IDs: se localiza la copia por
+        # sus features re-mapeadas y su tipo
+        new_source_id = old_to_new_id_map.get(db_relation.source_feature_id)
+        new_target_id = old_to_new_id_map.get(db_relation.target_feature_id)
+        if not new_source_id or not new_target_id:
+            raise RuntimeError("Could not map old feature IDs to new ones.")
+
+        statement = select(FeatureRelation).where(
+            FeatureRelation.feature_model_version_id == new_version.id,
+            FeatureRelation.source_feature_id == new_source_id,
+            FeatureRelation.target_feature_id == new_target_id,
+            FeatureRelation.type == db_relation.type,
+        )
+        result = await self.session.execute(statement)
+        return new_version.id, old_to_new_id_map, result.scalars().first()
 
     async def exists(self, relation_id: UUID) -> bool:
         """Verificar si una relación existe."""
@@ -232,6 +199,9 @@ class FeatureRelationRepository(BaseFeatureRelationRepository):
         db_relation.is_active = True
         self.session.add(db_relation)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_relation.feature_model_version_id
+        )
         await self.session.refresh(db_relation)
         return db_relation
 
@@ -240,5 +210,8 @@ class FeatureRelationRepository(BaseFeatureRelationRepository):
         db_relation.is_active = False
         self.session.add(db_relation)
         await self.session.commit()
+        await FeatureModelVersionRepository(self.session).discard_compiled_structure(
+            db_relation.feature_model_version_id
+        )
         await self.session.refresh(db_relation)
         return db_relation
@@ -4,5 +4,18 @@ from .feature_model_complete import (
     FeatureRelationInfo,
     ConstraintInfo,
     FeatureModelStatistics,
+    FeatureSubtreeNode,
+    FeatureSubtreeResponse,
 )
-from .utils import WelcomeResponse
\ No newline at end of file
+from .utils import WelcomeResponse
+
+__all__ = [
+    "FeatureModelCompleteResponse",
+    "FeatureTreeNode",
+    "FeatureRelationInfo",
+    "ConstraintInfo",
+    "FeatureModelStatistics",
+    "FeatureSubtreeNode",
+    "FeatureSubtreeResponse",
+    "WelcomeResponse",
+]
@@ -102,6 +102,43 @@ class FeatureTreeNode(BaseModel):
 FeatureTreeNode.model_rebuild()
 
 
+class FeatureSubtreeNode(BaseModel):
+    """
+    Nodo de un subárbol paginado.
+
+    Los hijos llegan por páginas ordenadas por nombre; ``next_cursor`` permite
+    pedir la siguiente página de hijos de este nodo.
+    """
+
+    id: uuid.UUID
+    name: str
+    type: FeatureType
+    properties: dict[str, Any] = Field(default_factory=dict)
+    group: Optional[FeatureGroupInfo] = None
+    depth: int = Field(0, description="Profundidad absoluta en el árbol (0 = raíz)")
+    children_count: int = Field(0, description="Número total de hijos activos")
+    children: list["FeatureSubtreeNode"] = Field(default_factory=list)
+    has_more_children: bool = Field(
+        False, description="True si hay hijos que no vienen en esta respuesta"
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor para la siguiente página de hijos de este nodo"
+    )
+    is_leaf: bool = Field(False, description="True si no tiene hijos")
+
+
+FeatureSubtreeNode.model_rebuild()
+
+
+class FeatureSubtreeResponse(BaseModel):
+    """Subtree de una feature limitado en profundidad y paginado por nivel."""
+
+    version_id: uuid.UUID
+    root: FeatureSubtreeNode
+    depth: int = Field(description="Niveles devueltos bajo la raíz")
+    page_size: int = Field(description="Máximo de hijos por nodo")
+
+
 class FeatureRelationInfo(BaseModel):
     """Relación entre dos features (prerequisito o exclusión)."""
 
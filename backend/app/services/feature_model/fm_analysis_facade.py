@@ -6,6 +6,7 @@ Provee operaciones de alto nivel combinando:
 - Análisis estructural
 - Enumeración parcial de configuraciones para core/commonality/atomic
 - Integración opcional con Flamapy (Python) para validar UVL
+- Compilación de la CNF (precálculo al publicar)
 """
 
 from __future__ import annotations
@@ -20,6 +21,7 @@ from app.services.feature_model import (
     FeatureModelLogicalValidator,
     FeatureModelStructuralAnalyzer,
 )
+from app.services.feature_model.fm_model_hash import compute_model_hash
 from app.services.feature_model.fm_uvl_importer import FeatureModelUVLImporter
 
 
@@ -204,7 +206,15 @@ def analyze_version(
     analysis_types: Optional[List[AnalysisType]] = None,
     max_solutions: int = 100,
     include_uvl_validation: bool = True,
+    compiled_cnf: Optional[Dict[str, Any]] = None,
 ) -> AnalysisSummary:
+    """
+    Resumen de análisis de una versión.
+
+    ``compiled_cnf`` es la CNF cacheada de la versión (``compile_cnf``,
+    ``get_cached_cnf``); con ella la satisfacibilidad no vuelve a codificar el
+    modelo.
+    """
     features_payload, relations_payload, constraints_payload = _build_payload(version)
 
     validator = FeatureModelLogicalValidator()
@@ -214,6 +224,7 @@ def analyze_version(
         features=features_payload,
         relations=relations_payload,
         constraints=constraints_payload,
+        compiled_cnf=compiled_cnf,
     )
 
     structural_results = analyzer.analyze_feature_model(
@@ -284,6 +295,37 @@ def analyze_version(
     )
 
 
+def version_model_hash(version) -> str:
+    """Huella de contenido del payload de análisis de una versión."""
+    return compute_model_hash(*_build_payload(version))
+
+
+def compile_cnf(version) -> Dict[str, Any]:
+    """
+    CNF de una versión con el encoding de PySAT.
+
+    Returns:
+        ``{"variables": feature_id -> var_id, "clauses": [[int, ...], ...],
+        "errors": [...]}`` (``errors``: constraints que no se pudieron
+        codificar, los mismos que reportaría la validación)
+
+    Raises:
+        InvalidConfigurationException: Si PySAT no está disponible
+    """
+    features_payload, relations_payload, constraints_payload = _build_payload(version)
+    validator = FeatureModelLogicalValidator()
+    variables, clauses = validator.build_cnf(
+        features=features_payload,
+        relations=relations_payload,
+        constraints=constraints_payload,
+    )
+    return {
+        "variables": variables,
+        "clauses": [list(c) for c in clauses],
+        "errors": validator.pysat_encoding_errors,
+    }
+
+
 def compare_versions(
     *,
     base_version,
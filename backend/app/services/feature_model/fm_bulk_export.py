@@ -0,0 +1,90 @@
+"""
+Exportación en streaming de configuraciones masivas (NDJSON comprimido).
+
+Cada configuración se escribe como un registro compacto por línea::
+
+    {"selected": ["<feature_id>", ...], "score": 0.42}
+
+El flujo se comprime con gzip sobre un ``SpooledTemporaryFile``: mientras el
+resultado cabe en memoria no toca disco y, a partir de ese umbral, se vuelca a
+un fichero temporal. Así el consumo de memoria no depende del número de
+configuraciones y el fichero final se sube a MinIO con multipart upload.
+
+Los miembros gzip concatenados forman un gzip válido, pero al unir cubos se
+re-comprime línea a línea para poder truncar al número pedido.
+"""
+
+import gzip
+import io
+import json
+import tempfile
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+BULK_EXPORT_FORMAT = "ndjson.gz"
+BULK_EXPORT_CONTENT_TYPE = "application/x-ndjson"
+
+# Umbral a partir del cual el fichero temporal se vuelca a disco
+BULK_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class NDJSONGzipWriter:
+    """Escritor incremental de registros NDJSON comprimidos con gzip."""
+
+    def __init__(self, spool_max_memory: int = BULK_SPOOL_MAX_MEMORY):
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_max_memory)
+        # mtime=0: misma entrada, mismos bytes (útil para objetos por contenido)
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode="wb", mtime=0)
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8", newline="\n")
+        self.count = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Añade un registro como una línea JSON."""
+        self._text.write(json.dumps(record, separators=(",", ":")))
+        self._text.write("\n")
+        self.count += 1
+
+    def write_configuration(
+        self, selected_features: Iterable[str], score: Optional[float] = None
+    ) -> None:
+        """Añade una configuración como registro compacto."""
+        record: Dict[str, Any] = {"selected": list(selected_features)}
+        if score is not None:
+            record["score"] = score
+        self.write(record)
+
+    def finish(self) -> IO[bytes]:
+        """
+        Cierra el flujo gzip y devuelve el fichero comprimido posicionado al
+        inicio, listo para subirse.
+        """
+        self._text.flush()
+        self._text.detach()
+        self._gzip.close()
+        self._file.seek(0)
+        return self._file
+
+    @property
+    def compressed_size(self) -> int:
+        """Bytes comprimidos escritos (válido tras ``finish``)."""
+        position = self._file.tell()
+        self._file.seek(0, io.SEEK_END)
+        size = self._file.tell()
+        self._file.seek(position)
+        return size
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "NDJSONGzipWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def iter_ndjson_gzip(fileobj: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """Lee en streaming los registros de un fichero NDJSON comprimido."""
+    with gzip.GzipFile(fileobj=fileobj, mode="rb") as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
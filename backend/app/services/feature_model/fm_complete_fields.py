@@ -0,0 +1,126 @@
+"""
+Selección de campos (sparse fieldsets) de la respuesta completa.
+
+Muchos consumidores del endpoint ``/complete`` solo necesitan el esqueleto
+del árbol (ids, nombres, tipos). ``CompleteFieldSet`` describe qué secciones
+de la respuesta y qué campos de cada nodo se piden; el constructor del árbol
+omite el resto al construir y serializar, y el repositorio elige un plan de
+eager loading acorde (``load_plan``).
+
+Sin selección (``include`` y ``fields`` vacíos) la respuesta es la completa
+de siempre, con las mismas claves y la misma clave de caché.
+"""
+
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+# Secciones opcionales del documento (feature_model, version, tree y
+# metadata siempre se incluyen). ``uvl`` controla también
+# ``version.uvl_content`` y ``snapshot`` el snapshot de la versión.
+COMPLETE_SECTIONS = ("relations", "constraints", "uvl", "statistics", "snapshot")
+
+# Campos opcionales de cada nodo del árbol (``id`` y ``children`` siempre)
+TREE_NODE_FIELDS = (
+    "name",
+    "type",
+    "properties",
+    "resource",
+    "tags",
+    "group",
+    "depth",
+    "is_leaf",
+)
+TREE_NODE_REQUIRED_FIELDS = ("id", "children")
+
+
+@dataclass(frozen=True)
+class CompleteFieldSet:
+    """Secciones y campos de nodo pedidos; None significa todos."""
+
+    sections: Optional[FrozenSet[str]] = None
+    node_fields: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def parse(
+        cls, include: Optional[str] = None, fields: Optional[str] = None
+    ) -> "CompleteFieldSet":
+        """
+        Construye la selección a partir de los parámetros de la petición.
+
+        Args:
+            include: Secciones separadas por comas (ej. ``relations,statistics``)
+            fields: Campos de nodo separados por comas (ej. ``name,type``)
+
+        Raises:
+            ValueError: Si se pide una sección o un campo desconocido
+        """
+        return cls(
+            sections=_parse_names(include, COMPLETE_SECTIONS, "section"),
+            node_fields=_parse_names(
+                fields, TREE_NODE_FIELDS + TREE_NODE_REQUIRED_FIELDS, "field"
+            ),
+        )
+
+    @property
+    def is_full(self) -> bool:
+        """True si no hay selección (respuesta completa)."""
+        return self.sections is None and self.node_fields is None
+
+    def wants_section(self, section: str) -> bool:
+        return self.sections is None or section in self.sections
+
+    def wants_node_field(self, field: str) -> bool:
+        return self.node_fields is None or field in self.node_fields
+
+    def node_include(self) -> Optional[set[str]]:
+        """Claves de nodo a serializar (None: todas)."""
+        if self.node_fields is None:
+            return None
+        return set(self.node_fields) | set(TREE_NODE_REQUIRED_FIELDS)
+
+    def load_plan(self) -> Optional[FrozenSet[str]]:
+        """
+        Partes a cargar en ``get_complete_with_relations`` (None: todas).
+
+        El UVL efectivo puede generarse desde la estructura, así que necesita
+        grupos, relaciones y constraints; las estadísticas además cuentan
+        las configuraciones.
+        """
+        if self.is_full:
+            return None
+        parts = set()
+        if self.wants_node_field("tags"):
+            parts.add("tags")
+        if self.wants_node_field("group"):
+            parts.add("groups")
+        if self.wants_section("relations"):
+            parts.add("relations")
+        if self.wants_section("constraints"):
+            parts.add("constraints")
+        if self.wants_section("uvl"):
+            parts.update(("groups", "relations", "constraints"))
+        if self.wants_section("statistics"):
+            parts.update(("groups", "relations", "constraints", "configurations"))
+        return frozenset(parts)
+
+    def cache_variant(self) -> str:
+        """Sufijo estable para claves de caché y ETag ('' sin selección)."""
+        if self.is_full:
+            return ""
+        sections = "*" if self.sections is None else ",".join(sorted(self.sections))
+        fields = "*" if self.node_fields is None else ",".join(sorted(self.node_fields))
+        return f"include={sections}:fields={fields}"
+
+
+def _parse_names(
+    raw: Optional[str], allowed: tuple[str, ...], kind: str
+) -> Optional[FrozenSet[str]]:
+    if raw is None or not raw.strip():
+        return None
+    names = frozenset(name.strip() for name in raw.split(",") if name.strip())
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise ValueError(
+            f"Unknown {kind}(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return names
@@ -16,16 +16,27 @@ Estrategias disponibles:
 2. RANDOM: Estocástica, diversidad de soluciones
 3. BEAM_SEARCH: Balance entre exhaustividad y eficiencia
 4. GENETIC: Optimización multi-objetivo con algoritmos evolutivos
+5. DIVERSE: Selección farthest-point sobre un pool de candidatos RANDOM
 """
 
 import random
-from itertools import combinations
-from typing import Dict, List, Any, Optional, Set, Callable
+import time
+from itertools import combinations, islice
+from typing import Dict, Iterator, List, Any, Optional, Set, Callable
 
 from app.enums import GenerationStrategy
 from app.services.feature_model.fm_logical_validator import (
     FeatureModelLogicalValidator,
 )
+from app.services.feature_model.fm_configuration_metrics import (
+    NUMPY_AVAILABLE,
+    ConfigurationSetMetrics,
+    FeatureBitIndex,
+    farthest_point_selection,
+)
+from app.services.feature_model.fm_parallel_enumeration import (
+    enumerate_configurations_parallel,
+)
 from app.exceptions import InvalidConfigurationException
 
 # DEAP para algoritmos genéticos
@@ -54,6 +65,10 @@ except ImportError:
     BDD_AVAILABLE = False
 
 
+# A partir de este número de soluciones SAT_ENUM reparte la enumeración en cubos
+PARALLEL_ENUMERATION_MIN_SOLUTIONS = 5000
+
+
 class GenerationResult:
     """Resultado de una generación de configuración."""
 
@@ -88,8 +103,16 @@ class FeatureModelConfigurationGenerator:
     4. GENETIC: Algoritmos genéticos con DEAP (optimización multi-objetivo)
     """
 
-    def __init__(self):
-        """Inicializa el generador."""
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Inicializa el generador.
+
+        Args:
+            seed: Semilla del generador pseudoaleatorio. Con la misma semilla,
+                modelo y parámetros, las muestras son reproducibles.
+        """
+        self.seed: Optional[int] = seed
+        self.rng = random.Random(seed)
         self.features_map: Dict[str, Dict[str, Any]] = {}
         self.relations_map: Dict[str, List[Dict[str, Any]]] = {}
         self.constraints: List[Dict[str, Any]] = []
@@ -100,6 +123,19 @@ class FeatureModelConfigurationGenerator:
         self.population_size: int = 50
         self.num_generations: int = 100
 
+    def reseed(self, seed: Optional[int]) -> None:
+        """Reinicia el generador pseudoaleatorio con una nueva semilla."""
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def _seed_global_random(self) -> None:
+        """
+        Los operadores de DEAP usan el módulo global ``random``; si hay semilla,
+        se deriva una del generador local para que la evolución sea reproducible.
+        """
+        if self.seed is not None:
+            random.seed(self.rng.getrandbits(64))
+
     def generate_valid_configuration(
         self,
         features: List[Dict[str, Any]],
@@ -108,6 +144,7 @@ class FeatureModelConfigurationGenerator:
         strategy: GenerationStrategy = GenerationStrategy.GREEDY,
         partial_selection: Optional[Dict[str, bool]] = None,
         max_iterations: int = 1000,
+        seed: Optional[int] = None,
     ) -> GenerationResult:
         """
         Genera una configuración válida del Feature Model.
@@ -119,10 +156,13 @@ class FeatureModelConfigurationGenerator:
             strategy: Estrategia de generación a utilizar
             partial_selection: Selección parcial inicial (puede ser None)
             max_iterations: Número máximo de iteraciones
+            seed: Si se indica, reinicia el generador pseudoaleatorio
 
         Returns:
             GenerationResult con la configuración generada
         """
+        if seed is not None:
+            self.reseed(seed)
         self._initialize(features, relations, constraints)
 
         if strategy == GenerationStrategy.GREEDY:
@@ -170,6 +210,16 @@ class FeatureModelConfigurationGenerator:
                 partial_selection,
                 max_iterations,
             )
+        elif strategy == GenerationStrategy.DIVERSE:
+            # Con una sola configuración no hay nada que diversificar
+            return self._generate_with_validation(
+                self._generate_random,
+                features,
+                relations,
+                constraints,
+                partial_selection,
+                max_iterations,
+            )
         elif strategy == GenerationStrategy.SAT_ENUM:
             return self._generate_sat_enumeration(
                 features,
@@ -295,6 +345,10 @@ class FeatureModelConfigurationGenerator:
         diverse: bool = True,
         strategy: GenerationStrategy = GenerationStrategy.RANDOM,
         partial_selection: Optional[Dict[str, bool]] = None,
+        on_result: Optional[Callable[[GenerationResult], None]] = None,
+        pool_size: Optional[int] = None,
+        time_budget_seconds: Optional[float] = None,
+        seed: Optional[int] = None,
     ) -> List[GenerationResult]:
         """
         Genera múltiples configuraciones válidas diferentes.
@@ -305,23 +359,40 @@ class FeatureModelConfigurationGenerator:
             constraints: Lista de restricciones
             count: Número de configuraciones a generar
             diverse: Si True, intenta maximizar diversidad
+            on_result: Callback invocado con cada configuración aceptada
+                (permite reportar métricas incrementales durante la generación)
+            pool_size: Tamaño del pool de candidatos (solo estrategia DIVERSE)
+            time_budget_seconds: Presupuesto de tiempo del pool (solo DIVERSE)
+            seed: Si se indica, reinicia el generador pseudoaleatorio; con la
+                misma semilla y parámetros el resultado es reproducible
 
         Returns:
             Lista de GenerationResult
         """
-        results = []
-        generated_configs: Set[frozenset] = set()
+        if seed is not None:
+            self.reseed(seed)
+        results: List[GenerationResult] = []
 
         if strategy == GenerationStrategy.SAT_ENUM:
             validator = FeatureModelLogicalValidator()
             try:
-                solutions = validator.enumerate_configurations(
-                    features=features,
-                    relations=relations,
-                    constraints=constraints,
-                    max_solutions=count,
-                    partial_selection=partial_selection,
-                )
+                if count >= PARALLEL_ENUMERATION_MIN_SOLUTIONS:
+                    # Cube-and-conquer: cubos disjuntos enumerados en paralelo
+                    solutions = enumerate_configurations_parallel(
+                        features=features,
+                        relations=relations,
+                        constraints=constraints,
+                        max_solutions=count,
+                        partial_selection=partial_selection,
+                    )
+                else:
+                    solutions = validator.enumerate_configurations(
+                        features=features,
+                        relations=relations,
+                        constraints=constraints,
+                        max_solutions=count,
+                        partial_selection=partial_selection,
+                    )
             except Exception as exc:
                 return [
                     GenerationResult(
@@ -330,84 +401,203 @@ class FeatureModelConfigurationGenerator:
                     )
                 ]
 
-            for selected in solutions:
-                configuration = {
-                    str(feature.get("id")): str(feature.get("id")) in selected
-                    for feature in features
-                }
-                results.append(
-                    GenerationResult(
-                        success=True,
-                        configuration=configuration,
-                        selected_features=selected,
-                        score=self._score_configuration(
-                            configuration, list(configuration.keys())
-                        ),
-                        iterations=0,
-                    )
-                )
+            results = self.results_from_solutions(features, solutions)
+            if on_result:
+                for result in results:
+                    on_result(result)
 
             return results
 
+        batch = self._generate_batch(
+            features=features,
+            relations=relations,
+            constraints=constraints,
+            count=count,
+            strategy=strategy,
+            partial_selection=partial_selection,
+            pool_size=pool_size,
+            time_budget_seconds=time_budget_seconds,
+        )
+        if batch is not None:
+            if on_result:
+                for result in batch:
+                    if result.success:
+                        on_result(result)
+            return batch
+
+        for result in self._iter_sampled_configurations(
+            features=features,
+            relations=relations,
+            constraints=constraints,
+            count=count,
+            diverse=diverse,
+            strategy=strategy,
+            partial_selection=partial_selection,
+        ):
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        return results
+
+    def iter_multiple_configurations(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+        count: int = 10,
+        diverse: bool = True,
+        strategy: GenerationStrategy = GenerationStrategy.RANDOM,
+        partial_selection: Optional[Dict[str, bool]] = None,
+        pool_size: Optional[int] = None,
+        time_budget_seconds: Optional[float] = None,
+        seed: Optional[int] = None,
+    ) -> Iterator[GenerationResult]:
+        """
+        Versión perezosa de ``generate_multiple_configurations``.
+
+        Produce cada resultado (también los fallidos) sin acumularlos, para
+        escribirlos en streaming. SAT_ENUM enumera las soluciones una a una
+        (en serie; el reparto en cubos lo hacen las subtareas de Celery) y las
+        estrategias iterativas generan bajo demanda. Las estrategias por lotes
+        (pairwise, uniforme, NSGA-II...) necesitan la muestra completa para su
+        propio algoritmo y se producen al terminar.
+        """
+        if seed is not None:
+            self.reseed(seed)
+
+        if strategy == GenerationStrategy.SAT_ENUM:
+            feature_ids = [str(feature.get("id")) for feature in features]
+            validator = FeatureModelLogicalValidator()
+            try:
+                solutions = validator.iter_configurations(
+                    features=features,
+                    relations=relations,
+                    constraints=constraints,
+                    partial_selection=partial_selection,
+                )
+                for selected in islice(solutions, count):
+                    yield self._result_from_solution(feature_ids, selected)
+            except Exception as exc:
+                yield GenerationResult(success=False, errors=[str(exc)])
+            return
+
+        batch = self._generate_batch(
+            features=features,
+            relations=relations,
+            constraints=constraints,
+            count=count,
+            strategy=strategy,
+            partial_selection=partial_selection,
+            pool_size=pool_size,
+            time_budget_seconds=time_budget_seconds,
+        )
+        if batch is not None:
+            yield from batch
+            return
+
+        yield from self._iter_sampled_configurations(
+            features=features,
+            relations=relations,
+            constraints=constraints,
+            count=count,
+            diverse=diverse,
+            strategy=strategy,
+            partial_selection=partial_selection,
+        )
+
+    def _generate_batch(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+        count: int,
+        strategy: GenerationStrategy,
+        partial_selection: Optional[Dict[str, bool]],
+        pool_size: Optional[int],
+        time_budget_seconds: Optional[float],
+    ) -> Optional[List[GenerationResult]]:
+        """Muestra de las estrategias por lotes; None si ``strategy`` es iterativa."""
+        batch: Optional[List[GenerationResult]] = None
         if strategy == GenerationStrategy.PAIRWISE:
-            return self._generate_pairwise_configurations(
+            batch = self._generate_pairwise_configurations(
                 features=features,
                 relations=relations,
                 constraints=constraints,
                 count=count,
                 partial_selection=partial_selection,
             )
-
-        if strategy == GenerationStrategy.UNIFORM:
-            return self._generate_uniform_sample(
+        elif strategy == GenerationStrategy.UNIFORM:
+            batch = self._generate_uniform_sample(
                 features=features,
                 relations=relations,
                 constraints=constraints,
                 count=count,
                 partial_selection=partial_selection,
             )
-
-        if strategy == GenerationStrategy.STRATIFIED:
-            return self._generate_stratified_sample(
+        elif strategy == GenerationStrategy.STRATIFIED:
+            batch = self._generate_stratified_sample(
                 features=features,
                 relations=relations,
                 constraints=constraints,
                 count=count,
                 partial_selection=partial_selection,
             )
-
-        if strategy == GenerationStrategy.CP_SAT:
-            return self._generate_cp_sat_multiple(
+        elif strategy == GenerationStrategy.CP_SAT:
+            batch = self._generate_cp_sat_multiple(
                 features=features,
                 relations=relations,
                 constraints=constraints,
                 count=count,
                 partial_selection=partial_selection,
             )
-
-        if strategy == GenerationStrategy.BDD:
-            return self._generate_bdd_sample(
+        elif strategy == GenerationStrategy.BDD:
+            batch = self._generate_bdd_sample(
                 features=features,
                 relations=relations,
                 constraints=constraints,
                 count=count,
                 partial_selection=partial_selection,
             )
-
-        if strategy == GenerationStrategy.NSGA2:
-            return self._generate_nsga2_configurations(
+        elif strategy == GenerationStrategy.NSGA2:
+            batch = self._generate_nsga2_configurations(
+                features=features,
+                relations=relations,
+                constraints=constraints,
+                count=count,
+                partial_selection=partial_selection,
+            )
+        elif strategy == GenerationStrategy.DIVERSE:
+            batch = self.generate_diverse_configurations(
                 features=features,
                 relations=relations,
                 constraints=constraints,
                 count=count,
                 partial_selection=partial_selection,
+                pool_size=pool_size,
+                time_budget_seconds=time_budget_seconds,
             )
 
-        for i in range(count * 3):  # Intentar más veces para asegurar diversidad
-            if len(results) >= count:
+        return batch
+
+    def _iter_sampled_configurations(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+        count: int,
+        diverse: bool,
+        strategy: GenerationStrategy,
+        partial_selection: Optional[Dict[str, bool]],
+    ) -> Iterator[GenerationResult]:
+        """Configuraciones aceptadas de las estrategias iterativas, una a una."""
+        accepted = 0
+        generated_configs: Set[frozenset] = set()
+        for _ in range(count * 3):  # Intentar más veces para asegurar diversidad
+            if accepted >= count:
                 break
 
-            # Usar random con seeds diferentes para diversidad
+            # El generador local avanza entre llamadas: cada intento es distinto
             result = self.generate_valid_configuration(
                 features=features,
                 relations=relations,
@@ -420,10 +610,113 @@ class FeatureModelConfigurationGenerator:
                 # Verificar si es diferente a las anteriores
                 config_set = frozenset(result.selected_features)
                 if not diverse or config_set not in generated_configs:
-                    results.append(result)
                     generated_configs.add(config_set)
+                    accepted += 1
+                    yield result
 
-        return results
+    def results_from_solutions(
+        self, features: List[Dict[str, Any]], solutions: List[List[str]]
+    ) -> List[GenerationResult]:
+        """Convierte soluciones enumeradas (listas de feature_ids) en resultados."""
+        feature_ids = [str(feature.get("id")) for feature in features]
+        return [
+            self._result_from_solution(feature_ids, selected) for selected in solutions
+        ]
+
+    def _result_from_solution(
+        self, feature_ids: List[str], selected: List[str]
+    ) -> GenerationResult:
+        selected_set = set(selected)
+        configuration = {fid: fid in selected_set for fid in feature_ids}
+        return GenerationResult(
+            success=True,
+            configuration=configuration,
+            selected_features=selected,
+            score=self._score_configuration(configuration, feature_ids),
+            iterations=0,
+        )
+
+    def generate_diverse_configurations(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+        count: int,
+        partial_selection: Optional[Dict[str, bool]] = None,
+        pool_size: Optional[int] = None,
+        time_budget_seconds: Optional[float] = None,
+        distance_metric: str = "jaccard",
+    ) -> List[GenerationResult]:
+        """
+        Genera configuraciones maximizando la diversidad (farthest-point).
+
+        1. Construye un pool de candidatos únicos con el muestreador RANDOM
+           hasta alcanzar ``pool_size`` o agotar ``time_budget_seconds``.
+        2. Empaqueta el pool como bitsets y elige golosamente el candidato más
+           lejano (Jaccard/Hamming) a los ya elegidos.
+
+        Args:
+            count: Número de configuraciones a devolver
+            partial_selection: Decisiones parciales a respetar
+            pool_size: Candidatos a muestrear (por defecto 4 × count)
+            time_budget_seconds: Tiempo máximo para construir el pool
+            distance_metric: "jaccard" o "hamming"
+
+        Returns:
+            Lista de GenerationResult en orden de selección
+        """
+        if not NUMPY_AVAILABLE:
+            return self.generate_multiple_configurations(
+                features=features,
+                relations=relations,
+                constraints=constraints,
+                count=count,
+                diverse=True,
+                strategy=GenerationStrategy.RANDOM,
+                partial_selection=partial_selection,
+            )
+
+        target_pool = max(pool_size or count * 4, count)
+        deadline = (
+            time.monotonic() + time_budget_seconds if time_budget_seconds else None
+        )
+
+        pool: List[GenerationResult] = []
+        seen: Set[frozenset] = set()
+        for _ in range(target_pool * 3):
+            if len(pool) >= target_pool:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            result = self.generate_valid_configuration(
+                features=features,
+                relations=relations,
+                constraints=constraints,
+                strategy=GenerationStrategy.RANDOM,
+                partial_selection=dict(partial_selection)
+                if partial_selection
+                else None,
+            )
+            if not result.success:
+                continue
+            config_set = frozenset(result.selected_features)
+            if config_set in seen:
+                continue
+            seen.add(config_set)
+            pool.append(result)
+
+        if not pool:
+            return [
+                GenerationResult(
+                    success=False,
+                    errors=["No se encontró configuración válida"],
+                )
+            ]
+
+        index = FeatureBitIndex([str(f.get("id")) for f in features])
+        rows = index.pack_many(r.selected_features for r in pool)
+        chosen = farthest_point_selection(rows, count, metric=distance_metric)
+        return [pool[i] for i in chosen]
 
     def _generate_pairwise_configurations(
         self,
@@ -527,7 +820,7 @@ class FeatureModelConfigurationGenerator:
             ]
 
         sample = (
-            random.sample(solutions, k=min(count, len(solutions)))
+            self.rng.sample(solutions, k=min(count, len(solutions)))
             if len(solutions) > count
             else solutions
         )
@@ -608,10 +901,10 @@ class FeatureModelConfigurationGenerator:
             if not bucket:
                 continue
             pick = min(per_bucket, len(bucket))
-            selected_solutions.extend(random.sample(bucket, k=pick))
+            selected_solutions.extend(self.rng.sample(bucket, k=pick))
 
         while len(selected_solutions) < min(count, len(solutions)):
-            selected_solutions.append(random.choice(solutions))
+            selected_solutions.append(self.rng.choice(solutions))
 
         selected_solutions = selected_solutions[: min(count, len(solutions))]
 
@@ -733,6 +1026,8 @@ class FeatureModelConfigurationGenerator:
 
         model.Maximize(sum(vars_map.values()))
         solver = cp_model.CpSolver()
+        if self.seed is not None:
+            solver.parameters.random_seed = self.seed % (2**31)
         status = solver.Solve(model)
         if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
             return GenerationResult(
@@ -859,6 +1154,8 @@ class FeatureModelConfigurationGenerator:
                     self.StopSearch()
 
         solver = cp_model.CpSolver()
+        if self.seed is not None:
+            solver.parameters.random_seed = self.seed % (2**31)
         collector = _SolutionCollector(vars_map, count)
         solver.SearchForAllSolutions(model, collector)
 
@@ -965,8 +1262,15 @@ class FeatureModelConfigurationGenerator:
 
         selected_sets = [set(r.selected_features) for r in successful]
 
-        diversity = self._average_jaccard_distance(selected_sets)
-        coverage = self._pairwise_coverage(selected_sets, feature_ids)
+        if NUMPY_AVAILABLE:
+            # Bitsets uint64: Jaccard por popcount y cobertura por producto de Gram
+            metrics = ConfigurationSetMetrics(feature_ids, len(selected_sets))
+            metrics.extend(selected_sets)
+            diversity = metrics.diversity()
+            coverage = metrics.pairwise_coverage()
+        else:
+            diversity = self._average_jaccard_distance(selected_sets)
+            coverage = self._pairwise_coverage(selected_sets, feature_ids)
         selected_counts = [len(s) for s in selected_sets]
 
         return {
@@ -1152,7 +1456,7 @@ class FeatureModelConfigurationGenerator:
             creator.create("IndividualMulti", list, fitness=creator.FitnessMulti)
 
         toolbox = base.Toolbox()
-        toolbox.register("attr_bool", random.randint, 0, 1)
+        toolbox.register("attr_bool", self.rng.randint, 0, 1)
         toolbox.register(
             "individual",
             tools.initRepeat,
@@ -1189,6 +1493,7 @@ class FeatureModelConfigurationGenerator:
         toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
         toolbox.register("select", tools.selNSGA2)
 
+        self._seed_global_random()
         population = toolbox.population(n=self.population_size)
         population = [apply_partial(ind) for ind in population]
 
@@ -1200,13 +1505,13 @@ class FeatureModelConfigurationGenerator:
             offspring = list(map(toolbox.clone, offspring))
 
             for child1, child2 in zip(offspring[::2], offspring[1::2]):
-                if random.random() < 0.9:
+                if self.rng.random() < 0.9:
                     toolbox.mate(child1, child2)
                     del child1.fitness.values
                     del child2.fitness.values
 
             for mutant in offspring:
-                if random.random() < 0.2:
+                if self.rng.random() < 0.2:
                     toolbox.mutate(mutant)
                     del mutant.fitness.values
 
@@ -1447,7 +1752,7 @@ class FeatureModelConfigurationGenerator:
                     queue.append(child_id)
                 elif relation_type == "optional":
                     # Decisión aleatoria
-                    should_include = random.random() > 0.5
+                    should_include = self.rng.random() > 0.5
                     configuration[child_id] = should_include
                     if should_include:
                         queue.append(child_id)
@@ -1556,11 +1861,11 @@ class FeatureModelConfigurationGenerator:
             # Si hay selección parcial, respetarla
             if partial_selection:
                 individual = [
-                    partial_selection.get(fid, random.choice([True, False]))
+                    partial_selection.get(fid, self.rng.choice([True, False]))
                     for fid in feature_ids
                 ]
             else:
-                individual = [random.choice([True, False]) for _ in range(n_features)]
+                individual = [self.rng.choice([True, False]) for _ in range(n_features)]
             return creator.Individual(individual)
 
         toolbox.register("individual", create_individual)
@@ -1590,6 +1895,7 @@ class FeatureModelConfigurationGenerator:
         toolbox.register("select", tools.selTournament, tournsize=3)
 
         # 4. Ejecutar algoritmo genético
+        self._seed_global_random()
         population = toolbox.population(n=self.population_size)
         hof = tools.HallOfFame(1)  # Mejor individuo
 
@@ -1722,8 +2028,8 @@ class FeatureModelConfigurationGenerator:
         num_children = len(children)
 
         if num_children == 0:
-            return random.random() < 0.3
+            return self.rng.random() < 0.3
         elif num_children <= 2:
-            return random.random() < 0.6
+            return self.rng.random() < 0.6
         else:
-            return random.random() < 0.8
+            return self.rng.random() < 0.8
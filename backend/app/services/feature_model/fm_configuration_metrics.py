@@ -0,0 +1,325 @@
+"""
+Métricas de calidad sobre conjuntos de configuraciones (bitsets empaquetados).
+
+Cada configuración se representa como una fila de palabras ``uint64`` donde el
+bit ``k`` indica si la feature ``k`` (según el orden de ``feature_ids``) está
+seleccionada. Sobre esa representación:
+
+- Distancia de Jaccard: intersecciones y uniones por popcount, en lote contra
+  todas las filas anteriores.
+- Cobertura pairwise: matriz de pares cubiertos (``n x n`` bits) actualizada
+  con el producto de Gram ``Xᵀ·X`` de cada lote de configuraciones.
+
+Las métricas son incrementales: ``add``/``extend`` se pueden invocar mientras
+la generación está en curso y ``snapshot`` devuelve el estado actual.
+
+También expone la selección farthest-point (max-min) usada por el muestreo
+orientado a diversidad.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+WORD_BITS = 64
+
+# Tamaño del bloque de features al calcular el producto de Gram por tramos
+GRAM_BLOCK_SIZE = 512
+
+if NUMPY_AVAILABLE:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class FeatureBitIndex:
+    """Mapa estable feature_id -> posición de bit."""
+
+    def __init__(self, feature_ids: Sequence[str]):
+        self.feature_ids: List[str] = [str(fid) for fid in feature_ids]
+        self.positions: Dict[str, int] = {
+            fid: idx for idx, fid in enumerate(self.feature_ids)
+        }
+        self.n_features = len(self.feature_ids)
+        self.n_words = max((self.n_features + WORD_BITS - 1) // WORD_BITS, 1)
+
+    def indices(self, selected_features: Iterable[str]) -> List[int]:
+        """Posiciones de bit de las features seleccionadas (ignora desconocidas)."""
+        positions = self.positions
+        return sorted(
+            {positions[fid] for fid in map(str, selected_features) if fid in positions}
+        )
+
+    def pack(self, selected_features: Iterable[str]) -> "np.ndarray":
+        """Empaqueta una configuración en una fila de ``n_words`` palabras uint64."""
+        row = np.zeros(self.n_words, dtype="<u8")
+        idx = np.asarray(self.indices(selected_features), dtype=np.int64)
+        if idx.size:
+            bits = np.left_shift(np.uint64(1), (idx % WORD_BITS).astype("<u8"))
+            np.bitwise_or.at(row, idx // WORD_BITS, bits)
+        return row
+
+    def pack_many(self, configurations: Iterable[Iterable[str]]) -> "np.ndarray":
+        """Empaqueta varias configuraciones en una matriz ``(m, n_words)``."""
+        rows = [self.pack(selected) for selected in configurations]
+        if not rows:
+            return np.zeros((0, self.n_words), dtype="<u8")
+        return np.vstack(rows)
+
+    def unpack(self, rows: "np.ndarray") -> "np.ndarray":
+        """Desempaqueta filas a una matriz 0/1 ``(m, n_features)`` de uint8."""
+        as_bytes = np.ascontiguousarray(rows, dtype="<u8").view(np.uint8)
+        bits = np.unpackbits(as_bytes, axis=1, bitorder="little")
+        return bits[:, : self.n_features]
+
+    def ids_from_row(self, row: "np.ndarray") -> List[str]:
+        """Lista de feature_ids seleccionadas en una fila empaquetada."""
+        bits = self.unpack(row.reshape(1, -1))[0]
+        return [self.feature_ids[i] for i in np.flatnonzero(bits)]
+
+
+def popcount(words: "np.ndarray") -> "np.ndarray":
+    """Popcount por palabra uint64."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    as_bytes = np.ascontiguousarray(words, dtype="<u8").view(np.uint8)
+    counts = _BYTE_POPCOUNT[as_bytes].reshape(*words.shape, 8)
+    return counts.sum(axis=-1, dtype=np.uint64)
+
+
+def row_popcount(rows: "np.ndarray") -> "np.ndarray":
+    """Número de bits activos por fila."""
+    return popcount(rows).sum(axis=-1, dtype=np.int64)
+
+
+class ConfigurationSetMetrics:
+    """
+    Acumulador incremental de diversidad y cobertura pairwise.
+
+    Uso típico durante una generación masiva::
+
+        metrics = ConfigurationSetMetrics(feature_ids)
+        for result in stream:
+            metrics.add(result.selected_features)
+            progress(metrics.snapshot())
+    """
+
+    def __init__(
+        self,
+        feature_ids: Sequence[str],
+        initial_capacity: int = 64,
+        diversity_sample_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            feature_ids: Orden de las features (posición de bit)
+            initial_capacity: Filas reservadas inicialmente
+            diversity_sample_size: Si se indica, la diversidad (O(m²)) se estima
+                sobre las primeras N configuraciones; la cobertura y los
+                objetivos siguen usando todas
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy no disponible para métricas con bitsets")
+
+        self.index = FeatureBitIndex(feature_ids)
+        self.diversity_sample_size = diversity_sample_size
+        capacity = max(initial_capacity, 1)
+        if diversity_sample_size is not None:
+            capacity = max(min(capacity, diversity_sample_size), 1)
+        self._rows = np.zeros((capacity, self.index.n_words), "<u8")
+        self._sizes = np.zeros(max(initial_capacity, 1), dtype=np.int64)
+        self._stored = 0
+        self.count = 0
+        self._distance_sum = 0.0
+        self._distance_pairs = 0
+        # Fila k: features que han co-ocurrido con la feature k en alguna configuración
+        self._coverage = np.zeros((self.index.n_features, self.index.n_words), "<u8")
+
+    @property
+    def rows(self) -> "np.ndarray":
+        """Configuraciones empaquetadas acumuladas (muestra de diversidad)."""
+        return self._rows[: self._stored]
+
+    def add(self, selected_features: Iterable[str]) -> None:
+        """Añade una configuración y actualiza las métricas."""
+        idx = self.index.indices(selected_features)
+        row = self.index.pack(self.index.feature_ids[i] for i in idx)
+        self._append_row(row)
+        if idx:
+            self._coverage[idx] |= row
+
+    def extend(self, configurations: Iterable[Iterable[str]]) -> None:
+        """Añade un lote de configuraciones (cobertura vía producto de Gram)."""
+        batch = self.index.pack_many(configurations)
+        if batch.shape[0] == 0:
+            return
+        for row in batch:
+            self._append_row(row)
+        self._merge_gram_coverage(batch)
+
+    def diversity(self) -> float:
+        """Distancia de Jaccard media entre todos los pares de configuraciones."""
+        if not self._distance_pairs:
+            return 0.0
+        return self._distance_sum / self._distance_pairs
+
+    def covered_pairs(self) -> int:
+        """Número de pares distintos de features cubiertos por el conjunto."""
+        if self.index.n_features < 2:
+            return 0
+        total_bits = int(row_popcount(self._coverage).sum())
+        positions = np.arange(self.index.n_features)
+        diagonal = (
+            self._coverage[positions, positions // WORD_BITS]
+            >> (positions % WORD_BITS).astype("<u8")
+        ) & np.uint64(1)
+        return (total_bits - int(diagonal.sum())) // 2
+
+    def pairwise_coverage(self) -> float:
+        """Fracción de pares de features cubiertos."""
+        n = self.index.n_features
+        if n < 2:
+            return 0.0
+        total_pairs = n * (n - 1) // 2
+        return self.covered_pairs() / total_pairs
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas actuales con el mismo formato que ``compute_quality_metrics``."""
+        sizes = self._sizes[: self.count]
+        if self.count == 0:
+            objectives = {"avg_selected": 0.0, "min_selected": 0, "max_selected": 0}
+        else:
+            objectives = {
+                "avg_selected": float(sizes.mean()),
+                "min_selected": int(sizes.min()),
+                "max_selected": int(sizes.max()),
+            }
+        return {
+            "diversity": self.diversity(),
+            "pairwise_coverage": self.pairwise_coverage(),
+            "objectives": objectives,
+        }
+
+    def distances_to(
+        self, row: "np.ndarray", rows: Optional["np.ndarray"] = None
+    ) -> "np.ndarray":
+        """Distancias de Jaccard de ``row`` contra ``rows`` (por defecto, todas)."""
+        rows = self.rows if rows is None else rows
+        return jaccard_distances(row, rows)
+
+    def _append_row(self, row: "np.ndarray") -> None:
+        if self.count == self._sizes.shape[0]:
+            self._sizes = np.resize(self._sizes, self.count * 2)
+        self._sizes[self.count] = int(popcount(row).sum())
+        self.count += 1
+
+        sample_size = self.diversity_sample_size
+        if sample_size is not None and self._stored >= sample_size:
+            return
+
+        if self._stored == self._rows.shape[0]:
+            self._rows = np.resize(self._rows, (self._stored * 2, self.index.n_words))
+
+        if self._stored:
+            distances = jaccard_distances(row, self.rows)
+            self._distance_sum += float(distances.sum())
+            self._distance_pairs += self._stored
+
+        self._rows[self._stored] = row
+        self._stored += 1
+
+    def _merge_gram_coverage(self, batch: "np.ndarray") -> None:
+        """OR de los pares co-seleccionados en ``batch`` sobre la matriz de cobertura."""
+        bits = self.index.unpack(batch).astype(np.float32)
+        n = self.index.n_features
+        for start in range(0, n, GRAM_BLOCK_SIZE):
+            stop = min(start + GRAM_BLOCK_SIZE, n)
+            block = bits[:, start:stop]
+            if not block.any():
+                continue
+            gram = block.T @ bits  # (bloque, n): co-ocurrencias por par
+            packed = np.packbits(gram > 0, axis=1, bitorder="little")
+            padded = np.zeros((stop - start, self.index.n_words * 8), dtype=np.uint8)
+            padded[:, : packed.shape[1]] = packed
+            self._coverage[start:stop] |= padded.view("<u8")
+
+
+def jaccard_distances(row: "np.ndarray", rows: "np.ndarray") -> "np.ndarray":
+    """Distancias de Jaccard vectorizadas de una fila contra una matriz de filas."""
+    if rows.shape[0] == 0:
+        return np.zeros(0, dtype=np.float64)
+    intersection = row_popcount(rows & row).astype(np.float64)
+    union = row_popcount(rows | row).astype(np.float64)
+    similarity = np.divide(
+        intersection, union, out=np.ones_like(intersection), where=union > 0
+    )
+    return 1.0 - similarity
+
+
+def hamming_distances(row: "np.ndarray", rows: "np.ndarray") -> "np.ndarray":
+    """Distancias de Hamming vectorizadas de una fila contra una matriz de filas."""
+    if rows.shape[0] == 0:
+        return np.zeros(0, dtype=np.float64)
+    return row_popcount(rows ^ row).astype(np.float64)
+
+
+DISTANCE_FUNCTIONS = {
+    "jaccard": jaccard_distances,
+    "hamming": hamming_distances,
+}
+
+
+def farthest_point_selection(
+    rows: "np.ndarray",
+    count: int,
+    metric: str = "jaccard",
+) -> List[int]:
+    """
+    Selección golosa max-min sobre filas empaquetadas.
+
+    En cada paso elige la fila cuya distancia mínima al conjunto ya elegido es
+    máxima. Mantiene un vector de distancias mínimas que se actualiza con una
+    única pasada vectorizada por elección: O(count · m · n_words).
+
+    Args:
+        rows: Matriz ``(m, n_words)`` de candidatos
+        count: Número de filas a elegir
+        metric: "jaccard" u "hamming"
+
+    Returns:
+        Índices de las filas elegidas, en orden de selección
+    """
+    distance = DISTANCE_FUNCTIONS.get(metric)
+    if distance is None:
+        raise ValueError(f"Métrica de distancia no soportada: {metric}")
+
+    m = rows.shape[0]
+    chosen: List[int] = []
+    if m == 0 or count <= 0:
+        return chosen
+
+    # Sin elegidos todavía, todos los candidatos están "infinitamente" lejos
+    min_dist = np.full(m, np.inf)
+    while len(chosen) < count:
+        idx = int(np.argmax(min_dist))
+        if min_dist[idx] < 0:
+            break
+        min_dist[idx] = -1.0
+        chosen.append(idx)
+        np.minimum(
+            min_dist, distance(rows[idx], rows), out=min_dist, where=min_dist >= 0
+        )
+
+    return chosen
+
+
+def compute_set_metrics(
+    configurations: Iterable[Iterable[str]], feature_ids: Sequence[str]
+) -> Dict[str, Any]:
+    """Calcula diversidad/cobertura de un conjunto cerrado de configuraciones."""
+    metrics = ConfigurationSetMetrics(feature_ids)
+    metrics.extend(configurations)
+    return metrics.snapshot()
@@ -10,13 +10,18 @@ Soporta exportación a:
 - UVL: Universal Variability Language
 - DOT: Graphviz diagram format
 - Mermaid: Mermaid diagram format
+
+Cada formato se genera como un iterador de fragmentos de texto
+(``iter_export``); ``iter_export_bytes`` los agrupa en trozos de bytes que
+pueden escribirse a la vez en una respuesta HTTP y en una subida multipart,
+sin construir el documento completo en memoria. Los métodos
+``export_to_*`` devuelven el documento entero como siempre.
 """
 
+import json
 import uuid
 import unicodedata
-from typing import Optional
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from typing import Iterable, Iterator, Optional
 
 from app.models import (
     FeatureModelVersion,
@@ -24,6 +29,52 @@ from app.models import (
     Constraint,
 )
 from app.enums import FeatureType, FeatureGroupType, FeatureRelationType, ExportFormat
+from app.services.feature_model.fm_json_stream import DEFAULT_CHUNK_SIZE, iter_chunks
+from app.services.feature_model.fm_tree_index import get_tree_index
+
+# Indentación de los formatos anidados (XML y JSON)
+_INDENT = "  "
+
+
+def _xml_escape(value: str) -> str:
+    """Escapa texto y atributos XML igual que ``minidom`` (& < " >)."""
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def _xml_attrs(attrs: Iterable[tuple[str, str]]) -> str:
+    return "".join(f' {name}="{_xml_escape(value)}"' for name, value in attrs)
+
+
+def _iter_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Fragmentos de ``"\\n".join(lines)`` sin construir la cadena."""
+    separator = ""
+    for line in lines:
+        yield separator + line
+        separator = "\n"
+
+
+def _json_block(value: object, level: int) -> str:
+    """``json.dumps(indent=2)`` de un valor anidado ``level`` niveles."""
+    text = json.dumps(value, indent=2, ensure_ascii=False)
+    if level:
+        # JSON escapa los saltos de línea dentro de cadenas
+        text = text.replace("\n", "\n" + _INDENT * level)
+    return text
+
+
+def _iter_json_array(items: Iterable[object], level: int) -> Iterator[str]:
+    """Lista JSON indentada elemento a elemento."""
+    indent = _INDENT * level
+    opening = "[\n"
+    for item in items:
+        yield opening + indent + _INDENT + _json_block(item, level + 1)
+        opening = ",\n"
+    yield "[]" if opening == "[\n" else "\n" + indent + "]"
 
 
 class FeatureModelExportService:
@@ -42,6 +93,9 @@ class FeatureModelExportService:
         # Crear mapeo de IDs para exportación
         self._build_id_mapping()
 
+        # Índice padre→hijos compartido (una vez por versión cargada)
+        self.tree_index = get_tree_index(version)
+
     def _build_id_mapping(self) -> None:
         """Construir mapeo entre UUIDs y IDs cortos para exportación."""
         self.uuid_to_int: dict[uuid.UUID, int] = {}
@@ -77,18 +131,30 @@ class FeatureModelExportService:
         Returns:
             String con el contenido exportado en el formato solicitado
 
+        Raises:
+            ValueError: Si el formato no está soportado
+        """
+        return "".join(self.iter_export(format))
+
+    def iter_export(self, format: ExportFormat) -> Iterator[str]:
+        """
+        Exportar el Feature Model como una secuencia de fragmentos de texto.
+
+        El formato se valida al llamar (no al iterar), así que el error llega
+        antes de empezar a responder.
+
         Raises:
             ValueError: Si el formato no está soportado
         """
         exporters = {
-            ExportFormat.XML: self.export_to_featureide_xml,
-            ExportFormat.SPLOT_XML: self.export_to_splot_xml,
-            ExportFormat.TVL: self.export_to_tvl,
-            ExportFormat.DIMACS: self.export_to_dimacs,
-            ExportFormat.JSON: self.export_to_json,
-            ExportFormat.UVL: self.export_to_uvl,
-            ExportFormat.DOT: self.export_to_dot,
-            ExportFormat.MERMAID: self.export_to_mermaid,
+            ExportFormat.XML: self._iter_featureide_xml,
+            ExportFormat.SPLOT_XML: self._iter_splot_xml,
+            ExportFormat.TVL: self._iter_tvl,
+            ExportFormat.DIMACS: self._iter_dimacs,
+            ExportFormat.JSON: self._iter_json,
+            ExportFormat.UVL: self._iter_uvl,
+            ExportFormat.DOT: self._iter_dot,
+            ExportFormat.MERMAID: self._iter_mermaid,
         }
 
         exporter = exporters.get(format)
@@ -97,6 +163,20 @@ class FeatureModelExportService:
 
         return exporter()
 
+    def iter_export_bytes(
+        self, format: ExportFormat, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Exportación en UTF-8 agrupada en trozos de ``chunk_size`` bytes.
+
+        Raises:
+            ValueError: Si el formato no está soportado
+        """
+        fragments = self.iter_export(format)
+        return iter_chunks(
+            (fragment.encode("utf-8") for fragment in fragments), chunk_size
+        )
+
     # ========================================================================
     # FEATUREIDE XML EXPORT
     # ========================================================================
@@ -132,120 +212,130 @@ class FeatureModelExportService:
         Returns:
             XML string formateado
         """
-        # Crear elemento raíz
-        root = Element("featureModel")
+        return "".join(self._iter_featureide_xml())
+
+    def _iter_featureide_xml(self) -> Iterator[str]:
+        """
+        Escribir el XML de FeatureIDE con indentación incremental.
+
+        Produce el mismo documento que ``minidom.toprettyxml(indent="  ")``
+        (mismo escape, elementos vacíos cerrados con ``/>`` y elementos con
+        solo texto en una línea) sin construir el árbol DOM.
+        """
+        yield '<?xml version="1.0" ?>\n<featureModel>\n'
 
-        # Agregar propiedades del modelo
-        properties = SubElement(root, "properties")
+        # Propiedades del modelo
+        yield f"{_INDENT}<properties>\n"
+        properties = []
         if self.feature_model.name:
-            prop = SubElement(properties, "property")
-            prop.set("key", "name")
-            prop.set("value", self.feature_model.name)
+            properties.append(("name", self.feature_model.name))
         if self.feature_model.description:
-            prop = SubElement(properties, "property")
-            prop.set("key", "description")
-            prop.set("value", self.feature_model.description)
-        prop = SubElement(properties, "property")
-        prop.set("key", "version")
-        prop.set("value", str(self.version.version_number))
-
-        # Construir estructura del árbol
-        struct = SubElement(root, "struct")
+            properties.append(("description", self.feature_model.description))
+        properties.append(("version", str(self.version.version_number)))
+        for key, value in properties:
+            yield self._featureide_property(key, value, level=2)
+        yield f"{_INDENT}</properties>\n"
+
+        # Estructura del árbol
         root_feature = self._get_root_feature()
         if root_feature:
-            self._build_featureide_tree(struct, root_feature)
+            yield f"{_INDENT}<struct>\n"
+            yield from self._iter_featureide_tree(root_feature, level=2)
+            yield f"{_INDENT}</struct>\n"
+        else:
+            yield f"{_INDENT}<struct/>\n"
 
-        # Agregar constraints
+        # Constraints
         if self.version.constraints:
-            constraints = SubElement(root, "constraints")
+            yield f"{_INDENT}<constraints>\n"
             for constraint in self.version.constraints:
-                self._build_featureide_constraint(constraints, constraint)
+                yield self._featureide_constraint(constraint, level=2)
+            yield f"{_INDENT}</constraints>\n"
 
-        # Formatear XML
-        return self._prettify_xml(root)
+        yield "</featureModel>\n"
 
     def _get_root_feature(self) -> Optional[Feature]:
         """Obtener la feature raíz del modelo."""
-        for feature in self.version.features:
-            if feature.parent_id is None:
-                return feature
-        return None
+        return self.tree_index.root
+
+    def _featureide_element_type(self, feature: Feature, has_children: bool) -> str:
+        """Tipo de elemento FeatureIDE según el grupo de la feature."""
+        if feature.group:
+            # Esta feature tiene un grupo, determinar el tipo
+            group_type = feature.group.group_type
+            if group_type == FeatureGroupType.ALTERNATIVE:
+                return "alt"  # XOR group
+            if group_type == FeatureGroupType.OR:
+                return "or"  # OR group
+            return "and"  # Default
+        # Sin grupo, usar "and" por defecto
+        return "and" if has_children else "feature"
 
-    def _build_featureide_tree(self, parent_element: Element, feature: Feature) -> None:
+    def _featureide_property(self, key: str, value: str, level: int) -> str:
+        attrs = _xml_attrs((("key", key), ("value", value)))
+        return f"{_INDENT * level}<property{attrs}/>\n"
+
+    def _iter_featureide_tree(self, feature: Feature, level: int) -> Iterator[str]:
         """
-        Construir árbol de features recursivamente para FeatureIDE XML.
+        Escribir el árbol de features para FeatureIDE XML (recorrido iterativo).
+
+        La pila mezcla features pendientes y etiquetas de cierre (``str``)
+        para emitir cada elemento en cuanto se visita.
 
         Args:
-            parent_element: Elemento XML padre
-            feature: Feature actual a procesar
+            feature: Feature raíz del subárbol a procesar
+            level: Nivel de indentación del elemento raíz
         """
-        # Determinar el tipo de elemento basado en el grupo
-        children = [f for f in self.version.features if f.parent_id == feature.id]
+        stack: list[tuple[Feature, int] | str] = [(feature, level)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
 
-        if feature.group:
-            # Esta feature tiene un grupo, determinar el tipo
-            group = feature.group
-            if group.group_type == FeatureGroupType.ALTERNATIVE:
-                element_type = "alt"  # XOR group
-            elif group.group_type == FeatureGroupType.OR:
-                element_type = "or"  # OR group
-            else:
-                element_type = "and"  # Default
-        else:
-            # Sin grupo, usar "and" por defecto
-            element_type = "and" if children else "feature"
+            feature, level = item
+            indent = _INDENT * level
+            children = self.tree_index.children(feature.id)
+            element_type = self._featureide_element_type(feature, bool(children))
 
-        # Crear elemento
-        feature_element = SubElement(parent_element, element_type)
-        feature_element.set("name", feature.name)
+            # mandatory/optional según el tipo de la feature
+            mandatory = "true" if feature.type == FeatureType.MANDATORY else "false"
+            attrs = _xml_attrs((("name", feature.name), ("mandatory", mandatory)))
 
-        # Establecer si es mandatory u optional
-        if feature.type == FeatureType.MANDATORY:
-            feature_element.set("mandatory", "true")
-        else:
-            feature_element.set("mandatory", "false")
+            # Propiedades adicionales si existen
+            properties = feature.properties or {}
+            if not properties and not children:
+                yield f"{indent}<{element_type}{attrs}/>\n"
+                continue
 
-        # Agregar propiedades adicionales si existen
-        if feature.properties:
-            for key, value in feature.properties.items():
-                prop = SubElement(feature_element, "property")
-                prop.set("key", str(key))
-                prop.set("value", str(value))
+            yield f"{indent}<{element_type}{attrs}>\n"
+            for key, value in properties.items():
+                yield self._featureide_property(str(key), str(value), level + 1)
 
-        # Procesar hijos recursivamente
-        for child in sorted(children, key=lambda x: x.name):
-            self._build_featureide_tree(feature_element, child)
+            # Hijos en orden de nombre (se apilan al revés, tras el cierre)
+            stack.append(f"{indent}</{element_type}>\n")
+            stack.extend((child, level + 1) for child in reversed(children))
 
-    def _build_featureide_constraint(
-        self, constraints_element: Element, constraint: Constraint
-    ) -> None:
+    def _featureide_constraint(self, constraint: Constraint, level: int) -> str:
         """
-        Construir constraint en formato FeatureIDE XML.
+        Constraint en formato FeatureIDE XML.
 
         Args:
-            constraints_element: Elemento XML de constraints
             constraint: Constraint a exportar
+            level: Nivel de indentación del elemento ``rule``
         """
-        rule = SubElement(constraints_element, "rule")
-
+        indent = _INDENT * level
         # TODO: Parsear constraint.expression y convertir a formato FeatureIDE
         # Por ahora, agregar como comentario
-        comment = SubElement(rule, "description")
-        comment.text = self._get_constraint_expression(constraint)
-
-    def _prettify_xml(self, element: Element) -> str:
-        """
-        Formatear XML con indentación.
-
-        Args:
-            element: Elemento XML raíz
-
-        Returns:
-            XML string formateado
-        """
-        rough_string = tostring(element, encoding="unicode")
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
+        expression = self._get_constraint_expression(constraint)
+        if expression:
+            description = (
+                f"{indent}{_INDENT}<description>{_xml_escape(expression)}"
+                "</description>\n"
+            )
+        else:
+            description = f"{indent}{_INDENT}<description/>\n"
+        return f"{indent}<rule>\n{description}{indent}</rule>\n"
 
     # ========================================================================
     # SPLOT XML EXPORT
@@ -261,8 +351,11 @@ class FeatureModelExportService:
         Returns:
             XML string en formato SPLOT
         """
+        return "".join(self._iter_splot_xml())
+
+    def _iter_splot_xml(self) -> Iterator[str]:
         # TODO: Implementar formato SPLOT XML
-        return "<!-- SPLOT XML format - TODO: Implementar -->"
+        yield "<!-- SPLOT XML format - TODO: Implementar -->"
 
     # ========================================================================
     # TVL EXPORT
@@ -289,8 +382,11 @@ class FeatureModelExportService:
         Returns:
             String en formato TVL
         """
+        return "".join(self._iter_tvl())
+
+    def _iter_tvl(self) -> Iterator[str]:
         # TODO: Implementar formato TVL
-        return "// TVL format - TODO: Implementar"
+        yield "// TVL format - TODO: Implementar"
 
     # ========================================================================
     # DIMACS EXPORT
@@ -306,13 +402,45 @@ class FeatureModelExportService:
         Returns:
             String en formato DIMACS CNF
         """
-        clauses = []
+        return "".join(self._iter_dimacs())
+
+    def _iter_dimacs(self) -> Iterator[str]:
+        """
+        Escribir el DIMACS clause a clause.
+
+        La cabecera necesita el número de clauses: se cuentan en una primera
+        pasada del generador (barata) en lugar de guardarlas todas.
+        """
+        num_vars = len(self.uuid_to_int)
+        num_clauses = sum(1 for _ in self._iter_dimacs_clauses())
 
+        yield from _iter_lines(
+            [
+                f"c Feature Model: {self.feature_model.name}",
+                f"c Version: {self.version.version_number}",
+                f"c Variables: {num_vars}",
+                f"c Clauses: {num_clauses}",
+                f"p cnf {num_vars} {num_clauses}",
+            ]
+        )
+
+        # Agregar clauses
+        for clause in self._iter_dimacs_clauses():
+            yield "\n" + " ".join(map(str, clause)) + " 0"
+
+        # Agregar mapeo de IDs
+        yield "\nc\nc Variable mapping:"
+        for feature in self.version.features:
+            feature_id = self.uuid_to_int[feature.id]
+            yield f"\nc {feature_id}: {feature.name}"
+
+    def _iter_dimacs_clauses(self) -> Iterator[list[int]]:
+        """Clauses CNF del modelo, en orden estable."""
         # 1. Constraint: Root feature debe estar presente
         root_feature = self._get_root_feature()
         if root_feature:
             root_id = self.uuid_to_int[root_feature.id]
-            clauses.append([root_id])
+            yield [root_id]
 
         # 2. Para cada feature con parent: si parent está, hijos mandatory también
         for feature in self.version.features:
@@ -320,7 +448,7 @@ class FeatureModelExportService:
                 parent_id = self.uuid_to_int[feature.parent_id]
                 feature_id = self.uuid_to_int[feature.id]
                 # parent => child (equivalente a: -parent OR child)
-                clauses.append([-parent_id, feature_id])
+                yield [-parent_id, feature_id]
 
         # 3. Para grupos XOR (alternative): exactamente uno debe estar seleccionado
         for group in self.version.feature_groups:
@@ -328,21 +456,19 @@ class FeatureModelExportService:
                 parent_feature = group.parent_feature
                 if parent_feature:
                     parent_id = self.uuid_to_int[parent_feature.id]
-                    children = [
-                        f
-                        for f in self.version.features
-                        if f.parent_id == parent_feature.id
-                    ]
-                    children_ids = [self.uuid_to_int[f.id] for f in children]
+                    children_ids = sorted(
+                        self.uuid_to_int[f.id]
+                        for f in self.tree_index.children(parent_feature.id)
+                    )
 
                     # Si parent está, al menos uno de los hijos debe estar
-                    clauses.append([-parent_id] + children_ids)
+                    yield [-parent_id] + children_ids
 
                     # Si parent está, no más de uno (pares excluyentes)
                     for i, id1 in enumerate(children_ids):
                         for id2 in children_ids[i + 1 :]:
                             # parent => not (child1 AND child2)
-                            clauses.append([-parent_id, -id1, -id2])
+                            yield [-parent_id, -id1, -id2]
 
         # 4. Relaciones REQUIRED y EXCLUDES
         for relation in self.version.feature_relations:
@@ -351,35 +477,10 @@ class FeatureModelExportService:
 
             if relation.type == FeatureRelationType.REQUIRED:
                 # source => target (equivalente a: -source OR target)
-                clauses.append([-source_id, target_id])
+                yield [-source_id, target_id]
             elif relation.type == FeatureRelationType.EXCLUDES:
                 # NOT (source AND target) (equivalente a: -source OR -target)
-                clauses.append([-source_id, -target_id])
-
-        # Generar formato DIMACS
-        num_vars = len(self.uuid_to_int)
-        num_clauses = len(clauses)
-
-        lines = [
-            f"c Feature Model: {self.feature_model.name}",
-            f"c Version: {self.version.version_number}",
-            f"c Variables: {num_vars}",
-            f"c Clauses: {num_clauses}",
-            f"p cnf {num_vars} {num_clauses}",
-        ]
-
-        # Agregar clauses
-        for clause in clauses:
-            lines.append(" ".join(map(str, clause)) + " 0")
-
-        # Agregar mapeo de IDs
-        lines.append("c")
-        lines.append("c Variable mapping:")
-        for feature in self.version.features:
-            feature_id = self.uuid_to_int[feature.id]
-            lines.append(f"c {feature_id}: {feature.name}")
-
-        return "\n".join(lines)
+                yield [-source_id, -target_id]
 
     # ========================================================================
     # JSON EXPORT
@@ -392,39 +493,99 @@ class FeatureModelExportService:
         Returns:
             JSON string
         """
-        import json
+        return "".join(self._iter_json())
 
-        root_feature = self._get_root_feature()
+    def _iter_json(self) -> Iterator[str]:
+        """
+        Escribir el JSON sección a sección.
 
-        data = {
+        Produce el mismo texto que ``json.dumps(data, indent=2,
+        ensure_ascii=False)`` del documento completo: cada nodo se serializa
+        por separado y se reindenta a su nivel.
+        """
+        header = {
             "name": self.feature_model.name,
             "description": self.feature_model.description,
             "version": self.version.version_number,
             "status": self.version.status.value,
-            "tree": self._build_json_tree(root_feature) if root_feature else None,
-            "relations": [
+        }
+        # Objeto sin la llave de cierre, para seguir añadiendo claves
+        yield _json_block(header, 0)[: -len("\n}")]
+
+        yield ',\n  "tree": '
+        root_feature = self._get_root_feature()
+        if root_feature:
+            yield from self._iter_json_tree(root_feature, level=1)
+        else:
+            yield "null"
+
+        yield ',\n  "relations": '
+        yield from _iter_json_array(
+            (
                 {
                     "source": rel.source_feature.name,
                     "target": rel.target_feature.name,
                     "type": rel.type.value,
                 }
                 for rel in self.version.feature_relations
-            ],
-            "constraints": [
+            ),
+            level=1,
+        )
+
+        yield ',\n  "constraints": '
+        yield from _iter_json_array(
+            (
                 {
                     "name": c.name,
                     "expression": c.expression,
                 }
                 for c in self.version.constraints
-            ],
-        }
+            ),
+            level=1,
+        )
+        yield "\n}"
 
-        return json.dumps(data, indent=2, ensure_ascii=False)
+    def _iter_json_tree(self, feature: Feature, level: int) -> Iterator[str]:
+        """
+        Escribir el árbol JSON en preorden (sin recursión).
 
-    def _build_json_tree(self, feature: Feature) -> dict:
-        """Construir árbol en formato JSON recursivamente."""
-        children = [f for f in self.version.features if f.parent_id == feature.id]
+        La pila mezcla nodos pendientes y separadores o cierres (``str``).
 
+        Args:
+            feature: Feature raíz del subárbol
+            level: Nivel de anidamiento del objeto raíz
+        """
+        stack: list[tuple[Feature, int, int] | str] = [(feature, level, 0)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+
+            feature, level, depth = item
+            node = _json_block(self._build_json_node(feature, depth, []), level)
+            children = self.tree_index.children(feature.id)
+            if not children:
+                yield node
+                continue
+
+            # Abrir "children" antes de la llave de cierre del nodo
+            indent = _INDENT * level
+            child_indent = _INDENT * (level + 2)
+            yield (
+                node[: -len("\n" + indent + "}")]
+                + f',\n{indent}{_INDENT}"children": [\n{child_indent}'
+            )
+
+            pending: list[tuple[Feature, int, int] | str] = []
+            for index, child in enumerate(children):
+                if index:
+                    pending.append(",\n" + child_indent)
+                pending.append((child, level + 2, depth + 1))
+            pending.append(f"\n{indent}{_INDENT}]\n{indent}}}")
+            stack.extend(reversed(pending))
+
+    def _build_json_node(self, feature: Feature, depth: int, children: list) -> dict:
         node = {
             "name": feature.name,
             "type": feature.type.value,
@@ -439,10 +600,7 @@ class FeatureModelExportService:
             }
 
         if children:
-            node["children"] = [
-                self._build_json_tree(child)
-                for child in sorted(children, key=lambda x: x.name)
-            ]
+            node["children"] = children
 
         return node
 
@@ -479,26 +637,30 @@ class FeatureModelExportService:
         Returns:
             String en formato UVL
         """
-        lines = []
+        return "".join(self._iter_uvl())
+
+    def _iter_uvl(self) -> Iterator[str]:
+        return _iter_lines(self._iter_uvl_lines())
 
+    def _iter_uvl_lines(self) -> Iterator[str]:
         # Namespace (usar nombre del modelo)
         namespace = self._normalize_uvl_identifier(self.feature_model.name)
-        lines.append(f"namespace {namespace}")
-        lines.append("")
+        yield f"namespace {namespace}"
+        yield ""
 
         # Sección de features
-        lines.append("features")
+        yield "features"
 
         # Construir árbol de features
         root_feature = self._get_root_feature()
         if root_feature:
-            self._build_uvl_tree(lines, root_feature, indent=1)
+            yield from self._iter_uvl_tree(root_feature, indent=1)
 
-        lines.append("")
+        yield ""
 
         # Sección de constraints
         if self.version.constraints or self.version.feature_relations:
-            lines.append("constraints")
+            yield "constraints"
 
             # Agregar relaciones como constraints
             for relation in self.version.feature_relations:
@@ -511,10 +673,10 @@ class FeatureModelExportService:
 
                 if relation.type == FeatureRelationType.REQUIRED:
                     # source requires target: source => target
-                    lines.append(f"    {source_name} => {target_name}")
+                    yield f"    {source_name} => {target_name}"
                 elif relation.type == FeatureRelationType.EXCLUDES:
                     # source excludes target: !(source & target)
-                    lines.append(f"    !({source_name} & {target_name})")
+                    yield f"    !({source_name} & {target_name})"
 
             # Agregar constraints adicionales
             for constraint in self.version.constraints:
@@ -524,82 +686,64 @@ class FeatureModelExportService:
                     continue
 
                 uvl_expr = self._convert_constraint_to_uvl(constraint_expression)
-                lines.append(f"    {uvl_expr}")
+                yield f"    {uvl_expr}"
 
-        return "\n".join(lines)
-
-    def _build_uvl_tree(
-        self, lines: list[str], feature: Feature, indent: int = 0
-    ) -> None:
+    def _iter_uvl_tree(self, feature: Feature, indent: int = 0) -> Iterator[str]:
         """
-        Construir árbol de features recursivamente para formato UVL.
+        Líneas del árbol de features en formato UVL (recorrido iterativo).
+
+        La pila mezcla features pendientes y cabeceras de sección
+        (``mandatory``, ``optional``...) para conservar el orden de salida.
 
         Args:
-            lines: Lista de líneas del documento UVL
-            feature: Feature actual a procesar
+            feature: Feature raíz del subárbol a procesar
             indent: Nivel de indentación
         """
-        indent_str = "    " * indent
-        feature_name = self._normalize_uvl_identifier(feature.name)
-
-        # Agregar nombre de la feature
-        lines.append(f"{indent_str}{feature_name}")
-
-        # Obtener hijos
-        children = [f for f in self.version.features if f.parent_id == feature.id]
-
-        if not children:
-            return
-
-        # Agrupar hijos por tipo y grupo
-        mandatory_children = []
-        optional_children = []
-        alternative_children = []
-        or_children = []
-
-        for child in children:
-            # Si el padre tiene un grupo, verificar el tipo de grupo
-            if feature.group:
-                if feature.group.group_type == FeatureGroupType.ALTERNATIVE:
-                    alternative_children.append(child)
-                elif feature.group.group_type == FeatureGroupType.OR:
-                    or_children.append(child)
-                else:
-                    # Grupo AND: respetar tipo individual
-                    if child.type == FeatureType.MANDATORY:
-                        mandatory_children.append(child)
-                    else:
-                        optional_children.append(child)
-            else:
-                # Sin grupo: respetar tipo individual
-                if child.type == FeatureType.MANDATORY:
-                    mandatory_children.append(child)
+        stack: list[tuple[Optional[Feature], int, str]] = [(feature, indent, "")]
+        while stack:
+            feature, indent, header = stack.pop()
+            if feature is None:
+                yield header
+                continue
+
+            indent_str = "    " * indent
+
+            # Agregar nombre de la feature
+            yield f"{indent_str}{self._normalize_uvl_identifier(feature.name)}"
+
+            # Obtener hijos (ya ordenados por nombre)
+            children = self.tree_index.children(feature.id)
+            if not children:
+                continue
+
+            # Agrupar hijos por tipo y grupo
+            sections: dict[str, list[Feature]] = {
+                "mandatory": [],
+                "optional": [],
+                "alternative": [],
+                "or": [],
+            }
+            group_type = feature.group.group_type if feature.group else None
+            for child in children:
+                # Si el padre tiene un grupo, verificar el tipo de grupo
+                if group_type == FeatureGroupType.ALTERNATIVE:
+                    sections["alternative"].append(child)
+                elif group_type == FeatureGroupType.OR:
+                    sections["or"].append(child)
+                elif child.type == FeatureType.MANDATORY:
+                    # Sin grupo o grupo AND: respetar tipo individual
+                    sections["mandatory"].append(child)
                 else:
-                    optional_children.append(child)
-
-        # Procesar mandatory children
-        if mandatory_children:
-            lines.append(f"{indent_str}    mandatory")
-            for child in sorted(mandatory_children, key=lambda x: x.name):
-                self._build_uvl_tree(lines, child, indent + 2)
-
-        # Procesar optional children
-        if optional_children:
-            lines.append(f"{indent_str}    optional")
-            for child in sorted(optional_children, key=lambda x: x.name):
-                self._build_uvl_tree(lines, child, indent + 2)
-
-        # Procesar alternative (XOR) children
-        if alternative_children:
-            lines.append(f"{indent_str}    alternative")
-            for child in sorted(alternative_children, key=lambda x: x.name):
-                self._build_uvl_tree(lines, child, indent + 2)
-
-        # Procesar or children
-        if or_children:
-            lines.append(f"{indent_str}    or")
-            for child in sorted(or_children, key=lambda x: x.name):
-                self._build_uvl_tree(lines, child, indent + 2)
+                    sections["optional"].append(child)
+
+            # Secciones en orden mandatory, optional, alternative, or
+            pending: list[tuple[Optional[Feature], int, str]] = []
+            for section, section_children in sections.items():
+                if not section_children:
+                    continue
+                pending.append((None, indent, f"{indent_str}    {section}"))
+                pending.extend((child, indent + 2, "") for child in section_children)
+            stack.extend(reversed(pending))
 
     def _convert_constraint_to_uvl(self, expression: str) -> str:
         """
@@ -673,14 +817,20 @@ class FeatureModelExportService:
         Returns:
             String en formato DOT
         """
-        lines = [
+        return "".join(self._iter_dot())
+
+    def _iter_dot(self) -> Iterator[str]:
+        return _iter_lines(self._iter_dot_lines())
+
+    def _iter_dot_lines(self) -> Iterator[str]:
+        yield from (
             "digraph FeatureModel {",
             "  rankdir=TB;",
             "  node [shape=box, style=rounded];",
             f'  label="{self.feature_model.name}";',
             "  labelloc=t;",
             "",
-        ]
+        )
 
         # Agregar nodos
         for feature in self.version.features:
@@ -693,16 +843,16 @@ class FeatureModelExportService:
             else:
                 style = 'fillcolor=white, style="rounded,filled,dashed"'
 
-            lines.append(f'  f{feature_id} [label="{label}", {style}];')
+            yield f'  f{feature_id} [label="{label}", {style}];'
 
-        lines.append("")
+        yield ""
 
         # Agregar edges (relaciones parent-child)
         for feature in self.version.features:
             if feature.parent_id:
                 parent_id = self.uuid_to_int[feature.parent_id]
                 feature_id = self.uuid_to_int[feature.id]
-                lines.append(f"  f{parent_id} -> f{feature_id};")
+                yield f"  f{parent_id} -> f{feature_id};"
 
         # Agregar relaciones (requires, excludes)
         for relation in self.version.feature_relations:
@@ -710,17 +860,11 @@ class FeatureModelExportService:
             target_id = self.uuid_to_int[relation.target_feature_id]
 
             if relation.type == FeatureRelationType.REQUIRED:
-                lines.append(
-                    f'  f{source_id} -> f{target_id} [style=dashed, color=green, label="requires"];'
-                )
+                yield f'  f{source_id} -> f{target_id} [style=dashed, color=green, label="requires"];'
             elif relation.type == FeatureRelationType.EXCLUDES:
-                lines.append(
-                    f'  f{source_id} -> f{target_id} [style=dashed, color=red, label="excludes", dir=none];'
-                )
+                yield f'  f{source_id} -> f{target_id} [style=dashed, color=red, label="excludes", dir=none];'
 
-        lines.append("}")
-
-        return "\n".join(lines)
+        yield "}"
 
     # ========================================================================
     # MERMAID EXPORT
@@ -735,9 +879,13 @@ class FeatureModelExportService:
         Returns:
             String en formato Mermaid
         """
-        lines = [
-            "graph TD",
-        ]
+        return "".join(self._iter_mermaid())
+
+    def _iter_mermaid(self) -> Iterator[str]:
+        return _iter_lines(self._iter_mermaid_lines())
+
+    def _iter_mermaid_lines(self) -> Iterator[str]:
+        yield "graph TD"
 
         # Agregar nodos con estilos
         for feature in self.version.features:
@@ -746,11 +894,11 @@ class FeatureModelExportService:
 
             # Determinar forma según tipo
             if feature.type == FeatureType.MANDATORY:
-                lines.append(f'  f{feature_id}["{label}"]')
+                yield f'  f{feature_id}["{label}"]'
             else:
-                lines.append(f'  f{feature_id}("{label}")')
+                yield f'  f{feature_id}("{label}")'
 
-        lines.append("")
+        yield ""
 
         # Agregar conexiones parent-child
         for feature in self.version.features:
@@ -759,9 +907,9 @@ class FeatureModelExportService:
                 feature_id = self.uuid_to_int[feature.id]
 
                 if feature.type == FeatureType.MANDATORY:
-                    lines.append(f"  f{parent_id} --> f{feature_id}")
+                    yield f"  f{parent_id} --> f{feature_id}"
                 else:
-                    lines.append(f"  f{parent_id} -.-> f{feature_id}")
+                    yield f"  f{parent_id} -.-> f{feature_id}"
 
         # Agregar relaciones
         for relation in self.version.feature_relations:
@@ -769,17 +917,11 @@ class FeatureModelExportService:
             target_id = self.uuid_to_int[relation.target_feature_id]
 
             if relation.type == FeatureRelationType.REQUIRED:
-                lines.append(f"  f{source_id} ==>|requires| f{target_id}")
+                yield f"  f{source_id} ==>|requires| f{target_id}"
             elif relation.type == FeatureRelationType.EXCLUDES:
-                lines.append(f"  f{source_id} -.->|excludes| f{target_id}")
+                yield f"  f{source_id} -.->|excludes| f{target_id}"
 
         # Agregar estilos
-        lines.extend(
-            [
-                "",
-                "  classDef mandatory fill:#e1f5ff,stroke:#01579b,stroke-width:2px",
-                "  classDef optional fill:#fff,stroke:#666,stroke-width:2px,stroke-dasharray: 5 5",
-            ]
-        )
-
-        return "\n".join(lines)
+        yield ""
+        yield "  classDef mandatory fill:#e1f5ff,stroke:#01579b,stroke-width:2px"
+        yield "  classDef optional fill:#fff,stroke:#666,stroke-width:2px,stroke-dasharray: 5 5"
@@ -0,0 +1,493 @@
+"""
+Caché de exportaciones direccionada por contenido.
+
+La clave de una exportación es el SHA-256 de (contenido de la versión,
+formato, versión de los exportadores). El contenido se identifica sin cargar
+el grafo: las versiones son copy-on-write, así que basta con su id, la
+generación de cambios in situ (``fm:vgen:<id>``) y los datos del modelo y de
+la versión que aparecen en las exportaciones (nombre, descripción, número,
+estado).
+
+- Hit: el objeto ya está en MinIO; se sirve desde allí por trozos (o con una
+  redirección a una URL firmada) sin reconstruir ni volver a subir.
+- Miss: un solo proceso genera la exportación (lock en Redis) y cada trozo se
+  envía al cliente y a una subida multipart a la vez; los demás esperan al
+  puntero en lugar de repetir el trabajo.
+"""
+
+import asyncio
+import hashlib
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from app.core.cache import CacheKeys, cache_service
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+from app.core.s3 import minio_client
+from app.enums import ExportFormat
+
+log = get_logger(__name__)
+
+# Incrementar si cambia la salida de los exportadores para un mismo modelo
+EXPORT_ARTIFACT_VERSION = 1
+
+# Espera máxima a que otro proceso termine la misma exportación
+EXPORT_BUILD_WAIT_SECONDS = 15.0
+EXPORT_BUILD_POLL_SECONDS = 0.1
+
+# Trozos en tránsito entre la respuesta y la subida (con trozos de 64 KiB,
+# 1 MiB como mucho); si MinIO va más lento, la respuesta espera
+EXPORT_PIPE_MAX_CHUNKS = 16
+EXPORT_PIPE_POLL_SECONDS = 0.2
+EXPORT_READ_CHUNK_SIZE = 64 * 1024
+
+EXPORT_CONTENT_TYPES = {
+    ExportFormat.XML: "application/xml",
+    ExportFormat.SPLOT_XML: "application/xml",
+    ExportFormat.JSON: "application/json",
+    ExportFormat.TVL: "text/plain",
+    ExportFormat.DIMACS: "text/plain",
+    ExportFormat.UVL: "text/plain",
+    ExportFormat.DOT: "text/plain",
+    ExportFormat.MERMAID: "text/plain",
+}
+
+EXPORT_FILE_EXTENSIONS = {
+    ExportFormat.XML: "xml",
+    ExportFormat.SPLOT_XML: "xml",
+    ExportFormat.JSON: "json",
+    ExportFormat.TVL: "tvl",
+    ExportFormat.DIMACS: "cnf",
+    ExportFormat.UVL: "uvl",
+    ExportFormat.DOT: "dot",
+    ExportFormat.MERMAID: "mmd",
+}
+
+
+@dataclass
+class ExportArtifact:
+    """Exportación guardada (o recién construida) de una versión."""
+
+    key: str
+    content_type: str
+    extension: str
+    object_name: Optional[str] = None  # None si (aún) no está en MinIO
+    size: Optional[int] = None
+
+
+@dataclass
+class ExportStream:
+    """Exportación lista para enviar."""
+
+    artifact: ExportArtifact
+    chunks: Optional[AsyncIterator[bytes]]  # None: hit sin abrir (redirección)
+    built: bool  # True si se genera en esta petición
+
+
+class ExportUploadPipe:
+    """
+    Flujo de bytes entre el generador de la exportación y ``put_object``.
+
+    El event loop escribe con ``feed``; el hilo de la subida lee con
+    ``read`` (bloqueante). La cola está acotada, así que en memoria solo hay
+    unos pocos trozos más la parte multipart en curso. Si la subida termina
+    antes de tiempo (error de MinIO) los trozos siguientes se descartan, y
+    ``abort`` hace fallar la lectura para que el SDK aborte el multipart.
+    """
+
+    _EOF = object()
+
+    def __init__(self, max_chunks: int = EXPORT_PIPE_MAX_CHUNKS):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b""
+        self._eof = False
+        self._aborted = threading.Event()
+        self._reader_done = threading.Event()
+
+    async def feed(self, chunk: bytes) -> None:
+        await self._put(chunk)
+
+    async def finish(self) -> None:
+        await self._put(self._EOF)
+
+    def abort(self) -> None:
+        self._aborted.set()
+
+    def reader_done(self) -> None:
+        """La subida terminó (con o sin error): no seguir encolando."""
+        self._reader_done.set()
+
+    async def _put(self, item: Any) -> None:
+        if self._reader_done.is_set():
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.to_thread(self._put_blocking, item)
+
+    def _put_blocking(self, item: Any) -> None:
+        while not self._reader_done.is_set():
+            try:
+                self._queue.put(item, timeout=EXPORT_PIPE_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._buffer:
+            if self._eof:
+                return b""
+            if self._aborted.is_set():
+                raise OSError("export stream aborted")
+            try:
+                item = self._queue.get(timeout=EXPORT_PIPE_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is self._EOF:
+                self._eof = True
+            else:
+                self._buffer = item
+        if size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def export_media(fmt: ExportFormat) -> Tuple[str, str]:
+    """(content type, extensión) de un formato de exportación."""
+    return (
+        EXPORT_CONTENT_TYPES.get(fmt, "text/plain"),
+        EXPORT_FILE_EXTENSIONS.get(fmt, "txt"),
+    )
+
+
+def build_export_key(
+    version: Any, feature_model: Any, generation: int, fmt: ExportFormat
+) -> str:
+    """Clave de contenido de una exportación (SHA-256 hexadecimal)."""
+    material = {
+        "v": EXPORT_ARTIFACT_VERSION,
+        "format": ExportFormat(fmt).value,
+        "version_id": str(version.id),
+        "generation": generation,
+        "version_number": version.version_number,
+        "status": getattr(version.status, "value", version.status),
+        "model": [feature_model.name, feature_model.description],
+    }
+    raw = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def get_export_artifact(
+    artifact_key: str, fmt: ExportFormat
+) -> Optional[ExportArtifact]:
+    """
+    Busca una exportación guardada.
+
+    Primero el puntero en Redis; si expiró pero el objeto sigue en MinIO, se
+    restaura el puntero en lugar de reconstruir.
+    """
+    content_type, extension = export_media(fmt)
+    try:
+        entry = await cache_service.get_export_artifact(artifact_key)
+        if entry:
+            return ExportArtifact(
+                key=artifact_key,
+                content_type=entry.get("content_type", content_type),
+                extension=extension,
+                object_name=entry["object_name"],
+                size=entry.get("size"),
+            )
+
+        found = await minio_client.find_export_artifact(artifact_key, fmt=extension)
+        if found is None:
+            return None
+        object_name, size = found
+        artifact = ExportArtifact(
+            key=artifact_key,
+            content_type=content_type,
+            extension=extension,
+            object_name=object_name,
+            size=size,
+        )
+        await _set_pointer(artifact)
+        return artifact
+    except Exception as exc:
+        log.warning(
+            "export_artifact.read_failed", artifact_key=artifact_key, error=str(exc)
+        )
+        return None
+
+
+async def open_export(
+    artifact_key: str,
+    fmt: ExportFormat,
+    produce: Callable[[], Awaitable[Iterable[bytes]]],
+    *,
+    open_stored: bool = True,
+) -> ExportStream:
+    """
+    Devuelve la exportación guardada o la genera una sola vez.
+
+    En un miss los trozos de ``produce`` se suben a MinIO a medida que se
+    consumen; el puntero se guarda (y el lock se libera) al terminar. Si
+    otro proceso tiene el lock de la misma clave se espera a su puntero; si
+    no llega a tiempo (o Redis no responde) se genera sin subir.
+
+    Args:
+        artifact_key: Clave de ``build_export_key``
+        fmt: Formato de exportación
+        produce: Corrutina que carga la versión y devuelve los trozos de la
+            exportación (los errores de exportación deben lanzarse aquí)
+        open_stored: En un hit, abrir la descarga (False para redirigir)
+    """
+    stream = await _stored_stream(artifact_key, fmt, open_stored)
+    if stream is not None:
+        log.debug("export_artifact.hit", artifact_key=artifact_key)
+        return stream
+
+    if not await _acquire_lock(artifact_key):
+        if await _wait_for_artifact(artifact_key, fmt) is not None:
+            stream = await _stored_stream(artifact_key, fmt, open_stored)
+            if stream is not None:
+                return stream
+        log.warning("export_artifact.wait_timeout", artifact_key=artifact_key)
+        chunks = await produce()
+        return ExportStream(_new_artifact(artifact_key, fmt), _iter_async(chunks), True)
+
+    try:
+        # Otro proceso pudo terminar entre la consulta y el lock
+        stream = await _stored_stream(artifact_key, fmt, open_stored)
+        if stream is None:
+            chunks = await produce()
+    except BaseException:
+        await _release_lock(artifact_key)
+        raise
+    if stream is not None:
+        await _release_lock(artifact_key)
+        return stream
+
+    artifact = _new_artifact(artifact_key, fmt)
+    return ExportStream(artifact, _stream_and_store(artifact, chunks), True)
+
+
+async def store_export(
+    artifact_key: str,
+    fmt: ExportFormat,
+    produce: Callable[[], Awaitable[Iterable[bytes]]],
+) -> ExportArtifact:
+    """
+    Genera y guarda una exportación sin cliente (precálculo).
+
+    Si ya existe no se genera; ``object_name`` es None si no se pudo subir.
+    """
+    stream = await open_export(artifact_key, fmt, produce, open_stored=False)
+    if stream.chunks is not None:
+        async for _ in stream.chunks:
+            pass
+    return stream.artifact
+
+
+async def record_export(
+    model_id: Any,
+    version: Any,
+    artifact: ExportArtifact,
+    filename: str,
+    built: bool,
+) -> None:
+    """
+    Registra la exportación en el índice del modelo (``GET /exports``).
+
+    En un hit solo se escribe si la entrada ya no existe.
+    """
+    if artifact.object_name is None:
+        return
+    item_key = CacheKeys.feature_model_export_item(
+        model_id=str(model_id), version_id=str(version.id), fmt=artifact.extension
+    )
+    index_key = CacheKeys.feature_model_export_index(model_id=str(model_id))
+    payload = {
+        "model_id": str(model_id),
+        "version_id": str(version.id),
+        "format": artifact.extension,
+        "content_type": artifact.content_type,
+        "object_name": artifact.object_name,
+        "artifact_key": artifact.key,
+        "filename": filename,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    try:
+        written = await redis_client.set(
+            item_key,
+            json.dumps(payload),
+            ex=CacheKeys.TTL_EXPORT_CACHE,
+            nx=not built,
+        )
+        if written:
+            await redis_client.zadd(index_key, {item_key: time.time()})
+            await redis_client.expire(index_key, CacheKeys.TTL_EXPORT_CACHE)
+    except Exception as exc:
+        log.warning(
+            "export_artifact.index_failed", artifact_key=artifact.key, error=str(exc)
+        )
+
+
+def _new_artifact(artifact_key: str, fmt: ExportFormat) -> ExportArtifact:
+    content_type, extension = export_media(fmt)
+    return ExportArtifact(
+        key=artifact_key, content_type=content_type, extension=extension
+    )
+
+
+async def _stored_stream(
+    artifact_key: str, fmt: ExportFormat, open_stored: bool
+) -> Optional[ExportStream]:
+    """
+    Hit: la exportación guardada, abierta para leer si ``open_stored``.
+
+    Si el objeto desapareció de MinIO se descarta el puntero (miss).
+    """
+    artifact = await get_export_artifact(artifact_key, fmt)
+    if artifact is None:
+        return None
+    if not open_stored:
+        return ExportStream(artifact, None, False)
+    try:
+        response = await minio_client.open_export_artifact(artifact.object_name)
+    except Exception as exc:
+        log.warning(
+            "export_artifact.download_failed", artifact_key=artifact_key, error=str(exc)
+        )
+        response = None
+    if response is None:
+        try:
+            await cache_service.delete_export_artifact(artifact_key)
+        except Exception:
+            pass
+        return None
+    chunks = minio_client.iter_object(response, EXPORT_READ_CHUNK_SIZE)
+    return ExportStream(artifact, chunks, False)
+
+
+async def _iter_async(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _stream_and_store(
+    artifact: ExportArtifact, chunks: Iterable[bytes]
+) -> AsyncIterator[bytes]:
+    """
+    Envía los trozos y los sube a MinIO a la vez.
+
+    El puntero solo se guarda si la exportación se generó entera y la subida
+    terminó bien; si el cliente se desconecta la subida se aborta. Libera el
+    lock de construcción al terminar.
+    """
+    pipe = ExportUploadPipe()
+    upload = asyncio.create_task(
+        minio_client.upload_export_artifact(
+            artifact.key,
+            pipe,
+            fmt=artifact.extension,
+            content_type=artifact.content_type,
+        )
+    )
+    upload.add_done_callback(lambda _: pipe.reader_done())
+    size = 0
+    completed = False
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            await pipe.feed(chunk)
+            yield chunk
+        completed = True
+    finally:
+        if completed:
+            await pipe.finish()
+            try:
+                artifact.object_name = await upload
+                artifact.size = size
+                await _set_pointer(artifact)
+            except Exception as exc:
+                artifact.object_name = None
+                log.warning(
+                    "export_artifact.write_failed",
+                    artifact_key=artifact.key,
+                    error=str(exc),
+                )
+        else:
+            pipe.abort()
+            upload.add_done_callback(_discard_upload_result)
+        await _release_lock(artifact.key)
+
+
+def _discard_upload_result(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        log.debug("export_artifact.upload_aborted", error=str(task.exception()))
+
+
+async def _set_pointer(artifact: ExportArtifact) -> None:
+    await cache_service.set_export_artifact(
+        artifact.key,
+        {
+            "object_name": artifact.object_name,
+            "content_type": artifact.content_type,
+            "size": artifact.size,
+        },
+    )
+
+
+async def _acquire_lock(artifact_key: str) -> bool:
+    try:
+        return await cache_service.acquire_export_build_lock(artifact_key)
+    except Exception as exc:
+        # Sin Redis no hay coordinación posible: construir directamente
+        log.warning(
+            "export_artifact.lock_failed", artifact_key=artifact_key, error=str(exc)
+        )
+        return True
+
+
+async def _release_lock(artifact_key: str) -> None:
+    try:
+        await cache_service.release_export_build_lock(artifact_key)
+    except Exception as exc:
+        log.warning(
+            "export_artifact.unlock_failed", artifact_key=artifact_key, error=str(exc)
+        )
+
+
+async def _wait_for_artifact(
+    artifact_key: str, fmt: ExportFormat
+) -> Optional[ExportArtifact]:
+    deadline = time.monotonic() + EXPORT_BUILD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(EXPORT_BUILD_POLL_SECONDS)
+        try:
+            entry = await cache_service.get_export_artifact(artifact_key)
+            building = await redis_client.exists(
+                CacheKeys.export_build_lock(artifact_key)
+            )
+        except Exception:
+            return None
+        if entry:
+            return await get_export_artifact(artifact_key, fmt)
+        if not building:
+            # El constructor terminó sin guardar (falló): no seguir esperando
+            return None
+    return None
@@ -0,0 +1,89 @@
+"""
+Escritura incremental de JSON en bytes para respuestas en streaming.
+
+En lugar de construir la respuesta completa, volcarla con ``model_dump_json``
+y trocearla (tres copias en memoria), los productores emiten fragmentos de
+bytes a medida que recorren la estructura. ``JsonChunkBuffer`` los agrupa en
+trozos de tamaño fijo para la respuesta HTTP; el mismo flujo se puede
+comprimir en paralelo para la caché con ``app.core.cache_codec.StreamEncoder``.
+
+Si ``orjson`` está instalado se usa como codificador; si no, ``json`` compacto
+con la misma salida.
+"""
+
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Tamaño por defecto de los trozos enviados al cliente
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Codifica un valor ya serializable (``model_dump(mode="json")``) a bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_object_split(value: dict, key: str) -> tuple[bytes, bytes]:
+    """
+    Codifica un objeto dejando un hueco para el valor de ``key``.
+
+    Devuelve ``(prefijo, sufijo)`` de forma que
+    ``prefijo + <valor de key> + sufijo`` es el objeto completo con las claves
+    en su orden original. Sirve para anidar hijos sin materializarlos.
+    """
+    keys = list(value)
+    position = keys.index(key)
+    before = {name: value[name] for name in keys[:position]}
+    after = {name: value[name] for name in keys[position + 1 :]}
+
+    prefix = dumps_bytes(before)[:-1]
+    prefix += b"," if before else b""
+    prefix += dumps_bytes(key) + b":"
+    suffix = b"," + dumps_bytes(after)[1:] if after else b"}"
+    return prefix, suffix
+
+
+class JsonChunkBuffer:
+    """Agrupa fragmentos de bytes en trozos de ``chunk_size``."""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def write(self, fragment: bytes) -> Optional[bytes]:
+        """Añade un fragmento; devuelve un trozo si el búfer está lleno."""
+        self._buffer += fragment
+        if len(self._buffer) < self.chunk_size:
+            return None
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+    def flush(self) -> Optional[bytes]:
+        """Devuelve lo pendiente (o None si no queda nada)."""
+        if not self._buffer:
+            return None
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+
+def iter_chunks(fragments: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Reagrupa fragmentos arbitrarios en trozos de ``chunk_size``."""
+    buffer = JsonChunkBuffer(chunk_size)
+    for fragment in fragments:
+        chunk = buffer.write(fragment)
+        if chunk is not None:
+            yield chunk
+    chunk = buffer.flush()
+    if chunk is not None:
+        yield chunk
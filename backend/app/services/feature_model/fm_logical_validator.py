@@ -12,8 +12,8 @@ Tecnologías:
 El validador selecciona automáticamente el nivel apropiado según el tamaño del modelo.
 """
 
-from typing import Dict, List, Tuple, Any, Optional
-from itertools import combinations
+from typing import Dict, Iterator, List, Tuple, Any, Optional
+from itertools import combinations, islice
 from enum import Enum
 
 # Nivel 1: SymPy (Básico)
@@ -107,6 +107,7 @@ class FeatureModelLogicalValidator:
         self.pysat_var_mapping: Dict[str, int] = {}
         self.pysat_reverse_mapping: Dict[int, str] = {}
         self.pysat_cnf: CNF | None = None if not PYSAT_AVAILABLE else CNF()
+        self.pysat_encoding_errors: List[str] = []
 
         # Z3 solver
         self.z3_solver: z3.Solver | None = None if not Z3_AVAILABLE else z3.Solver()
@@ -146,6 +147,7 @@ class FeatureModelLogicalValidator:
         features: List[Dict[str, Any]],
         relations: List[Dict[str, Any]],
         constraints: List[Dict[str, Any]],
+        compiled_cnf: Optional[Dict[str, Any]] = None,
     ) -> FeatureModelValidationResult:
         """
         Valida un Feature Model completo usando el nivel apropiado.
@@ -154,6 +156,9 @@ class FeatureModelLogicalValidator:
             features: Lista de features con sus propiedades
             relations: Lista de relaciones entre features
             constraints: Lista de restricciones cross-tree
+            compiled_cnf: CNF ya compilada del mismo modelo (``compile_cnf``).
+                Si se indica y PySAT está disponible, se resuelve con ella sin
+                volver a codificar el modelo
 
         Returns:
             FeatureModelValidationResult con el resultado de la validación
@@ -163,12 +168,18 @@ class FeatureModelLogicalValidator:
         """
         self._reset()
 
-        # Seleccionar nivel de validación
-        level = self._select_validation_level(len(features))
+        # Seleccionar nivel de validación (con CNF compilada, PySAT no paga
+        # la codificación y es la opción más barata para cualquier tamaño)
+        if compiled_cnf is not None and PYSAT_AVAILABLE and not self.validation_level:
+            level = ValidationLevel.PYSAT
+        else:
+            level = self._select_validation_level(len(features))
 
         # Delegar a la implementación específica
         if level == ValidationLevel.PYSAT and PYSAT_AVAILABLE:
-            return self._validate_with_pysat(features, relations, constraints)
+            return self._validate_with_pysat(
+                features, relations, constraints, compiled_cnf=compiled_cnf
+            )
         elif level == ValidationLevel.Z3 and Z3_AVAILABLE:
             return self._validate_with_z3(features, relations, constraints)
         else:
@@ -226,38 +237,21 @@ class FeatureModelLogicalValidator:
         features: List[Dict[str, Any]],
         relations: List[Dict[str, Any]],
         constraints: List[Dict[str, Any]],
+        compiled_cnf: Optional[Dict[str, Any]] = None,
     ) -> FeatureModelValidationResult:
         """
         Validación Nivel 2: PySAT (SAT solving industrial).
 
-        Más escalable que SymPy para modelos medianos/grandes.
+        Más escalable que SymPy para modelos medianos/grandes. Con
+        ``compiled_cnf`` se omiten los pasos 1-5 (codificación).
         """
         errors = []
         warnings = []
 
-        # 1. Construir mapeo de variables (feature_id -> int)
-        for idx, feature in enumerate(features, start=1):
-            feature_id = str(feature.get("id"))
-            self.pysat_var_mapping[feature_id] = idx
-            self.pysat_reverse_mapping[idx] = feature_id
-
-        # 2. Inicializar CNF
-        if self.pysat_cnf is None:
-            self.pysat_cnf = CNF()
+        if compiled_cnf is not None:
+            errors.extend(self._load_compiled_cnf(compiled_cnf))
         else:
-            self.pysat_cnf.clauses = []
-
-        # 3. Codificar relaciones jerárquicas
-        self._encode_hierarchy_pysat(features, relations)
-
-        # 4. Codificar grupos OR/XOR
-        self._encode_groups_pysat(features, relations)
-
-        # 5. Codificar constraints cross-tree
-        constraint_errors = self._encode_cross_tree_constraints_pysat(
-            features, constraints
-        )
-        errors.extend(constraint_errors)
+            errors.extend(self._encode_pysat(features, relations, constraints))
 
         # 6. Resolver SAT
         try:
@@ -488,6 +482,29 @@ class FeatureModelLogicalValidator:
         Returns:
             Lista de configuraciones, cada una como lista de feature_ids seleccionadas
         """
+        return list(
+            islice(
+                self.iter_configurations(
+                    features, relations, constraints, partial_selection
+                ),
+                max(max_solutions, 0),
+            )
+        )
+
+    def iter_configurations(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+        partial_selection: Optional[Dict[str, bool]] = None,
+    ) -> Iterator[List[str]]:
+        """
+        Versión perezosa de ``enumerate_configurations``.
+
+        Produce las configuraciones una a una, de modo que el consumidor puede
+        detenerse en cualquier momento (p. ej. al alcanzar una cuota global
+        compartida entre varios cubos de enumeración).
+        """
         if not Z3_AVAILABLE:
             raise InvalidConfigurationException(
                 configuration_details="enumeration",
@@ -511,21 +528,19 @@ class FeatureModelLogicalValidator:
                     continue
                 self.z3_solver.add(var if selected else z3.Not(var))
 
-        solutions: List[List[str]] = []
-        while len(solutions) < max_solutions and self.z3_solver.check() == z3.sat:
+        while self.z3_solver.check() == z3.sat:
             model = self.z3_solver.model()
             assignment = self._convert_z3_assignment(model)
             selected = [fid for fid, val in assignment.items() if val]
-            solutions.append(selected)
 
-            # Bloquear modelo actual
+            # Bloquear modelo actual antes de entregarlo
             blocking_clause = []
             for feature_id, var in self.z3_var_mapping.items():
                 val = assignment.get(feature_id, False)
                 blocking_clause.append(z3.Not(var) if val else var)
             self.z3_solver.add(z3.Or(blocking_clause))
 
-        return solutions
+            yield selected
 
     def _reset(self) -> None:
         """Reinicia el estado interno del validador."""
@@ -998,22 +1013,63 @@ class FeatureModelLogicalValidator:
 
         self.pysat_var_mapping = {}
         self.pysat_reverse_mapping = {}
+        self.pysat_encoding_errors = self._encode_pysat(
+            features, relations, constraints
+        )
+
+        return self.pysat_var_mapping, list(self.pysat_cnf.clauses)
+
+    def _encode_pysat(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+    ) -> List[str]:
+        """
+        Codifica el modelo en ``self.pysat_cnf``.
 
+        Returns:
+            Errores de las constraints que no se pudieron codificar
+        """
+        # 1. Construir mapeo de variables (feature_id -> int)
         for idx, feature in enumerate(features, start=1):
             feature_id = str(feature.get("id"))
             self.pysat_var_mapping[feature_id] = idx
             self.pysat_reverse_mapping[idx] = feature_id
 
+        # 2. Inicializar CNF
         if self.pysat_cnf is None:
             self.pysat_cnf = CNF()
         else:
             self.pysat_cnf.clauses = []
 
+        # 3. Codificar relaciones jerárquicas
         self._encode_hierarchy_pysat(features, relations)
+
+        # 4. Codificar grupos OR/XOR
         self._encode_groups_pysat(features, relations)
-        self._encode_cross_tree_constraints_pysat(features, constraints)
 
-        return self.pysat_var_mapping, list(self.pysat_cnf.clauses)
+        # 5. Codificar constraints cross-tree
+        return self._encode_cross_tree_constraints_pysat(features, constraints)
+
+    def _load_compiled_cnf(self, compiled_cnf: Dict[str, Any]) -> List[str]:
+        """
+        Carga una CNF compilada (``compile_cnf``) en ``self.pysat_cnf``.
+
+        Returns:
+            Errores de codificación registrados al compilarla
+        """
+        self.pysat_var_mapping = {
+            str(feature_id): int(var)
+            for feature_id, var in compiled_cnf["variables"].items()
+        }
+        self.pysat_reverse_mapping = {
+            var: feature_id for feature_id, var in self.pysat_var_mapping.items()
+        }
+        if self.pysat_cnf is None:
+            self.pysat_cnf = CNF()
+        self.pysat_cnf.clauses = [list(clause) for clause in compiled_cnf["clauses"]]
+        return list(compiled_cnf.get("errors", []))
 
     def _validate_configuration_with_z3(
         self,
@@ -1178,7 +1234,9 @@ class FeatureModelLogicalValidator:
                         "min_cardinality": relation.get("min_cardinality", 1),
                         "max_cardinality": relation.get("max_cardinality"),
                     }
-                groups[key]["children"].append(child_id)
+                # La feature ya pudo registrarse desde su propio group_id
+                if child_id not in groups[key]["children"]:
+                    groups[key]["children"].append(child_id)
 
         # Normalizar grupos
         normalized = []
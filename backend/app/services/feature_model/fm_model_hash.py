@@ -0,0 +1,61 @@
+"""
+Huella de contenido (hash) de un Feature Model.
+
+La huella se calcula sobre el payload normalizado que consumen los servicios
+de análisis y generación (features, relaciones y restricciones). Dos versiones
+con el mismo contenido producen el mismo hash, independientemente del orden en
+que la base de datos devuelva las filas, por lo que sirve como clave de caché
+direccionada por contenido.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Tuple
+
+
+ModelPayload = Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+def _stable_dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def canonicalize_model_payload(
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    constraints: List[Dict[str, Any]],
+) -> ModelPayload:
+    """
+    Ordena el payload del modelo de forma determinista.
+
+    Los generadores recorren las features en orden de inserción, así que
+    trabajar sobre el payload canónico hace que una misma semilla produzca la
+    misma muestra aunque cambie el orden de carga.
+    """
+    return (
+        sorted(features, key=lambda f: str(f.get("id"))),
+        sorted(
+            relations,
+            key=lambda r: (str(r.get("parent_id")), str(r.get("child_id"))),
+        ),
+        sorted(
+            constraints,
+            key=lambda c: (str(c.get("id")), str(c.get("expr_text"))),
+        ),
+    )
+
+
+def compute_model_hash(
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    constraints: List[Dict[str, Any]],
+) -> str:
+    """SHA-256 hexadecimal del contenido canónico del modelo."""
+    canonical = canonicalize_model_payload(features, relations, constraints)
+    digest = hashlib.sha256()
+    for section in canonical:
+        for item in section:
+            digest.update(_stable_dumps(item).encode("utf-8"))
+            digest.update(b"\n")
+        digest.update(b"\x00")
+    return digest.hexdigest()
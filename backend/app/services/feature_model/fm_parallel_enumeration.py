@@ -0,0 +1,304 @@
+"""
+Enumeración paralela de configuraciones (cube-and-conquer).
+
+El espacio de configuraciones se divide en cubos disjuntos fijando unas pocas
+variables de alto impacto cerca de la raíz:
+
+- Grupos XOR (alternative): un cubo por hijo elegido, más el cubo "ningún
+  hijo" (que cubre el caso del padre deseleccionado). Los cubos son disjuntos
+  y su unión es todo el espacio.
+- Si no quedan grupos XOR que quepan, features opcionales: f=True / f=False.
+
+Cada cubo se enumera de forma independiente (procesos locales o subtareas
+Celery) y los resultados se concatenan en orden de cubo. Una cuota global
+compartida detiene a todos los cubos cuando ya se alcanzó ``max_solutions``;
+en ese caso qué configuraciones concretas se devuelven depende de la
+velocidad relativa de los cubos.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.services.feature_model.fm_logical_validator import (
+    FeatureModelLogicalValidator,
+)
+
+# Soluciones entre consultas a la cuota global
+ENUMERATION_CHUNK_SIZE = 1000
+
+# Cubos por worker: más cubos que workers reparte mejor cubos desequilibrados
+CUBES_PER_WORKER = 4
+
+Cube = Dict[str, bool]
+
+
+def build_enumeration_cubes(
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    max_cubes: int,
+    partial_selection: Optional[Dict[str, bool]] = None,
+) -> List[Cube]:
+    """
+    Divide el espacio de configuraciones en cubos disjuntos y exhaustivos.
+
+    Args:
+        features: Lista de features del modelo
+        relations: Lista de relaciones
+        max_cubes: Número máximo de cubos a generar
+        partial_selection: Decisiones parciales; se añaden a cada cubo y se
+            descartan los cubos que las contradicen
+
+    Returns:
+        Lista de asignaciones parciales (feature_id -> bool), una por cubo
+    """
+    parent_of = {
+        str(f.get("id")): str(f.get("parent_id")) if f.get("parent_id") else None
+        for f in features
+    }
+    depth = _feature_depths(parent_of)
+
+    groups = FeatureModelLogicalValidator()._collect_groups(features, relations)
+    alternatives = []
+    grouped: set[str] = set()
+    for group in groups:
+        children = list(dict.fromkeys(group["children"]))
+        grouped.update(children)
+        if group["group_type"] == "alternative" and len(children) > 1:
+            alternatives.append((depth.get(group["parent_id"], 0), children))
+    alternatives.sort(key=lambda item: (item[0], item[1]))
+
+    cubes: List[Cube] = [{}]
+    for _, children in alternatives:
+        branches = [{cid: cid == chosen for cid in children} for chosen in children] + [
+            dict.fromkeys(children, False)
+        ]
+        if len(cubes) * len(branches) > max_cubes:
+            continue
+        cubes = [{**cube, **branch} for cube in cubes for branch in branches]
+
+    fixed = set(cubes[0])
+    optional = sorted(
+        (
+            fid
+            for fid, parent in parent_of.items()
+            if parent and fid not in grouped and fid not in fixed
+        ),
+        key=lambda fid: (depth.get(fid, 0), fid),
+    )
+    for fid in optional:
+        if len(cubes) * 2 > max_cubes:
+            break
+        cubes = [{**cube, fid: value} for cube in cubes for value in (True, False)]
+
+    if not partial_selection:
+        return cubes
+
+    partial = {str(k): v for k, v in partial_selection.items()}
+    compatible = []
+    for cube in cubes:
+        if any(cube.get(fid, value) != value for fid, value in partial.items()):
+            continue
+        compatible.append({**cube, **partial})
+    return compatible
+
+
+def _feature_depths(parent_of: Dict[str, Optional[str]]) -> Dict[str, int]:
+    """Profundidad de cada feature (la raíz tiene profundidad 0)."""
+    children: Dict[Optional[str], List[str]] = {}
+    for fid, parent in parent_of.items():
+        children.setdefault(parent, []).append(fid)
+
+    depth: Dict[str, int] = {}
+    queue = deque((fid, 0) for fid in children.get(None, []))
+    while queue:
+        fid, level = queue.popleft()
+        if fid in depth:
+            continue
+        depth[fid] = level
+        queue.extend((child, level + 1) for child in children.get(fid, []))
+    return depth
+
+
+def iter_cube_chunks(
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    constraints: List[Dict[str, Any]],
+    cube: Cube,
+    max_solutions: int,
+    chunk_size: int = ENUMERATION_CHUNK_SIZE,
+) -> Iterator[List[List[str]]]:
+    """
+    Enumera un cubo por tramos de ``chunk_size`` configuraciones.
+
+    Entre tramos el consumidor puede consultar una cuota global (contador en
+    memoria compartida o en Redis) y abandonar el cubo.
+    """
+    validator = FeatureModelLogicalValidator()
+    chunk: List[List[str]] = []
+    for produced, selected in enumerate(
+        validator.iter_configurations(
+            features, relations, constraints, partial_selection=cube
+        ),
+        start=1,
+    ):
+        chunk.append(selected)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+        if produced >= max_solutions:
+            break
+    if chunk:
+        yield chunk
+
+
+def enumerate_cube(
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    constraints: List[Dict[str, Any]],
+    cube: Cube,
+    max_solutions: int,
+    should_stop: Optional[Callable[[int], bool]] = None,
+    chunk_size: int = ENUMERATION_CHUNK_SIZE,
+) -> List[List[str]]:
+    """
+    Enumera las configuraciones de un cubo.
+
+    Args:
+        cube: Asignación parcial que define el cubo
+        max_solutions: Límite local del cubo
+        should_stop: Se invoca tras cada tramo con el número de soluciones
+            nuevas; si devuelve True se detiene la enumeración (cuota global
+            alcanzada)
+
+    Returns:
+        Configuraciones del cubo como listas de feature_ids seleccionadas
+    """
+    solutions: List[List[str]] = []
+    for chunk in iter_cube_chunks(
+        features, relations, constraints, cube, max_solutions, chunk_size
+    ):
+        solutions.extend(chunk)
+        if should_stop is not None and should_stop(len(chunk)):
+            break
+    return solutions
+
+
+# Estado de cada proceso del pool (inicializado por _init_worker)
+_worker_counter: Any = None
+_worker_limit: int = 0
+
+
+def _init_worker(counter: Any, limit: int) -> None:
+    global _worker_counter, _worker_limit
+    _worker_counter = counter
+    _worker_limit = limit
+
+
+def _claim_solutions(count: int) -> bool:
+    with _worker_counter.get_lock():
+        _worker_counter.value += count
+        return _worker_counter.value >= _worker_limit
+
+
+def _enumerate_cube_worker(
+    index: int,
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    constraints: List[Dict[str, Any]],
+    cube: Cube,
+    max_solutions: int,
+) -> Tuple[int, List[List[str]]]:
+    if _claim_solutions(0):
+        # La cuota global ya se cubrió mientras el cubo esperaba en cola
+        return index, []
+    solutions = enumerate_cube(
+        features,
+        relations,
+        constraints,
+        cube,
+        max_solutions,
+        should_stop=_claim_solutions,
+    )
+    return index, solutions
+
+
+def enumerate_configurations_parallel(
+    features: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+    constraints: List[Dict[str, Any]],
+    max_solutions: int,
+    partial_selection: Optional[Dict[str, bool]] = None,
+    workers: Optional[int] = None,
+    max_cubes: Optional[int] = None,
+    on_cube_done: Optional[Callable[[int, int, int, int], None]] = None,
+) -> List[List[str]]:
+    """
+    Enumera configuraciones repartiendo los cubos entre procesos.
+
+    Dentro de un proceso daemon (p. ej. un worker prefork de Celery) no se
+    pueden crear procesos hijos; en ese caso los cubos se enumeran en serie.
+    Para paralelizar desde Celery se usan subtareas (ver
+    ``app.tasks.feature_model_analysis.enumerate_configuration_cube``).
+
+    Args:
+        max_solutions: Número máximo de configuraciones a devolver
+        partial_selection: Decisiones parciales a respetar
+        workers: Procesos a usar (por defecto, número de CPUs)
+        max_cubes: Cubos a generar (por defecto, ``CUBES_PER_WORKER`` × workers)
+        on_cube_done: Callback ``(cube_index, solutions, cubes_done, total_cubes)``
+
+    Returns:
+        Configuraciones como listas de feature_ids seleccionadas
+    """
+    workers = max(workers or os.cpu_count() or 1, 1)
+    cubes = build_enumeration_cubes(
+        features,
+        relations,
+        max_cubes or workers * CUBES_PER_WORKER,
+        partial_selection,
+    )
+    if not cubes or max_solutions <= 0:
+        return []
+
+    per_cube: Dict[int, List[List[str]]] = {}
+    if workers == 1 or len(cubes) == 1 or multiprocessing.current_process().daemon:
+        total = 0
+        for index, cube in enumerate(cubes):
+            if total >= max_solutions:
+                break
+            per_cube[index] = enumerate_cube(
+                features, relations, constraints, cube, max_solutions - total
+            )
+            total += len(per_cube[index])
+            if on_cube_done:
+                on_cube_done(index, len(per_cube[index]), len(per_cube), len(cubes))
+    else:
+        counter = multiprocessing.Value("q", 0)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(cubes)),
+            initializer=_init_worker,
+            initargs=(counter, max_solutions),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _enumerate_cube_worker,
+                    index,
+                    features,
+                    relations,
+                    constraints,
+                    cube,
+                    max_solutions,
+                )
+                for index, cube in enumerate(cubes)
+            ]
+            for future in as_completed(futures):
+                index, solutions = future.result()
+                per_cube[index] = solutions
+                if on_cube_done:
+                    on_cube_done(index, len(solutions), len(per_cube), len(cubes))
+
+    merged = [selected for index in sorted(per_cube) for selected in per_cube[index]]
+    return merged[:max_solutions]
@@ -0,0 +1,188 @@
+"""
+Alcanzabilidad del grafo de dependencias en una sola pasada.
+
+El grafo (jerarquía + ``requires``) se condensa en su DAG de componentes
+fuertemente conexas (Tarjan iterativo). Tarjan emite las componentes en orden
+topológico inverso, así que al procesarlas en ese orden los sucesores de cada
+componente ya tienen su conjunto alcanzable calculado:
+
+    reach(C) = bits(C) | OR(reach(S) para cada sucesor S de C)
+
+Los conjuntos se representan como bitsets sobre enteros de Python, y el número
+de dependientes transitivos de una feature es un ``bit_count``. El coste total
+es O((n + e) · n / 64) en lugar de un DFS por feature, O(n · (n + e)).
+
+Los resultados se cachean en memoria por huella de contenido del modelo
+(``compute_model_hash``).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+# Modelos distintos cuya alcanzabilidad se conserva en memoria
+REACHABILITY_CACHE_SIZE = 64
+
+_cache: "OrderedDict[str, DependencyReachability]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class DependencyReachability:
+    """Componentes fuertemente conexas y conjuntos alcanzables de un grafo."""
+
+    def __init__(
+        self,
+        nodes: List[str],
+        components: List[List[str]],
+        component_of: Dict[str, int],
+        reach: List[int],
+    ):
+        self.nodes = nodes
+        # Componentes en orden topológico inverso (sumideros primero)
+        self.components = components
+        self.component_of = component_of
+        self.reach = reach
+        self._index = {node: position for position, node in enumerate(nodes)}
+
+    def dependents_count(self, node_id: str) -> int:
+        """Número de nodos alcanzables desde ``node_id`` (sin contarlo)."""
+        component = self.component_of.get(node_id)
+        if component is None:
+            return 0
+        return self.reach[component].bit_count() - 1
+
+    def dependents(self, node_id: str) -> Set[str]:
+        """Nodos alcanzables desde ``node_id`` (sin incluirlo)."""
+        component = self.component_of.get(node_id)
+        if component is None:
+            return set()
+        bits = self.reach[component] & ~(1 << self._index[node_id])
+        found: Set[str] = set()
+        while bits:
+            low = bits & -bits
+            found.add(self.nodes[low.bit_length() - 1])
+            bits ^= low
+        return found
+
+    def dependents_counts(self) -> Dict[str, int]:
+        """Dependientes transitivos de todos los nodos."""
+        counts = [bits.bit_count() - 1 for bits in self.reach]
+        return {node: counts[self.component_of[node]] for node in self.nodes}
+
+    def cycles(self) -> List[List[str]]:
+        """Componentes con más de un nodo (ciclos)."""
+        return [component for component in self.components if len(component) > 1]
+
+
+def build_reachability(
+    graph: Mapping[str, Sequence[str]], nodes: Iterable[str] = ()
+) -> DependencyReachability:
+    """
+    Condensa ``graph`` en su DAG de SCC y calcula la alcanzabilidad.
+
+    Args:
+        graph: Lista de adyacencia (nodo -> sucesores)
+        nodes: Nodos adicionales sin aristas salientes (p. ej. hojas)
+
+    Returns:
+        DependencyReachability con componentes y bitsets alcanzables
+    """
+    order: Dict[str, int] = {}
+    for node in nodes:
+        order.setdefault(node, len(order))
+    for node, successors in graph.items():
+        order.setdefault(node, len(order))
+        for successor in successors:
+            order.setdefault(successor, len(order))
+    node_list = list(order)
+
+    components: List[List[str]] = []
+    component_of: Dict[str, int] = {}
+    reach: List[int] = []
+
+    indices: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+
+    for start in node_list:
+        if start in indices:
+            continue
+        indices[start] = lowlink[start] = len(indices)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(graph.get(start, ())))]
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for successor in successors:
+                if successor not in indices:
+                    indices[successor] = lowlink[successor] = len(indices)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    advanced = True
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], indices[successor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] != indices[node]:
+                continue
+
+            # Raíz de componente: sus sucesores externos ya están cerrados
+            component_id = len(components)
+            members: List[str] = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component_of[member] = component_id
+                members.append(member)
+                if member == node:
+                    break
+            bits = 0
+            for member in members:
+                bits |= 1 << order[member]
+                for successor in graph.get(member, ()):
+                    target = component_of[successor]
+                    if target != component_id:
+                        bits |= reach[target]
+            components.append(members)
+            reach.append(bits)
+
+    return DependencyReachability(node_list, components, component_of, reach)
+
+
+def get_reachability(
+    model_hash: Optional[str],
+    graph: Mapping[str, Sequence[str]],
+    nodes: Iterable[str] = (),
+) -> DependencyReachability:
+    """Devuelve la alcanzabilidad cacheada para ``model_hash`` o la calcula."""
+    if model_hash is None:
+        return build_reachability(graph, nodes)
+
+    with _cache_lock:
+        cached = _cache.get(model_hash)
+        if cached is not None:
+            _cache.move_to_end(model_hash)
+            return cached
+
+    reachability = build_reachability(graph, nodes)
+    with _cache_lock:
+        _cache[model_hash] = reachability
+        _cache.move_to_end(model_hash)
+        while len(_cache) > REACHABILITY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return reachability
+
+
+def clear_reachability_cache() -> None:
+    """Vacía la caché en memoria (tests)."""
+    with _cache_lock:
+        _cache.clear()
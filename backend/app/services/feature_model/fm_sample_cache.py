@@ -0,0 +1,157 @@
+"""
+Caché de muestras de configuraciones direccionada por contenido.
+
+La clave de una muestra es el SHA-256 de (hash del modelo, estrategia,
+parámetros, semilla): la misma entrada produce siempre la misma muestra, así
+que regenerar el plan de pruebas de una versión publicada es una lectura.
+
+- Muestras pequeñas: JSON inline en Redis.
+- Muestras grandes: JSON comprimido con gzip en MinIO y un puntero en Redis.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.cache import CacheKeys, cache_service
+from app.core.logging import get_logger
+from app.core.s3 import minio_client
+from app.enums import GenerationStrategy
+
+log = get_logger(__name__)
+
+# Por encima de este tamaño (JSON serializado) la muestra se guarda en MinIO
+SAMPLE_INLINE_MAX_BYTES = 256 * 1024
+
+# Incrementar si cambia la salida de los generadores para una misma semilla
+SAMPLE_KEY_VERSION = 1
+
+# Estrategias cuya salida no depende del generador pseudoaleatorio
+DETERMINISTIC_STRATEGIES = frozenset(
+    {
+        GenerationStrategy.GREEDY,
+        GenerationStrategy.BEAM_SEARCH,
+        GenerationStrategy.SAT_ENUM,
+    }
+)
+
+
+def is_sample_cacheable(
+    strategy: GenerationStrategy,
+    seed: Optional[int],
+    params: Dict[str, Any],
+) -> bool:
+    """Una muestra es cacheable si es reproducible."""
+    if params.get("time_budget_seconds"):
+        # El tamaño del pool depende del reloj: no es reproducible
+        return False
+    return seed is not None or strategy in DETERMINISTIC_STRATEGIES
+
+
+def build_sample_key(
+    model_hash: str,
+    strategy: GenerationStrategy,
+    params: Dict[str, Any],
+    seed: Optional[int],
+) -> str:
+    """Clave de contenido de una muestra (SHA-256 hexadecimal)."""
+    material = {
+        "v": SAMPLE_KEY_VERSION,
+        "model": model_hash,
+        "strategy": GenerationStrategy(strategy).value,
+        "params": params,
+        "seed": seed,
+    }
+    raw = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def get_cached_sample(sample_key: str) -> Optional[Dict[str, Any]]:
+    """Recupera una muestra de Redis o, si allí solo hay un puntero, de MinIO."""
+    try:
+        entry = await cache_service.get_configuration_sample(sample_key)
+        if not entry:
+            return None
+        if entry.get("storage") == "minio":
+            data = await minio_client.download_configuration_sample(sample_key)
+            if data is None:
+                return None
+            return json.loads(gzip.decompress(data))
+        return entry.get("sample")
+    except Exception as exc:
+        log.warning("sample_cache.read_failed", sample_key=sample_key, error=str(exc))
+        return None
+
+
+async def store_sample(
+    sample_key: str,
+    sample: Dict[str, Any],
+    ttl: int = CacheKeys.TTL_SAMPLE_CACHE,
+) -> Optional[str]:
+    """
+    Guarda una muestra en el nivel que corresponda a su tamaño.
+
+    Returns:
+        "redis", "minio" o None si no se pudo guardar
+    """
+    raw = json.dumps(sample, separators=(",", ":"), default=str)
+    try:
+        if len(raw) <= SAMPLE_INLINE_MAX_BYTES:
+            await cache_service.set_configuration_sample(
+                sample_key, {"storage": "redis", "sample": sample}, ttl
+            )
+            return "redis"
+
+        object_name = await minio_client.upload_configuration_sample(
+            sample_key, gzip.compress(raw.encode("utf-8"))
+        )
+        await cache_service.set_configuration_sample(
+            sample_key,
+            {"storage": "minio", "object_name": object_name},
+            ttl,
+        )
+        return "minio"
+    except Exception as exc:
+        log.warning("sample_cache.write_failed", sample_key=sample_key, error=str(exc))
+        return None
+
+
+async def get_or_generate_sample(
+    *,
+    model_hash: str,
+    strategy: GenerationStrategy,
+    params: Dict[str, Any],
+    seed: Optional[int],
+    generate: Callable[[], Dict[str, Any]],
+    ttl: int = CacheKeys.TTL_SAMPLE_CACHE,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Devuelve la muestra cacheada o la genera y la guarda.
+
+    Args:
+        model_hash: Huella de contenido del modelo (ver ``compute_model_hash``)
+        strategy: Estrategia de generación
+        params: Parámetros que afectan al resultado (count, partial_selection...)
+        seed: Semilla del generador pseudoaleatorio
+        generate: Función que produce la muestra serializable, con la forma
+            ``{"configurations": [GenerationResult.__dict__...], "quality": {...}}``
+        ttl: Tiempo de vida de la entrada en Redis
+
+    Returns:
+        (muestra, True si vino de la caché)
+    """
+    if not is_sample_cacheable(strategy, seed, params):
+        return generate(), False
+
+    sample_key = build_sample_key(model_hash, strategy, params, seed)
+    cached = await get_cached_sample(sample_key)
+    if cached is not None:
+        log.debug("sample_cache.hit", sample_key=sample_key)
+        return cached, True
+
+    sample = generate()
+    if any(c.get("success") for c in sample.get("configurations", [])):
+        # Los fallos no se cachean: pueden deberse a límites de iteraciones
+        await store_sample(sample_key, sample, ttl)
+    return sample, False
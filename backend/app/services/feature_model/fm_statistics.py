@@ -0,0 +1,256 @@
+"""
+Motor único de estadísticas de un Feature Model.
+
+Calcula en una sola pasada O(n) (sin recursión) todo lo que antes calculaban
+por separado el constructor del árbol, el gestor de versiones y el repositorio:
+conteos por tipo, histograma de profundidad, factor de ramificación, tamaño de
+grupos y puntuación de complejidad.
+
+Los resultados se cachean en memoria por huella de contenido (ids, jerarquía,
+tipos y conteos), de modo que la misma versión no se recalcula al servir el
+árbol, el snapshot y el endpoint de estadísticas.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.enums import FeatureGroupType, FeatureRelationType, FeatureType
+
+# Versiones distintas cuyas estadísticas se conservan en memoria
+STATISTICS_CACHE_SIZE = 128
+
+_cache: "OrderedDict[str, ModelStatistics]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class ModelStatistics:
+    total_features: int = 0
+    mandatory_features: int = 0
+    optional_features: int = 0
+    root_features: int = 0
+    leaf_features: int = 0
+    # Profundidad en aristas: 0 si solo hay raíz
+    max_depth: int = 0
+    depth_histogram: Dict[int, int] = field(default_factory=dict)
+    avg_branching_factor: float = 0.0
+    max_branching_factor: int = 0
+    total_groups: int = 0
+    xor_groups: int = 0
+    or_groups: int = 0
+    avg_group_size: float = 0.0
+    max_group_size: int = 0
+    total_relations: int = 0
+    requires_relations: int = 0
+    excludes_relations: int = 0
+    total_constraints: int = 0
+    total_configurations: int = 0
+    complexity_score: float = 0.0
+
+    @property
+    def tree_levels(self) -> int:
+        """Niveles del árbol (la raíz cuenta como nivel 1)."""
+        return self.max_depth + 1 if self.root_features else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def statistics_fingerprint(
+    features: Sequence[Any],
+    groups: Sequence[Any],
+    relations: Sequence[Any],
+    constraints_count: int,
+    configurations_count: int,
+) -> str:
+    """Huella de los datos que determinan las estadísticas."""
+    digest = hashlib.sha256()
+    for feature in features:
+        digest.update(
+            f"{feature.id}|{feature.parent_id}|{_enum_value(feature.type)}"
+            f"|{feature.group_id}\n".encode()
+        )
+    digest.update(b"\x00")
+    for group in groups:
+        digest.update(f"{group.id}|{_enum_value(group.group_type)}\n".encode())
+    digest.update(b"\x00")
+    for relation in relations:
+        digest.update(f"{_enum_value(relation.type)}\n".encode())
+    digest.update(f"\x00{constraints_count}|{configurations_count}".encode())
+    return digest.hexdigest()
+
+
+def compute_model_statistics(
+    features: Sequence[Any],
+    groups: Sequence[Any],
+    relations: Sequence[Any],
+    constraints_count: int,
+    configurations_count: int = 0,
+) -> ModelStatistics:
+    """
+    Calcula las estadísticas de un modelo en una pasada.
+
+    Args:
+        features: Features (``id``, ``parent_id``, ``type``, ``group_id``)
+        groups: Grupos (``id``, ``group_type``)
+        relations: Relaciones cross-tree (``type``)
+        constraints_count: Número de constraints
+        configurations_count: Número de configuraciones guardadas
+
+    Returns:
+        ModelStatistics
+    """
+    stats = ModelStatistics(
+        total_features=len(features),
+        total_groups=len(groups),
+        total_relations=len(relations),
+        total_constraints=constraints_count,
+        total_configurations=configurations_count,
+    )
+
+    children: Dict[Any, List[Any]] = {}
+    roots: List[Any] = []
+    group_sizes: Dict[Any, int] = {}
+    for feature in features:
+        if _enum_value(feature.type) == FeatureType.MANDATORY.value:
+            stats.mandatory_features += 1
+        if feature.parent_id is None:
+            roots.append(feature.id)
+        else:
+            children.setdefault(feature.parent_id, []).append(feature.id)
+        if feature.group_id is not None:
+            group_sizes[feature.group_id] = group_sizes.get(feature.group_id, 0) + 1
+    stats.optional_features = stats.total_features - stats.mandatory_features
+    stats.root_features = len(roots)
+
+    # BFS iterativo por niveles desde las raíces
+    histogram: Dict[int, int] = {}
+    visited = set()
+    queue = deque((root_id, 0) for root_id in roots)
+    while queue:
+        feature_id, depth = queue.popleft()
+        if feature_id in visited:
+            continue
+        visited.add(feature_id)
+        histogram[depth] = histogram.get(depth, 0) + 1
+        queue.extend((child_id, depth + 1) for child_id in children.get(feature_id, ()))
+    stats.depth_histogram = histogram
+    stats.max_depth = max(histogram) if histogram else 0
+
+    branching = [len(child_ids) for child_ids in children.values()]
+    stats.leaf_features = stats.total_features - len(children)
+    if branching:
+        stats.avg_branching_factor = round(sum(branching) / len(branching), 2)
+        stats.max_branching_factor = max(branching)
+
+    for group in groups:
+        group_type = _enum_value(group.group_type)
+        if group_type == FeatureGroupType.ALTERNATIVE.value:
+            stats.xor_groups += 1
+        elif group_type == FeatureGroupType.OR.value:
+            stats.or_groups += 1
+    if group_sizes:
+        stats.avg_group_size = round(sum(group_sizes.values()) / len(group_sizes), 2)
+        stats.max_group_size = max(group_sizes.values())
+
+    for relation in relations:
+        relation_type = _enum_value(relation.type)
+        if relation_type == FeatureRelationType.REQUIRED.value:
+            stats.requires_relations += 1
+        elif relation_type == FeatureRelationType.EXCLUDES.value:
+            stats.excludes_relations += 1
+
+    stats.complexity_score = complexity_score(
+        features=stats.total_features,
+        relations=stats.total_relations,
+        constraints=stats.total_constraints,
+        groups=stats.total_groups,
+        tree_levels=stats.tree_levels,
+    )
+    return stats
+
+
+def complexity_score(
+    *, features: int, relations: int, constraints: int, groups: int, tree_levels: int
+) -> float:
+    """Puntuación de complejidad ponderada del modelo."""
+    return round(
+        features * 0.5
+        + relations * 2.0
+        + constraints * 3.0
+        + groups * 1.5
+        + tree_levels * 1.0,
+        2,
+    )
+
+
+def get_model_statistics(
+    features: Sequence[Any],
+    groups: Sequence[Any],
+    relations: Sequence[Any],
+    constraints_count: int,
+    configurations_count: int = 0,
+) -> ModelStatistics:
+    """Devuelve las estadísticas cacheadas por huella o las calcula."""
+    key = statistics_fingerprint(
+        features, groups, relations, constraints_count, configurations_count
+    )
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    stats = compute_model_statistics(
+        features, groups, relations, constraints_count, configurations_count
+    )
+    with _cache_lock:
+        _cache[key] = stats
+        while len(_cache) > STATISTICS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return stats
+
+
+def get_version_statistics(
+    version: Any, configurations_count: Optional[int] = None
+) -> ModelStatistics:
+    """
+    Estadísticas de una ``FeatureModelVersion`` con sus colecciones cargadas.
+
+    Solo cuentan los elementos activos: grupos, relaciones y constraints se
+    eliminan con soft delete al crear una nueva versión.
+
+    Args:
+        version: Versión con features, grupos, relaciones y constraints
+        configurations_count: Si es None se usa ``version.configurations``
+    """
+    if configurations_count is None:
+        configurations_count = len(_loaded(version, "configurations"))
+    return get_model_statistics(
+        _loaded(version, "features"),
+        _loaded(version, "feature_groups"),
+        _loaded(version, "feature_relations"),
+        len(_loaded(version, "constraints")),
+        configurations_count,
+    )
+
+
+def clear_statistics_cache() -> None:
+    """Vacía la caché en memoria (tests)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _loaded(version: Any, attribute: str) -> List[Any]:
+    return [
+        item
+        for item in getattr(version, attribute, None) or []
+        if getattr(item, "is_active", True)
+    ]
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
@@ -0,0 +1,128 @@
+"""
+Difusión de estadísticas por WebSocket.
+
+Registro de conexiones por versión que usa el endpoint
+``/ws/feature-models/{model_id}/versions/{version_id}/statistics`` y al que
+``fm_statistics_store.publish_statistics_delta`` envía los cambios tras cada
+mutación.
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from typing import Set
+
+from fastapi import WebSocket
+
+
+class StatisticsConnectionManager:
+    """
+    Gestor de conexiones WebSocket para estadísticas en tiempo real.
+
+    Mantiene un registro de conexiones activas por version_id y permite
+    broadcast de actualizaciones a todos los clientes suscritos.
+    """
+
+    def __init__(self):
+        # version_id -> Set[WebSocket]
+        self.active_connections: dict[uuid.UUID, Set[WebSocket]] = {}
+        self._lock = asyncio.Lock()
+
+    async def connect(self, websocket: WebSocket, version_id: uuid.UUID):
+        """Conectar un cliente a las actualizaciones de una versión."""
+        await websocket.accept()
+
+        async with self._lock:
+            if version_id not in self.active_connections:
+                self.active_connections[version_id] = set()
+            self.active_connections[version_id].add(websocket)
+
+    async def disconnect(self, websocket: WebSocket, version_id: uuid.UUID):
+        """Desconectar un cliente."""
+        async with self._lock:
+            if version_id in self.active_connections:
+                self.active_connections[version_id].discard(websocket)
+
+                # Limpiar si no hay más conexiones
+                if not self.active_connections[version_id]:
+                    del self.active_connections[version_id]
+
+    async def broadcast_statistics(self, version_id: uuid.UUID, statistics: dict):
+        """
+        Enviar estadísticas actualizadas a todos los clientes suscritos.
+
+        Args:
+            version_id: ID de la versión actualizada
+            statistics: Diccionario con las estadísticas
+        """
+        await self._broadcast(
+            version_id,
+            {
+                "type": "statistics_update",
+                "version_id": str(version_id),
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": statistics,
+            },
+        )
+
+    async def broadcast_statistics_delta(
+        self,
+        version_id: uuid.UUID,
+        new_version_id: uuid.UUID,
+        delta: dict,
+        statistics: dict | None = None,
+    ):
+        """
+        Enviar el delta de una mutación a los clientes de la versión de origen.
+
+        Las mutaciones son copy-on-write: el delta describe el paso de
+        ``version_id`` a ``new_version_id``. Si se pudieron derivar, se
+        adjuntan también las estadísticas completas de la nueva versión.
+
+        Args:
+            version_id: Versión de origen (a la que están suscritos)
+            new_version_id: Versión creada por la mutación
+            delta: Cambios por contador (p. ej. ``{"total_features": 1}``)
+            statistics: Estadísticas de la nueva versión, si se conocen
+        """
+        await self._broadcast(
+            version_id,
+            {
+                "type": "statistics_delta",
+                "version_id": str(version_id),
+                "new_version_id": str(new_version_id),
+                "timestamp": datetime.utcnow().isoformat(),
+                "delta": delta,
+                "data": statistics,
+            },
+        )
+
+    async def _broadcast(self, version_id: uuid.UUID, message: dict):
+        if version_id not in self.active_connections:
+            return
+
+        message_json = json.dumps(message)
+
+        # Enviar a todos los clientes conectados
+        disconnected = set()
+
+        for connection in list(self.active_connections[version_id]):
+            try:
+                await connection.send_text(message_json)
+            except Exception:
+                # Marcar para desconexión
+                disconnected.add(connection)
+
+        # Limpiar conexiones muertas
+        async with self._lock:
+            for connection in disconnected:
+                self.active_connections.get(version_id, set()).discard(connection)
+
+    def get_connection_count(self, version_id: uuid.UUID) -> int:
+        """Obtener número de conexiones activas para una versión."""
+        return len(self.active_connections.get(version_id, set()))
+
+
+# Instancia global del gestor
+manager = StatisticsConnectionManager()
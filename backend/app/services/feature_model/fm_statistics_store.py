@@ -0,0 +1,292 @@
+"""
+Estadísticas de versión mantenidas de forma incremental.
+
+Cada versión tiene un hash compacto en Redis con sus contadores (features por
+tipo, grupos, relaciones, constraints, configuraciones) y el histograma de
+profundidad (``depth:<n>``). La lectura es un ``HGETALL``; solo si el hash no
+existe se recalcula con el motor de estadísticas y se siembra.
+
+Las mutaciones siguen el patrón copy-on-write: cada cambio crea una versión
+nueva, cuyo hash se deriva del de la versión de origen aplicando el delta de
+la operación. Si el delta no se puede calcular (p. ej. mover una feature con
+subárbol) no se deriva nada y la nueva versión se recalcula al leerse. Los
+cambios in situ (activar o desactivar) incrementan el hash de la propia
+versión con ``HINCRBY`` atómicos. ``publish_statistics_delta`` hace ambas
+cosas y avisa a los clientes WebSocket de la versión.
+"""
+
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.cache import cache_service
+from app.core.logging import get_logger
+from app.enums import FeatureGroupType, FeatureRelationType, FeatureType
+from app.services.feature_model.fm_statistics import ModelStatistics
+from app.services.feature_model.fm_statistics_broadcast import manager
+
+log = get_logger(__name__)
+
+STATISTICS_COUNTERS = (
+    "total_features",
+    "mandatory_features",
+    "optional_features",
+    "total_groups",
+    "xor_groups",
+    "or_groups",
+    "total_relations",
+    "requires_relations",
+    "excludes_relations",
+    "total_constraints",
+    "total_configurations",
+)
+
+_DEPTH_PREFIX = "depth:"
+
+StatisticsDelta = Dict[str, int]
+
+
+def statistics_fields(stats: ModelStatistics) -> Dict[str, int]:
+    """Campos del hash de contadores a partir de un cálculo completo."""
+    fields = {name: getattr(stats, name) for name in STATISTICS_COUNTERS}
+    for depth, count in stats.depth_histogram.items():
+        fields[f"{_DEPTH_PREFIX}{depth}"] = count
+    return fields
+
+
+def statistics_from_fields(fields: Dict[str, int]) -> Dict[str, int]:
+    """Estadísticas públicas (formato de ``get_statistics``) desde el hash."""
+    depths = [
+        int(name[len(_DEPTH_PREFIX) :])
+        for name, count in fields.items()
+        if name.startswith(_DEPTH_PREFIX) and count > 0
+    ]
+    stats = {name: fields.get(name, 0) for name in STATISTICS_COUNTERS}
+    stats["max_tree_depth"] = max(depths) if depths else 0
+    return stats
+
+
+def apply_delta(fields: Dict[str, int], delta: StatisticsDelta) -> Dict[str, int]:
+    """Aplica un delta a los contadores (sin valores negativos)."""
+    updated = dict(fields)
+    for name, change in delta.items():
+        updated[name] = max(updated.get(name, 0) + change, 0)
+    return {
+        name: value
+        for name, value in updated.items()
+        if value or name in STATISTICS_COUNTERS
+    }
+
+
+# ── Deltas por operación ─────────────────────────────────────────────────────
+
+
+def feature_delta(feature_type: Any, depth: int, sign: int = 1) -> StatisticsDelta:
+    """Alta (sign=1) o baja (sign=-1) de una feature hoja a profundidad ``depth``."""
+    kind = (
+        "mandatory_features"
+        if _enum_value(feature_type) == FeatureType.MANDATORY.value
+        else "optional_features"
+    )
+    return {"total_features": sign, kind: sign, f"{_DEPTH_PREFIX}{depth}": sign}
+
+
+def feature_type_delta(old_type: Any, new_type: Any) -> StatisticsDelta:
+    """Cambio de tipo de una feature."""
+    if _enum_value(old_type) == _enum_value(new_type):
+        return {}
+    delta = feature_delta(new_type, 0)
+    for name, change in feature_delta(old_type, 0, sign=-1).items():
+        delta[name] = delta.get(name, 0) + change
+    return {name: change for name, change in delta.items() if change}
+
+
+def group_delta(group_type: Any, sign: int = 1) -> StatisticsDelta:
+    delta = {"total_groups": sign}
+    value = _enum_value(group_type)
+    if value == FeatureGroupType.ALTERNATIVE.value:
+        delta["xor_groups"] = sign
+    elif value == FeatureGroupType.OR.value:
+        delta["or_groups"] = sign
+    return delta
+
+
+def relation_delta(relation_type: Any, sign: int = 1) -> StatisticsDelta:
+    delta = {"total_relations": sign}
+    value = _enum_value(relation_type)
+    if value == FeatureRelationType.REQUIRED.value:
+        delta["requires_relations"] = sign
+    elif value == FeatureRelationType.EXCLUDES.value:
+        delta["excludes_relations"] = sign
+    return delta
+
+
+def constraint_delta(sign: int = 1) -> StatisticsDelta:
+    return {"total_constraints": sign}
+
+
+def configuration_delta(sign: int = 1) -> StatisticsDelta:
+    return {"total_configurations": sign}
+
+
+def merge_deltas(*deltas: StatisticsDelta) -> StatisticsDelta:
+    merged: StatisticsDelta = {}
+    for delta in deltas:
+        for name, change in delta.items():
+            merged[name] = merged.get(name, 0) + change
+    return {name: change for name, change in merged.items() if change}
+
+
+# ── Lectura / escritura ─────────────────────────────────────────────────────
+
+
+async def get_cached_statistics(version_id: str | UUID) -> Optional[Dict[str, int]]:
+    """Estadísticas mantenidas de una versión o None si no hay hash."""
+    try:
+        fields = await cache_service.get_version_statistics(version_id)
+    except Exception as exc:
+        log.warning(
+            "statistics.read_failed", version_id=str(version_id), error=str(exc)
+        )
+        return None
+    return statistics_from_fields(fields) if fields is not None else None
+
+
+async def store_statistics(version_id: str | UUID, stats: ModelStatistics) -> None:
+    """Siembra el hash de una versión con un cálculo completo."""
+    try:
+        await cache_service.set_version_statistics(version_id, statistics_fields(stats))
+    except Exception as exc:
+        log.warning(
+            "statistics.write_failed", version_id=str(version_id), error=str(exc)
+        )
+
+
+async def derive_statistics(
+    source_version_id: str | UUID,
+    target_version_id: str | UUID,
+    delta: Optional[StatisticsDelta],
+) -> Optional[Dict[str, int]]:
+    """
+    Deriva el hash de una versión copy-on-write desde el de su origen.
+
+    Args:
+        source_version_id: Versión clonada
+        target_version_id: Versión nueva
+        delta: Cambio aplicado por la operación (None si no es calculable)
+
+    Returns:
+        Estadísticas de la versión nueva o None si no se pudieron derivar
+    """
+    if delta is None:
+        return None
+    try:
+        fields = await cache_service.get_version_statistics(source_version_id)
+        if fields is None:
+            return None
+        updated = apply_delta(fields, delta)
+        await cache_service.set_version_statistics(target_version_id, updated)
+    except Exception as exc:
+        log.warning(
+            "statistics.derive_failed",
+            source_version_id=str(source_version_id),
+            target_version_id=str(target_version_id),
+            error=str(exc),
+        )
+        return None
+    return statistics_from_fields(updated)
+
+
+async def increment_statistics(
+    version_id: str | UUID, delta: StatisticsDelta
+) -> Optional[Dict[str, int]]:
+    """
+    Aplica ``delta`` al hash de la propia versión (cambios in situ).
+
+    Los incrementos son atómicos en Redis, así que dos mutaciones
+    concurrentes no se pisan. None si el hash no existía.
+    """
+    try:
+        fields = await cache_service.increment_version_statistics(version_id, delta)
+    except Exception as exc:
+        log.warning(
+            "statistics.increment_failed", version_id=str(version_id), error=str(exc)
+        )
+        return None
+    return statistics_from_fields(fields) if fields is not None else None
+
+
+async def invalidate_statistics(version_id: str | UUID) -> None:
+    """Descarta el hash (cambios in situ no expresables como delta)."""
+    try:
+        await cache_service.delete_version_statistics(version_id)
+    except Exception as exc:
+        log.warning(
+            "statistics.invalidate_failed", version_id=str(version_id), error=str(exc)
+        )
+
+
+async def publish_statistics_delta(
+    source_version_id: UUID,
+    new_version_id: Optional[UUID],
+    delta: Optional[StatisticsDelta],
+) -> None:
+    """
+    Mantiene las estadísticas incrementales tras una mutación y avisa por WebSocket.
+
+    Deriva el hash de estadísticas de ``new_version_id`` desde el de la
+    versión de origen aplicando ``delta``; sin versión nueva (cambio in
+    situ) lo incrementa en sitio. Con ``delta=None`` (cambio no expresable
+    como delta) la versión se recalcula en su primera lectura. Nunca lanza:
+    las estadísticas no deben romper la mutación.
+
+    Args:
+        source_version_id: Versión clonada por la mutación
+        new_version_id: Versión resultante (None si se modificó in situ)
+        delta: Cambio de contadores de la operación
+    """
+    if new_version_id is None:
+        # Cambio in situ: el contenido servido de la versión ya no es el mismo
+        await _invalidate_version_tag(source_version_id)
+    try:
+        if delta is None:
+            if new_version_id is None:
+                await invalidate_statistics(source_version_id)
+            return
+        if new_version_id is None:
+            if not delta:
+                return
+            statistics = await increment_statistics(source_version_id, delta)
+        else:
+            statistics = await derive_statistics(
+                source_version_id, new_version_id, delta
+            )
+        if new_version_id is None and statistics is not None:
+            await manager.broadcast_statistics(source_version_id, statistics)
+        else:
+            await manager.broadcast_statistics_delta(
+                source_version_id,
+                new_version_id or source_version_id,
+                delta,
+                statistics,
+            )
+    except Exception as exc:
+        log.warning(
+            "statistics.publish_failed",
+            version_id=str(source_version_id),
+            error=str(exc),
+        )
+
+
+async def _invalidate_version_tag(version_id: UUID) -> None:
+    try:
+        await cache_service.invalidate_version_tag(version_id)
+    except Exception as exc:
+        log.warning(
+            "statistics.invalidate_tag_failed",
+            version_id=str(version_id),
+            error=str(exc),
+        )
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
@@ -8,7 +8,7 @@ Análisis realizados:
 - Dead features (características inaccesibles)
 - Características redundantes
 - Relaciones implícitas
-- Dependencias transitivas
+- Dependencias transitivas (condensación SCC + alcanzabilidad con bitsets)
 - Componentes fuertemente conexas (SCC)
 - Métricas de impacto y complejidad
 - Análisis de caminos y centralidad
@@ -20,7 +20,7 @@ Tecnologías:
 - PageRank, Betweenness: Métricas de centralidad
 """
 
-from typing import Dict, List, Any, Set, Tuple, Optional
+from typing import Dict, FrozenSet, List, Any, Set, Tuple, Optional
 from collections import defaultdict
 
 # NetworkX para análisis avanzado de grafos
@@ -40,6 +40,26 @@ from app.exceptions import (
     DeadFeatureDetectedException,
     FalseOptionalDetectedException,
 )
+from app.services.feature_model.fm_model_hash import compute_model_hash
+from app.services.feature_model.fm_reachability import (
+    DependencyReachability,
+    build_reachability,
+    get_reachability,
+)
+
+# Vistas de grafo (se construyen bajo demanda a partir de las aristas compiladas)
+GRAPH_VIEW_ADJACENCY = "adjacency"  # Jerarquía + requires, directo e inverso
+GRAPH_VIEW_DEPENDENCY = "dependency"  # Solo aristas requires
+
+# Vistas que necesita cada tipo de análisis
+ANALYSIS_GRAPH_VIEWS: Dict[AnalysisType, FrozenSet[str]] = {
+    AnalysisType.DEAD_FEATURES: frozenset({GRAPH_VIEW_ADJACENCY}),
+    AnalysisType.REDUNDANCIES: frozenset(),
+    AnalysisType.IMPLICIT_RELATIONS: frozenset(),
+    AnalysisType.TRANSITIVE_DEPENDENCIES: frozenset({GRAPH_VIEW_ADJACENCY}),
+    AnalysisType.STRONGLY_CONNECTED: frozenset({GRAPH_VIEW_DEPENDENCY}),
+    AnalysisType.COMPLEXITY_METRICS: frozenset({GRAPH_VIEW_ADJACENCY}),
+}
 
 
 class StructuralIssue:
@@ -90,13 +110,21 @@ class FeatureModelStructuralAnalyzer:
     def __init__(self):
         """Inicializa el analizador estructural."""
         self.features_map: Dict[str, Dict[str, Any]] = {}
-        self.nx_graph = nx.DiGraph() if NETWORKX_AVAILABLE else None
-        self.nx_tree_graph = nx.DiGraph() if NETWORKX_AVAILABLE else None
-        self.nx_dependency_graph = nx.DiGraph() if NETWORKX_AVAILABLE else None
         self.relations: List[Dict[str, Any]] = []
         self.constraints: List[Dict[str, Any]] = []
-        self.graph: Dict[str, List[str]] = {}  # Grafo de dependencias
-        self.reverse_graph: Dict[str, List[str]] = {}  # Grafo inverso
+        self._reset_views()
+
+    def _reset_views(self) -> None:
+        """Descarta las aristas compiladas y las vistas derivadas."""
+        self._tree_edges: Optional[List[Tuple[str, str]]] = None
+        self._binary_constraints: Optional[List[Tuple[str, str, str]]] = None
+        self._graph: Optional[Dict[str, List[str]]] = None
+        self._reverse_graph: Optional[Dict[str, List[str]]] = None
+        self._dependency_graph: Optional[Dict[str, List[str]]] = None
+        self._nx_graph = None
+        self._nx_tree_graph = None
+        self._nx_dependency_graph = None
+        self._reachability: Optional[DependencyReachability] = None
 
     def analyze_feature_model(
         self,
@@ -122,6 +150,11 @@ class FeatureModelStructuralAnalyzer:
         if analysis_types is None:
             analysis_types = list(AnalysisType)
 
+        # Solo se construyen las vistas que piden los análisis solicitados
+        self._prepare_views(
+            set().union(*(ANALYSIS_GRAPH_VIEWS[t] for t in analysis_types))
+        )
+
         results = {}
 
         for analysis_type in analysis_types:
@@ -176,19 +209,43 @@ class FeatureModelStructuralAnalyzer:
             Dict con métricas de impacto
         """
         self._initialize(features, relations, constraints)
+        return self._feature_impact(feature_id, self._get_reachability())
+
+    def calculate_all_feature_impacts(
+        self,
+        features: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        constraints: List[Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Calcula el impacto de todas las features reutilizando una única
+        condensación del grafo de dependencias.
+
+        Returns:
+            Dict feature_id -> métricas de impacto (ver ``calculate_feature_impact``)
+        """
+        self._initialize(features, relations, constraints)
+        reachability = self._get_reachability()
+        return {
+            feature_id: self._feature_impact(feature_id, reachability)
+            for feature_id in self.features_map
+        }
 
+    def _feature_impact(
+        self, feature_id: str, reachability: DependencyReachability
+    ) -> Dict[str, Any]:
         direct_dependents = self._get_direct_dependents(feature_id)
-        transitive_dependents = self._get_transitive_dependents(feature_id)
+        transitive_dependents = reachability.dependents_count(feature_id)
         depth = self._calculate_feature_depth(feature_id)
         constraints_count = self._count_constraints_involving(feature_id)
 
         return {
             "feature_id": feature_id,
             "direct_dependents": len(direct_dependents),
-            "transitive_dependents": len(transitive_dependents),
+            "transitive_dependents": transitive_dependents,
             "depth": depth,
             "constraints_count": constraints_count,
-            "impact_score": len(transitive_dependents)
+            "impact_score": transitive_dependents
             + constraints_count * 2,  # Peso mayor a constraints
         }
 
@@ -198,44 +255,117 @@ class FeatureModelStructuralAnalyzer:
         relations: List[Dict[str, Any]],
         constraints: List[Dict[str, Any]],
     ) -> None:
-        """Inicializa estructuras de datos internas."""
+        """
+        Inicializa estructuras de datos internas.
+
+        Solo guarda las entradas: las aristas y las vistas de grafo (listas de
+        adyacencia, grafos de NetworkX) se construyen al usarse por primera vez.
+        """
         self.features_map = {str(f["id"]): f for f in features}
         self.relations = relations
         self.constraints = constraints
-
-        # Construir grafo de dependencias
-        self.graph = defaultdict(list)
-        self.reverse_graph = defaultdict(list)
-
-        if NETWORKX_AVAILABLE:
-            self.nx_graph = nx.DiGraph()
-            self.nx_tree_graph = nx.DiGraph()
-            self.nx_dependency_graph = nx.DiGraph()
-
-        for relation in relations:
-            parent_id = str(relation.get("parent_id"))
-            child_id = str(relation.get("child_id"))
-
-            self.graph[parent_id].append(child_id)
-            self.reverse_graph[child_id].append(parent_id)
-
-            if NETWORKX_AVAILABLE:
-                self.nx_graph.add_edge(parent_id, child_id)
-                self.nx_tree_graph.add_edge(parent_id, child_id)
-
+        self._reset_views()
+
+    def _prepare_views(self, views: Set[str]) -> None:
+        """Construye por adelantado las vistas de grafo indicadas."""
+        if GRAPH_VIEW_ADJACENCY in views:
+            self._build_adjacency()
+        if GRAPH_VIEW_DEPENDENCY in views:
+            self._build_dependency_graph()
+
+    # ============ Modelo compilado y vistas de grafo ============
+
+    def _get_tree_edges(self) -> List[Tuple[str, str]]:
+        """Aristas padre -> hijo de la jerarquía."""
+        if self._tree_edges is None:
+            self._tree_edges = [
+                (str(relation.get("parent_id")), str(relation.get("child_id")))
+                for relation in self.relations
+            ]
+        return self._tree_edges
+
+    def _get_binary_constraints(self) -> List[Tuple[str, str, str]]:
+        """Constraints binarias (tipo, izquierda, derecha) ya resueltas a IDs."""
+        if self._binary_constraints is None:
+            name_to_id = self._build_feature_name_map(list(self.features_map.values()))
+            parsed_constraints = []
+            for constraint in self.constraints:
+                parsed = self._parse_binary_constraint(
+                    constraint.get("expr_text", ""), name_to_id
+                )
+                if parsed:
+                    parsed_constraints.append(parsed)
+            self._binary_constraints = parsed_constraints
+        return self._binary_constraints
+
+    def _get_requires_edges(self) -> List[Tuple[str, str]]:
+        return [
+            (left_id, right_id)
+            for ctype, left_id, right_id in self._get_binary_constraints()
+            if ctype == "requires"
+        ]
+
+    def _build_adjacency(self) -> None:
+        if self._graph is not None:
+            return
+        graph: Dict[str, List[str]] = defaultdict(list)
+        reverse_graph: Dict[str, List[str]] = defaultdict(list)
+        for parent_id, child_id in self._get_tree_edges():
+            graph[parent_id].append(child_id)
+            reverse_graph[child_id].append(parent_id)
         # Agregar dependencias derivadas de constraints (requires)
-        name_to_id = self._build_feature_name_map(features)
-        for constraint in constraints:
-            expr_text = constraint.get("expr_text", "")
-            parsed = self._parse_binary_constraint(expr_text, name_to_id)
-            if not parsed:
-                continue
-            ctype, left_id, right_id = parsed
-            if ctype == "requires":
-                self.graph[left_id].append(right_id)
-                self.reverse_graph[right_id].append(left_id)
-                if NETWORKX_AVAILABLE:
-                    self.nx_dependency_graph.add_edge(left_id, right_id)
+        for left_id, right_id in self._get_requires_edges():
+            graph[left_id].append(right_id)
+            reverse_graph[right_id].append(left_id)
+        self._graph = graph
+        self._reverse_graph = reverse_graph
+
+    def _build_dependency_graph(self) -> None:
+        if self._dependency_graph is not None:
+            return
+        dependency_graph: Dict[str, List[str]] = defaultdict(list)
+        for left_id, right_id in self._get_requires_edges():
+            dependency_graph[left_id].append(right_id)
+        self._dependency_graph = dependency_graph
+
+    @property
+    def graph(self) -> Dict[str, List[str]]:
+        """Grafo de dependencias (jerarquía + requires)."""
+        self._build_adjacency()
+        return self._graph
+
+    @property
+    def reverse_graph(self) -> Dict[str, List[str]]:
+        """Grafo inverso."""
+        self._build_adjacency()
+        return self._reverse_graph
+
+    @property
+    def dependency_graph(self) -> Dict[str, List[str]]:
+        """Grafo de dependencias cross-tree (solo requires)."""
+        self._build_dependency_graph()
+        return self._dependency_graph
+
+    @property
+    def nx_graph(self):
+        """Jerarquía como ``nx.DiGraph`` (None sin NetworkX)."""
+        if self._nx_graph is None and NETWORKX_AVAILABLE:
+            self._nx_graph = nx.DiGraph(self._get_tree_edges())
+        return self._nx_graph
+
+    @property
+    def nx_tree_graph(self):
+        """Árbol de features como ``nx.DiGraph`` (None sin NetworkX)."""
+        if self._nx_tree_graph is None and NETWORKX_AVAILABLE:
+            self._nx_tree_graph = nx.DiGraph(self._get_tree_edges())
+        return self._nx_tree_graph
+
+    @property
+    def nx_dependency_graph(self):
+        """Dependencias requires como ``nx.DiGraph`` (None sin NetworkX)."""
+        if self._nx_dependency_graph is None and NETWORKX_AVAILABLE:
+            self._nx_dependency_graph = nx.DiGraph(self._get_requires_edges())
+        return self._nx_dependency_graph
 
     def _analyze_dead_features(self) -> StructuralAnalysisResult:
         """
@@ -348,19 +478,9 @@ class FeatureModelStructuralAnalyzer:
         """
         issues = []
 
-        name_to_id = self._build_feature_name_map(list(self.features_map.values()))
-        explicit_pairs = {
-            (str(rel.get("parent_id")), str(rel.get("child_id")))
-            for rel in self.relations
-        }
-
-        for constraint in self.constraints:
-            expr_text = constraint.get("expr_text", "")
-            parsed = self._parse_binary_constraint(expr_text, name_to_id)
-            if not parsed:
-                continue
-            ctype, left_id, right_id = parsed
+        explicit_pairs = set(self._get_tree_edges())
 
+        for ctype, left_id, right_id in self._get_binary_constraints():
             if ctype == "requires" and (left_id, right_id) not in explicit_pairs:
                 issues.append(
                     StructuralIssue(
@@ -396,11 +516,12 @@ class FeatureModelStructuralAnalyzer:
         """
         issues = []
 
-        # Para cada feature, calcular sus dependientes transitivos
-        transitive_deps = {}
-        for feature_id in self.features_map.keys():
-            deps = self._get_transitive_dependents(feature_id)
-            transitive_deps[feature_id] = len(deps)
+        # Dependientes transitivos de todas las features en una sola pasada
+        counts = self._get_reachability().dependents_counts()
+        transitive_deps = {
+            feature_id: counts.get(feature_id, 0)
+            for feature_id in self.features_map.keys()
+        }
 
         # Identificar features con muchas dependencias (puntos críticos)
         threshold = len(self.features_map) * 0.3  # 30% del modelo
@@ -434,11 +555,9 @@ class FeatureModelStructuralAnalyzer:
         """
         issues = []
 
-        # Usar NetworkX si está disponible
-        if NETWORKX_AVAILABLE and self.nx_dependency_graph is not None:
-            sccs = list(nx.strongly_connected_components(self.nx_dependency_graph))
-        else:
-            sccs = self._tarjan_scc()
+        # Condensación iterativa sobre las aristas requires (mismo resultado que
+        # nx.strongly_connected_components sin construir el DiGraph)
+        sccs = build_reachability(self.dependency_graph).components
 
         # SCCs con más de 1 elemento son ciclos
         for scc in sccs:
@@ -446,7 +565,9 @@ class FeatureModelStructuralAnalyzer:
                 feature_names = [self.features_map[fid].get("name") for fid in scc]
 
                 # Lanzar excepción personalizada
-                raise CyclicDependencyException(feature_cycle=", ".join(feature_names))
+                raise CyclicDependencyException(
+                    cycle_description=", ".join(feature_names)
+                )
 
         return StructuralAnalysisResult(
             analysis_type=AnalysisType.STRONGLY_CONNECTED,
@@ -552,7 +673,23 @@ class FeatureModelStructuralAnalyzer:
 
     def _get_transitive_dependents(self, feature_id: str) -> Set[str]:
         """Retorna todos los descendientes transitivos de una feature."""
-        return self._dfs_reachable(feature_id) - {feature_id}
+        return self._get_reachability().dependents(feature_id)
+
+    def _get_reachability(self) -> DependencyReachability:
+        """
+        Condensación SCC y alcanzabilidad del grafo de dependencias.
+
+        Se calcula una vez por modelo: se reutiliza entre análisis de la misma
+        instancia y, entre instancias, vía la caché por huella de contenido.
+        """
+        if self._reachability is None:
+            model_hash = compute_model_hash(
+                list(self.features_map.values()), self.relations, self.constraints
+            )
+            self._reachability = get_reachability(
+                model_hash, self.graph, self.features_map.keys()
+            )
+        return self._reachability
 
     def _calculate_feature_depth(self, feature_id: str) -> int:
         """Calcula la profundidad de una feature en el árbol."""
@@ -584,50 +721,6 @@ class FeatureModelStructuralAnalyzer:
 
         return count
 
-    def _tarjan_scc(self) -> List[List[str]]:
-        """
-        Algoritmo de Tarjan para encontrar componentes fuertemente conexas.
-
-        Implementación simplificada.
-        """
-        index = 0
-        stack: list[str] = []
-        indices: Dict[str, int] = {}
-        lowlink: Dict[str, int] = {}
-        on_stack: Set[str] = set()
-        result: List[List[str]] = []
-
-        def strongconnect(node: str) -> None:
-            nonlocal index
-            indices[node] = index
-            lowlink[node] = index
-            index += 1
-            stack.append(node)
-            on_stack.add(node)
-
-            for neighbor in self.graph.get(node, []):
-                if neighbor not in indices:
-                    strongconnect(neighbor)
-                    lowlink[node] = min(lowlink[node], lowlink[neighbor])
-                elif neighbor in on_stack:
-                    lowlink[node] = min(lowlink[node], indices[neighbor])
-
-            if lowlink[node] == indices[node]:
-                scc = []
-                while True:
-                    w = stack.pop()
-                    on_stack.remove(w)
-                    scc.append(w)
-                    if w == node:
-                        break
-                result.append(scc)
-
-        for node in self.features_map.keys():
-            if node not in indices:
-                strongconnect(node)
-
-        return result
-
     def _build_feature_name_map(self, features: List[Dict[str, Any]]) -> Dict[str, str]:
         name_to_id = {}
         for feature in features:
@@ -0,0 +1,120 @@
+"""
+Subárboles paginados para la carga perezosa del árbol en el frontend.
+
+El repositorio devuelve, con un CTE recursivo, las filas planas del subárbol
+de una feature limitado a N niveles y a ``page_size + 1`` hijos por nodo
+(orden ``name, id``). Aquí se arma el árbol anidado: la fila sobrante de cada
+nodo solo indica que hay más hijos y se convierte en ``next_cursor``.
+
+El cursor es opaco (base64 de ``[name, id]``) y sirve como keyset para pedir
+la siguiente página de hijos de un nodo.
+"""
+
+import base64
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.schemas.feature_model_complete import FeatureGroupInfo, FeatureSubtreeNode
+
+# Límites del endpoint de subárbol
+SUBTREE_DEFAULT_DEPTH = 3
+SUBTREE_MAX_DEPTH = 10
+SUBTREE_DEFAULT_PAGE_SIZE = 50
+SUBTREE_MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(name: str, feature_id: uuid.UUID) -> str:
+    """Cursor opaco de la última feature devuelta en una página."""
+    raw = json.dumps([name, str(feature_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, uuid.UUID]:
+    """
+    Decodifica un cursor de página.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, feature_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(name), uuid.UUID(feature_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def build_subtree(
+    rows: Sequence[Dict[str, Any]],
+    root_id: uuid.UUID,
+    page_size: int,
+    depth: int,
+    base_depth: int = 0,
+) -> Optional[FeatureSubtreeNode]:
+    """
+    Arma el subárbol anidado a partir de las filas del CTE.
+
+    Args:
+        rows: Filas con ``id``, ``parent_id``, ``name``, ``type``,
+            ``properties``, ``level``, ``position`` (orden entre hermanos),
+            ``children_count`` y los datos del grupo (``group_id``...)
+        root_id: Feature raíz del subárbol
+        page_size: Hijos por página (las filas traen uno más por nodo)
+        depth: Niveles pedidos bajo la raíz
+        base_depth: Profundidad absoluta de la raíz
+
+    Returns:
+        Nodo raíz o None si la raíz no está entre las filas
+    """
+    children_rows: Dict[Any, List[Dict[str, Any]]] = {}
+    root_row = None
+    for row in rows:
+        if row["id"] == root_id:
+            root_row = row
+        else:
+            children_rows.setdefault(row["parent_id"], []).append(row)
+    if root_row is None:
+        return None
+
+    # Preorden iterativo; los nodos se enlazan al padre al crearse
+    root = _make_node(root_row, base_depth)
+    stack = [(root, root_row)]
+    while stack:
+        node, row = stack.pop()
+        # Mismo orden que la base de datos (name, id) para que el cursor cuadre
+        page = sorted(children_rows.get(row["id"], ()), key=lambda r: r["position"])
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            node.next_cursor = encode_cursor(last["name"], last["id"])
+            node.has_more_children = True
+        elif row["level"] >= depth and node.children_count:
+            # Límite de profundidad alcanzado: los hijos se piden aparte
+            node.has_more_children = True
+        for child_row in page:
+            child = _make_node(child_row, base_depth)
+            node.children.append(child)
+            stack.append((child, child_row))
+    return root
+
+
+def _make_node(row: Dict[str, Any], base_depth: int) -> FeatureSubtreeNode:
+    group = None
+    if row.get("group_id") is not None and row.get("group_type") is not None:
+        group = FeatureGroupInfo(
+            id=row["group_id"],
+            group_type=getattr(row["group_type"], "value", row["group_type"]),
+            min_cardinality=row["min_cardinality"],
+            max_cardinality=row["max_cardinality"],
+        )
+    return FeatureSubtreeNode(
+        id=row["id"],
+        name=row["name"],
+        type=row["type"],
+        properties=row.get("properties") or {},
+        group=group,
+        depth=base_depth + row["level"],
+        children_count=row["children_count"],
+        is_leaf=row["children_count"] == 0,
+    )
@@ -4,15 +4,18 @@ Optimizado para consulta única y renderizado en frontend.
 
 OPTIMIZACIONES:
 - Lazy serialization (construir solo componentes necesarios)
-- Caching de árboles pre-computados en Redis
+- Caching de árboles pre-computados en Redis (serializados y comprimidos)
 - Invalidación inteligente por status de versión
+- Streaming incremental del JSON (nodo a nodo) con caché gzip en paralelo
 """
 
 import json
-import uuid
-from typing import Optional, AsyncGenerator
+from itertools import chain
+from typing import Any, AsyncGenerator, Iterable, Iterator, Optional
 from datetime import datetime
 
+from pydantic import BaseModel
+
 from app.models import (
     FeatureModelVersion,
     Feature,
@@ -31,79 +34,103 @@ from app.schemas.feature_model_complete import (
     FeatureGroupInfo,
 )
 from app.enums import (
-    FeatureType,
     FeatureGroupType,
     FeatureRelationType,
     ModelStatus,
 )
 from app.exceptions import MissingRootFeatureException, MultipleRootFeaturesException
+from app.core.cache import CacheKeys
+from app.core.cache_codec import (
+    StreamEncoder,
+    decode_json_bytes,
+    encode_json_bytes,
+    iter_json_bytes,
+)
+from app.core.logging import get_logger
 from .fm_export import FeatureModelExportService
+from .fm_complete_fields import CompleteFieldSet
+from .fm_statistics import get_version_statistics
+from .fm_json_stream import (
+    DEFAULT_CHUNK_SIZE,
+    dumps_bytes,
+    dumps_object_split,
+    iter_chunks,
+)
+from .fm_tree_index import FeatureTreeIndex, get_tree_index
+
+log = get_logger(__name__)
 
 
 class FeatureModelTreeBuilder:
     """Constructor del árbol completo de Feature Model."""
 
-    def __init__(self, version: FeatureModelVersion, include_resources: bool = True):
+    def __init__(
+        self,
+        version: FeatureModelVersion,
+        include_resources: bool = True,
+        include_statistics: bool = True,
+        fieldset: Optional[CompleteFieldSet] = None,
+    ):
         self.version = version
-        self.include_resources = include_resources
+        self.fieldset = fieldset or CompleteFieldSet()
+        self.include_resources = include_resources and self.fieldset.wants_node_field(
+            "resource"
+        )
+        self.include_statistics = (
+            include_statistics and self.fieldset.wants_section("statistics")
+        )
         self.start_time = datetime.utcnow()
         self._cache_key = self._generate_cache_key()
 
     def _generate_cache_key(self) -> str:
         """Generar clave única de caché para esta versión y configuración."""
         resource_flag = "with_resources" if self.include_resources else "no_resources"
-        return f"tree:complete:{self.version.id}:{resource_flag}"
-
-    async def build_complete_response_with_cache(
-        self,
-    ) -> FeatureModelCompleteResponse:
+        variant = f"complete:{resource_flag}"
+        if not self.include_statistics:
+            variant += ":no_statistics"
+        if not self.fieldset.is_full:
+            variant += ":" + self.fieldset.cache_variant()
+        return CacheKeys.feature_model_tree_variant(self.version.id, variant)
+
+    async def get_complete_response_json_with_cache(self) -> bytes:
         """
-        Construir la respuesta completa con soporte de caché Redis.
+        Respuesta completa serializada, con soporte de caché Redis.
+
+        La entrada se guarda ya serializada (y comprimida, ver
+        ``app.core.cache_codec``) con ``metadata.cached = true``; en un hit los
+        bytes se devuelven tal cual, sin pasar por Pydantic.
 
         PERFORMANCE:
-        - Hit en caché: ~0ms (solo deserialización)
-        - Miss en caché: ~100-200ms (construcción + serialización + almacenamiento)
+        - Hit en caché: descompresión, sin deserializar
+        - Miss en caché: serialización incremental + almacenamiento
         - Ratio esperado: 80-90% hits en PUBLISHED
 
         Returns:
-            FeatureModelCompleteResponse con metadata de caché
+            Documento JSON de ``FeatureModelCompleteResponse``
         """
-        from app.core.redis import redis_client
-        from app.core.config import settings
+        from app.core.redis import redis_binary_client
 
         # 1. Intentar obtener del caché
         try:
-            cached_json = await redis_client.get(self._cache_key)
-            if cached_json:
-                response_dict = json.loads(cached_json)
-                response = FeatureModelCompleteResponse(**response_dict)
-                response.metadata.cached = True
-                response.metadata.cache_expires_at = None  # TODO: obtener TTL real
-                return response
+            cached = await redis_binary_client.get(self._cache_key)
+            if cached:
+                return decode_json_bytes(cached)
         except Exception as e:
             # Si falla caché, continuar sin él (graceful degradation)
-            from app.core.logging import get_logger
-            log = get_logger(__name__)
             log.warning(f"cache.tree.read_failed: {str(e)}")
 
         # 2. Construir respuesta (operación costosa)
-        response = self.build_complete_response(cached=False)
+        body = b"".join(self._iter_body_json())
 
         # 3. Guardar en caché con TTL dinámico
         try:
             ttl = self._get_cache_ttl()
-            response_json = response.model_dump_json()
-            await redis_client.setex(
-                self._cache_key,
-                ttl,
-                response_json,
-            )
+            entry = encode_json_bytes(body + self._metadata_json(cached=True))
+            await redis_binary_client.setex(self._cache_key, ttl, entry)
         except Exception as e:
-            from app.core.logging import get_logger
-            log = get_logger(__name__)
             log.warning(f"cache.tree.write_failed: {str(e)}")
 
-        return response
+        return body + self._metadata_json(cached=False)
 
     def _get_cache_ttl(self) -> int:
         """
@@ -158,7 +185,7 @@ class FeatureModelTreeBuilder:
         constraints = self._build_constraints()
 
         # 6. Calcular estadísticas
-        statistics = self._calculate_statistics()
+        statistics = self._calculate_statistics() if self.include_statistics else None
 
         # 7. Metadata de la respuesta
         processing_time = (datetime.utcnow() - self.start_time).total_seconds() * 1000
@@ -221,45 +248,36 @@ class FeatureModelTreeBuilder:
         Returns:
             Nodo raíz con toda la estructura anidada
         """
-        # Obtener todas las features de la versión
-        features = self.version.features
+        # Índice padre→hijos compartido de la versión
+        index = get_tree_index(self.version)
 
         # Encontrar la feature raíz (parent_id = None)
-        roots = [f for f in features if f.parent_id is None]
+        roots = index.roots
         if not roots:
             raise MissingRootFeatureException()
         if len(roots) > 1:
             raise MultipleRootFeaturesException(count=len(roots))
 
-        root_feature = roots[0]
-
-        # Construir el árbol recursivamente
-        return self._build_tree_node(root_feature, features, depth=0)
+        # Construir el árbol de abajo arriba sin recursión
+        return index.build(roots[0], self._build_tree_node)
 
     def _build_tree_node(
-        self, feature: Feature, all_features: list[Feature], depth: int = 0
+        self, feature: Feature, depth: int, children_nodes: list[FeatureTreeNode]
     ) -> FeatureTreeNode:
         """
-        Construir un nodo del árbol recursivamente.
+        Construir un nodo del árbol a partir de sus hijos ya construidos.
 
         Args:
             feature: Feature actual
-            all_features: Lista de todas las features para búsqueda de hijos
             depth: Profundidad actual en el árbol
+            children_nodes: Nodos hijos ordenados por nombre
 
         Returns:
             FeatureTreeNode con sus hijos anidados
         """
-        # Obtener hijos de esta feature
-        children_features = [f for f in all_features if f.parent_id == feature.id]
-
-        # Construir nodos hijos recursivamente
-        children_nodes = [
-            self._build_tree_node(child, all_features, depth + 1)
-            for child in sorted(children_features, key=lambda x: x.name)
-        ]
 
         # Construir información del recurso si existe
+        fieldset = self.fieldset
         resource_summary = None
         if self.include_resources and feature.resource:
             resource = feature.resource
@@ -275,7 +293,7 @@ class FeatureModelTreeBuilder:
 
         # Construir información del grupo si existe
         group_info = None
-        if feature.group:
+        if fieldset.wants_node_field("group") and feature.group:
             group = feature.group
             # Generar descripción legible del grupo
             group_description = self._generate_group_description(group)
@@ -288,7 +306,9 @@ class FeatureModelTreeBuilder:
             )
 
         # Obtener nombres de tags
-        tag_names = [tag.name for tag in feature.tags] if feature.tags else []
+        tag_names = []
+        if fieldset.wants_node_field("tags") and feature.tags:
+            tag_names = [tag.name for tag in feature.tags]
 
         # Construir el nodo
         return FeatureTreeNode(
@@ -320,8 +340,10 @@ class FeatureModelTreeBuilder:
 
     def _build_relations(self) -> list[FeatureRelationInfo]:
         """Construir lista de relaciones entre features."""
-        relations = []
+        return list(self._iter_relations())
 
+    def _iter_relations(self) -> Iterator[FeatureRelationInfo]:
+        """Relaciones entre features, una a una."""
         for relation in self.version.feature_relations:
             # Obtener nombres de las features
             source_name = (
@@ -339,147 +361,173 @@ class FeatureModelTreeBuilder:
             else:
                 description = f"{source_name} → {target_name}"
 
-            relations.append(
-                FeatureRelationInfo(
-                    id=relation.id,
-                    type=relation.type.value,
-                    source_feature_id=relation.source_feature_id,
-                    source_feature_name=source_name,
-                    target_feature_id=relation.target_feature_id,
-                    target_feature_name=target_name,
-                    description=description,
-                )
+            yield FeatureRelationInfo(
+                id=relation.id,
+                type=relation.type.value,
+                source_feature_id=relation.source_feature_id,
+                source_feature_name=source_name,
+                target_feature_id=relation.target_feature_id,
+                target_feature_name=target_name,
+                description=description,
             )
 
-        return relations
-
     def _build_constraints(self) -> list[ConstraintInfo]:
         """Construir lista de constraints."""
-        constraints = []
+        return list(self._iter_constraints())
 
+    def _iter_constraints(self) -> Iterator[ConstraintInfo]:
+        """Constraints del modelo, una a una."""
         for constraint in self.version.constraints:
-            constraints.append(
-                ConstraintInfo(
-                    id=constraint.id,
-                    description=constraint.description,
-                    expr_text=constraint.expr_text,
-                    expr_cnf=constraint.expr_cnf,
-                )
+            yield ConstraintInfo(
+                id=constraint.id,
+                description=constraint.description,
+                expr_text=constraint.expr_text,
+                expr_cnf=constraint.expr_cnf,
             )
 
-        return constraints
-
     def _calculate_statistics(self) -> FeatureModelStatistics:
         """Calcular estadísticas del feature model."""
-        features = self.version.features
-
-        # Contar por tipo
-        mandatory_count = sum(1 for f in features if f.type == FeatureType.MANDATORY)
-        optional_count = len(features) - mandatory_count
-
-        # Contar grupos
-        groups = self.version.feature_groups
-        xor_count = sum(
-            1 for g in groups if g.group_type == FeatureGroupType.ALTERNATIVE
-        )
-        or_count = sum(1 for g in groups if g.group_type == FeatureGroupType.OR)
-
-        # Contar relaciones
-        relations = self.version.feature_relations
-        requires_count = sum(
-            1 for r in relations if r.type == FeatureRelationType.REQUIRED
-        )
-        excludes_count = sum(
-            1 for r in relations if r.type == FeatureRelationType.EXCLUDES
-        )
-
-        # Calcular profundidad máxima
-        max_depth = self._calculate_max_depth(features)
-
-        # Contar configuraciones
-        configurations_count = len(self.version.configurations)
+        stats = get_version_statistics(self.version)
 
         return FeatureModelStatistics(
-            total_features=len(features),
-            mandatory_features=mandatory_count,
-            optional_features=optional_count,
-            total_groups=len(groups),
-            xor_groups=xor_count,
-            or_groups=or_count,
-            total_relations=len(relations),
-            requires_relations=requires_count,
-            excludes_relations=excludes_count,
-            total_constraints=len(self.version.constraints),
-            total_configurations=configurations_count,
-            max_tree_depth=max_depth,
+            total_features=stats.total_features,
+            mandatory_features=stats.mandatory_features,
+            optional_features=stats.optional_features,
+            total_groups=stats.total_groups,
+            xor_groups=stats.xor_groups,
+            or_groups=stats.or_groups,
+            total_relations=stats.total_relations,
+            requires_relations=stats.requires_relations,
+            excludes_relations=stats.excludes_relations,
+            total_constraints=stats.total_constraints,
+            total_configurations=stats.total_configurations,
+            max_tree_depth=stats.max_depth,
         )
 
-    def _calculate_max_depth(self, features: list[Feature]) -> int:
-        """Calcular la profundidad máxima del árbol."""
-        if not features:
-            return 0
-
-        # Encontrar la raíz
-        root = next((f for f in features if f.parent_id is None), None)
-        if not root:
-            return 0
-
-        # Calcular profundidad recursivamente
-        return self._calculate_depth_recursive(root.id, features, 0)
+    def iter_complete_response_json(self, cached: bool = False) -> Iterator[bytes]:
+        """
+        Emitir la respuesta completa como fragmentos JSON, nodo a nodo.
 
-    def _calculate_depth_recursive(
-        self, feature_id: uuid.UUID, features: list[Feature], current_depth: int
-    ) -> int:
-        """Calcular profundidad recursivamente."""
-        # Obtener hijos
-        children = [f for f in features if f.parent_id == feature_id]
+        Produce el mismo documento que
+        ``build_complete_response().model_dump_json()`` sin materializar el
+        árbol ni el JSON completo: el árbol se recorre en preorden iterativo y
+        cada nodo se codifica al visitarlo. La pila solo guarda referencias a
+        las features pendientes del camino actual.
 
-        if not children:
-            return current_depth
+        Raises:
+            MissingRootFeatureException / MultipleRootFeaturesException antes
+            de emitir el primer fragmento
+        """
+        yield from self._iter_body_json()
+        yield self._metadata_json(cached)
 
-        # Calcular profundidad de cada hijo
-        depths = [
-            self._calculate_depth_recursive(child.id, features, current_depth + 1)
-            for child in children
-        ]
+    def _iter_body_json(self) -> Iterator[bytes]:
+        """Documento (con la selección de campos) salvo el cierre ``,"metadata":{...}}``."""
+        index = get_tree_index(self.version)
+        roots = index.roots
+        if not roots:
+            raise MissingRootFeatureException()
+        if len(roots) > 1:
+            raise MultipleRootFeaturesException(count=len(roots))
 
-        return max(depths)
+        # Con selección de campos las secciones no pedidas se omiten
+        fieldset = self.fieldset
+        yield b'{"feature_model":'
+        yield _dump_model(self._build_feature_model_info())
+        yield b',"version":'
+        yield self._version_info_json()
+        yield b',"tree":'
+        yield from self._iter_tree_json(index, roots[0])
+        if fieldset.wants_section("relations"):
+            yield b',"relations":'
+            yield from _iter_json_array(self._iter_relations())
+        if fieldset.wants_section("constraints"):
+            yield b',"constraints":'
+            yield from _iter_json_array(self._iter_constraints())
+        if fieldset.wants_section("uvl"):
+            yield b',"uvl":'
+            yield dumps_bytes(self._get_effective_uvl())
+        if self.include_statistics:
+            yield b',"statistics":'
+            yield _dump_model(self._calculate_statistics())
+        elif fieldset.sections is None:
+            yield b',"statistics":null'
+
+    def _version_info_json(self) -> bytes:
+        """Información de la versión sin las partes no pedidas."""
+        exclude = set()
+        if not self.fieldset.wants_section("uvl"):
+            exclude.add("uvl_content")
+        if not self.fieldset.wants_section("snapshot"):
+            exclude.add("snapshot")
+        info = self._build_version_info()
+        return dumps_bytes(info.model_dump(mode="json", exclude=exclude or None))
+
+    def _metadata_json(self, cached: bool) -> bytes:
+        """Cierre del documento con la metadata de la respuesta."""
+        processing_time = (datetime.utcnow() - self.start_time).total_seconds() * 1000
+        metadata = ResponseMetadata(
+            cached=cached,
+            cache_expires_at=None,
+            generated_at=self.start_time,
+            processing_time_ms=int(processing_time),
+            version_status=self.version.status,
+        )
+        return b',"metadata":' + _dump_model(metadata) + b"}"
+
+    def _iter_tree_json(self, index: FeatureTreeIndex, root: Feature) -> Iterator[bytes]:
+        """Codificar el árbol en preorden sin recursión ni nodos anidados."""
+        node_include = self.fieldset.node_include()
+        # Elementos de la pila: (feature, profundidad) o bytes literales
+        stack: list[Any] = [(root, 0)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, bytes):
+                yield item
+                continue
+
+            feature, depth = item
+            children = index.children(feature.id)
+            node = self._build_tree_node(feature, depth, [])
+            node.is_leaf = not children
+            node_json = node.model_dump(mode="json", include=node_include)
+            prefix, suffix = dumps_object_split(node_json, "children")
+            yield prefix + b"["
+
+            stack.append(b"]" + suffix)
+            for position in range(len(children) - 1, -1, -1):
+                stack.append((children[position], depth + 1))
+                if position:
+                    stack.append(b",")
 
     async def stream_complete_response_with_cache(
-        self, chunk_size: int = 8192
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
     ) -> AsyncGenerator[bytes, None]:
         """
         Stream the complete response JSON (cached when possible) in chunks.
 
-        This method first tries to read the serialized JSON from Redis. If found,
-        it streams the cached bytes. Otherwise, it builds the response, stores
-        it in Redis and streams the generated JSON.
+        On a hit the cache entry is decompressed chunk by chunk. On a miss the
+        JSON is written incrementally by ``iter_complete_response_json`` and
+        the same bytes are compressed on the fly into the cache entry, which
+        is stored only if the whole document was produced.
         """
-        from app.core.redis import redis_client
-        from app.core.logging import get_logger
-
-        log = get_logger(__name__)
+        from app.core.redis import redis_binary_client
 
         # Try to return cached value
+        cached = None
         try:
-            cached = await redis_client.get(self._cache_key)
-            if cached:
-                # cached can be bytes or str
-                if isinstance(cached, (bytes, bytearray)):
-                    data = bytes(cached)
-                else:
-                    data = str(cached).encode("utf-8")
-
-                for i in range(0, len(data), chunk_size):
-                    yield data[i : i + chunk_size]
-                return
+            cached = await redis_binary_client.get(self._cache_key)
         except Exception as e:
             log.warning(f"cache.stream.read_failed: {str(e)}")
+        if cached:
+            for chunk in iter_json_bytes(cached, chunk_size):
+                yield chunk
+            return
 
-        # Build response (synchronous builder)
+        # The root checks run before the first fragment is produced
+        fragments = self._iter_body_json()
         try:
-            response = self.build_complete_response(cached=False)
-            response_json = response.model_dump_json()
+            first = next(fragments)
         except Exception as e:
             log.error(f"stream.build_failed: {str(e)}", exc_info=True)
             # Stream a simple error JSON
@@ -487,13 +535,36 @@ class FeatureModelTreeBuilder:
             yield err
             return
 
-        # Store in cache asynchronously
+        tee = StreamEncoder()
+        try:
+            for chunk in iter_chunks(chain([first], fragments), chunk_size):
+                tee.write(chunk)
+                yield chunk
+        except Exception as e:
+            # Headers are already sent: stop the stream and skip the cache
+            log.error(f"stream.build_failed: {str(e)}", exc_info=True)
+            return
+        # The cached copy is served to later requests as a hit
+        tee.write(self._metadata_json(cached=True))
+        yield self._metadata_json(cached=False)
+
         try:
             ttl = self._get_cache_ttl()
-            await redis_client.setex(self._cache_key, ttl, response_json)
+            await redis_binary_client.setex(self._cache_key, ttl, tee.finish())
         except Exception as e:
             log.warning(f"cache.stream.write_failed: {str(e)}")
 
-        data = response_json.encode("utf-8")
-        for i in range(0, len(data), chunk_size):
-            yield data[i : i + chunk_size]
+
+def _dump_model(model: BaseModel) -> bytes:
+    return dumps_bytes(model.model_dump(mode="json"))
+
+
+def _iter_json_array(models: Iterable[BaseModel]) -> Iterator[bytes]:
+    """Codificar una lista de modelos elemento a elemento."""
+    yield b"["
+    separator = b""
+    for model in models:
+        yield separator
+        yield _dump_model(model)
+        separator = b","
+    yield b"]"
@@ -0,0 +1,129 @@
+"""
+Índice padre→hijos de las features de una versión.
+
+Se construye una sola vez por versión cargada (O(n)) y lo comparten el gestor
+de versiones, el constructor del árbol y los exportadores, que antes buscaban
+los hijos de cada nodo recorriendo la lista completa de features (O(n²)).
+
+Los recorridos son iterativos para no depender del límite de recursión de
+Python en árboles profundos.
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Atributo donde se memoriza el índice en la versión cargada
+_INDEX_ATTRIBUTE = "_feature_tree_index"
+
+
+class FeatureTreeIndex:
+    """Hijos por feature (ordenados por nombre) y raíces de una versión."""
+
+    def __init__(self, features: Sequence[Any]):
+        self.size = len(features)
+        self.by_id: Dict[Any, Any] = {}
+        self.roots: List[Any] = []
+        self._children: Dict[Any, List[Any]] = {}
+        for feature in features:
+            self.by_id[feature.id] = feature
+            if feature.parent_id is None:
+                self.roots.append(feature)
+            else:
+                self._children.setdefault(feature.parent_id, []).append(feature)
+        for children in self._children.values():
+            children.sort(key=lambda child: child.name)
+
+    @property
+    def root(self) -> Optional[Any]:
+        """Primera feature sin padre (o None)."""
+        return self.roots[0] if self.roots else None
+
+    def children(self, feature_id: Any) -> List[Any]:
+        """Hijos de una feature ordenados por nombre."""
+        return self._children.get(feature_id, [])
+
+    def iter_preorder(self, root: Any) -> Iterator[Tuple[Any, int]]:
+        """Recorre el subárbol de ``root`` en preorden: (feature, profundidad)."""
+        visited = set()
+        stack = [(root, 0)]
+        while stack:
+            feature, depth = stack.pop()
+            if feature.id in visited:
+                continue
+            visited.add(feature.id)
+            yield feature, depth
+            stack.extend(
+                (child, depth + 1) for child in reversed(self.children(feature.id))
+            )
+
+    def build(self, root: Any, make_node: Callable[[Any, int, List[T]], T]) -> T:
+        """
+        Construye un árbol anidado de abajo arriba sin recursión.
+
+        Args:
+            root: Feature raíz del subárbol
+            make_node: ``(feature, depth, child_nodes) -> node``; recibe los
+                nodos hijos ya construidos en orden de nombre
+
+        Returns:
+            Nodo construido para ``root``
+        """
+        order = list(self.iter_preorder(root))
+        built: Dict[Any, T] = {}
+        for feature, depth in reversed(order):
+            child_nodes = [
+                built.pop(child.id)
+                for child in self.children(feature.id)
+                if child.id in built
+            ]
+            built[feature.id] = make_node(feature, depth, child_nodes)
+        return built[root.id]
+
+    def has_cycle(self) -> bool:
+        """
+        Indica si la jerarquía tiene ciclos.
+
+        Con un único ``parent_id`` por feature, un ciclo nunca es alcanzable
+        desde una raíz: basta con subir por los padres de cada feature.
+        """
+        state: Dict[Any, int] = {}  # 1 = en el camino actual, 2 = cerrado
+        for feature_id in self.by_id:
+            path = []
+            current = feature_id
+            while current in self.by_id and state.get(current) is None:
+                state[current] = 1
+                path.append(current)
+                current = self.by_id[current].parent_id
+            if current is not None and state.get(current) == 1:
+                return True
+            for visited in path:
+                state[visited] = 2
+        return False
+
+
+def get_tree_index(version: Any) -> FeatureTreeIndex:
+    """
+    Índice de la versión cargada, construido una sola vez por instancia.
+
+    Se reconstruye si cambia el número de features cargadas.
+    """
+    features = version.features
+    index = getattr(version, _INDEX_ATTRIBUTE, None)
+    if index is None or index.size != len(features):
+        index = FeatureTreeIndex(features)
+        try:
+            setattr(version, _INDEX_ATTRIBUTE, index)
+        except (AttributeError, ValueError):
+            pass
+    return index
@@ -0,0 +1,135 @@
+"""
+Importación UVL asíncrona.
+
+El endpoint de importación sube el fichero a MinIO y encola
+``app.tasks.feature_model.import_feature_model`` en la cola ``import``; la
+tarea descarga el fichero a un temporal y llama a ``run_uvl_import``:
+
+1. ``parse``: el parser consume el fichero línea a línea en un hilo mientras
+   el bucle de eventos informa de los bytes leídos
+2. ``validate``: comprobaciones del modelo compilado
+3. ``insert``: escritura por lotes (filas escritas / total)
+
+La cancelación es cooperativa: ``is_cancelled`` se consulta entre pasos,
+durante el parseo y tras cada lote; al cancelar no queda ninguna versión
+creada.
+"""
+
+import asyncio
+import time
+from typing import IO, Any, Awaitable, Callable, Iterator
+
+from app.models import FeatureModelVersion
+from app.services.feature_model.fm_uvl_importer import (
+    FeatureModelUVLImporter,
+    UVLImportCancelled,
+)
+from app.services.feature_model.fm_uvl_parser import UVLParseError
+
+# Cada cuánto se informa del progreso del parseo
+IMPORT_PROGRESS_INTERVAL_SECONDS = 1.0
+
+ImportReport = Callable[[dict[str, Any]], Awaitable[None]]
+CancelCheck = Callable[[], Awaitable[bool]]
+
+
+class ImportLineReader:
+    """
+    Líneas de un fichero binario UTF-8 contando los bytes leídos.
+
+    Se consume desde el hilo del parser; si ``cancelled`` se activa, la
+    siguiente línea lanza ``UVLImportCancelled``.
+    """
+
+    def __init__(self, raw: IO[bytes]):
+        self.raw = raw
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.cancelled = False
+
+    def __iter__(self) -> Iterator[str]:
+        for raw_line in self.raw:
+            if self.cancelled:
+                raise UVLImportCancelled()
+            self.lines_read += 1
+            self.bytes_read += len(raw_line)
+            try:
+                yield raw_line.decode("utf-8-sig")
+            except UnicodeDecodeError as exc:
+                raise UVLParseError(
+                    f"Invalid UTF-8 ({exc.reason})", self.lines_read, exc.start + 1
+                )
+
+
+def import_progress(
+    step: str, current: int, total: int, start_time: float
+) -> dict[str, Any]:
+    """Meta de progreso (mismo formato que las tareas de mantenimiento)."""
+    percent = min(int(current / total * 100), 100) if total else 100
+    elapsed = max(time.perf_counter() - start_time, 0.0)
+    eta_seconds = (
+        int(elapsed / current * (total - current)) if current and total else None
+    )
+    return {
+        "step": step,
+        "current": current,
+        "total": total,
+        "percent": percent,
+        "eta_seconds_estimate": eta_seconds,
+    }
+
+
+async def run_uvl_import(
+    importer: FeatureModelUVLImporter,
+    raw: IO[bytes],
+    *,
+    report: ImportReport,
+    is_cancelled: CancelCheck,
+) -> FeatureModelVersion:
+    """
+    Importa el UVL de ``raw`` (fichero binario posicionable) como versión nueva.
+
+    Raises:
+        UVLParseError: UVL inválido
+        UVLImportCancelled: Si se pidió la cancelación
+    """
+    size = raw.seek(0, 2)
+    raw.seek(0)
+
+    # 1. Parseo en un hilo; el bucle informa del avance y de la cancelación
+    reader = ImportLineReader(raw)
+    start_time = time.perf_counter()
+    parsing = asyncio.ensure_future(asyncio.to_thread(importer.parse, reader))
+    while True:
+        done, _ = await asyncio.wait(
+            {parsing}, timeout=IMPORT_PROGRESS_INTERVAL_SECONDS
+        )
+        if done:
+            break
+        if await is_cancelled():
+            reader.cancelled = True
+        await report(import_progress("parse", reader.bytes_read, size, start_time))
+    model = parsing.result()
+    await report(import_progress("parse", size, size, start_time))
+
+    # 2. Validación del modelo compilado
+    await _checkpoint(is_cancelled)
+    importer.validate_model(model)
+    await report(import_progress("validate", 1, 1, time.perf_counter()))
+
+    # 3. Escritura por lotes
+    await _checkpoint(is_cancelled)
+    raw.seek(0)
+    uvl_content = raw.read().decode("utf-8-sig")
+    insert_start = time.perf_counter()
+
+    async def on_progress(step: str, current: int, total: int) -> None:
+        await _checkpoint(is_cancelled)
+        await report(import_progress(step, current, total, insert_start))
+
+    return await importer.apply_model(model, uvl_content, on_progress=on_progress)
+
+
+async def _checkpoint(is_cancelled: CancelCheck) -> None:
+    if await is_cancelled():
+        raise UVLImportCancelled()
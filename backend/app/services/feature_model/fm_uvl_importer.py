@@ -2,11 +2,40 @@
 Servicio para importar UVL y crear estructura de Feature Model.
 Fases 1-6: parseo, estructura base, constraints simples, validaciones,
 sincronización y diff.
+
+El parseo lo hace ``fm_uvl_parser`` en una sola pasada y devuelve el modelo
+compilado. La estructura se construye en memoria (UUIDs generados en
+cliente y referencias cruzadas resueltas antes de insertar) y se escribe
+con INSERT multi-fila por lotes: el número de round trips depende del
+tamaño del modelo dividido por ``BULK_INSERT_BATCH_SIZE``, no del número de
+features.
+
+``apply_uvl_delta`` aplica el UVL como delta sobre una versión base: empareja
+las features por nombre (y detecta renombrados y movimientos), clona la base
+en la base de datos (``INSERT ... SELECT``) y escribe solo las filas que
+cambian. Con ``VERSION_DELTA_STORAGE`` la versión no copia la base: guarda
+solo sus cambios (``fm_version_delta``).
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
 
+from sqlalchemy import Uuid, any_, bindparam, delete, insert, update
+from sqlalchemy.dialects import postgresql
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.enums import FeatureGroupType, FeatureType, FeatureRelationType
@@ -17,30 +46,128 @@ from app.models import (
     FeatureModel,
     FeatureModelVersion,
     FeatureRelation,
+    FeatureTagLink,
     Constraint,
     User,
 )
+from app.repositories.feature_model_version import FeatureModelVersionRepository
+from app.services.feature_model.fm_uvl_parser import (
+    UVLConstraint,
+    UVLFeature,
+    UVLGroup,
+    UVLModel,
+    UVLParseError,
+    normalize_name,
+    parse_uvl,
+)
+from app.services.feature_model.fm_version_delta import (
+    delta_storage_enabled,
+    rows_from_import,
+    store_delta_version,
+)
 from app.services.feature_model.fm_version_manager import FeatureModelVersionManager
 
+# Filas por sentencia INSERT/UPDATE multi-fila
+BULK_INSERT_BATCH_SIZE = 1000
+
+# ``(paso, actual, total)``; puede lanzar ``UVLImportCancelled`` para abortar
+ImportProgressCallback = Callable[[str, int, int], Awaitable[None]]
+
 
 @dataclass
-class ParsedChild:
-    name: str
-    relation_type: str
-    group_type: Optional[str] = None
+class ImportRows:
+    """Filas a insertar para una versión importada (ids ya asignados)."""
+
+    features: List[Dict[str, Any]] = field(default_factory=list)
+    groups: List[Dict[str, Any]] = field(default_factory=list)
+    # ``{"id": feature_id, "group_id": ...}``: los grupos referencian a su
+    # feature padre, así que la pertenencia se asigna tras insertarlos
+    group_members: List[Dict[str, Any]] = field(default_factory=list)
+    relations: List[Dict[str, Any]] = field(default_factory=list)
+    constraints: List[Dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
-class ParsedNode:
-    name: str
-    children: List[ParsedChild]
+class UVLDelta:
+    """
+    Cambios de un modelo UVL respecto a una versión base.
+
+    Las filas existentes se identifican por su id en la base y las nuevas
+    por su clave normalizada en el modelo UVL.
+    """
+
+    # Clave normalizada en el UVL -> id de la feature emparejada en la base
+    matched: Dict[str, uuid.UUID] = field(default_factory=dict)
+    features_added: List[str] = field(default_factory=list)
+    # Ordenadas de hojas a raíz (los hijos se borran antes que sus padres)
+    features_removed: List[uuid.UUID] = field(default_factory=list)
+    features_renamed: Set[uuid.UUID] = field(default_factory=set)
+    features_moved: Set[uuid.UUID] = field(default_factory=set)
+    # Cambios de tipo (mandatory/optional) o de atributos
+    features_updated: Set[uuid.UUID] = field(default_factory=set)
+    features_retyped: Set[uuid.UUID] = field(default_factory=set)
+    groups_added: List[UVLGroup] = field(default_factory=list)
+    groups_removed: List[uuid.UUID] = field(default_factory=list)
+    relations_added: List[Tuple[str, str, str]] = field(default_factory=list)
+    relations_removed: List[uuid.UUID] = field(default_factory=list)
+    constraints_added: List[UVLConstraint] = field(default_factory=list)
+    constraints_removed: List[uuid.UUID] = field(default_factory=list)
+    # Índice en ``model.groups`` / ``model.constraints`` -> id en la base de
+    # los grupos, relaciones y constraints sin cambios
+    matched_groups: Dict[int, uuid.UUID] = field(default_factory=dict)
+    matched_relations: Dict[int, uuid.UUID] = field(default_factory=dict)
+    matched_constraints: Dict[int, uuid.UUID] = field(default_factory=dict)
+
+    @property
+    def changed_features(self) -> Set[uuid.UUID]:
+        """Features existentes cuya fila hay que actualizar."""
+        return self.features_renamed | self.features_moved | self.features_updated
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self.summary().values())
+
+    @property
+    def affects_logic(self) -> bool:
+        """
+        Si cambia la semántica del modelo (lo que ven los análisis).
+
+        Los renombrados y los cambios de atributos no la cambian.
+        """
+        return bool(
+            self.features_added
+            or self.features_removed
+            or self.features_moved
+            or self.features_retyped
+            or self.groups_added
+            or self.groups_removed
+            or self.relations_added
+            or self.relations_removed
+            or self.constraints_added
+            or self.constraints_removed
+        )
 
+    def summary(self) -> Dict[str, int]:
+        return {
+            "features_added": len(self.features_added),
+            "features_removed": len(self.features_removed),
+            "features_renamed": len(self.features_renamed),
+            "features_moved": len(self.features_moved),
+            "features_updated": len(self.features_updated),
+            "groups_added": len(self.groups_added),
+            "groups_removed": len(self.groups_removed),
+            "relations_added": len(self.relations_added),
+            "relations_removed": len(self.relations_removed),
+            "constraints_added": len(self.constraints_added),
+            "constraints_removed": len(self.constraints_removed),
+        }
 
-class UVLParseError(BusinessLogicException):
-    """Error de parseo UVL."""
 
-    def __init__(self, reason: str):
-        super().__init__(detail=f"UVL parse error: {reason}")
+class UVLImportCancelled(BusinessLogicException):
+    """Importación UVL cancelada a petición del usuario."""
+
+    def __init__(self):
+        super().__init__(detail="UVL import cancelled")
 
 
 class FeatureModelUVLImporter:
@@ -52,26 +179,110 @@ class FeatureModelUVLImporter:
         self.user = user
 
     @classmethod
-    def validate_uvl_only(cls, uvl_content: str) -> dict:
-        """Valida UVL sin persistir: estructura, cardinalidad y constraints simples."""
-        parser = cls.__new__(cls)
-        parsed, constraints = parser._parse_uvl(uvl_content)
-        parser._validate_parsed_structure(parsed)
-        parser._validate_constraints(constraints, parsed)
-        root = parser._find_root(parsed)
+    def validate_uvl_only(cls, uvl_content: Union[str, TextIO]) -> dict:
+        """Valida UVL sin persistir: estructura, cardinalidad y constraints."""
+        model = parse_uvl(uvl_content)
         return {
             "is_valid": True,
-            "root": root,
-            "features": len(parsed),
-            "constraints": len(constraints),
+            "root": model.root,
+            "features": len(model.features),
+            "constraints": len(model.constraints),
         }
 
+    @staticmethod
+    def parse(source: Union[str, TextIO]) -> UVLModel:
+        """Parsea UVL (texto o líneas de un fichero) para importarlo."""
+        return parse_uvl(source)
+
+    @staticmethod
+    def validate_model(model: UVLModel) -> None:
+        """Comprobaciones previas a materializar el modelo compilado."""
+        if model.imports:
+            raise UVLParseError(
+                reason=f"Imports are not supported: {', '.join(model.imports)}"
+            )
+
     async def apply_uvl(self, uvl_content: str) -> FeatureModelVersion:
-        parsed, constraints = self._parse_uvl(uvl_content)
-        root_name = self._find_root(parsed)
-        self._validate_parsed_structure(parsed)
-        self._validate_constraints(constraints, parsed)
+        model = self.parse(uvl_content)
+        self.validate_model(model)
+        return await self.apply_model(model, uvl_content)
+
+    async def apply_model(
+        self,
+        model: UVLModel,
+        uvl_content: str,
+        on_progress: Optional[ImportProgressCallback] = None,
+    ) -> FeatureModelVersion:
+        """
+        Crea una versión nueva con la estructura del modelo compilado.
+
+        Si la escritura falla o se cancela, la versión se elimina.
+        """
+
+        async def write(new_version: FeatureModelVersion) -> None:
+            rows = self._build_rows(model, new_version.id)
+            await self._write_rows(rows, on_progress)
+
+        return await self._create_version(write, uvl_content)
+
+    async def apply_uvl_delta(
+        self, uvl_content: str, base_version: FeatureModelVersion
+    ) -> Tuple[FeatureModelVersion, UVLDelta]:
+        """
+        Aplica el UVL como delta sobre ``base_version``.
+
+        Clona la base y escribe solo las diferencias (altas, bajas,
+        renombrados, movimientos y cambios de grupos, relaciones y
+        constraints). Si no hay ninguna diferencia no se crea versión y se
+        devuelve la base.
+
+        Args:
+            uvl_content: UVL a aplicar
+            base_version: Versión con la estructura completa cargada
+
+        Returns:
+            Versión resultante y delta aplicado
+        """
+        model = self.parse(uvl_content)
+        self.validate_model(model)
+        delta = self.compute_delta(model, base_version)
+        if delta.is_empty and (base_version.uvl_content or "").strip() == (
+            uvl_content.strip()
+        ):
+            return base_version, delta
+
+        async def write(new_version: FeatureModelVersion) -> None:
+            if delta_storage_enabled():
+                rows = rows_from_import(
+                    self._build_rows(model, new_version.id, reuse=delta)
+                )
+                if await store_delta_version(
+                    self.session, new_version, base_version.id, rows
+                ):
+                    return
+            id_map = await FeatureModelVersionRepository(
+                self.session
+            ).clone_version_structure(
+                source_version_id=base_version.id,
+                target_version_id=new_version.id,
+                user_id=self.user.id if self.user else None,
+                return_id_map=True,
+            )
+            await self._write_delta(delta, model, id_map, new_version.id)
 
+        return await self._create_version(write, uvl_content), delta
+
+    async def _create_version(
+        self,
+        write: Callable[[FeatureModelVersion], Awaitable[None]],
+        uvl_content: str,
+    ) -> FeatureModelVersion:
+        """
+        Crea una versión DRAFT vacía, la rellena con ``write`` y guarda el UVL.
+
+        Si la escritura falla o se cancela, la versión (vacía, confirmada al
+        crearla) se elimina.
+        """
         manager = FeatureModelVersionManager(
             session=self.session,
             feature_model=self.feature_model,
@@ -79,138 +290,497 @@ class FeatureModelUVLImporter:
         )
         new_version = await manager.create_new_version(source_version=None)
 
-        name_to_id: Dict[str, str] = {}
+        try:
+            await write(new_version)
+
+            # Persistir UVL en la nueva versión
+            new_version.uvl_content = uvl_content.strip()
+            self.session.add(new_version)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            await self.session.delete(new_version)
+            await self.session.commit()
+            raise
+        await self.session.refresh(new_version)
+        return new_version
 
-        # Crear root
-        root_feature = Feature(
-            name=root_name,
-            type=FeatureType.MANDATORY,
-            feature_model_version_id=new_version.id,
-            parent_id=None,
-            created_by_id=self.user.id,
-        )
-        self.session.add(root_feature)
-        await self.session.flush()
-        name_to_id[self._normalize_name(root_name)] = str(root_feature.id)
-
-        # Crear resto del árbol
-        queue = [root_name]
-        while queue:
-            current = queue.pop(0)
-            parent_id = name_to_id[self._normalize_name(current)]
-            node = parsed[current]
-            for child in node.children:
-                if self._normalize_name(child.name) in name_to_id:
-                    raise UVLParseError(reason=f"Duplicate feature name '{child.name}'")
-                feature_type = (
-                    FeatureType.MANDATORY
-                    if child.relation_type == "mandatory"
-                    else FeatureType.OPTIONAL
-                )
-                new_feature = Feature(
-                    name=child.name,
-                    type=feature_type,
-                    feature_model_version_id=new_version.id,
-                    parent_id=parent_id,
-                    created_by_id=self.user.id,
+    def _row_factory(self, version_id: uuid.UUID) -> Callable[..., Dict[str, Any]]:
+        """Constructor de filas nuevas de la versión ``version_id``."""
+        user_id = self.user.id if self.user else None
+        now = datetime.utcnow()
+
+        def new_row(**values: Any) -> Dict[str, Any]:
+            # Valores que BaseTable rellena al instanciar el modelo
+            return {
+                "id": uuid.uuid4(),
+                "created_at": now,
+                "is_active": True,
+                "created_by_id": user_id,
+                "feature_model_version_id": version_id,
+                **values,
+            }
+
+        return new_row
+
+    def _build_rows(
+        self,
+        model: UVLModel,
+        version_id: uuid.UUID,
+        reuse: Optional[UVLDelta] = None,
+    ) -> ImportRows:
+        """
+        Construye en memoria todas las filas de la versión importada.
+
+        Con ``reuse`` (delta respecto a una base) las filas emparejadas
+        conservan el id que tienen en la base.
+        """
+        rows = ImportRows()
+        new_row = self._row_factory(version_id)
+        reuse = reuse or UVLDelta()
+
+        def reused(base_id: Optional[uuid.UUID]) -> Dict[str, Any]:
+            return {"id": base_id} if base_id is not None else {}
+
+        # El modelo compilado está en preorden: cada padre antes que sus hijos
+        name_to_id: Dict[str, uuid.UUID] = {}
+        for key, feature in model.features.items():
+            row = new_row(
+                **reused(reuse.matched.get(key)),
+                **self._feature_values(feature),
+                parent_id=(
+                    name_to_id[normalize_name(feature.parent)]
+                    if feature.parent is not None
+                    else None
+                ),
+            )
+            rows.features.append(row)
+            name_to_id[key] = row["id"]
+
+        # Grupos (alternative/or/cardinalidad)
+        for index, group in enumerate(model.groups):
+            row = new_row(
+                **reused(reuse.matched_groups.get(index)),
+                **self._group_values(group),
+                parent_feature_id=name_to_id[normalize_name(group.parent)],
+            )
+            rows.groups.append(row)
+            rows.group_members.extend(
+                {"id": name_to_id[normalize_name(member)], "group_id": row["id"]}
+                for member in group.members
+            )
+
+        # Relaciones simples y constraints
+        for index, constraint in enumerate(model.constraints):
+            if constraint.relation is None:
+                rows.constraints.append(
+                    new_row(
+                        **reused(reuse.matched_constraints.get(index)),
+                        expr_text=constraint.text,
+                    )
                 )
-                self.session.add(new_feature)
-                await self.session.flush()
-                name_to_id[self._normalize_name(child.name)] = str(new_feature.id)
-                queue.append(child.name)
-
-        # Crear grupos (alternative/or)
-        parent_to_group: Dict[str, FeatureGroup] = {}
-        for parent_name, node in parsed.items():
-            group_children = [c for c in node.children if c.group_type]
-            if not group_children:
                 continue
 
-            group_type = group_children[0].group_type
-            if group_type not in {"alternative", "or"}:
+            ctype, left, right = constraint.relation
+            rows.relations.append(
+                new_row(
+                    **reused(reuse.matched_relations.get(index)),
+                    type=self._relation_type(ctype),
+                    source_feature_id=name_to_id[normalize_name(left)],
+                    target_feature_id=name_to_id[normalize_name(right)],
+                )
+            )
+
+        return rows
+
+    @classmethod
+    def _feature_values(cls, feature: UVLFeature) -> Dict[str, Any]:
+        """Columnas de la feature que dependen solo del UVL (sin padre)."""
+        return {
+            "name": feature.name,
+            "type": (
+                FeatureType.MANDATORY
+                if feature.parent is None or feature.relation_type == "mandatory"
+                else FeatureType.OPTIONAL
+            ),
+            "properties": cls._feature_properties(feature),
+        }
+
+    @staticmethod
+    def _group_values(group: UVLGroup) -> Dict[str, Any]:
+        is_alternative = (group.min_cardinality, group.max_cardinality) == (1, 1)
+        return {
+            "group_type": (
+                FeatureGroupType.ALTERNATIVE if is_alternative else FeatureGroupType.OR
+            ),
+            "min_cardinality": group.min_cardinality,
+            "max_cardinality": group.max_cardinality,
+        }
+
+    @staticmethod
+    def _relation_type(kind: str) -> FeatureRelationType:
+        return (
+            FeatureRelationType.REQUIRED
+            if kind == "requires"
+            else FeatureRelationType.EXCLUDES
+        )
+
+    @staticmethod
+    def _feature_properties(feature: UVLFeature) -> Optional[Dict[str, Any]]:
+        """Atributos UVL, tipo y cardinalidad de la feature (None si no hay)."""
+        properties = dict(feature.attributes)
+        if feature.feature_type:
+            properties["uvl_type"] = feature.feature_type
+        if feature.cardinality:
+            low, high = feature.cardinality
+            properties["cardinality"] = {"min": low, "max": high}
+        return properties or None
+
+    async def _write_rows(
+        self,
+        rows: ImportRows,
+        on_progress: Optional[ImportProgressCallback] = None,
+    ) -> None:
+        total = (
+            len(rows.features)
+            + len(rows.groups)
+            + len(rows.group_members)
+            + len(rows.relations)
+            + len(rows.constraints)
+        )
+        written = 0
+
+        async def advance(count: int) -> None:
+            nonlocal written
+            written += count
+            if on_progress is not None:
+                await on_progress("insert", written, total)
+
+        await self._bulk_insert(Feature, rows.features, advance)
+        await self._bulk_insert(FeatureGroup, rows.groups, advance)
+        await self._bulk_update(Feature, rows.group_members, advance)
+        await self._bulk_insert(FeatureRelation, rows.relations, advance)
+        await self._bulk_insert(Constraint, rows.constraints, advance)
+
+    async def _bulk_insert(
+        self,
+        model: type,
+        rows: List[Dict[str, Any]],
+        advance: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> None:
+        await self._execute_batches(insert(model), rows, advance)
+
+    async def _bulk_update(
+        self,
+        model: type,
+        rows: List[Dict[str, Any]],
+        advance: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> None:
+        """UPDATE por clave primaria (cada fila lleva ``id``)."""
+        await self._execute_batches(update(model), rows, advance)
+
+    async def _execute_batches(
+        self,
+        statement: Any,
+        rows: List[Dict[str, Any]],
+        advance: Optional[Callable[[int], Awaitable[None]]],
+    ) -> None:
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            batch = rows[start : start + BULK_INSERT_BATCH_SIZE]
+            await self.session.execute(statement, batch)
+            if advance is not None:
+                await advance(len(batch))
+
+    # ------------------------------------------------------------------
+    # Aplicación como delta
+    # ------------------------------------------------------------------
+
+    def compute_delta(self, model: UVLModel, base: FeatureModelVersion) -> UVLDelta:
+        """
+        Diferencias entre el modelo UVL y la estructura de ``base``.
+
+        Las features se emparejan por nombre normalizado. Entre las que no
+        se emparejan, una feature de la base y una del UVL bajo el mismo
+        padre se consideran un renombrado si son las únicas sin pareja de
+        ese padre o si tienen exactamente los mismos hijos.
+        """
+        delta = UVLDelta()
+        base_features = list(base.features)
+        base_by_key = {normalize_name(f.name): f for f in base_features}
+        matched: Dict[str, Any] = {
+            key: base_by_key[key] for key in model.features if key in base_by_key
+        }
+
+        new_children: Dict[Optional[str], List[str]] = defaultdict(list)
+        for key, feature in model.features.items():
+            parent_key = normalize_name(feature.parent) if feature.parent else None
+            new_children[parent_key].append(key)
+        base_children: Dict[Optional[uuid.UUID], List[Any]] = defaultdict(list)
+        for feature in base_features:
+            base_children[feature.parent_id].append(feature)
+
+        # Renombrados (preorden: el padre ya está emparejado al llegar al hijo)
+        paired_ids = {f.id for f in matched.values()}
+        for key, feature in model.features.items():
+            if key in matched:
+                continue
+            parent_key = normalize_name(feature.parent) if feature.parent else None
+            if parent_key is not None and parent_key not in matched:
                 continue
+            parent_id = matched[parent_key].id if parent_key is not None else None
+            candidates = [f for f in base_children[parent_id] if f.id not in paired_ids]
+            siblings = [k for k in new_children[parent_key] if k not in matched]
+            wanted = set(new_children[key])
+            if len(candidates) == 1 and len(siblings) == 1:
+                pick = candidates[0]
+            else:
+                same_children = [
+                    f
+                    for f in candidates
+                    if wanted
+                    and {normalize_name(c.name) for c in base_children[f.id]} == wanted
+                ]
+                pick = same_children[0] if len(same_children) == 1 else None
+            if pick is not None:
+                matched[key] = pick
+                paired_ids.add(pick.id)
+
+        delta.matched = {key: f.id for key, f in matched.items()}
+        key_of = {f.id: key for key, f in matched.items()}
+
+        # Features: altas, cambios y bajas
+        for key, feature in model.features.items():
+            base_feature = matched.get(key)
+            if base_feature is None:
+                delta.features_added.append(key)
+                continue
+            parent_key = normalize_name(feature.parent) if feature.parent else None
+            if parent_key is None:
+                moved = base_feature.parent_id is not None
+            else:
+                # Un padre nuevo implica siempre movimiento
+                parent = matched.get(parent_key)
+                moved = parent is None or base_feature.parent_id != parent.id
+            values = self._feature_values(feature)
+            if base_feature.name != values["name"]:
+                delta.features_renamed.add(base_feature.id)
+            if moved:
+                delta.features_moved.add(base_feature.id)
+            if FeatureType(base_feature.type) != values["type"]:
+                delta.features_retyped.add(base_feature.id)
+                delta.features_updated.add(base_feature.id)
+            if (base_feature.properties or None) != values["properties"]:
+                delta.features_updated.add(base_feature.id)
+
+        depth: Dict[uuid.UUID, int] = {}
+        by_id = {f.id: f for f in base_features}
+
+        def depth_of(feature_id: uuid.UUID) -> int:
+            if feature_id not in depth:
+                parent_id = by_id[feature_id].parent_id
+                depth[feature_id] = (
+                    0 if parent_id not in by_id else depth_of(parent_id) + 1
+                )
+            return depth[feature_id]
 
-            parent_id = name_to_id[self._normalize_name(parent_name)]
-            min_card = 1
-            max_card = 1 if group_type == "alternative" else None
-            group = FeatureGroup(
-                group_type=(
-                    FeatureGroupType.ALTERNATIVE
-                    if group_type == "alternative"
-                    else FeatureGroupType.OR
-                ),
-                parent_feature_id=parent_id,
-                min_cardinality=min_card,
-                max_cardinality=max_card,
-                feature_model_version_id=new_version.id,
-                created_by_id=self.user.id,
+        delta.features_removed = sorted(
+            (f.id for f in base_features if f.id not in key_of),
+            key=depth_of,
+            reverse=True,
+        )
+
+        # Grupos: se comparan por padre, tipo, cardinalidad y miembros
+        members: Dict[uuid.UUID, Set[Optional[str]]] = defaultdict(set)
+        for feature in base_features:
+            if feature.group_id is not None:
+                members[feature.group_id].add(key_of.get(feature.id))
+        base_groups: Dict[Tuple, List[uuid.UUID]] = defaultdict(list)
+        for group in base.feature_groups:
+            signature = (
+                key_of.get(group.parent_feature_id),
+                FeatureGroupType(group.group_type),
+                group.min_cardinality,
+                group.max_cardinality,
+                frozenset(members[group.id]),
             )
-            self.session.add(group)
-            await self.session.flush()
-            parent_to_group[parent_name] = group
-
-            # Asignar group_id a hijos del grupo
-            for child in group_children:
-                child_id = name_to_id[self._normalize_name(child.name)]
-                feature_stmt = await self.session.get(Feature, child_id)
-                if feature_stmt:
-                    feature_stmt.group_id = group.id
-                    self.session.add(feature_stmt)
-
-        # Crear relaciones/constraints simples
-        for raw in constraints:
-            parsed_constraint = self._parse_constraint(raw, name_to_id)
-            if parsed_constraint is None:
-                new_constraint = Constraint(
-                    description=None,
-                    expr_text=raw,
-                    feature_model_version_id=new_version.id,
-                    created_by_id=self.user.id,
-                )
-                self.session.add(new_constraint)
+            base_groups[signature].append(group.id)
+        for index, group in enumerate(model.groups):
+            values = self._group_values(group)
+            signature = (
+                normalize_name(group.parent),
+                values["group_type"],
+                values["min_cardinality"],
+                values["max_cardinality"],
+                frozenset(normalize_name(m) for m in group.members),
+            )
+            if base_groups.get(signature):
+                delta.matched_groups[index] = base_groups[signature].pop()
+            else:
+                delta.groups_added.append(group)
+        delta.groups_removed = [g for ids in base_groups.values() for g in ids]
+
+        # Relaciones simples y constraints
+        base_relations: Dict[Tuple, List[uuid.UUID]] = defaultdict(list)
+        for relation in base.feature_relations:
+            signature = (
+                key_of.get(relation.source_feature_id),
+                key_of.get(relation.target_feature_id),
+                FeatureRelationType(relation.type),
+            )
+            base_relations[signature].append(relation.id)
+        base_constraints: Dict[str, List[uuid.UUID]] = defaultdict(list)
+        for constraint in base.constraints:
+            base_constraints[(constraint.expr_text or "").strip()].append(constraint.id)
+
+        for index, constraint in enumerate(model.constraints):
+            if constraint.relation is None:
+                if base_constraints.get(constraint.text):
+                    delta.matched_constraints[index] = base_constraints[
+                        constraint.text
+                    ].pop()
+                else:
+                    delta.constraints_added.append(constraint)
                 continue
+            ctype, left, right = constraint.relation
+            signature = (
+                normalize_name(left),
+                normalize_name(right),
+                self._relation_type(ctype),
+            )
+            if base_relations.get(signature):
+                delta.matched_relations[index] = base_relations[signature].pop()
+            else:
+                delta.relations_added.append(constraint.relation)
+        delta.relations_removed = [r for ids in base_relations.values() for r in ids]
+        delta.constraints_removed = [
+            c for ids in base_constraints.values() for c in ids
+        ]
+        return delta
+
+    async def _write_delta(
+        self,
+        delta: UVLDelta,
+        model: UVLModel,
+        id_map: Dict[str, Dict[uuid.UUID, uuid.UUID]],
+        version_id: uuid.UUID,
+    ) -> None:
+        """Escribe el delta sobre la copia de la base (ids de ``id_map``)."""
+        new_row = self._row_factory(version_id)
+        feature_map = id_map["features"]
+        name_to_id = {
+            key: feature_map[base_id] for key, base_id in delta.matched.items()
+        }
 
-            ctype, left_id, right_id = parsed_constraint
-            if ctype == "requires":
-                relation = FeatureRelation(
-                    type=FeatureRelationType.REQUIRED,
-                    source_feature_id=left_id,
-                    target_feature_id=right_id,
-                    feature_model_version_id=new_version.id,
-                    created_by_id=self.user.id,
-                )
-                self.session.add(relation)
-            elif ctype == "excludes":
-                relation = FeatureRelation(
-                    type=FeatureRelationType.EXCLUDES,
-                    source_feature_id=left_id,
-                    target_feature_id=right_id,
-                    feature_model_version_id=new_version.id,
-                    created_by_id=self.user.id,
+        def parent_id(feature: UVLFeature) -> Optional[uuid.UUID]:
+            if feature.parent is None:
+                return None
+            return name_to_id[normalize_name(feature.parent)]
+
+        # 1. Altas y cambios de features (los padres nuevos van primero)
+        added: List[Dict[str, Any]] = []
+        for key in delta.features_added:
+            feature = model.features[key]
+            row = new_row(**self._feature_values(feature), parent_id=parent_id(feature))
+            added.append(row)
+            name_to_id[key] = row["id"]
+        await self._bulk_insert(Feature, added)
+
+        base_to_key = {base_id: key for key, base_id in delta.matched.items()}
+        await self._bulk_update(
+            Feature,
+            [
+                {
+                    "id": feature_map[base_id],
+                    **self._feature_values(model.features[base_to_key[base_id]]),
+                    "parent_id": parent_id(model.features[base_to_key[base_id]]),
+                }
+                for base_id in delta.changed_features
+            ],
+        )
+
+        # 2. Bajas: relaciones y grupos antes que las features que referencian
+        removed_groups = [id_map["feature_groups"][g] for g in delta.groups_removed]
+        for batch in _batches(removed_groups):
+            await self.session.execute(
+                update(Feature).where(Feature.group_id.in_(batch)).values(group_id=None)
+            )
+        await self._delete_ids(
+            FeatureRelation,
+            [id_map["feature_relations"][r] for r in delta.relations_removed],
+        )
+        await self._delete_ids(FeatureGroup, removed_groups)
+        removed_features = [feature_map[f] for f in delta.features_removed]
+        for batch in _batches(removed_features):
+            await self.session.execute(
+                delete(FeatureTagLink).where(FeatureTagLink.feature_id.in_(batch))
+            )
+        # Una sola sentencia (ids como array): padres e hijos borrados en lotes
+        # distintos romperían la clave de parent_id, que se comprueba al
+        # final de cada sentencia
+        if removed_features:
+            await self.session.execute(
+                delete(Feature).where(
+                    Feature.id
+                    == any_(
+                        bindparam(
+                            "removed_ids",
+                            removed_features,
+                            type_=postgresql.ARRAY(Uuid),
+                        )
+                    )
                 )
-                self.session.add(relation)
+            )
+        await self._delete_ids(
+            Constraint, [id_map["constraints"][c] for c in delta.constraints_removed]
+        )
 
-        # Persistir UVL en la nueva versión
-        new_version.uvl_content = uvl_content.strip()
-        self.session.add(new_version)
-        await self.session.commit()
-        await self.session.refresh(new_version)
-        return new_version
+        # 3. Altas de grupos, relaciones y constraints
+        rows = ImportRows()
+        for group in delta.groups_added:
+            row = new_row(
+                **self._group_values(group),
+                parent_feature_id=name_to_id[normalize_name(group.parent)],
+            )
+            rows.groups.append(row)
+            rows.group_members.extend(
+                {"id": name_to_id[normalize_name(member)], "group_id": row["id"]}
+                for member in group.members
+            )
+        rows.relations = [
+            new_row(
+                type=self._relation_type(ctype),
+                source_feature_id=name_to_id[normalize_name(left)],
+                target_feature_id=name_to_id[normalize_name(right)],
+            )
+            for ctype, left, right in delta.relations_added
+        ]
+        rows.constraints = [
+            new_row(expr_text=constraint.text) for constraint in delta.constraints_added
+        ]
+        await self._write_rows(rows)
+
+    async def _delete_ids(self, model: type, ids: List[uuid.UUID]) -> None:
+        for batch in _batches(ids):
+            await self.session.execute(delete(model).where(model.id.in_(batch)))
 
     def diff_uvl(self, uvl_content: str, version: FeatureModelVersion) -> dict:
         """Comparar UVL contra estructura actual y devolver diferencias."""
-        parsed, constraints = self._parse_uvl(uvl_content)
-        self._validate_parsed_structure(parsed)
+        model = parse_uvl(uvl_content)
 
-        uvl_features = {self._normalize_name(name) for name in parsed.keys()}
-        uvl_relations = self._extract_uvl_relations(constraints, parsed)
-        uvl_constraints = self._extract_uvl_constraints(constraints, parsed)
+        uvl_features = set(model.features.keys())
+        uvl_relations = {
+            (normalize_name(left), normalize_name(right), ctype)
+            for ctype, left, right in (
+                c.relation for c in model.constraints if c.relation is not None
+            )
+        }
+        uvl_constraints = {c.text for c in model.constraints if c.relation is None}
 
-        structure_features = {self._normalize_name(f.name) for f in version.features}
+        structure_features = {normalize_name(f.name) for f in version.features}
         structure_relations = {
             (
-                self._normalize_name(rel.source_feature.name),
-                self._normalize_name(rel.target_feature.name),
+                normalize_name(rel.source_feature.name),
+                normalize_name(rel.target_feature.name),
                 rel.type.value,
             )
             for rel in version.feature_relations
@@ -228,242 +798,9 @@ class FeatureModelUVLImporter:
             "constraints_removed": sorted(structure_constraints - uvl_constraints),
         }
 
-    def _parse_uvl(self, uvl_content: str) -> tuple[Dict[str, ParsedNode], List[str]]:
-        lines = [line.rstrip("\n") for line in uvl_content.splitlines()]
-        cleaned = []
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
-            if stripped.startswith("//") or stripped.startswith("#"):
-                continue
-            cleaned.append(line)
-
-        in_features = False
-        in_constraints = False
-        parsed: Dict[str, ParsedNode] = {}
-        constraints: List[str] = []
-
-        stack: List[dict] = []
-
-        for raw in cleaned:
-            text = raw.strip()
-            if text.lower().startswith("namespace "):
-                continue
-            if text == "features":
-                in_features = True
-                in_constraints = False
-                stack = []
-                continue
-            if text == "constraints":
-                in_features = False
-                in_constraints = True
-                continue
-            if in_constraints:
-                constraints.append(text)
-                continue
-            if not in_features:
-                continue
-
-            indent = len(raw) - len(raw.lstrip(" "))
-            if indent % 4 != 0:
-                raise UVLParseError(reason=f"Invalid indentation: '{raw}'")
-            level = indent // 4
-
-            while stack and level <= stack[-1]["level"]:
-                stack.pop()
-
-            if text in {"mandatory", "optional", "alternative", "or"}:
-                parent = next(
-                    (item for item in reversed(stack) if item["kind"] == "feature"),
-                    None,
-                )
-                if not parent:
-                    raise UVLParseError(reason=f"Group '{text}' without parent")
-                stack.append(
-                    {
-                        "kind": "group",
-                        "level": level,
-                        "relation_type": (
-                            text if text in {"mandatory", "optional"} else None
-                        ),
-                        "group_type": text if text in {"alternative", "or"} else None,
-                        "parent": parent["name"],
-                    }
-                )
-                continue
-
-            parent = next(
-                (item for item in reversed(stack) if item["kind"] == "feature"),
-                None,
-            )
-            group_ctx = stack[-1] if stack and stack[-1]["kind"] == "group" else None
-            relation_type = group_ctx.get("relation_type") if group_ctx else "mandatory"
-            group_type = group_ctx.get("group_type") if group_ctx else None
-            parent_name = parent["name"] if parent else None
-
-            if text not in parsed:
-                parsed[text] = ParsedNode(name=text, children=[])
-
-            if parent_name:
-                if parent_name not in parsed:
-                    parsed[parent_name] = ParsedNode(name=parent_name, children=[])
-                parsed[parent_name].children.append(
-                    ParsedChild(
-                        name=text,
-                        relation_type=relation_type or "optional",
-                        group_type=group_type,
-                    )
-                )
-
-            stack.append({"kind": "feature", "level": level, "name": text})
-
-        if not parsed:
-            raise UVLParseError(reason="No features parsed")
-        return parsed, constraints
-
-    def _find_root(self, parsed: Dict[str, ParsedNode]) -> str:
-        parents = {child.name for node in parsed.values() for child in node.children}
-        roots = [name for name in parsed.keys() if name not in parents]
-        if len(roots) != 1:
-            raise UVLParseError(reason=f"Expected single root, found {len(roots)}")
-        return roots[0]
-
-    def _validate_parsed_structure(self, parsed: Dict[str, ParsedNode]) -> None:
-        """Validaciones de estructura: ciclos, grupos, cardinalidad."""
-        # Validar ciclos
-        graph = {
-            name: [child.name for child in node.children]
-            for name, node in parsed.items()
-        }
-        visited: set[str] = set()
-        stack: set[str] = set()
-
-        def dfs(node: str) -> None:
-            if node in stack:
-                raise UVLParseError(reason=f"Cycle detected at '{node}'")
-            if node in visited:
-                return
-            visited.add(node)
-            stack.add(node)
-            for child in graph.get(node, []):
-                if child not in graph:
-                    raise UVLParseError(reason=f"Undefined feature '{child}'")
-                dfs(child)
-            stack.remove(node)
-
-        for node in graph.keys():
-            if node not in visited:
-                dfs(node)
-
-        # Validar grupos
-        for parent_name, node in parsed.items():
-            group_children = [c for c in node.children if c.group_type]
-            if not group_children:
-                continue
-
-            group_types = {c.group_type for c in group_children}
-            if len(group_types) > 1:
-                raise UVLParseError(reason=f"Mixed group types under '{parent_name}'")
 
-            group_type = group_children[0].group_type
-            count = len(group_children)
-            if group_type == "alternative" and count < 2:
-                raise UVLParseError(
-                    reason=f"Alternative group under '{parent_name}' requires >= 2 children"
-                )
-            if group_type == "or" and count < 1:
-                raise UVLParseError(
-                    reason=f"OR group under '{parent_name}' requires >= 1 child"
-                )
-
-    def _validate_constraints(
-        self, constraints: List[str], parsed: Dict[str, ParsedNode]
-    ) -> None:
-        """Validar constraints simples: referencias a features existentes."""
-        name_to_id = {
-            self._normalize_name(name): self._normalize_name(name)
-            for name in parsed.keys()
-        }
-        for raw in constraints:
-            parsed_constraint = self._parse_constraint(raw, name_to_id)
-            if parsed_constraint is None:
-                continue
-            _, left_id, right_id = parsed_constraint
-            if left_id not in name_to_id.values():
-                raise UVLParseError(
-                    reason=f"Unknown feature in constraint: '{left_id}'"
-                )
-            if right_id not in name_to_id.values():
-                raise UVLParseError(
-                    reason=f"Unknown feature in constraint: '{right_id}'"
-                )
-
-    def _parse_constraint(
-        self, raw: str, name_to_id: Dict[str, str]
-    ) -> Optional[tuple[str, str, str]]:
-        """Parsea constraints simples: A => B, !(A & B), !A | !B."""
-        expr = raw.strip()
-        if "=>" in expr:
-            left, right = expr.split("=>", 1)
-            left_id = self._resolve_name(left, name_to_id)
-            right_id = self._resolve_name(right, name_to_id)
-            return "requires", left_id, right_id
-
-        if expr.startswith("!(") and expr.endswith(")") and "&" in expr:
-            inner = expr[2:-1]
-            left, right = inner.split("&", 1)
-            left_id = self._resolve_name(left, name_to_id)
-            right_id = self._resolve_name(right, name_to_id)
-            return "excludes", left_id, right_id
-
-        if "|" in expr and "!" in expr:
-            parts = [p.strip() for p in expr.split("|")]
-            if (
-                len(parts) == 2
-                and parts[0].startswith("!")
-                and parts[1].startswith("!")
-            ):
-                left_id = self._resolve_name(parts[0][1:], name_to_id)
-                right_id = self._resolve_name(parts[1][1:], name_to_id)
-                return "excludes", left_id, right_id
-
-        return None
-
-    def _extract_uvl_relations(
-        self, constraints: List[str], parsed: Dict[str, ParsedNode]
-    ) -> set[tuple[str, str, str]]:
-        name_to_id = {
-            self._normalize_name(name): self._normalize_name(name)
-            for name in parsed.keys()
-        }
-        relations = set()
-        for raw in constraints:
-            parsed_constraint = self._parse_constraint(raw, name_to_id)
-            if parsed_constraint is None:
-                continue
-            ctype, left_id, right_id = parsed_constraint
-            rel_type = "requires" if ctype == "requires" else "excludes"
-            relations.add((left_id, right_id, rel_type))
-        return relations
-
-    def _extract_uvl_constraints(
-        self, constraints: List[str], parsed: Dict[str, ParsedNode]
-    ) -> set[str]:
-        name_to_id = {
-            self._normalize_name(name): self._normalize_name(name)
-            for name in parsed.keys()
-        }
-        normalized = set()
-        for raw in constraints:
-            if self._parse_constraint(raw, name_to_id) is None:
-                normalized.add(raw.strip())
-        return normalized
-
-    def _resolve_name(self, token: str, name_to_id: Dict[str, str]) -> str:
-        name = token.strip().replace("_", " ").strip()
-        normalized = self._normalize_name(name)
-        return name_to_id.get(normalized, name)
-
-    def _normalize_name(self, name: str) -> str:
-        return name.strip().lower()
+def _batches(items: List[Any]) -> List[List[Any]]:
+    return [
+        items[start : start + BULK_INSERT_BATCH_SIZE]
+        for start in range(0, len(items), BULK_INSERT_BATCH_SIZE)
+    ]
@@ -0,0 +1,825 @@
+"""
+Parser UVL en streaming (una pasada).
+
+Consume el UVL línea a línea desde un texto o un objeto tipo fichero y
+construye directamente el modelo compilado (``UVLModel``): features en
+preorden (cada padre antes que sus hijos), grupos con su cardinalidad y
+constraints con sus referencias ya resueltas. La memoria depende del tamaño
+del modelo, no del fichero: solo se tokeniza la línea lógica en curso.
+
+Gramática soportada:
+
+- ``namespace``, ``imports`` e ``include`` (se registran, no se resuelven)
+- Indentación con espacios o tabuladores (cualquier anchura consistente)
+- Nombres con comillas dobles (``"Feature A"``) y tipos (``Integer Cost``)
+- Grupos ``mandatory``, ``optional``, ``alternative``, ``or`` y de
+  cardinalidad (``[1..3]``, ``[2]``, ``[1..*]``)
+- Cardinalidad de feature (``Feature cardinality [0..5]``)
+- Atributos (``{abstract, cost 5, label 'x', tags ['a', 'b']}``), también en
+  varias líneas
+- Constraints booleanas y aritméticas, en varias líneas si hay paréntesis
+  abiertos, terminan en operador o continúan con más indentación
+- Comentarios ``//``, ``/* ... */`` y líneas que empiezan por ``#``
+
+Los errores se reportan con línea y columna (``UVLParseError``).
+"""
+
+import io
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from app.exceptions import BusinessLogicException
+
+UVL_TAB_WIDTH = 4
+
+SECTION_KEYWORDS = ("namespace", "imports", "include", "features", "constraints")
+GROUP_KEYWORDS = ("mandatory", "optional", "alternative", "or")
+FEATURE_TYPES = ("Boolean", "Integer", "Real", "String")
+AGGREGATE_FUNCTIONS = ("sum", "avg", "len", "floor", "ceil")
+
+_BINARY_OPERATORS = frozenset(
+    ("=>", "<=>", "&", "|", "==", "!=", "<", ">", "<=", ">=", "+", "-", "*", "/")
+)
+_OPENING = {"(": ")", "{": "}", "[": "]"}
+_CLOSING = {")": "(", "}": "{", "]": "["}
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>[ \t]+)
+    |(?P<comment>//.*)
+    |(?P<block>/\*)
+    |(?P<qname>"(?:[^"\\\n]|\\.)*")
+    |(?P<string>'(?:[^'\\\n]|\\.)*')
+    |(?P<name>\w*[^\W\d]\w*(?:\.\w*[^\W\d]\w*)*)
+    |(?P<number>\d+\.\d+|\d+)
+    |(?P<op><=>|=>|==|!=|<=|>=|\.\.|[!&|(){}\[\],*+\-/<>])
+    """,
+    re.VERBOSE,
+)
+
+
+class UVLParseError(BusinessLogicException):
+    """Error de parseo UVL (con posición si se conoce)."""
+
+    def __init__(
+        self,
+        reason: str,
+        line: Optional[int] = None,
+        column: Optional[int] = None,
+    ):
+        self.reason = reason
+        self.line = line
+        self.column = column
+        position = ""
+        if line is not None:
+            position = f"line {line}" + (
+                f", column {column}: " if column is not None else ": "
+            )
+        super().__init__(detail=f"UVL parse error: {position}{reason}")
+
+
+@dataclass(frozen=True)
+class UVLToken:
+    kind: str  # name | qname | string | number | op
+    value: str
+    line: int
+    column: int
+
+    @property
+    def text(self) -> str:
+        """Valor sin comillas (nombres y cadenas)."""
+        if self.kind in ("qname", "string"):
+            return self.value[1:-1]
+        return self.value
+
+
+@dataclass
+class UVLFeature:
+    name: str
+    parent: Optional[str]
+    relation_type: str  # mandatory | optional
+    line: int
+    group: Optional[int] = None  # índice en ``UVLModel.groups``
+    feature_type: Optional[str] = None
+    cardinality: Optional[tuple[int, Optional[int]]] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class UVLGroup:
+    parent: str
+    group_type: str  # alternative | or | cardinality
+    min_cardinality: int
+    max_cardinality: Optional[int]
+    line: int
+    members: List[str] = field(default_factory=list)
+
+
+@dataclass
+class UVLConstraint:
+    text: str
+    line: int
+    column: int
+    references: List[str] = field(default_factory=list)
+    # ``(requires|excludes, origen, destino)`` si es una relación simple
+    relation: Optional[tuple[str, str, str]] = None
+
+
+@dataclass
+class UVLModel:
+    namespace: Optional[str] = None
+    imports: List[str] = field(default_factory=list)
+    includes: List[str] = field(default_factory=list)
+    root: Optional[str] = None
+    # Clave: nombre normalizado; orden: preorden del árbol
+    features: Dict[str, UVLFeature] = field(default_factory=dict)
+    groups: List[UVLGroup] = field(default_factory=list)
+    constraints: List[UVLConstraint] = field(default_factory=list)
+
+    def resolve(self, reference: str) -> Optional[str]:
+        """
+        Nombre de la feature a la que apunta una referencia.
+
+        Acepta el nombre tal cual (sin distinguir mayúsculas), con ``_`` en
+        lugar de espacios (como exporta el servicio UVL) o con acceso a
+        atributo (``Feature.cost``).
+        """
+        candidates = [reference, reference.replace("_", " ")]
+        if "." in reference:
+            candidates.append(reference.rsplit(".", 1)[0])
+        for candidate in candidates:
+            feature = self.features.get(normalize_name(candidate))
+            if feature is not None:
+                return feature.name
+        return None
+
+
+def normalize_name(name: str) -> str:
+    return name.strip().lower()
+
+
+def parse_uvl(source: Union[str, TextIO, Iterable[str]]) -> UVLModel:
+    """
+    Parsea UVL desde un texto o un iterable de líneas (p. ej. un fichero).
+
+    Raises:
+        UVLParseError: Con línea y columna del primer error
+    """
+    lines = io.StringIO(source) if isinstance(source, str) else source
+    return _UVLParser().parse(lines)
+
+
+# ========================================================================
+#                           --- Tokenizer ---
+# ========================================================================
+
+
+class _Tokenizer:
+    """Tokeniza línea a línea; mantiene el estado de comentarios de bloque."""
+
+    def __init__(self):
+        self.in_block_comment = False
+
+    def tokenize(self, text: str, line: int) -> List[UVLToken]:
+        tokens: List[UVLToken] = []
+        pos = 0
+        if self.in_block_comment:
+            end = text.find("*/")
+            if end < 0:
+                return tokens
+            self.in_block_comment = False
+            pos = end + 2
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if match is None:
+                raise UVLParseError(
+                    f"Unexpected character '{text[pos]}'", line, pos + 1
+                )
+            kind = match.lastgroup
+            if kind == "comment":
+                break
+            if kind == "block":
+                end = text.find("*/", match.end())
+                if end < 0:
+                    self.in_block_comment = True
+                    break
+                pos = end + 2
+                continue
+            if kind != "ws":
+                tokens.append(UVLToken(kind, match.group(), line, pos + 1))
+            pos = match.end()
+        return tokens
+
+
+def _indent_width(raw: str) -> int:
+    width = 0
+    for char in raw:
+        if char == " ":
+            width += 1
+        elif char == "\t":
+            width += UVL_TAB_WIDTH - width % UVL_TAB_WIDTH
+        else:
+            break
+    return width
+
+
+@dataclass
+class _LogicalLine:
+    indent: int
+    tokens: List[UVLToken]
+    # Fragmentos de texto fuente sin comentarios (uno por línea física)
+    segments: List[str]
+
+    @property
+    def first(self) -> UVLToken:
+        return self.tokens[0]
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.segments)
+
+
+def _iter_logical_lines(lines: Iterable[str]) -> Iterator[_LogicalLine]:
+    """
+    Agrupa las líneas físicas en líneas lógicas.
+
+    Una línea lógica continúa mientras queden paréntesis, llaves o corchetes
+    abiertos.
+    """
+    tokenizer = _Tokenizer()
+    current: Optional[_LogicalLine] = None
+    depth: List[UVLToken] = []
+    for number, raw in enumerate(lines, start=1):
+        raw = raw.rstrip("\r\n")
+        stripped = raw.lstrip(" \t")
+        if current is None and not tokenizer.in_block_comment:
+            if not stripped or stripped.startswith("#"):
+                continue
+        tokens = tokenizer.tokenize(raw, number)
+        if not tokens:
+            continue
+        for token in tokens:
+            if token.value in _OPENING and token.kind == "op":
+                depth.append(token)
+            elif token.value in _CLOSING and token.kind == "op":
+                if not depth or depth[-1].value != _CLOSING[token.value]:
+                    raise UVLParseError(
+                        f"Unbalanced '{token.value}'", token.line, token.column
+                    )
+                depth.pop()
+        last = tokens[-1]
+        segment = raw[tokens[0].column - 1 : last.column - 1 + len(last.value)]
+        if current is None:
+            current = _LogicalLine(_indent_width(raw), tokens, [segment])
+        else:
+            current.tokens.extend(tokens)
+            current.segments.append(segment)
+        if not depth:
+            yield current
+            current = None
+    if depth:
+        token = depth[-1]
+        raise UVLParseError(f"Unclosed '{token.value}'", token.line, token.column)
+    if tokenizer.in_block_comment:
+        raise UVLParseError("Unclosed block comment")
+
+
+# ========================================================================
+#                       --- Parser de secciones ---
+# ========================================================================
+
+
+@dataclass
+class _Frame:
+    indent: int
+    kind: str  # section | feature | block
+    name: Optional[str] = None  # feature (en bloques, la feature padre)
+    block: Optional[str] = None  # mandatory | optional | group
+    group: Optional[int] = None
+    child_indent: Optional[int] = None
+
+
+class _UVLParser:
+    def __init__(self):
+        self.model = UVLModel()
+        self.section: Optional[str] = None
+        self.stack: List[_Frame] = []
+        self.pending: Optional[_LogicalLine] = None
+
+    def parse(self, lines: Iterable[str]) -> UVLModel:
+        for logical in _iter_logical_lines(lines):
+            if self.pending is not None:
+                if self._continues_constraint(logical):
+                    self.pending.tokens.extend(logical.tokens)
+                    self.pending.segments.extend(logical.segments)
+                    continue
+                self._flush_constraint()
+            self._handle(logical)
+        self._flush_constraint()
+        if not self.model.features:
+            raise UVLParseError("No features parsed")
+        self._resolve_constraints()
+        return self.model
+
+    def _handle(self, logical: _LogicalLine) -> None:
+        first = logical.first
+        if logical.indent == 0 and first.kind == "name":
+            if first.value in SECTION_KEYWORDS:
+                self._start_section(logical)
+                return
+        if self.section == "features":
+            self._feature_line(logical)
+        elif self.section == "constraints":
+            self.pending = logical
+        elif self.section == "imports":
+            self.model.imports.append(logical.text)
+        elif self.section == "include":
+            self.model.includes.append(logical.text)
+        else:
+            raise UVLParseError(
+                f"Unexpected '{first.value}' outside of a section",
+                first.line,
+                first.column,
+            )
+
+    def _start_section(self, logical: _LogicalLine) -> None:
+        first = logical.first
+        if first.value == "namespace":
+            if len(logical.tokens) != 2 or logical.tokens[1].kind not in (
+                "name",
+                "qname",
+            ):
+                raise UVLParseError("Expected 'namespace <name>'", first.line)
+            self.model.namespace = logical.tokens[1].text
+            self.section = None
+            return
+        _expect_end(logical.tokens, 1)
+        self.section = first.value
+        if self.section == "features":
+            if self.model.features:
+                raise UVLParseError(
+                    "Duplicate 'features' section", first.line, first.column
+                )
+            self.stack = [_Frame(indent=-1, kind="section")]
+
+    # -------------------- features --------------------
+
+    def _feature_line(self, logical: _LogicalLine) -> None:
+        first = logical.first
+        while self.stack[-1].indent >= logical.indent:
+            self.stack.pop()
+        parent = self.stack[-1]
+        if parent.child_indent is None:
+            parent.child_indent = logical.indent
+        elif parent.child_indent != logical.indent:
+            raise UVLParseError("Inconsistent indentation", first.line, 1)
+
+        group = _parse_group_keyword(logical.tokens)
+        if group is not None:
+            self._open_block(logical, parent, group)
+            return
+        if parent.kind == "feature":
+            raise UVLParseError(
+                f"Feature '{first.text}' must be nested under a group keyword "
+                f"({', '.join(GROUP_KEYWORDS)} or a cardinality)",
+                first.line,
+                first.column,
+            )
+        if parent.kind == "section" and self.model.root is not None:
+            raise UVLParseError(
+                f"Expected single root, found another root '{first.text}'",
+                first.line,
+                first.column,
+            )
+        feature = _parse_feature_declaration(logical.tokens)
+        feature.parent = parent.name
+        feature.relation_type = (
+            "mandatory" if parent.block == "mandatory" else "optional"
+        )
+        key = normalize_name(feature.name)
+        if key in self.model.features:
+            raise UVLParseError(
+                f"Duplicate feature name '{feature.name}'", first.line, first.column
+            )
+        if parent.group is not None:
+            feature.group = parent.group
+            self.model.groups[parent.group].members.append(feature.name)
+        self.model.features[key] = feature
+        if parent.kind == "section":
+            self.model.root = feature.name
+        self.stack.append(
+            _Frame(indent=logical.indent, kind="feature", name=feature.name)
+        )
+
+    def _open_block(
+        self,
+        logical: _LogicalLine,
+        parent: _Frame,
+        group: tuple[str, int, Optional[int]],
+    ) -> None:
+        first = logical.first
+        keyword, min_card, max_card = group
+        if parent.kind != "feature":
+            raise UVLParseError(
+                f"Group '{first.value}' without parent feature",
+                first.line,
+                first.column,
+            )
+        frame = _Frame(
+            indent=logical.indent, kind="block", name=parent.name, block=keyword
+        )
+        if keyword not in ("mandatory", "optional"):
+            self.model.groups.append(
+                UVLGroup(
+                    parent=parent.name,
+                    group_type=keyword,
+                    min_cardinality=min_card,
+                    max_cardinality=max_card,
+                    line=first.line,
+                )
+            )
+            frame.group = len(self.model.groups) - 1
+        self.stack.append(frame)
+
+    # -------------------- constraints --------------------
+
+    def _continues_constraint(self, logical: _LogicalLine) -> bool:
+        pending = self.pending
+        if logical.indent > pending.indent:
+            return True
+        last = pending.tokens[-1]
+        return last.kind == "op" and (
+            last.value in _BINARY_OPERATORS or last.value == "!"
+        )
+
+    def _flush_constraint(self) -> None:
+        if self.pending is None:
+            return
+        logical, self.pending = self.pending, None
+        references = _ExpressionParser(logical.tokens).parse()
+        self.model.constraints.append(
+            UVLConstraint(
+                text=logical.text,
+                line=logical.first.line,
+                column=logical.first.column,
+                references=references,
+                relation=_simple_relation(logical.tokens),
+            )
+        )
+
+    def _resolve_constraints(self) -> None:
+        for group in self.model.groups:
+            _validate_group(group)
+        skip_dotted = bool(self.model.imports)
+        for constraint in self.model.constraints:
+            resolved = []
+            for token in constraint.references:
+                name = self.model.resolve(token.text)
+                if name is None:
+                    if skip_dotted and "." in token.text:
+                        continue
+                    raise UVLParseError(
+                        f"Unknown feature in constraint: '{token.text}'",
+                        token.line,
+                        token.column,
+                    )
+                resolved.append(name)
+            constraint.references = resolved
+            if constraint.relation is not None:
+                kind, left, right = constraint.relation
+                constraint.relation = (
+                    kind,
+                    self.model.resolve(left),
+                    self.model.resolve(right),
+                )
+
+
+def _validate_group(group: UVLGroup) -> None:
+    if not group.members:
+        raise UVLParseError(
+            f"Empty '{group.group_type}' group under '{group.parent}'", group.line
+        )
+    if group.group_type == "alternative" and len(group.members) < 2:
+        raise UVLParseError(
+            f"Alternative group under '{group.parent}' requires >= 2 children",
+            group.line,
+        )
+
+
+def _expect_end(tokens: List[UVLToken], index: int) -> None:
+    if index < len(tokens):
+        token = tokens[index]
+        raise UVLParseError(f"Unexpected '{token.value}'", token.line, token.column)
+
+
+def _parse_cardinality(
+    tokens: List[UVLToken], index: int
+) -> tuple[int, Optional[int], int]:
+    """``[n]``, ``[n..m]`` o ``[n..*]`` desde ``tokens[index]`` (el ``[``)."""
+
+    def bound(i: int, allow_star: bool) -> Optional[int]:
+        if i >= len(tokens):
+            raise UVLParseError("Incomplete cardinality", tokens[-1].line)
+        token = tokens[i]
+        if token.kind == "number" and token.value.isdigit():
+            return int(token.value)
+        if allow_star and token.value == "*":
+            return None
+        raise UVLParseError(
+            f"Invalid cardinality bound '{token.value}'", token.line, token.column
+        )
+
+    low = bound(index + 1, allow_star=False)
+    i = index + 2
+    high: Optional[int] = low
+    if i < len(tokens) and tokens[i].value == "..":
+        high = bound(i + 1, allow_star=True)
+        i += 2
+    if i >= len(tokens) or tokens[i].value != "]":
+        raise UVLParseError("Expected ']' closing cardinality", tokens[index].line)
+    if high is not None and high < low:
+        raise UVLParseError(
+            f"Invalid cardinality [{low}..{high}]",
+            tokens[index].line,
+            tokens[index].column,
+        )
+    return low, high, i + 1
+
+
+def _parse_group_keyword(
+    tokens: List[UVLToken],
+) -> Optional[tuple[str, int, Optional[int]]]:
+    first = tokens[0]
+    if first.kind == "name" and first.value in GROUP_KEYWORDS and len(tokens) == 1:
+        if first.value == "alternative":
+            return "alternative", 1, 1
+        if first.value == "or":
+            return "or", 1, None
+        return first.value, 0, None
+    if first.kind == "op" and first.value == "[":
+        low, high, end = _parse_cardinality(tokens, 0)
+        _expect_end(tokens, end)
+        return "cardinality", low, high
+    return None
+
+
+def _parse_feature_declaration(tokens: List[UVLToken]) -> UVLFeature:
+    index = 0
+    feature_type = None
+    if (
+        tokens[0].kind == "name"
+        and tokens[0].value in FEATURE_TYPES
+        and len(tokens) > 1
+        and tokens[1].kind in ("name", "qname")
+    ):
+        feature_type = tokens[0].value
+        index = 1
+    name_token = tokens[index]
+    if name_token.kind not in ("name", "qname") or not name_token.text.strip():
+        raise UVLParseError(
+            f"Expected feature name, found '{name_token.value}'",
+            name_token.line,
+            name_token.column,
+        )
+    name = name_token.text
+    index += 1
+    if name_token.kind == "name":
+        # Compatibilidad: nombres con espacios sin comillas (``Mobile App``)
+        while (
+            index < len(tokens)
+            and tokens[index].kind == "name"
+            and tokens[index].value != "cardinality"
+        ):
+            name = f"{name} {tokens[index].value}"
+            index += 1
+    feature = UVLFeature(
+        name=name,
+        parent=None,
+        relation_type="optional",
+        line=name_token.line,
+        feature_type=feature_type,
+    )
+    if index < len(tokens) and tokens[index].value == "cardinality":
+        if index + 1 >= len(tokens) or tokens[index + 1].value != "[":
+            raise UVLParseError(
+                "Expected '[' after 'cardinality'",
+                tokens[index].line,
+                tokens[index].column,
+            )
+        low, high, index = _parse_cardinality(tokens, index + 1)
+        feature.cardinality = (low, high)
+    if index < len(tokens) and tokens[index].value == "{":
+        feature.attributes, index = _AttributeParser(tokens).parse_object(index)
+    _expect_end(tokens, index)
+    return feature
+
+
+class _AttributeParser:
+    """Atributos ``{clave valor, ...}`` con listas y objetos anidados."""
+
+    def __init__(self, tokens: List[UVLToken]):
+        self.tokens = tokens
+
+    def parse_object(self, index: int) -> tuple[Dict[str, Any], int]:
+        attributes: Dict[str, Any] = {}
+        index += 1  # '{'
+        while self.tokens[index].value != "}":
+            key_token = self.tokens[index]
+            if key_token.kind not in ("name", "qname"):
+                raise self._error(key_token, "Expected attribute name")
+            key = key_token.text
+            index += 1
+            if key in ("constraint", "constraints"):
+                attributes[key], index = self._raw_until_separator(index)
+            elif self.tokens[index].value in (",", "}"):
+                attributes[key] = True
+            else:
+                attributes[key], index = self.parse_value(index)
+            if self.tokens[index].value == ",":
+                index += 1
+            elif self.tokens[index].value != "}":
+                raise self._error(self.tokens[index], "Expected ',' or '}'")
+        return attributes, index + 1
+
+    def parse_value(self, index: int) -> tuple[Any, int]:
+        token = self.tokens[index]
+        if token.kind == "string":
+            return token.text, index + 1
+        if token.kind == "number":
+            return _number(token.value), index + 1
+        if token.value == "-" and self.tokens[index + 1].kind == "number":
+            return -_number(self.tokens[index + 1].value), index + 2
+        if token.kind == "name" and token.value in ("true", "false"):
+            return token.value == "true", index + 1
+        if token.value == "{":
+            return self.parse_object(index)
+        if token.value == "[":
+            values: List[Any] = []
+            index += 1
+            while self.tokens[index].value != "]":
+                value, index = self.parse_value(index)
+                values.append(value)
+                if self.tokens[index].value == ",":
+                    index += 1
+                elif self.tokens[index].value != "]":
+                    raise self._error(self.tokens[index], "Expected ',' or ']'")
+            return values, index + 1
+        raise self._error(token, f"Invalid attribute value '{token.value}'")
+
+    def _raw_until_separator(self, index: int) -> tuple[str, int]:
+        depth = 0
+        parts: List[str] = []
+        while True:
+            token = self.tokens[index]
+            if depth == 0 and token.value in (",", "}"):
+                return " ".join(parts), index
+            if token.value in _OPENING:
+                depth += 1
+            elif token.value in _CLOSING:
+                depth -= 1
+            parts.append(token.value)
+            index += 1
+
+    @staticmethod
+    def _error(token: UVLToken, reason: str) -> UVLParseError:
+        return UVLParseError(reason, token.line, token.column)
+
+
+def _number(value: str) -> Union[int, float]:
+    return float(value) if "." in value else int(value)
+
+
+# ========================================================================
+#                     --- Expresiones de constraints ---
+# ========================================================================
+
+
+class _ExpressionParser:
+    """
+    Descenso recursivo sobre los tokens de una constraint.
+
+    Valida la sintaxis y devuelve los tokens que referencian features (los
+    argumentos de funciones agregadas son atributos y no se cuentan).
+    """
+
+    _LEVELS = (
+        ("=>", "<=>"),
+        ("|",),
+        ("&",),
+        ("==", "!=", "<", ">", "<=", ">="),
+        ("+", "-"),
+        ("*", "/"),
+    )
+
+    def __init__(self, tokens: List[UVLToken]):
+        self.tokens = tokens
+        self.index = 0
+        self.references: List[UVLToken] = []
+        self.in_function = 0
+
+    def parse(self) -> List[UVLToken]:
+        self._binary(0)
+        if self.index < len(self.tokens):
+            token = self.tokens[self.index]
+            raise UVLParseError(
+                f"Unexpected '{token.value}' in constraint", token.line, token.column
+            )
+        return self.references
+
+    def _peek(self) -> Optional[UVLToken]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _binary(self, level: int) -> None:
+        if level == len(self._LEVELS):
+            self._unary()
+            return
+        self._binary(level + 1)
+        while (token := self._peek()) is not None and (
+            token.kind == "op" and token.value in self._LEVELS[level]
+        ):
+            self.index += 1
+            self._binary(level + 1)
+
+    def _unary(self) -> None:
+        token = self._peek()
+        if token is not None and token.kind == "op" and token.value in ("!", "-"):
+            self.index += 1
+            self._unary()
+            return
+        self._primary()
+
+    def _primary(self) -> None:
+        token = self._peek()
+        if token is None:
+            last = self.tokens[-1]
+            raise UVLParseError(
+                "Incomplete constraint expression",
+                last.line,
+                last.column + len(last.value),
+            )
+        self.index += 1
+        if token.kind == "op" and token.value == "(":
+            self._binary(0)
+            self._expect(")")
+            return
+        if token.kind in ("number", "string"):
+            return
+        if token.kind == "name" and token.value in ("true", "false"):
+            return
+        if token.kind in ("name", "qname"):
+            following = self._peek()
+            if (
+                token.kind == "name"
+                and following is not None
+                and following.value == "("
+            ):
+                self._call(token)
+                return
+            if not self.in_function:
+                self.references.append(token)
+            return
+        raise UVLParseError(
+            f"Unexpected '{token.value}' in constraint", token.line, token.column
+        )
+
+    def _call(self, name: UVLToken) -> None:
+        if name.value not in AGGREGATE_FUNCTIONS:
+            raise UVLParseError(
+                f"Unknown function '{name.value}'", name.line, name.column
+            )
+        self.index += 1  # '('
+        self.in_function += 1
+        self._binary(0)
+        while (token := self._peek()) is not None and token.value == ",":
+            self.index += 1
+            self._binary(0)
+        self.in_function -= 1
+        self._expect(")")
+
+    def _expect(self, value: str) -> None:
+        token = self._peek()
+        if token is None or token.value != value:
+            anchor = token or self.tokens[-1]
+            raise UVLParseError(f"Expected '{value}'", anchor.line, anchor.column)
+        self.index += 1
+
+
+def _simple_relation(tokens: List[UVLToken]) -> Optional[tuple[str, str, str]]:
+    """Detecta ``A => B``, ``!(A & B)`` y ``!A | !B`` (nombres sin resolver)."""
+    shape = [None if _is_reference(t) else t.value for t in tokens]
+    names = [t.text for t in tokens if _is_reference(t)]
+    if shape == [None, "=>", None]:
+        return "requires", names[0], names[1]
+    if shape in (
+        ["!", "(", None, "&", None, ")"],
+        ["!", None, "|", "!", None],
+    ):
+        return "excludes", names[0], names[1]
+    return None
+
+
+def _is_reference(token: UVLToken) -> bool:
+    return token.kind == "qname" or (
+        token.kind == "name" and token.value not in ("true", "false")
+    )
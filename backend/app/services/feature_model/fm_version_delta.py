@@ -0,0 +1,953 @@
+"""
+Almacenamiento delta de versiones (opcional, ``VERSION_DELTA_STORAGE``).
+
+Cada versión nueva duplicaba todas las filas de ``features``,
+``feature_groups``, ``feature_relations`` y ``constraints`` aunque solo
+cambiara una feature. En modo delta una versión guarda en
+``structure_delta`` solo las filas que cambian respecto a su versión base
+(``base_version_id``) y comparte el resto::
+
+    {"format": 1, "<tabla>": {"upsert": [fila, ...], "delete": [id, ...]}}
+
+Las filas van en JSON (ids como texto, enums por valor); las compartidas
+conservan el id de la versión que las escribió.
+
+- Lectura: ``resolve_version_rows`` recorre la cadena hasta la versión
+  completa más cercana, aplica los deltas y guarda el resultado en Redis.
+  ``materialize_version`` construye con esas filas los objetos ORM que usan
+  el árbol, la exportación y los análisis, sin añadirlos a la sesión.
+- Escritura: ``store_delta_version``; si la cadena llegaría a
+  ``VERSION_DELTA_MAX_CHAIN`` saltos, el llamador guarda la versión completa.
+- Compactación: ``compact_version`` convierte una versión delta en completa
+  (ids nuevos para las filas compartidas) y remapea los deltas de sus
+  descendientes. El mantenimiento compacta las cadenas de más de
+  ``VERSION_DELTA_COMPACT_CHAIN`` saltos; los cambios sobre filas
+  compartidas compactan antes las versiones delta (``ensure_not_shared``).
+
+Las versiones publicadas y archivadas guardan las mismas filas en su
+snapshot (``snapshot["structure"]``, ver ``compile_structure``): los
+análisis y las exportaciones las cargan desde esa fila sin ``selectinload``.
+Los cambios en sitio (activación, tags) la descartan con
+``discard_compiled_structure``.
+"""
+
+import enum
+import uuid
+from datetime import datetime
+from typing import Any, Collection, Dict, Iterable, List, Mapping, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import cache_service
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.enums import ModelStatus
+from app.exceptions import SharedVersionRowsException
+from app.models import (
+    Constraint,
+    Feature,
+    FeatureGroup,
+    FeatureModelVersion,
+    FeatureRelation,
+    FeatureTagLink,
+    Resource,
+    Tag,
+)
+
+log = get_logger(__name__)
+
+DELTA_FORMAT = 1
+
+# Tablas de la estructura de una versión, en orden de inserción
+STRUCTURE_TABLES: Dict[str, type] = {
+    "features": Feature,
+    "feature_groups": FeatureGroup,
+    "feature_relations": FeatureRelation,
+    "constraints": Constraint,
+}
+
+# Columnas que referencian filas de la estructura (tabla referenciada)
+REFERENCE_COLUMNS: Dict[str, Dict[str, str]] = {
+    "features": {"parent_id": "features", "group_id": "feature_groups"},
+    "feature_groups": {"parent_feature_id": "features"},
+    "feature_relations": {
+        "source_feature_id": "features",
+        "target_feature_id": "features",
+    },
+    "constraints": {},
+}
+
+# No cuentan al comparar una fila con la de la base
+NON_CONTENT_COLUMNS = frozenset(
+    {
+        "created_at",
+        "updated_at",
+        "deleted_at",
+        "created_by_id",
+        "updated_by_id",
+        "deleted_by_id",
+        "is_active",
+    }
+)
+
+# Ids de las tags de una feature (tabla ``feature_tags``)
+TAG_IDS = "tag_ids"
+
+# Versión del formato de ``snapshot["structure"]``
+COMPILED_STRUCTURE_FORMAT = 1
+
+# Estados en los que la estructura de una versión ya no cambia
+IMMUTABLE_STATUSES = frozenset({ModelStatus.PUBLISHED, ModelStatus.ARCHIVED})
+
+# Filas por sentencia al escribir una versión completa
+DELTA_WRITE_BATCH_SIZE = 1000
+
+# tabla -> id -> fila JSON
+VersionRows = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+def delta_storage_enabled() -> bool:
+    return settings.VERSION_DELTA_STORAGE
+
+
+def empty_rows() -> VersionRows:
+    return {table: {} for table in STRUCTURE_TABLES}
+
+
+# ── Conversión de filas ───────────────────────────────────────────────────────
+
+
+def json_row(values: Mapping[str, Any]) -> Dict[str, Any]:
+    """Fila en forma JSON (sin la versión propietaria)."""
+    return {
+        name: _json_value(value)
+        for name, value in values.items()
+        if name != "feature_model_version_id"
+    }
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def python_row(table: str, row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Valores de columna de una fila JSON (tipos de la tabla)."""
+    columns = STRUCTURE_TABLES[table].__table__.c
+    values: Dict[str, Any] = {}
+    for name, value in row.items():
+        if name == TAG_IDS or name not in columns:
+            continue
+        column_type = columns[name].type
+        if value is not None:
+            enum_class = getattr(column_type, "enum_class", None)
+            if isinstance(column_type, sa.Uuid):
+                value = uuid.UUID(value)
+            elif enum_class is not None:
+                value = enum_class(value)
+            elif name.endswith("_at"):
+                value = datetime.fromisoformat(value)
+        values[name] = value
+    return values
+
+
+def _column_values(table: str, row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Todas las columnas de la fila; las ausentes con su valor por defecto."""
+    stored = python_row(table, row)
+    return {
+        column.name: stored.get(column.name, _column_default(column))
+        for column in STRUCTURE_TABLES[table].__table__.c
+    }
+
+
+def _column_default(column: sa.Column) -> Any:
+    default = column.default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+def rows_from_import(rows: Any) -> VersionRows:
+    """
+    Filas de una importación UVL (``ImportRows``) como ``VersionRows``.
+
+    La pertenencia a grupos se incorpora a ``group_id`` de cada feature.
+    """
+    group_of = {str(m["id"]): str(m["group_id"]) for m in rows.group_members}
+    version_rows = empty_rows()
+    for table, table_rows in (
+        ("features", rows.features),
+        ("feature_groups", rows.groups),
+        ("feature_relations", rows.relations),
+        ("constraints", rows.constraints),
+    ):
+        for row in table_rows:
+            values = json_row(row)
+            if table == "features":
+                values["group_id"] = group_of.get(values["id"])
+            version_rows[table][values["id"]] = values
+    return version_rows
+
+
+# ── Deltas ────────────────────────────────────────────────────────────────────
+
+
+def encode_delta(parent: VersionRows, rows: VersionRows) -> Dict[str, Any]:
+    """
+    Delta que transforma ``parent`` en ``rows``.
+
+    Las filas de ``rows`` pueden ser parciales: en las que ya existen en
+    ``parent`` solo cuentan sus columnas de contenido, el resto (auditoría,
+    tags, recurso) se conserva de la base.
+    """
+    delta: Dict[str, Any] = {"format": DELTA_FORMAT}
+    for table in STRUCTURE_TABLES:
+        base_rows = parent.get(table, {})
+        new_rows = rows.get(table, {})
+        upsert = []
+        for row_id, row in new_rows.items():
+            current = base_rows.get(row_id)
+            if current is None:
+                upsert.append(row)
+                continue
+            merged = {
+                **current,
+                **{k: v for k, v in row.items() if k not in NON_CONTENT_COLUMNS},
+            }
+            if merged != current:
+                upsert.append(merged)
+        deleted = [row_id for row_id in base_rows if row_id not in new_rows]
+        if upsert or deleted:
+            delta[table] = {"upsert": upsert, "delete": deleted}
+    return delta
+
+
+def apply_delta(parent: VersionRows, delta: Mapping[str, Any]) -> VersionRows:
+    """
+    Filas de ``parent`` con ``delta`` aplicado.
+
+    Las tablas sin cambios se comparten con ``parent``: las filas resueltas
+    se tratan como inmutables.
+    """
+    rows: VersionRows = {}
+    for table in STRUCTURE_TABLES:
+        changes = delta.get(table)
+        if not changes:
+            rows[table] = parent.get(table, {})
+            continue
+        table_rows = dict(parent.get(table, {}))
+        for row_id in changes.get("delete", ()):
+            table_rows.pop(row_id, None)
+        for row in changes.get("upsert", ()):
+            table_rows[row["id"]] = row
+        rows[table] = table_rows
+    return rows
+
+
+def _remap_row(table: str, row: Dict[str, Any], id_map: Mapping[str, str]) -> Dict:
+    remapped = dict(row)
+    for name in ("id", *REFERENCE_COLUMNS[table]):
+        if remapped.get(name) is not None:
+            remapped[name] = id_map.get(remapped[name], remapped[name])
+    return remapped
+
+
+def remap_rows(rows: VersionRows, id_map: Mapping[str, str]) -> VersionRows:
+    """Filas con ids y referencias traducidas por ``id_map``."""
+    remapped = empty_rows()
+    for table, table_rows in rows.items():
+        for row in table_rows.values():
+            row = _remap_row(table, row, id_map)
+            remapped[table][row["id"]] = row
+    return remapped
+
+
+def remap_delta(delta: Mapping[str, Any], id_map: Mapping[str, str]) -> Dict:
+    """Delta con ids y referencias traducidas por ``id_map``."""
+    remapped: Dict[str, Any] = {"format": delta.get("format", DELTA_FORMAT)}
+    for table in STRUCTURE_TABLES:
+        changes = delta.get(table)
+        if not changes:
+            continue
+        remapped[table] = {
+            "upsert": [_remap_row(table, row, id_map) for row in changes["upsert"]],
+            "delete": [id_map.get(row_id, row_id) for row_id in changes["delete"]],
+        }
+    return remapped
+
+
+def delta_size(delta: Optional[Mapping[str, Any]]) -> int:
+    """Filas escritas o borradas por un delta."""
+    if not delta:
+        return 0
+    return sum(
+        len(changes["upsert"]) + len(changes["delete"])
+        for table, changes in delta.items()
+        if table in STRUCTURE_TABLES
+    )
+
+
+def versions_to_compact(
+    bases: Mapping[uuid.UUID, Optional[uuid.UUID]], max_chain: int
+) -> List[uuid.UUID]:
+    """
+    Versiones a compactar para que ninguna cadena supere ``max_chain`` saltos.
+
+    Args:
+        bases: Versión delta -> versión base (las ausentes son completas)
+
+    Returns:
+        Ids de ancestro a descendiente (el orden en que hay que compactar)
+    """
+    depths: Dict[uuid.UUID, int] = {}
+    order: Dict[uuid.UUID, int] = {}
+
+    def chain_of(version_id: uuid.UUID) -> List[uuid.UUID]:
+        chain = []
+        current: Optional[uuid.UUID] = version_id
+        while current in bases and current not in depths:
+            chain.append(current)
+            current = bases[current]
+        return chain
+
+    compact: List[uuid.UUID] = []
+    for version_id in bases:
+        for current in reversed(chain_of(version_id)):
+            base = bases[current]
+            depth = depths.get(base, 0) + 1
+            if depth > max_chain:
+                compact.append(current)
+                depth = 0
+            depths[current] = depth
+            order[current] = len(order)
+    return sorted(compact, key=order.__getitem__)
+
+
+# ── Lectura ───────────────────────────────────────────────────────────────────
+
+
+async def load_version_chain(
+    session: AsyncSession, version_id: uuid.UUID
+) -> List[uuid.UUID]:
+    """Ids de la versión y sus bases hasta la primera completa (incluida)."""
+    versions = FeatureModelVersion.__table__
+    chain = (
+        sa.select(
+            versions.c.id, versions.c.base_version_id, sa.literal(0).label("depth")
+        )
+        .where(versions.c.id == version_id)
+        .cte("version_chain", recursive=True)
+    )
+    parent = versions.alias("parent_version")
+    chain = chain.union_all(
+        sa.select(parent.c.id, parent.c.base_version_id, chain.c.depth + 1).join(
+            chain, parent.c.id == chain.c.base_version_id
+        )
+    )
+    result = await session.execute(sa.select(chain.c.id).order_by(chain.c.depth))
+    return [row[0] for row in result.all()]
+
+
+async def load_stored_rows(session: AsyncSession, version_id: uuid.UUID) -> VersionRows:
+    """Filas propias de una versión completa (sin hidratar objetos ORM)."""
+    rows = empty_rows()
+    for table, model in STRUCTURE_TABLES.items():
+        columns = model.__table__
+        result = await session.execute(
+            sa.select(columns).where(columns.c.feature_model_version_id == version_id)
+        )
+        for record in result.mappings():
+            row = json_row(record)
+            rows[table][row["id"]] = row
+
+    links = FeatureTagLink.__table__
+    features = Feature.__table__
+    result = await session.execute(
+        sa.select(links.c.feature_id, links.c.tag_id)
+        .join(features, features.c.id == links.c.feature_id)
+        .where(features.c.feature_model_version_id == version_id)
+    )
+    for feature_id, tag_id in result.all():
+        feature = rows["features"][str(feature_id)]
+        feature.setdefault(TAG_IDS, []).append(str(tag_id))
+    return rows
+
+
+async def resolve_version_rows(
+    session: AsyncSession, version_id: uuid.UUID
+) -> VersionRows:
+    """
+    Estructura de una versión (delta o completa) como ``VersionRows``.
+
+    Parte de la versión más cercana de la cadena con filas en caché (o de
+    la versión completa) y aplica los deltas hasta ``version_id``.
+    """
+    cached = await _get_cached_rows(version_id)
+    if cached is not None:
+        return cached
+
+    chain = await load_version_chain(session, version_id)
+    start = len(chain) - 1
+    rows: Optional[VersionRows] = None
+    for index in range(1, len(chain) - 1):
+        rows = await _get_cached_rows(chain[index])
+        if rows is not None:
+            start = index
+            break
+    if rows is None:
+        rows = await load_stored_rows(session, chain[start])
+
+    pending = chain[:start]
+    if pending:
+        versions = FeatureModelVersion.__table__
+        result = await session.execute(
+            sa.select(versions.c.id, versions.c.structure_delta).where(
+                versions.c.id.in_(pending)
+            )
+        )
+        deltas = dict(result.all())
+        for pending_id in reversed(pending):
+            rows = apply_delta(rows, deltas[pending_id] or {})
+
+    try:
+        await cache_service.set_version_rows(version_id, rows)
+    except Exception as exc:
+        log.warning(
+            "version_delta.cache_write_failed",
+            version_id=str(version_id),
+            error=str(exc),
+        )
+    return rows
+
+
+async def _get_cached_rows(version_id: uuid.UUID) -> Optional[VersionRows]:
+    try:
+        return await cache_service.get_version_rows(version_id)
+    except Exception as exc:
+        log.warning(
+            "version_delta.cache_read_failed",
+            version_id=str(version_id),
+            error=str(exc),
+        )
+        return None
+
+
+async def materialize_version(
+    session: AsyncSession,
+    version: FeatureModelVersion,
+    include_resources: bool = True,
+) -> None:
+    """Carga en ``version`` la estructura resuelta de una versión delta."""
+    rows = await resolve_version_rows(session, version.id)
+    await hydrate_version(session, version, rows, include_resources=include_resources)
+
+
+async def hydrate_version(
+    session: AsyncSession,
+    version: FeatureModelVersion,
+    rows: VersionRows,
+    include_resources: bool = True,
+) -> None:
+    """
+    Asigna a ``version`` la estructura de ``rows``.
+
+    Solo consulta la base de datos para las tags y los recursos que
+    referencian las features (ninguna consulta si no hay).
+    """
+    tag_ids = {
+        tag_id for row in rows["features"].values() for tag_id in row.get(TAG_IDS, ())
+    }
+    tags = await _load_by_id(session, Tag, tag_ids)
+    resources = {}
+    if include_resources:
+        resource_ids = {
+            row["resource_id"]
+            for row in rows["features"].values()
+            if row.get("resource_id")
+        }
+        resources = await _load_by_id(session, Resource, resource_ids)
+    build_structure(version, rows, tags=tags, resources=resources)
+
+
+async def _load_by_id(
+    session: AsyncSession, model: type, ids: Iterable[str]
+) -> Dict[str, Any]:
+    ids = [uuid.UUID(value) for value in ids]
+    if not ids:
+        return {}
+    result = await session.execute(select(model).where(model.id.in_(ids)))
+    return {str(obj.id): obj for obj in result.scalars().all()}
+
+
+def build_structure(
+    version: Any,
+    rows: VersionRows,
+    tags: Optional[Mapping[str, Any]] = None,
+    resources: Optional[Mapping[str, Any]] = None,
+) -> None:
+    """
+    Construye los objetos ORM de ``rows`` y los asigna a ``version``.
+
+    Los objetos quedan *detached* y las relaciones se fijan como valores ya
+    cargados (``set_committed_value``): no hay eventos ni cascadas, así que
+    nunca se insertan aunque la versión vuelva a añadirse a la sesión.
+    """
+    tags = tags or {}
+    resources = resources or {}
+
+    def instance(table: str, row: Mapping[str, Any]) -> Any:
+        # Todas las columnas: las que falten se cargarían de la sesión
+        obj = STRUCTURE_TABLES[table](
+            **{**_column_values(table, row), "feature_model_version_id": version.id}
+        )
+        make_transient_to_detached(obj)
+        set_committed_value(obj, "feature_model_version", version)
+        return obj
+
+    features = {
+        row_id: instance("features", row) for row_id, row in rows["features"].items()
+    }
+    groups = {
+        row_id: instance("feature_groups", row)
+        for row_id, row in rows["feature_groups"].items()
+    }
+    relations = [
+        instance("feature_relations", row) for row in rows["feature_relations"].values()
+    ]
+    constraints = [instance("constraints", row) for row in rows["constraints"].values()]
+
+    children: Dict[str, List[Any]] = {row_id: [] for row_id in features}
+    members: Dict[str, List[Any]] = {row_id: [] for row_id in groups}
+    child_groups: Dict[str, List[Any]] = {row_id: [] for row_id in features}
+    source_relations: Dict[str, List[Any]] = {row_id: [] for row_id in features}
+    target_relations: Dict[str, List[Any]] = {row_id: [] for row_id in features}
+
+    for row_id, feature in features.items():
+        row = rows["features"][row_id]
+        if row.get("parent_id") in children:
+            children[row["parent_id"]].append(feature)
+        if row.get("group_id") in members:
+            members[row["group_id"]].append(feature)
+    for row_id, group in groups.items():
+        parent_id = rows["feature_groups"][row_id]["parent_feature_id"]
+        set_committed_value(group, "parent_feature", features.get(parent_id))
+        set_committed_value(group, "member_features", members[row_id])
+        if parent_id in child_groups:
+            child_groups[parent_id].append(group)
+    for relation in relations:
+        source = features.get(str(relation.source_feature_id))
+        target = features.get(str(relation.target_feature_id))
+        set_committed_value(relation, "source_feature", source)
+        set_committed_value(relation, "target_feature", target)
+        if source is not None:
+            source_relations[str(source.id)].append(relation)
+        if target is not None:
+            target_relations[str(target.id)].append(relation)
+
+    for row_id, feature in features.items():
+        row = rows["features"][row_id]
+        set_committed_value(feature, "parent", features.get(row.get("parent_id")))
+        set_committed_value(feature, "children", children[row_id])
+        set_committed_value(feature, "group", groups.get(row.get("group_id")))
+        set_committed_value(feature, "child_groups", child_groups[row_id])
+        set_committed_value(feature, "source_relations", source_relations[row_id])
+        set_committed_value(feature, "target_relations", target_relations[row_id])
+        set_committed_value(feature, "configurations", [])
+        set_committed_value(
+            feature,
+            "tags",
+            [tags[tag_id] for tag_id in row.get(TAG_IDS, ()) if tag_id in tags],
+        )
+        set_committed_value(feature, "resource", resources.get(row.get("resource_id")))
+
+    set_committed_value(version, "features", list(features.values()))
+    set_committed_value(version, "feature_groups", list(groups.values()))
+    set_committed_value(version, "feature_relations", relations)
+    set_committed_value(version, "constraints", constraints)
+
+
+# ── Estructura compilada del snapshot ─────────────────────────────────────────
+
+
+def compile_structure(version: Any) -> Dict[str, Any]:
+    """
+    Estructura de una versión con sus colecciones cargadas, para el snapshot.
+
+    Mismas filas que ``resolve_version_rows``: ``hydrate_version`` la
+    reconstruye sin cargar la versión con ``selectinload``.
+    """
+    rows = empty_rows()
+    for table, attribute in (
+        ("features", "features"),
+        ("feature_groups", "feature_groups"),
+        ("feature_relations", "feature_relations"),
+        ("constraints", "constraints"),
+    ):
+        columns = STRUCTURE_TABLES[table].__table__.c
+        for obj in getattr(version, attribute):
+            row = json_row(
+                {column.name: getattr(obj, column.name) for column in columns}
+            )
+            if table == "features" and obj.tags:
+                row[TAG_IDS] = [str(tag.id) for tag in obj.tags]
+            rows[table][row["id"]] = row
+    return {"format": COMPILED_STRUCTURE_FORMAT, "rows": rows}
+
+
+def has_compiled_structure(snapshot: Optional[Mapping[str, Any]]) -> bool:
+    structure = (snapshot or {}).get("structure") or {}
+    return structure.get("format") == COMPILED_STRUCTURE_FORMAT
+
+
+def compiled_rows(version: FeatureModelVersion) -> Optional[VersionRows]:
+    """
+    Filas de la estructura compilada de una versión inmutable.
+
+    None si la versión puede cambiar (DRAFT) o su snapshot no tiene
+    estructura compilada (o es de un formato anterior).
+    """
+    if version.status not in IMMUTABLE_STATUSES:
+        return None
+    if not has_compiled_structure(version.snapshot):
+        return None
+    return version.snapshot["structure"]["rows"]
+
+
+# ── Escritura y compactación ──────────────────────────────────────────────────
+
+
+async def store_delta_version(
+    session: AsyncSession,
+    version: FeatureModelVersion,
+    base_version_id: uuid.UUID,
+    rows: VersionRows,
+) -> bool:
+    """
+    Guarda ``rows`` en ``version`` como delta sobre ``base_version_id``.
+
+    No confirma la transacción. Devuelve False (sin escribir nada) si la
+    cadena superaría ``VERSION_DELTA_MAX_CHAIN``: el llamador debe guardar
+    la versión completa.
+    """
+    chain = await load_version_chain(session, base_version_id)
+    if len(chain) > settings.VERSION_DELTA_MAX_CHAIN:
+        return False
+    parent = await resolve_version_rows(session, base_version_id)
+    version.base_version_id = base_version_id
+    version.structure_delta = encode_delta(parent, rows)
+    session.add(version)
+    log.info(
+        "version_delta.stored",
+        version_id=str(version.id),
+        base_version_id=str(base_version_id),
+        rows=delta_size(version.structure_delta),
+    )
+    return True
+
+
+async def write_full_rows(
+    session: AsyncSession,
+    version_id: uuid.UUID,
+    rows: VersionRows,
+    user_id: Optional[uuid.UUID] = None,
+    keep_ids: Collection[str] = frozenset(),
+) -> Dict[str, str]:
+    """
+    Escribe ``rows`` como filas propias de ``version_id`` con ids nuevos.
+
+    Las filas de ``keep_ids`` conservan su id: deben ser ids que no están
+    en las tablas.
+
+    Returns:
+        Id original -> id nuevo (texto, de todas las tablas)
+    """
+    id_map = {
+        row_id: row_id if row_id in keep_ids else str(uuid.uuid4())
+        for table_rows in rows.values()
+        for row_id in table_rows
+    }
+    remapped = remap_rows(rows, id_map)
+    now = datetime.utcnow()
+
+    def values(table: str, row: Mapping[str, Any]) -> Dict[str, Any]:
+        # Todas las filas de un lote llevan las mismas columnas
+        values = _column_values(table, row)
+        values["feature_model_version_id"] = version_id
+        values["created_at"] = values["created_at"] or now
+        values["created_by_id"] = values["created_by_id"] or user_id
+        return values
+
+    # Padres antes que hijos; la pertenencia a grupos tras insertar los grupos
+    features = remapped["features"]
+    ordered: List[Dict[str, Any]] = []
+    pending = [row for row in features.values() if row.get("parent_id") not in features]
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for row in features.values():
+        if row.get("parent_id") in features:
+            children.setdefault(row["parent_id"], []).append(row)
+    while pending:
+        row = pending.pop()
+        ordered.append(row)
+        pending.extend(children.get(row["id"], ()))
+
+    await _execute_batches(
+        session,
+        sa.insert(Feature),
+        [{**values("features", row), "group_id": None} for row in ordered],
+    )
+    for table in ("feature_groups", "feature_relations", "constraints"):
+        await _execute_batches(
+            session,
+            sa.insert(STRUCTURE_TABLES[table]),
+            [values(table, row) for row in remapped[table].values()],
+        )
+    await _execute_batches(
+        session,
+        sa.update(Feature),
+        [
+            {"id": uuid.UUID(row["id"]), "group_id": uuid.UUID(row["group_id"])}
+            for row in ordered
+            if row.get("group_id") in remapped["feature_groups"]
+        ],
+    )
+    await _execute_batches(
+        session,
+        sa.insert(FeatureTagLink),
+        [
+            {"feature_id": uuid.UUID(row["id"]), "tag_id": uuid.UUID(tag_id)}
+            for row in ordered
+            for tag_id in row.get(TAG_IDS, ())
+        ],
+    )
+    return id_map
+
+
+async def _execute_batches(
+    session: AsyncSession, statement: Any, rows: List[Dict[str, Any]]
+) -> None:
+    for start in range(0, len(rows), DELTA_WRITE_BATCH_SIZE):
+        await session.execute(statement, rows[start : start + DELTA_WRITE_BATCH_SIZE])
+
+
+async def compact_version(
+    session: AsyncSession,
+    version_id: uuid.UUID,
+    user_id: Optional[uuid.UUID] = None,
+) -> Dict[str, Any]:
+    """
+    Convierte una versión delta en completa y confirma la transacción.
+
+    Las filas que comparte con su base se escriben con ids nuevos, así que
+    los deltas de las versiones que derivan de ella se remapean a esos ids.
+    Las que solo existen en su delta conservan el suyo: es el que ya han
+    visto los clientes en el árbol de la versión.
+    """
+    rows = await resolve_version_rows(session, version_id)
+    unstored = await _unstored_ids(session, rows)
+
+    versions = FeatureModelVersion.__table__
+    descendants_cte = (
+        sa.select(versions.c.id)
+        .where(versions.c.base_version_id == version_id)
+        .cte("version_descendants", recursive=True)
+    )
+    child = versions.alias("child_version")
+    descendants_cte = descendants_cte.union_all(
+        sa.select(child.c.id).join(
+            descendants_cte, child.c.base_version_id == descendants_cte.c.id
+        )
+    )
+    result = await session.execute(
+        sa.select(versions.c.id, versions.c.structure_delta).where(
+            versions.c.id.in_(sa.select(descendants_cte.c.id))
+        )
+    )
+    descendants = result.all()
+
+    id_map = await write_full_rows(
+        session, version_id, rows, user_id=user_id, keep_ids=unstored
+    )
+    await session.execute(
+        sa.update(versions)
+        .where(versions.c.id == version_id)
+        .values(base_version_id=None, structure_delta=None)
+    )
+    for descendant_id, delta in descendants:
+        await session.execute(
+            sa.update(versions)
+            .where(versions.c.id == descendant_id)
+            .values(structure_delta=remap_delta(delta or {}, id_map))
+        )
+
+    affected = [version_id, *(descendant_id for descendant_id, _ in descendants)]
+    # La estructura compilada de sus snapshots lleva los ids anteriores: se
+    # descarta y ``ensure_snapshot`` la vuelve a generar
+    await session.execute(
+        sa.update(versions)
+        .where(
+            versions.c.id.in_(affected),
+            versions.c.snapshot.has_key("structure"),
+        )
+        .values(snapshot=versions.c.snapshot.op("-")(sa.literal("structure")))
+    )
+    await session.commit()
+
+    await cache_service.delete_version_rows(*affected)
+    for affected_id in affected:
+        # Los ids de las features cambian: las respuestas cacheadas no valen
+        await cache_service.invalidate_version_tag(affected_id)
+    log.info(
+        "version_delta.compacted",
+        version_id=str(version_id),
+        rows=len(id_map),
+        descendants=len(descendants),
+    )
+    return {
+        "version_id": str(version_id),
+        "rows": len(id_map),
+        "descendants": len(descendants),
+    }
+
+
+async def _unstored_ids(session: AsyncSession, rows: VersionRows) -> set:
+    """Ids de ``rows`` que no tiene ninguna fila de las tablas."""
+    unstored = set()
+    for table, table_rows in rows.items():
+        if not table_rows:
+            continue
+        model = STRUCTURE_TABLES[table]
+        result = await session.execute(
+            sa.select(model.id).where(
+                model.id.in_([uuid.UUID(row_id) for row_id in table_rows])
+            )
+        )
+        stored = {str(row_id) for row_id in result.scalars().all()}
+        unstored.update(row_id for row_id in table_rows if row_id not in stored)
+    return unstored
+
+
+async def ensure_full_version(session: AsyncSession, version_id: uuid.UUID) -> bool:
+    """
+    Compacta ``version_id`` si es una versión delta.
+
+    Las consultas SQL por versión (listados, subárbol, conteos) leen las
+    tablas de estructura, donde una versión delta no tiene filas propias.
+    La fila de la versión se bloquea para que dos lecturas concurrentes no
+    la compacten dos veces.
+
+    Returns:
+        True si se ha compactado ahora
+    """
+    versions = FeatureModelVersion.__table__
+    lookup = sa.select(versions.c.base_version_id).where(versions.c.id == version_id)
+    result = await session.execute(lookup)
+    if result.scalar_one_or_none() is None:
+        return False
+
+    result = await session.execute(lookup.with_for_update())
+    if result.scalar_one_or_none() is None:
+        # Otra petición la compactó mientras se esperaba el bloqueo
+        await session.commit()
+        return False
+    await compact_version(session, version_id)
+    return True
+
+
+async def ensure_not_shared(session: AsyncSession, version_id: uuid.UUID) -> None:
+    """
+    Impide modificar las filas de ``version_id`` si otras versiones delta
+    las comparten.
+
+    El árbol de una versión delta muestra los ids de esas filas, así que un
+    cambio sobre uno de ellos no indica a qué versión iba dirigido: en sitio
+    aparecería también en las versiones delta y con copy-on-write se
+    clonaría la base. Las versiones delta se compactan (filas e ids propios)
+    y el cambio se rechaza; tras recargar el árbol ya no hay ambigüedad.
+    """
+    versions = FeatureModelVersion.__table__
+    result = await session.execute(
+        sa.select(versions.c.id).where(versions.c.base_version_id == version_id)
+    )
+    sharing = result.scalars().all()
+    if not sharing:
+        return
+    for delta_version_id in sharing:
+        await ensure_full_version(session, delta_version_id)
+    raise SharedVersionRowsException(version_id=str(version_id))
+
+
+async def discard_compiled_structure(
+    session: AsyncSession, version_id: uuid.UUID
+) -> None:
+    """
+    Descarta las filas compiladas de ``version_id`` tras un cambio en sitio
+    ya confirmado (activación, tags).
+
+    Quita la estructura del snapshot (``get_compiled`` vuelve a leer las
+    tablas hasta que ``ensure_snapshot`` la recompila) y las filas resueltas
+    en caché, de las que parten los deltas de sus versiones derivadas.
+    """
+    versions = FeatureModelVersion.__table__
+    await session.execute(
+        sa.update(versions)
+        .where(versions.c.id == version_id, versions.c.snapshot.has_key("structure"))
+        .values(snapshot=versions.c.snapshot.op("-")(sa.literal("structure")))
+    )
+    await session.commit()
+    try:
+        await cache_service.delete_version_rows(version_id)
+    except Exception as exc:
+        log.warning(
+            "version_delta.rows_discard_failed",
+            version_id=str(version_id),
+            error=str(exc),
+        )
+
+
+async def compact_row_owner(
+    session: AsyncSession, table: str, row_id: uuid.UUID
+) -> bool:
+    """
+    Compacta la versión delta que añadió la fila ``row_id`` de ``table``.
+
+    Las filas que solo existen en un delta no están en las tablas, pero su
+    id aparece en el árbol de la versión. Al compactarla la fila se escribe
+    con ese mismo id. Si varias versiones de una cadena la incluyen se
+    compacta la más antigua, la que la añadió: las demás la comparten.
+
+    Returns:
+        True si se ha compactado una versión
+    """
+    versions = FeatureModelVersion.__table__
+    result = await session.execute(
+        sa.select(versions.c.id)
+        .where(
+            versions.c.structure_delta.contains(
+                {table: {"upsert": [{"id": str(row_id)}]}}
+            )
+        )
+        .order_by(versions.c.created_at)
+        .limit(1)
+    )
+    owner_id = result.scalar_one_or_none()
+    if owner_id is None:
+        return False
+    return await ensure_full_version(session, owner_id)
+
+
+async def load_delta_bases(session: AsyncSession) -> Dict[uuid.UUID, uuid.UUID]:
+    """Versión delta -> versión base, de todas las versiones delta."""
+    versions = FeatureModelVersion.__table__
+    result = await session.execute(
+        sa.select(versions.c.id, versions.c.base_version_id).where(
+            versions.c.base_version_id.is_not(None)
+        )
+    )
+    return dict(result.all())
@@ -11,7 +11,6 @@ Este componente es responsable de:
 - Preservación de relaciones UUID↔Integer para exportación
 """
 
-import uuid
 from datetime import datetime
 from typing import Optional, Any
 
@@ -23,10 +22,21 @@ from app.models import (
     Feature,
     User,
 )
-from app.enums import ModelStatus, FeatureType, FeatureGroupType, FeatureRelationType
+from app.core.cache import cache_service
+from app.core.logging import get_logger
+from app.enums import ModelStatus
 from app.repositories.feature_model_version import (
     FeatureModelVersionRepository,
 )
+from app.services.feature_model.fm_statistics import get_version_statistics
+from app.services.feature_model.fm_tree_index import (
+    FeatureTreeIndex,
+    get_tree_index,
+)
+from app.services.feature_model.fm_version_delta import (
+    compile_structure,
+    has_compiled_structure,
+)
 from app.exceptions import (
     FeatureModelVersionNotFoundException,
     InvalidVersionStateException,
@@ -36,6 +46,8 @@ from app.exceptions import (
     InvalidRelationException,
 )
 
+log = get_logger(__name__)
+
 
 class FeatureModelVersionManager:
     """
@@ -209,9 +221,14 @@ class FeatureModelVersionManager:
                 operation="publish version",
             )
 
-        # Validar la versión si se solicita
+        # Validar la versión si se solicita (con la estructura cargada desde el
+        # repositorio: las versiones delta no tienen filas propias)
         if validate:
-            await self._validate_version(version)
+            await self._validate_version(
+                await self.repository.get_complete_with_relations(
+                    version.id, include_resources=False
+                )
+            )
 
         # Generar snapshot inmutable
         snapshot = await self._build_snapshot(version)
@@ -222,9 +239,28 @@ class FeatureModelVersionManager:
 
         await self.session.commit()
         await self.session.refresh(version)
+        await self._invalidate_version_tag(version)
 
         return version
 
+    async def ensure_snapshot(self, version: FeatureModelVersion) -> bool:
+        """
+        Generar el snapshot de una versión si aún no lo tiene.
+
+        Las versiones publicadas antes de que la publicación generase el
+        snapshot (o importadas ya publicadas) lo obtienen aquí, igual que
+        las que tienen un snapshot sin estructura compilada.
+
+        Returns:
+            True si se generó ahora, False si ya existía
+        """
+        if version.snapshot and has_compiled_structure(version.snapshot):
+            return False
+
+        version.snapshot = await self._build_snapshot(version)
+        await self.session.commit()
+        return True
+
     async def archive_version(
         self, version: FeatureModelVersion
     ) -> FeatureModelVersion:
@@ -252,6 +288,7 @@ class FeatureModelVersionManager:
 
         await self.session.commit()
         await self.session.refresh(version)
+        await self._invalidate_version_tag(version)
 
         return version
 
@@ -281,9 +318,21 @@ class FeatureModelVersionManager:
 
         await self.session.commit()
         await self.session.refresh(version)
+        await self._invalidate_version_tag(version)
 
         return version
 
+    async def _invalidate_version_tag(self, version: FeatureModelVersion) -> None:
+        """Renueva los ETag de la versión tras un cambio de estado in situ."""
+        try:
+            await cache_service.invalidate_version_tag(version.id)
+        except Exception as exc:
+            log.warning(
+                "version_tag.invalidate_failed",
+                version_id=str(version.id),
+                error=str(exc),
+            )
+
     # ========================================================================
     # SNAPSHOT Y REPRODUCIBILIDAD
     # ========================================================================
@@ -298,6 +347,7 @@ class FeatureModelVersionManager:
         - Todas las relaciones y constraints
         - Estadísticas precalculadas
         - Metadatos de caché
+        - Estructura compilada (filas de la versión) para cargarla sin ORM
 
         Args:
             version: Versión de la cual construir el snapshot
@@ -341,6 +391,7 @@ class FeatureModelVersionManager:
                 "int_to_uuid": int_to_uuid,
             },
             "tree": tree,
+            "structure": compile_structure(version_complete),
             "statistics": statistics,
             "metadata": {
                 "total_features": len(version_complete.features),
@@ -363,23 +414,18 @@ class FeatureModelVersionManager:
         Returns:
             Diccionario con estructura del árbol
         """
-        # Encontrar raíz
-        root_feature = None
-        for feature in version.features:
-            if feature.parent_id is None:
-                root_feature = feature
-                break
-
+        index = get_tree_index(version)
+        root_feature = index.root
         if not root_feature:
             return {}
 
-        # Construir árbol recursivamente
-        return self._build_tree_node(root_feature, version.features)
+        # Índice padre→hijos compartido y construcción iterativa
+        return index.build(root_feature, self._build_tree_node)
 
     def _build_tree_node(
-        self, feature: Feature, all_features: list[Feature]
+        self, feature: Feature, depth: int, children: list[dict[str, Any]]
     ) -> dict[str, Any]:
-        """Construir nodo del árbol recursivamente."""
+        """Construir nodo del árbol a partir de sus hijos ya construidos."""
         node = {
             "id": str(feature.id),
             "name": feature.name,
@@ -395,13 +441,8 @@ class FeatureModelVersionManager:
                 "max_cardinality": feature.group.max_cardinality,
             }
 
-        # Construir hijos
-        children = [f for f in all_features if f.parent_id == feature.id]
         if children:
-            node["children"] = [
-                self._build_tree_node(child, all_features)
-                for child in sorted(children, key=lambda x: x.name)
-            ]
+            node["children"] = children
 
         return node
 
@@ -415,109 +456,24 @@ class FeatureModelVersionManager:
         Returns:
             Diccionario con estadísticas calculadas
         """
-        total_features = len(version.features)
-        mandatory_features = sum(
-            1 for f in version.features if f.type == FeatureType.MANDATORY
-        )
-        optional_features = total_features - mandatory_features
-
-        # Calcular profundidad máxima del árbol
-        max_depth = self._calculate_max_depth(version.features)
-
-        # Contar tipos de grupos
-        alternative_groups = sum(
-            1
-            for g in version.feature_groups
-            if g.group_type == FeatureGroupType.ALTERNATIVE
-        )
-        or_groups = sum(
-            1 for g in version.feature_groups if g.group_type == FeatureGroupType.OR
-        )
-
-        # Contar tipos de relaciones
-        requires_relations = sum(
-            1
-            for r in version.feature_relations
-            if r.type == FeatureRelationType.REQUIRED
-        )
-        excludes_relations = sum(
-            1
-            for r in version.feature_relations
-            if r.type == FeatureRelationType.EXCLUDES
-        )
+        stats = get_version_statistics(version)
 
         return {
-            "total_features": total_features,
-            "mandatory_features": mandatory_features,
-            "optional_features": optional_features,
-            "max_depth": max_depth,
-            "total_groups": len(version.feature_groups),
-            "alternative_groups": alternative_groups,
-            "or_groups": or_groups,
-            "total_relations": len(version.feature_relations),
-            "requires_relations": requires_relations,
-            "excludes_relations": excludes_relations,
-            "total_constraints": len(version.constraints),
-            "complexity_score": self._calculate_complexity_score(version),
+            "total_features": stats.total_features,
+            "mandatory_features": stats.mandatory_features,
+            "optional_features": stats.optional_features,
+            # En el snapshot la raíz cuenta como nivel 1
+            "max_depth": stats.tree_levels,
+            "total_groups": stats.total_groups,
+            "alternative_groups": stats.xor_groups,
+            "or_groups": stats.or_groups,
+            "total_relations": stats.total_relations,
+            "requires_relations": stats.requires_relations,
+            "excludes_relations": stats.excludes_relations,
+            "total_constraints": stats.total_constraints,
+            "complexity_score": stats.complexity_score,
         }
 
-    def _calculate_max_depth(self, features: list[Feature]) -> int:
-        """Calcular profundidad máxima del árbol."""
-        # Encontrar raíz
-        root = None
-        for feature in features:
-            if feature.parent_id is None:
-                root = feature
-                break
-
-        if not root:
-            return 0
-
-        # Calcular profundidad recursivamente
-        return self._calculate_depth_recursive(root, features)
-
-    def _calculate_depth_recursive(
-        self, feature: Feature, all_features: list[Feature], current_depth: int = 1
-    ) -> int:
-        """Calcular profundidad de forma recursiva."""
-        children = [f for f in all_features if f.parent_id == feature.id]
-
-        if not children:
-            return current_depth
-
-        max_child_depth = max(
-            self._calculate_depth_recursive(child, all_features, current_depth + 1)
-            for child in children
-        )
-
-        return max_child_depth
-
-    def _calculate_complexity_score(self, version: FeatureModelVersion) -> float:
-        """
-        Calcular puntuación de complejidad del modelo.
-
-        La complejidad se basa en:
-        - Número de features
-        - Profundidad del árbol
-        - Número de relaciones cross-tree
-        - Número de constraints
-        - Número de grupos
-        """
-        features_weight = len(version.features) * 0.5
-        relations_weight = len(version.feature_relations) * 2.0
-        constraints_weight = len(version.constraints) * 3.0
-        groups_weight = len(version.feature_groups) * 1.5
-        depth_weight = self._calculate_max_depth(version.features) * 1.0
-
-        return round(
-            features_weight
-            + relations_weight
-            + constraints_weight
-            + groups_weight
-            + depth_weight,
-            2,
-        )
-
     # ========================================================================
     # VALIDACIÓN
     # ========================================================================
@@ -563,29 +519,4 @@ class FeatureModelVersionManager:
 
     def _has_cycles(self, features: list[Feature]) -> bool:
         """Detectar ciclos en el árbol de features."""
-        visited = set()
-        rec_stack = set()
-
-        def has_cycle_util(feature_id: uuid.UUID) -> bool:
-            visited.add(feature_id)
-            rec_stack.add(feature_id)
-
-            # Encontrar hijos
-            children = [f for f in features if f.parent_id == feature_id]
-
-            for child in children:
-                if child.id not in visited:
-                    if has_cycle_util(child.id):
-                        return True
-                elif child.id in rec_stack:
-                    return True
-
-            rec_stack.remove(feature_id)
-            return False
-
-        # Buscar raíz y comenzar desde ahí
-        for feature in features:
-            if feature.parent_id is None:
-                return has_cycle_util(feature.id)
-
-        return False
+        return FeatureTreeIndex(features).has_cycle()
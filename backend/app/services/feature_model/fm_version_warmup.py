@@ -0,0 +1,274 @@
+"""
+Precálculo de artefactos al publicar una versión.
+
+Al publicar, el primer usuario que pedía el árbol, una exportación o el
+análisis de la versión pagaba el coste en frío. El pipeline de publicación
+(``app.tasks.version_warmup``) ejecuta en paralelo un paso por artefacto y,
+al terminar, marca la versión como ``warm``:
+
+- ``snapshot``: snapshot inmutable con la estructura compilada (si la versión
+  aún no lo tiene); los demás pasos cargan la versión desde él
+- ``cnf``: CNF compilada, direccionada por la huella del modelo; los
+  análisis de la versión (``get_cached_cnf``) resuelven con ella sin volver a
+  codificar el modelo
+- ``analysis``: resumen de análisis (conteos, commonality, core/dead) con los
+  parámetros por defecto del endpoint de resumen
+- ``tree``: respuesta completa por defecto en la caché del árbol
+- ``export:<formato>``: exportaciones estándar como artefactos en MinIO
+
+Cada paso es idempotente: si el artefacto ya existe no se recalcula.
+"""
+
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from app.core.cache import cache_service
+from app.core.logging import get_logger
+from app.enums import AnalysisType, ExportFormat
+from app.repositories import FeatureModelVersionRepository
+from app.services.feature_model.fm_analysis_facade import (
+    analyze_version,
+    compile_cnf,
+    version_model_hash,
+)
+from app.services.feature_model.fm_export import FeatureModelExportService
+from app.services.feature_model.fm_export_artifacts import (
+    build_export_key,
+    store_export,
+)
+from app.services.feature_model.fm_logical_validator import PYSAT_AVAILABLE
+from app.services.feature_model.fm_tree_builder import FeatureModelTreeBuilder
+from app.services.feature_model.fm_version_manager import FeatureModelVersionManager
+
+log = get_logger(__name__)
+
+# Formatos que se exportan al publicar (los más pedidos; SPLOT y TVL son stubs)
+WARMUP_EXPORT_FORMATS = (
+    ExportFormat.UVL,
+    ExportFormat.JSON,
+    ExportFormat.XML,
+    ExportFormat.DIMACS,
+)
+
+# Parámetros por defecto de ``POST .../analysis/summary``
+DEFAULT_ANALYSIS_PARAMS = {
+    "analysis_types": None,
+    "max_solutions": 100,
+    "include_uvl_validation": True,
+}
+
+# Pasos que necesitan la versión cargada con el ORM (el snapshot se construye
+# desde ella; el árbol incluye las configuraciones)
+ORM_WARMUP_STEPS = frozenset({"snapshot", "tree"})
+
+WARMUP_STATUS_WARMING = "warming"
+WARMUP_STATUS_WARM = "warm"
+WARMUP_STATUS_PARTIAL = "partial"
+
+
+def warmup_steps() -> list[str]:
+    """Pasos del pipeline (uno por tarea del chord)."""
+    return ["snapshot", "cnf", "analysis", "tree"] + [
+        f"export:{fmt.value}" for fmt in WARMUP_EXPORT_FORMATS
+    ]
+
+
+def analysis_params(
+    analysis_types: Optional[Iterable[AnalysisType]],
+    max_solutions: int,
+    include_uvl_validation: bool,
+) -> dict[str, Any]:
+    """Parámetros de un resumen de análisis en forma comparable."""
+    return {
+        "analysis_types": (
+            None
+            if analysis_types is None
+            else sorted(AnalysisType(t).value for t in analysis_types)
+        ),
+        "max_solutions": max_solutions,
+        "include_uvl_validation": include_uvl_validation,
+    }
+
+
+async def get_precached_analysis(
+    version_id: Any, params: dict[str, Any]
+) -> Optional[dict[str, Any]]:
+    """Resumen precalculado si se calculó con ``params``; None si no."""
+    try:
+        entry = await cache_service.get_analysis_precache(version_id)
+    except Exception as exc:
+        log.warning(
+            "warmup.analysis.read_failed", version_id=str(version_id), error=str(exc)
+        )
+        return None
+    if not entry or entry.get("params") != params:
+        return None
+    return entry.get("summary")
+
+
+async def get_cached_cnf(version: Any) -> Optional[dict[str, Any]]:
+    """
+    CNF compilada de la versión (paso ``cnf``) para ``analyze_version``.
+
+    None si no está cacheada, si PySAT no está disponible o si la entrada es
+    anterior al registro de errores de codificación (no se puede reutilizar
+    sin perderlos).
+    """
+    if not PYSAT_AVAILABLE:
+        return None
+    try:
+        cnf = await cache_service.get_compiled_cnf(version_model_hash(version))
+    except Exception as exc:
+        log.warning(
+            "warmup.cnf.read_failed", version_id=str(version.id), error=str(exc)
+        )
+        return None
+    if not cnf or "errors" not in cnf:
+        return None
+    return cnf
+
+
+async def track_version_access(version_id: Any) -> None:
+    """Cuenta una lectura (exportación o análisis) de la versión para su popularidad."""
+    try:
+        await cache_service.record_version_access(version_id)
+    except Exception as exc:
+        log.warning(
+            "warmup.access.record_failed", version_id=str(version_id), error=str(exc)
+        )
+
+
+async def is_version_warm(version_id: Any) -> bool:
+    try:
+        record = await cache_service.get_version_warmup(version_id)
+    except Exception:
+        return False
+    return bool(record) and record.get("status") == WARMUP_STATUS_WARM
+
+
+async def mark_version_warming(version_id: Any) -> None:
+    await cache_service.set_version_warmup(
+        version_id,
+        {"status": WARMUP_STATUS_WARMING, "started_at": _now()},
+    )
+
+
+async def mark_version_warm(version_id: Any, results: list[dict[str, Any]]) -> str:
+    """
+    Marca la versión con el resultado del pipeline.
+
+    ``warm`` si ningún paso falló (los omitidos, p. ej. CNF sin PySAT, no
+    cuentan como fallo); ``partial`` en otro caso.
+    """
+    failed = [r["step"] for r in results if r.get("status") == "error"]
+    status = WARMUP_STATUS_PARTIAL if failed else WARMUP_STATUS_WARM
+    await cache_service.set_version_warmup(
+        version_id,
+        {
+            "status": status,
+            "warmed_at": _now(),
+            "steps": {r["step"]: r.get("status") for r in results},
+            "failed": failed,
+        },
+    )
+    return status
+
+
+async def run_warmup_step(session: Any, version_id: Any, step: str) -> dict[str, Any]:
+    """
+    Ejecuta un paso del pipeline (nunca lanza: el chord necesita todos los
+    resultados).
+
+    Returns:
+        ``{"step", "status": "ok" | "cached" | "skipped" | "error", ...}``
+    """
+    try:
+        repo = FeatureModelVersionRepository(session)
+        if step in ORM_WARMUP_STEPS:
+            version = await repo.get_complete_with_relations(
+                version_id=version_id, include_resources=step == "tree"
+            )
+        else:
+            # El resto de pasos parte de la estructura compilada del snapshot
+            version = await repo.get_compiled(version_id)
+        if version is None:
+            return {"step": step, "status": "error", "error": "version not found"}
+
+        if step == "snapshot":
+            manager = FeatureModelVersionManager(session, version.feature_model)
+            built = await manager.ensure_snapshot(version)
+            return {"step": step, "status": "ok" if built else "cached"}
+        if step == "cnf":
+            return {"step": step, **await _warm_cnf(version)}
+        if step == "analysis":
+            return {"step": step, **await _warm_analysis(version)}
+        if step == "tree":
+            builder = FeatureModelTreeBuilder(version, include_resources=True)
+            await builder.get_complete_response_json_with_cache()
+            return {"step": step, "status": "ok"}
+        if step.startswith("export:"):
+            fmt = ExportFormat(step.split(":", 1)[1])
+            return {"step": step, **await _warm_export(version, fmt)}
+        return {"step": step, "status": "error", "error": "unknown step"}
+    except Exception as exc:
+        log.warning(
+            "warmup.step_failed", version_id=str(version_id), step=step, error=str(exc)
+        )
+        return {"step": step, "status": "error", "error": str(exc)}
+
+
+async def _ensure_cnf(version: Any) -> tuple[dict[str, Any], bool]:
+    """CNF de la versión desde la caché o compilada y guardada; (cnf, compilada)."""
+    cnf = await get_cached_cnf(version)
+    if cnf is not None:
+        return cnf, False
+    cnf = compile_cnf(version)
+    await cache_service.set_compiled_cnf(version_model_hash(version), cnf)
+    return cnf, True
+
+
+async def _warm_cnf(version: Any) -> dict[str, Any]:
+    if not PYSAT_AVAILABLE:
+        return {"status": "skipped", "reason": "pysat not available"}
+    cnf, built = await _ensure_cnf(version)
+    return {
+        "status": "ok" if built else "cached",
+        "model_hash": version_model_hash(version),
+        "clauses": len(cnf["clauses"]),
+    }
+
+
+async def _warm_analysis(version: Any) -> dict[str, Any]:
+    params = analysis_params(**DEFAULT_ANALYSIS_PARAMS)
+    if await get_precached_analysis(version.id, params) is not None:
+        return {"status": "cached"}
+    # El paso ``cnf`` corre en paralelo: el primero que llegue la compila
+    cnf = (await _ensure_cnf(version))[0] if PYSAT_AVAILABLE else None
+    summary = analyze_version(
+        version=version, compiled_cnf=cnf, **DEFAULT_ANALYSIS_PARAMS
+    )
+    await cache_service.set_analysis_precache(
+        version.id, {"params": params, "summary": asdict(summary)}
+    )
+    return {
+        "status": "ok",
+        "estimated_configurations": summary.estimated_configurations,
+    }
+
+
+async def _warm_export(version: Any, fmt: ExportFormat) -> dict[str, Any]:
+    generation = await cache_service.get_version_tag_generation(version.id)
+    artifact_key = build_export_key(version, version.feature_model, generation, fmt)
+
+    async def produce():
+        return FeatureModelExportService(version).iter_export_bytes(fmt)
+
+    artifact = await store_export(artifact_key, fmt, produce)
+    if artifact.object_name is None:
+        return {"status": "error", "error": "export upload failed"}
+    return {"status": "ok", "artifact_key": artifact_key}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
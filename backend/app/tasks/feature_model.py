@@ -0,0 +1,116 @@
+"""Importación asíncrona de Feature Models desde UVL (cola ``import``)."""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import uuid
+from typing import Any
+
+from app.api.deps import SessionLocal
+from app.core.cache import cache_service
+from app.core.celery import celery_app
+from app.core.logging import get_logger
+from app.core.s3 import minio_client
+from app.models import FeatureModel, User
+from app.services.feature_model.fm_uvl_import_job import run_uvl_import
+from app.services.feature_model.fm_uvl_importer import (
+    FeatureModelUVLImporter,
+    UVLImportCancelled,
+)
+from app.services.feature_model.fm_uvl_parser import UVLParseError
+
+log = get_logger(__name__)
+
+# El UVL descargado se mantiene en memoria hasta este tamaño; después, a disco
+UVL_IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+@celery_app.task(name="app.tasks.feature_model.import_feature_model", bind=True)
+def import_feature_model(
+    self,
+    *,
+    model_id: str,
+    object_name: str,
+    user_id: str,
+) -> dict[str, Any]:
+    """
+    Importa un UVL subido a MinIO como nueva versión del modelo.
+
+    El id de la tarea es el id del job: el progreso (``parse``, ``validate``,
+    ``insert``) se publica en los metadatos de Celery y en
+    ``task_progress:<id>``, y ``POST /tasks/<id>/cancel`` la detiene en el
+    siguiente punto de control.
+    """
+    job_id = self.request.id
+
+    async def _report(meta: dict[str, Any]) -> None:
+        self.update_state(state="PROGRESS", meta=meta)
+        await cache_service.set_task_progress(job_id, meta)
+        await cache_service.extend_import_lock(model_id)
+
+    async def _is_cancelled() -> bool:
+        return await cache_service.is_task_cancel_requested(job_id)
+
+    async def _finish(status: str, **payload: Any) -> dict[str, Any]:
+        await cache_service.set_import_status(
+            job_id, status, error=payload.get("error")
+        )
+        await cache_service.set_task_status(job_id, status=status, payload=payload)
+        return {"status": status, **payload}
+
+    async def _run() -> dict[str, Any]:
+        if not await cache_service.acquire_import_lock(model_id):
+            await minio_client.delete_uvl_import(object_name)
+            return await _finish(
+                "error", error="Another import is running for this model"
+            )
+
+        await cache_service.set_import_status(job_id, "running")
+        await cache_service.set_task_status(job_id, status="running")
+        try:
+            async with SessionLocal() as session:
+                feature_model = await session.get(FeatureModel, uuid.UUID(model_id))
+                user = await session.get(User, uuid.UUID(user_id))
+                if feature_model is None or user is None:
+                    return await _finish("error", error="Feature model not found")
+
+                importer = FeatureModelUVLImporter(
+                    session=session, feature_model=feature_model, user=user
+                )
+                with tempfile.SpooledTemporaryFile(
+                    max_size=UVL_IMPORT_SPOOL_SIZE
+                ) as raw:
+                    await minio_client.download_uvl_import(object_name, raw)
+                    version = await run_uvl_import(
+                        importer, raw, report=_report, is_cancelled=_is_cancelled
+                    )
+                version_id = str(version.id)
+        except UVLImportCancelled:
+            log.info("uvl_import.cancelled", job_id=job_id, model_id=model_id)
+            return await _finish("cancelled")
+        except UVLParseError as exc:
+            return await _finish("error", error=exc.detail)
+        except Exception as exc:
+            log.error("uvl_import.failed", job_id=job_id, error=str(exc))
+            await _finish("error", error=str(exc))
+            raise
+        finally:
+            await cache_service.release_import_lock(model_id)
+            await minio_client.delete_uvl_import(object_name)
+
+        await _report({"step": "done", "percent": 100, "eta_seconds_estimate": 0})
+        # Igual que al aplicar UVL de forma síncrona: análisis en background
+        from app.tasks.feature_model_analysis import run_feature_model_analysis
+
+        analysis = run_feature_model_analysis.delay(
+            model_id=model_id,
+            version_id=version_id,
+            analysis_types=None,
+            max_solutions=100,
+        )
+        return await _finish(
+            "done", version_id=version_id, analysis_task_id=str(analysis.id)
+        )
+
+    return asyncio.run(_run())
@@ -5,15 +5,18 @@ from __future__ import annotations
 import asyncio
 import io
 import json
+import tempfile
 import zipfile
 from typing import Any, Optional
 
+from celery import chord
+
 from app.core.celery import celery_app
 from app.api.deps import SessionLocal
 from app.repositories import FeatureModelVersionRepository
 from app.enums import AnalysisType, ExportFormat, GenerationStrategy
 from app.core.s3 import minio_client
-from app.core.cache import cache_service
+from app.core.cache import CacheKeys, cache_service
 from app.services.feature_model import FeatureModelConfigurationGenerator
 from app.services.feature_model.fm_analysis_facade import (
     analyze_version,
@@ -21,6 +24,44 @@ from app.services.feature_model.fm_analysis_facade import (
 )
 from app.services.feature_model.fm_logical_validator import FeatureModelLogicalValidator
 from app.services.feature_model.fm_export import FeatureModelExportService
+from app.services.feature_model.fm_bulk_export import (
+    BULK_EXPORT_FORMAT,
+    BULK_SPOOL_MAX_MEMORY,
+    NDJSONGzipWriter,
+    iter_ndjson_gzip,
+)
+from app.services.feature_model.fm_configuration_generator import (
+    PARALLEL_ENUMERATION_MIN_SOLUTIONS,
+    GenerationResult,
+)
+from app.services.feature_model.fm_configuration_metrics import (
+    NUMPY_AVAILABLE,
+    ConfigurationSetMetrics,
+)
+from app.services.feature_model.fm_model_hash import (
+    canonicalize_model_payload,
+    compute_model_hash,
+)
+from app.services.feature_model.fm_parallel_enumeration import (
+    build_enumeration_cubes,
+    iter_cube_chunks,
+)
+from app.services.feature_model.fm_sample_cache import (
+    build_sample_key,
+    get_cached_sample,
+    is_sample_cacheable,
+    store_sample,
+)
+from app.services.feature_model.fm_version_warmup import get_cached_cnf
+
+# Cada cuántas configuraciones se publica la cobertura parcial en bulk
+BULK_METRICS_REPORT_EVERY = 25
+
+# Cubos máximos en que se reparte una enumeración SAT_ENUM masiva
+BULK_ENUMERATION_MAX_CUBES = 32
+
+# La diversidad (O(m²)) de una generación masiva se estima sobre esta muestra
+BULK_DIVERSITY_SAMPLE_SIZE = 5000
 
 
 def _build_payload(
@@ -146,7 +187,7 @@ def run_feature_model_analysis(
         await _set_progress({"step": "load_version", "percent": 10})
         async with SessionLocal() as session:
             repo = FeatureModelVersionRepository(session)
-            version = await repo.get_complete_with_relations(
+            version = await repo.get_compiled(
                 version_id=version_id,
                 include_resources=False,
             )
@@ -194,6 +235,7 @@ def run_feature_model_analysis(
                     analysis_types=parsed_types,
                     max_solutions=max_solutions,
                     include_uvl_validation=True,
+                    compiled_cnf=await get_cached_cnf(version),
                 )
                 self.update_state(
                     state="PROGRESS",
@@ -212,6 +254,36 @@ def run_feature_model_analysis(
     return asyncio.run(_run())
 
 
+def _new_bulk_metrics(
+    feature_ids: list[str], count: int
+) -> Optional[ConfigurationSetMetrics]:
+    """Métricas incrementales; la diversidad se estima sobre una muestra acotada."""
+    if not NUMPY_AVAILABLE:
+        return None
+    return ConfigurationSetMetrics(
+        feature_ids,
+        min(count, BULK_DIVERSITY_SAMPLE_SIZE),
+        diversity_sample_size=BULK_DIVERSITY_SAMPLE_SIZE,
+    )
+
+
+async def _upload_bulk_file(
+    writer: NDJSONGzipWriter, key: str, metadata: dict[str, str]
+) -> dict[str, Any]:
+    """Sube el NDJSON comprimido y devuelve su descripción para el resumen."""
+    fileobj = writer.finish()
+    size = writer.compressed_size
+    object_name = await minio_client.upload_bulk_configurations(
+        key, fileobj, metadata=metadata
+    )
+    return {
+        "object_name": object_name,
+        "format": BULK_EXPORT_FORMAT,
+        "count": writer.count,
+        "bytes": size,
+    }
+
+
 @celery_app.task(
     name="app.tasks.feature_model_analysis.generate_bulk_configurations", bind=True
 )
@@ -223,8 +295,18 @@ def generate_bulk_configurations(
     count: int = 50,
     strategy: str = GenerationStrategy.SAT_ENUM.value,
     partial_selection: Optional[dict[str, bool]] = None,
+    pool_size: Optional[int] = None,
+    time_budget_seconds: Optional[float] = None,
+    seed: Optional[int] = None,
 ) -> dict[str, Any]:
-    """Genera configuraciones masivas para un modelo y devuelve un resumen."""
+    """
+    Genera configuraciones masivas para un modelo.
+
+    Las configuraciones se escriben en streaming a un NDJSON comprimido en
+    MinIO; el resultado de la tarea solo lleva el nombre del objeto y las
+    estadísticas. Con ``seed`` (o una estrategia determinista) el objeto se
+    reutiliza desde la caché direccionada por contenido.
+    """
 
     self.update_state(
         state="PROGRESS",
@@ -239,7 +321,7 @@ def generate_bulk_configurations(
         await _set_progress({"step": "load_version", "percent": 10})
         async with SessionLocal() as session:
             repo = FeatureModelVersionRepository(session)
-            version = await repo.get_complete_with_relations(
+            version = await repo.get_compiled(
                 version_id=version_id,
                 include_resources=False,
             )
@@ -248,11 +330,62 @@ def generate_bulk_configurations(
             if str(version.feature_model_id) != model_id:
                 return {"status": "error", "error": "Version does not belong to model"}
 
-            features_payload, relations_payload, constraints_payload = _build_payload(
-                version
+            features_payload, relations_payload, constraints_payload = (
+                canonicalize_model_payload(*_build_payload(version))
             )
-            generator = FeatureModelConfigurationGenerator()
-            parsed_strategy = GenerationStrategy(strategy)
+            sample_status = version.status
+
+        generator = FeatureModelConfigurationGenerator(seed=seed)
+        parsed_strategy = GenerationStrategy(strategy)
+        feature_ids = [str(f["id"]) for f in features_payload]
+        model_hash = compute_model_hash(
+            features_payload, relations_payload, constraints_payload
+        )
+        sample_params = {
+            "count": count,
+            "diverse": True,
+            "partial_selection": partial_selection,
+            "pool_size": pool_size,
+            "time_budget_seconds": time_budget_seconds,
+            "output": BULK_EXPORT_FORMAT,
+        }
+        sample_ttl = CacheKeys.get_ttl_for_status(sample_status)["samples"]
+        sample_key = (
+            build_sample_key(model_hash, parsed_strategy, sample_params, seed)
+            if is_sample_cacheable(parsed_strategy, seed, sample_params)
+            else None
+        )
+
+        summary = await get_cached_sample(sample_key) if sample_key else None
+        cached = summary is not None
+        if summary is None:
+            # Objeto direccionado por contenido si la muestra es reproducible
+            object_key = sample_key or str(self.request.id)
+            cubes = (
+                build_enumeration_cubes(
+                    features_payload,
+                    relations_payload,
+                    BULK_ENUMERATION_MAX_CUBES,
+                    partial_selection,
+                )
+                if parsed_strategy == GenerationStrategy.SAT_ENUM
+                and count >= PARALLEL_ENUMERATION_MIN_SOLUTIONS
+                else []
+            )
+            if len(cubes) > 1:
+                # Cube-and-conquer: la enumeración se reparte en subtareas
+                return {
+                    "status": "dispatch",
+                    "cubes": cubes,
+                    "features": features_payload,
+                    "relations": relations_payload,
+                    "constraints": constraints_payload,
+                    "object_key": object_key,
+                    "model_hash": model_hash,
+                    "sample_key": sample_key,
+                    "sample_ttl": sample_ttl,
+                }
+
             self.update_state(
                 state="PROGRESS",
                 meta={
@@ -263,38 +396,269 @@ def generate_bulk_configurations(
                 },
             )
             await _set_progress({"step": "generate", "count": count, "percent": 70})
-            results = generator.generate_multiple_configurations(
-                features=features_payload,
-                relations=relations_payload,
-                constraints=constraints_payload,
-                count=count,
-                diverse=True,
-                strategy=parsed_strategy,
-                partial_selection=partial_selection,
-            )
+            metrics = _new_bulk_metrics(feature_ids, count)
+            fallback: list[GenerationResult] = []
+            errors: list[str] = []
+
+            with NDJSONGzipWriter() as writer:
+                # Cada configuración se escribe según se genera: la tarea no
+                # acumula los resultados (como la unión de cubos)
+                for result in generator.iter_multiple_configurations(
+                    features=features_payload,
+                    relations=relations_payload,
+                    constraints=constraints_payload,
+                    count=count,
+                    diverse=True,
+                    strategy=parsed_strategy,
+                    partial_selection=partial_selection,
+                    pool_size=pool_size,
+                    time_budget_seconds=time_budget_seconds,
+                ):
+                    if not result.success:
+                        errors.extend(result.errors)
+                        continue
+                    writer.write_configuration(result.selected_features, result.score)
+                    if metrics:
+                        metrics.add(result.selected_features)
+                    elif len(fallback) < BULK_DIVERSITY_SAMPLE_SIZE:
+                        fallback.append(result)
+                    if writer.count % BULK_METRICS_REPORT_EVERY:
+                        continue
+                    meta: dict[str, Any] = {
+                        "step": "generate",
+                        "count": count,
+                        "generated": writer.count,
+                        "percent": 70 + int(15 * writer.count / max(count, 1)),
+                        "eta_seconds_estimate": None,
+                    }
+                    if metrics:
+                        meta["diversity"] = metrics.diversity()
+                        meta["pairwise_coverage"] = metrics.pairwise_coverage()
+                    self.update_state(state="PROGRESS", meta=meta)
 
-            self.update_state(
-                state="PROGRESS",
-                meta={"step": "quality", "percent": 85, "eta_seconds_estimate": None},
-            )
-            await _set_progress({"step": "quality", "percent": 85})
-            quality = generator.compute_quality_metrics(
-                results, [str(f["id"]) for f in features_payload]
-            )
-            self.update_state(
-                state="PROGRESS",
-                meta={"step": "done", "percent": 100, "eta_seconds_estimate": 0},
-            )
-            await _set_progress({"step": "done", "percent": 100})
-            await cache_service.set_task_status(self.request.id, status="done")
-            return {
-                "status": "ok",
-                "result": {
-                    "configurations": [r.__dict__ for r in results],
+                self.update_state(
+                    state="PROGRESS",
+                    meta={
+                        "step": "upload",
+                        "percent": 85,
+                        "eta_seconds_estimate": None,
+                    },
+                )
+                await _set_progress({"step": "upload", "percent": 85})
+                if metrics:
+                    # Las métricas ya se acumularon de forma incremental
+                    quality = metrics.snapshot()
+                else:
+                    quality = generator.compute_quality_metrics(fallback, feature_ids)
+                summary = {
+                    **await _upload_bulk_file(
+                        writer, object_key, {"model-hash": model_hash}
+                    ),
                     "quality": quality,
-                },
+                    "errors": errors,
+                }
+
+            if sample_key and summary["count"]:
+                await store_sample(sample_key, summary, sample_ttl)
+
+        self.update_state(
+            state="PROGRESS",
+            meta={"step": "done", "percent": 100, "eta_seconds_estimate": 0},
+        )
+        await _set_progress({"step": "done", "percent": 100})
+        await cache_service.set_task_status(self.request.id, status="done")
+        return {"status": "ok", "result": {**summary, "cached": cached}}
+
+    outcome = asyncio.run(_run())
+    if outcome.get("status") != "dispatch":
+        return outcome
+
+    cubes = outcome["cubes"]
+    header = [
+        enumerate_configuration_cube.s(
+            parent_task_id=self.request.id,
+            cube_index=index,
+            cube_count=len(cubes),
+            cube=cube,
+            features=outcome["features"],
+            relations=outcome["relations"],
+            constraints=outcome["constraints"],
+            max_solutions=count,
+        )
+        for index, cube in enumerate(cubes)
+    ]
+    body = merge_enumerated_cubes.s(
+        parent_task_id=self.request.id,
+        count=count,
+        feature_ids=[str(f["id"]) for f in outcome["features"]],
+        object_key=outcome["object_key"],
+        model_hash=outcome["model_hash"],
+        sample_key=outcome["sample_key"],
+        sample_ttl=outcome["sample_ttl"],
+    )
+    self.update_state(
+        state="PROGRESS",
+        meta={
+            "step": "enumerate",
+            "count": count,
+            "cubes_total": len(cubes),
+            "cubes_done": 0,
+            "percent": 70,
+            "eta_seconds_estimate": None,
+        },
+    )
+    # La tarea se sustituye por el chord: el task_id original recibe el resultado
+    raise self.replace(chord(header, body))
+
+
+@celery_app.task(
+    name="app.tasks.feature_model_analysis.enumerate_configuration_cube", bind=True
+)
+def enumerate_configuration_cube(
+    self,
+    *,
+    parent_task_id: str,
+    cube_index: int,
+    cube_count: int,
+    cube: dict[str, bool],
+    features: list[dict[str, Any]],
+    relations: list[dict[str, Any]],
+    constraints: list[dict[str, Any]],
+    max_solutions: int,
+) -> dict[str, Any]:
+    """
+    Enumera un cubo de una generación masiva SAT_ENUM.
+
+    Escribe sus configuraciones en un objeto NDJSON propio en MinIO y devuelve
+    solo su nombre. Comparte con el resto de cubos un contador global en Redis
+    y se detiene cuando entre todos alcanzan ``max_solutions``. El progreso por
+    cubo se publica en el estado de la tarea padre.
+    """
+
+    async def _run() -> dict[str, Any]:
+        part: dict[str, Any] = {"object_name": None, "count": 0}
+        total = await cache_service.add_enumerated_solutions(parent_task_id, 0)
+        if total < max_solutions:
+            with NDJSONGzipWriter() as writer:
+                for chunk in iter_cube_chunks(
+                    features, relations, constraints, cube, max_solutions
+                ):
+                    for selected in chunk:
+                        writer.write_configuration(selected)
+                    total = await cache_service.add_enumerated_solutions(
+                        parent_task_id, len(chunk)
+                    )
+                    if total >= max_solutions:
+                        break
+                if writer.count:
+                    part = await _upload_bulk_file(
+                        writer,
+                        f"{parent_task_id}/cube-{cube_index}",
+                        {"parent-task-id": parent_task_id},
+                    )
+
+        await cache_service.set_cube_progress(
+            parent_task_id,
+            cube_index,
+            {"status": "done", "solutions": part["count"]},
+        )
+        cubes = await cache_service.get_cube_progress(parent_task_id)
+        enumerated = min(total, max_solutions)
+        self.backend.store_result(
+            parent_task_id,
+            {
+                "step": "enumerate",
+                "count": max_solutions,
+                "cubes_total": cube_count,
+                "cubes_done": len(cubes),
+                "cubes": cubes,
+                "generated": enumerated,
+                "percent": 70 + int(15 * enumerated / max(max_solutions, 1)),
+                "eta_seconds_estimate": None,
+            },
+            "PROGRESS",
+        )
+        return part
+
+    return asyncio.run(_run())
+
+
+@celery_app.task(name="app.tasks.feature_model_analysis.merge_enumerated_cubes")
+def merge_enumerated_cubes(
+    cube_parts: list[dict[str, Any]],
+    *,
+    parent_task_id: str,
+    count: int,
+    feature_ids: list[str],
+    object_key: str,
+    model_hash: str,
+    sample_key: Optional[str] = None,
+    sample_ttl: int = CacheKeys.TTL_SAMPLE_CACHE,
+) -> dict[str, Any]:
+    """
+    Une en streaming las partes de cada cubo (en orden de cubo) en un único
+    NDJSON, truncado a ``count``, calcula la calidad y cachea el resumen.
+    """
+
+    async def _run() -> dict[str, Any]:
+        generator = FeatureModelConfigurationGenerator()
+        metrics = _new_bulk_metrics(feature_ids, count)
+        fallback: list[GenerationResult] = []
+        part_names = [p["object_name"] for p in cube_parts if p.get("object_name")]
+
+        with NDJSONGzipWriter() as writer:
+            for object_name in part_names:
+                if writer.count >= count:
+                    break
+                with tempfile.SpooledTemporaryFile(
+                    max_size=BULK_SPOOL_MAX_MEMORY
+                ) as part_file:
+                    await minio_client.download_bulk_configurations(
+                        object_name, part_file
+                    )
+                    part_file.seek(0)
+                    for record in iter_ndjson_gzip(part_file):
+                        if writer.count >= count:
+                            break
+                        selected = record["selected"]
+                        writer.write_configuration(
+                            selected,
+                            generator._score_configuration(
+                                dict.fromkeys(selected, True), feature_ids
+                            ),
+                        )
+                        if metrics:
+                            metrics.add(selected)
+                        elif len(fallback) < BULK_DIVERSITY_SAMPLE_SIZE:
+                            fallback.append(
+                                GenerationResult(
+                                    success=True, selected_features=selected
+                                )
+                            )
+
+            if metrics:
+                quality = metrics.snapshot()
+            else:
+                quality = generator.compute_quality_metrics(fallback, feature_ids)
+            summary = {
+                **await _upload_bulk_file(
+                    writer, object_key, {"model-hash": model_hash}
+                ),
+                "quality": quality,
+                "errors": [],
+                "cubes": len(cube_parts),
             }
 
+        await minio_client.delete_bulk_configurations(part_names)
+        if sample_key and summary["count"]:
+            await store_sample(sample_key, summary, sample_ttl)
+
+        await cache_service.set_task_progress(
+            parent_task_id, {"step": "done", "percent": 100}
+        )
+        await cache_service.set_task_status(parent_task_id, status="done")
+        return {"status": "ok", "result": {**summary, "cached": False}}
+
     return asyncio.run(_run())
 
 
@@ -323,7 +687,7 @@ def export_feature_model_bundle(
         await _set_progress({"step": "load_version", "percent": 5})
         async with SessionLocal() as session:
             repo = FeatureModelVersionRepository(session)
-            version = await repo.get_complete_with_relations(
+            version = await repo.get_compiled(
                 version_id=version_id,
                 include_resources=False,
             )
@@ -417,11 +781,11 @@ def compare_feature_model_versions(
         await _set_progress({"step": "load_versions", "percent": 10})
         async with SessionLocal() as session:
             repo = FeatureModelVersionRepository(session)
-            base_version = await repo.get_complete_with_relations(
+            base_version = await repo.get_compiled(
                 version_id=base_version_id,
                 include_resources=False,
             )
-            target_version = await repo.get_complete_with_relations(
+            target_version = await repo.get_compiled(
                 version_id=target_version_id,
                 include_resources=False,
             )
@@ -490,7 +854,7 @@ def recompute_version_statistics(self, *, version_id: str) -> dict[str, Any]:
         await _set_progress({"step": "load_statistics", "percent": 40})
         async with SessionLocal() as session:
             repo = FeatureModelVersionRepository(session)
-            stats = await repo.get_statistics(version_id=version_id)
+            stats = await repo.get_statistics(version_id=version_id, refresh=True)
             if stats is None:
                 return {"status": "error", "error": "Feature model version not found"}
             self.update_state(
@@ -529,7 +893,7 @@ def validate_configuration(
         await _set_progress({"step": "load_version", "percent": 10})
         async with SessionLocal() as session:
             repo = FeatureModelVersionRepository(session)
-            version = await repo.get_complete_with_relations(
+            version = await repo.get_compiled(
                 version_id=version_id,
                 include_resources=False,
             )
@@ -5,6 +5,7 @@ from __future__ import annotations
 import asyncio
 import json
 import time
+import uuid
 from typing import Any
 
 from sqlmodel import select
@@ -14,13 +15,28 @@ from app.core.celery import celery_app
 from app.api.deps import SessionLocal
 from app.core.redis import redis_client
 from app.core.cache import cache_service
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.enums import ModelStatus
 from app.models import FeatureModel, FeatureModelVersion
 from app.repositories import FeatureModelVersionRepository
 from app.services.feature_model.fm_analysis_facade import analyze_version
+from app.services.feature_model.fm_version_delta import (
+    compact_version,
+    load_delta_bases,
+    versions_to_compact,
+)
+from app.services.feature_model.fm_version_warmup import (
+    get_cached_cnf,
+    is_version_warm,
+)
 
 log = get_logger(__name__)
 
+# Ventana de popularidad (lecturas recientes) y tamaño del sondeo
+POPULARITY_WINDOW_DAYS = 7
+POPULARITY_CANDIDATES_FACTOR = 5
+
 
 def _progress_meta(
     *,
@@ -85,6 +101,7 @@ def refresh_active_models_metrics(self, limit: int = 50) -> dict[str, Any]:
                     analysis_types=None,
                     max_solutions=50,
                     include_uvl_validation=False,
+                    compiled_cnf=await get_cached_cnf(version),
                 )
                 key = f"fm:metrics:{version.id}"
                 await redis_client.set(key, json.dumps(summary.__dict__), ex=86400)
@@ -167,6 +184,7 @@ def verify_models_integrity(self, limit: int = 50) -> dict[str, Any]:
                         analysis_types=None,
                         max_solutions=20,
                         include_uvl_validation=True,
+                        compiled_cnf=await get_cached_cnf(version),
                     )
                     if not summary.satisfiable:
                         issues.append(
@@ -198,45 +216,83 @@ def verify_models_integrity(self, limit: int = 50) -> dict[str, Any]:
     return asyncio.run(_run())
 
 
+async def _get_popular_published_versions(
+    session, limit: int = 20
+) -> list[FeatureModelVersion]:
+    """
+    Versiones publicadas (de modelos activos) más leídas.
+
+    La popularidad es el número de exportaciones y análisis de cada versión
+    en los últimos ``POPULARITY_WINDOW_DAYS`` días (contador por versión, ver
+    ``track_version_access``), entre todas las versiones publicadas. Se
+    sondean más candidatos que ``limit`` porque algunos pueden haber dejado
+    de estar publicados o su modelo desactivado.
+    """
+    ranked = await cache_service.get_most_accessed_versions(
+        days=POPULARITY_WINDOW_DAYS, limit=limit * POPULARITY_CANDIDATES_FACTOR
+    )
+    if not ranked:
+        return []
+    position = {
+        uuid.UUID(version_id): idx for idx, (version_id, _) in enumerate(ranked)
+    }
+    stmt = (
+        select(FeatureModelVersion)
+        .join(FeatureModel, FeatureModel.id == FeatureModelVersion.feature_model_id)
+        .where(
+            FeatureModelVersion.id.in_(list(position)),
+            FeatureModelVersion.status == ModelStatus.PUBLISHED,
+            FeatureModel.is_active == True,  # noqa: E712
+        )
+    )
+    result = await session.execute(stmt)
+    versions = sorted(result.scalars().all(), key=lambda v: position[v.id])
+    return versions[:limit]
+
+
 @celery_app.task(
     name="app.tasks.maintenance.precache_popular_models_analysis", bind=True
 )
 def precache_popular_models_analysis(self, limit: int = 20) -> dict[str, Any]:
-    """Precalcula análisis para modelos activos (placeholder para ranking futuro)."""
+    """
+    Lanza el precálculo de artefactos de las versiones más populares.
+
+    Reutiliza el pipeline de publicación (``warm_published_version``) para
+    las versiones publicadas que no estén ya warm (p. ej. tras expirar la
+    caché o publicadas antes de existir el pipeline).
+    """
+    from app.tasks.version_warmup import warm_published_version
 
     async def _run() -> dict[str, Any]:
         await cache_service.set_task_status(self.request.id, status="running")
         async with SessionLocal() as session:
-            versions = await _get_latest_versions(session, limit=limit)
-            total = len(versions)
-            start_time = time.perf_counter()
-            for idx, version in enumerate(versions, start=1):
-                progress = _progress_meta(
-                    step="precache",
-                    current=idx,
-                    total=total,
-                    start_time=start_time,
-                )
-                self.update_state(state="PROGRESS", meta=progress)
-                await cache_service.set_task_progress(self.request.id, progress)
-                summary = analyze_version(
-                    version=version,
-                    analysis_types=None,
-                    max_solutions=30,
-                    include_uvl_validation=False,
-                )
-                key = f"fm:precache:{version.id}"
-                await redis_client.set(key, json.dumps(summary.__dict__), ex=43200)
-            self.update_state(
-                state="PROGRESS",
-                meta={"step": "done", "percent": 100, "eta_seconds_estimate": 0},
-            )
-            await cache_service.set_task_progress(
-                self.request.id,
-                {"step": "done", "percent": 100, "eta_seconds_estimate": 0},
+            versions = await _get_popular_published_versions(session, limit=limit)
+        dispatched = 0
+        total = len(versions)
+        start_time = time.perf_counter()
+        for idx, version in enumerate(versions, start=1):
+            progress = _progress_meta(
+                step="precache",
+                current=idx,
+                total=total,
+                start_time=start_time,
             )
-            await cache_service.set_task_status(self.request.id, status="done")
-            return {"status": "ok", "precached": len(versions)}
+            self.update_state(state="PROGRESS", meta=progress)
+            await cache_service.set_task_progress(self.request.id, progress)
+            if await is_version_warm(version.id):
+                continue
+            warm_published_version.delay(version_id=str(version.id))
+            dispatched += 1
+        self.update_state(
+            state="PROGRESS",
+            meta={"step": "done", "percent": 100, "eta_seconds_estimate": 0},
+        )
+        await cache_service.set_task_progress(
+            self.request.id,
+            {"step": "done", "percent": 100, "eta_seconds_estimate": 0},
+        )
+        await cache_service.set_task_status(self.request.id, status="done")
+        return {"status": "ok", "candidates": total, "dispatched": dispatched}
 
     return asyncio.run(_run())
 
@@ -269,6 +325,7 @@ def collect_analysis_runtime_metrics(self, limit: int = 20) -> dict[str, Any]:
                     analysis_types=None,
                     max_solutions=10,
                     include_uvl_validation=False,
+                    compiled_cnf=await get_cached_cnf(version),
                 )
                 elapsed_ms = int((time.perf_counter() - start) * 1000)
                 metrics.append(
@@ -317,7 +374,7 @@ def recompute_version_statistics(self, limit: int = 50) -> dict[str, Any]:
                 )
                 self.update_state(state="PROGRESS", meta=progress)
                 await cache_service.set_task_progress(self.request.id, progress)
-                stats = await repo.get_statistics(version_id=version.id)
+                stats = await repo.get_statistics(version_id=version.id, refresh=True)
                 if stats is None:
                     continue
                 stats_map.append({"version_id": str(version.id), "stats": stats})
@@ -376,3 +433,44 @@ def audit_feature_model_data_quality(self, limit: int = 50) -> dict[str, Any]:
             return {"status": "ok", "findings": findings}
 
     return asyncio.run(_run())
+
+
+@celery_app.task(name="app.tasks.maintenance.compact_version_chains", bind=True)
+def compact_version_chains(self, limit: int = 20) -> dict[str, Any]:
+    """
+    Compacta las cadenas de versiones delta más largas que
+    ``VERSION_DELTA_COMPACT_CHAIN`` (como mucho ``limit`` versiones).
+    """
+
+    async def _run() -> dict[str, Any]:
+        await cache_service.set_task_status(self.request.id, status="running")
+        async with SessionLocal() as session:
+            bases = await load_delta_bases(session)
+            pending = versions_to_compact(bases, settings.VERSION_DELTA_COMPACT_CHAIN)[
+                :limit
+            ]
+            compacted: list[dict[str, Any]] = []
+            total = len(pending)
+            start_time = time.perf_counter()
+            for idx, version_id in enumerate(pending, start=1):
+                progress = _progress_meta(
+                    step="compact",
+                    current=idx,
+                    total=total,
+                    start_time=start_time,
+                )
+                self.update_state(state="PROGRESS", meta=progress)
+                await cache_service.set_task_progress(self.request.id, progress)
+                compacted.append(await compact_version(session, version_id))
+            self.update_state(
+                state="PROGRESS",
+                meta={"step": "done", "percent": 100, "eta_seconds_estimate": 0},
+            )
+            await cache_service.set_task_progress(
+                self.request.id,
+                {"step": "done", "percent": 100, "eta_seconds_estimate": 0},
+            )
+            await cache_service.set_task_status(self.request.id, status="done")
+            return {"status": "ok", "compacted": compacted}
+
+    return asyncio.run(_run())
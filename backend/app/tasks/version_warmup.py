@@ -0,0 +1,103 @@
+"""Pipeline de precálculo al publicar una versión (chord sobre las colas existentes)."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import Any
+
+from celery import chord
+
+from app.api.deps import SessionLocal
+from app.core.cache import cache_service
+from app.core.celery import celery_app
+from app.core.logging import get_logger
+from app.enums import ModelStatus
+from app.repositories import FeatureModelVersionRepository
+from app.services.feature_model.fm_version_warmup import (
+    is_version_warm,
+    mark_version_warm,
+    mark_version_warming,
+    run_warmup_step,
+    warmup_steps,
+)
+
+log = get_logger(__name__)
+
+# Los pasos de cálculo (SAT) van a la cola de análisis; el resto a default
+WARMUP_STEP_QUEUES = {
+    "cnf": "validation",
+    "analysis": "validation",
+}
+
+
+@celery_app.task(name="app.tasks.version_warmup.warm_published_version", bind=True)
+def warm_published_version(
+    self, *, version_id: str, force: bool = False
+) -> dict[str, Any]:
+    """
+    Precalcula en paralelo los artefactos de una versión publicada.
+
+    Lanza un chord con un paso por artefacto (``warmup_steps``) cuyo cierre
+    marca la versión como warm. No hace nada si la versión no está publicada
+    o ya está warm (salvo ``force``).
+    """
+
+    async def _run() -> dict[str, Any]:
+        if not force and await is_version_warm(version_id):
+            return {"status": "skipped", "reason": "already warm"}
+        async with SessionLocal() as session:
+            repo = FeatureModelVersionRepository(session)
+            version = await repo.get(uuid.UUID(version_id))
+            if version is None:
+                return {"status": "error", "error": "Feature model version not found"}
+            if version.status != ModelStatus.PUBLISHED:
+                return {"status": "skipped", "reason": "version not published"}
+        await mark_version_warming(version_id)
+        await cache_service.set_task_status(self.request.id, status="running")
+        return {"status": "dispatch"}
+
+    outcome = asyncio.run(_run())
+    if outcome.get("status") != "dispatch":
+        return outcome
+
+    header = [
+        warm_version_step.s(version_id=version_id, step=step).set(
+            queue=WARMUP_STEP_QUEUES.get(step, "default")
+        )
+        for step in warmup_steps()
+    ]
+    body = finalize_version_warmup.s(
+        version_id=version_id, parent_task_id=self.request.id
+    )
+    # La tarea se sustituye por el chord: el task_id original recibe el resultado
+    raise self.replace(chord(header, body))
+
+
+@celery_app.task(name="app.tasks.version_warmup.warm_version_step")
+def warm_version_step(*, version_id: str, step: str) -> dict[str, Any]:
+    """Un paso del pipeline; devuelve su estado aunque falle."""
+
+    async def _run() -> dict[str, Any]:
+        async with SessionLocal() as session:
+            return await run_warmup_step(session, uuid.UUID(version_id), step)
+
+    return asyncio.run(_run())
+
+
+@celery_app.task(name="app.tasks.version_warmup.finalize_version_warmup")
+def finalize_version_warmup(
+    results: list[dict[str, Any]],
+    *,
+    version_id: str,
+    parent_task_id: str,
+) -> dict[str, Any]:
+    """Cierre del chord: marca la versión como warm (o partial)."""
+
+    async def _run() -> dict[str, Any]:
+        status = await mark_version_warm(version_id, results)
+        log.info("warmup.finished", version_id=version_id, status=status)
+        await cache_service.set_task_status(parent_task_id, status="done")
+        return {"status": status, "steps": results}
+
+    return asyncio.run(_run())
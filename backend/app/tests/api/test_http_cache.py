@@ -0,0 +1,188 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from starlette.requests import Request
+
+from app.api.http_cache import (
+    CACHE_CONTROL_BY_STATUS,
+    cache_control_for,
+    conditional_headers,
+    etag_matches,
+    invalidate_version_tags,
+    make_etag,
+    not_modified_response,
+)
+from app.api.v1.routes import feature as feature_routes
+from app.enums import ModelStatus, UserRole
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _request(if_none_match=None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_is_strong_per_variant_and_matches_weakly() -> None:
+    etag = make_etag("tag", "export:uvl")
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("tag", "export:uvl")
+    assert etag != make_etag("tag", "export:json")
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+    assert cache_control_for("draft") == "private, no-cache"
+    assert cache_control_for("unknown") == CACHE_CONTROL_BY_STATUS[ModelStatus.DRAFT]
+    assert "max-age=86400" in cache_control_for(ModelStatus.ARCHIVED)
+
+
+def test_not_modified_only_reads_the_version_tag() -> None:
+    model_id = uuid.uuid4()
+    version = SimpleNamespace(
+        id=uuid.uuid4(),
+        feature_model_id=model_id,
+        version_number=3,
+        status=ModelStatus.PUBLISHED,
+        updated_at=None,
+        created_at="2026-01-01",
+        uvl_content="features\n    Root",
+    )
+    store = {}
+
+    async def get_version_tag(version_id):
+        return store.get(version_id)
+
+    async def set_version_tag(version_id, record, _ttl):
+        store[version_id] = record
+
+    fake_cache = SimpleNamespace(
+        get_version_tag=get_version_tag,
+        set_version_tag=set_version_tag,
+        get_version_tag_generation=AsyncMock(return_value=0),
+    )
+    with patch("app.api.http_cache.cache_service", fake_cache):
+        headers = _run(conditional_headers(version, "uvl", model_active=True))
+        assert headers["Cache-Control"] == cache_control_for(ModelStatus.PUBLISHED)
+
+        response = _run(
+            not_modified_response(
+                _request(headers["ETag"]), model_id, version.id, "uvl"
+            )
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == headers["ETag"]
+
+        # Otra variante, otro modelo o sin cabecera: respuesta normal
+        assert (
+            _run(
+                not_modified_response(
+                    _request(headers["ETag"]), model_id, version.id, "statistics"
+                )
+            )
+            is None
+        )
+        assert (
+            _run(
+                not_modified_response(
+                    _request(headers["ETag"]), uuid.uuid4(), version.id, "uvl"
+                )
+            )
+            is None
+        )
+        assert (
+            _run(not_modified_response(_request(), model_id, version.id, "uvl")) is None
+        )
+
+
+def test_invalidated_version_gets_a_new_etag() -> None:
+    version = SimpleNamespace(
+        id=uuid.uuid4(),
+        feature_model_id=uuid.uuid4(),
+        version_number=1,
+        status=ModelStatus.PUBLISHED,
+        updated_at=None,
+        created_at="2026-01-01",
+        uvl_content="features\n    Root",
+    )
+    store = {}
+    generation = {"value": 0}
+
+    async def get_version_tag(version_id):
+        return store.get(version_id)
+
+    async def set_version_tag(version_id, record, _ttl):
+        store[version_id] = record
+
+    async def get_version_tag_generation(_version_id):
+        return generation["value"]
+
+    async def invalidate_version_tag(version_id):
+        # Como CacheService: descarta la etiqueta y sube la generación
+        store.pop(version_id, None)
+        generation["value"] += 1
+
+    fake_cache = SimpleNamespace(
+        get_version_tag=get_version_tag,
+        set_version_tag=set_version_tag,
+        get_version_tag_generation=get_version_tag_generation,
+        invalidate_version_tag=invalidate_version_tag,
+    )
+    with patch("app.api.http_cache.cache_service", fake_cache):
+        before = _run(conditional_headers(version, "tree", model_active=True))
+        # Edición de un recurso o del dominio: la fila de la versión no cambia
+        _run(invalidate_version_tags(version.id))
+        after = _run(conditional_headers(version, "tree", model_active=True))
+        stale = _run(
+            not_modified_response(
+                _request(before["ETag"]), version.feature_model_id, version.id, "tree"
+            )
+        )
+
+    assert before["ETag"] != after["ETag"]
+    assert stale is None
+
+
+def test_tag_changes_renew_the_version_etag() -> None:
+    version_id = uuid.uuid4()
+    tag = SimpleNamespace(id=uuid.uuid4())
+    feature = SimpleNamespace(
+        id=uuid.uuid4(), feature_model_version_id=version_id, tags=[]
+    )
+    session = SimpleNamespace(
+        refresh=AsyncMock(), add=lambda _obj: None, commit=AsyncMock()
+    )
+    feature_repo = SimpleNamespace(get=AsyncMock(return_value=feature), session=session)
+    tag_repo = SimpleNamespace(get=AsyncMock(return_value=tag))
+    user = SimpleNamespace(role=UserRole.ADMIN)
+    invalidate = AsyncMock()
+
+    with (
+        patch.object(feature_routes, "ensure_not_shared", AsyncMock()),
+        patch.object(feature_routes, "discard_compiled_structure", AsyncMock()),
+        patch.object(feature_routes, "invalidate_version_tags", invalidate),
+    ):
+        for route in (
+            feature_routes.add_tag_to_feature,
+            feature_routes.remove_tag_from_feature,
+        ):
+            _run(
+                route(
+                    feature_id=feature.id,
+                    tag_id=tag.id,
+                    feature_repo=feature_repo,
+                    tag_repo=tag_repo,
+                    current_user=user,
+                )
+            )
+
+    assert feature.tags == []
+    assert invalidate.await_args_list == [((version_id,),), ((version_id,),)]
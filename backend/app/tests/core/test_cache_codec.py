@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.core import cache_codec
+from app.core.cache_codec import (
+    COMPRESSION_GZIP,
+    COMPRESSION_NONE,
+    COMPRESSION_ZSTD,
+    MAGIC,
+    CacheCodecError,
+    StreamEncoder,
+    codec_settings,
+    decode_json_bytes,
+    decode_value,
+    encode_json_bytes,
+    encode_value,
+    iter_json_bytes,
+)
+
+
+def test_json_entries_round_trip_compressed_and_plain():
+    document = json.dumps({"items": list(range(2000))}).encode("utf-8")
+
+    entry = encode_json_bytes(document, compression=COMPRESSION_GZIP)
+    assert entry.startswith(MAGIC)
+    assert len(entry) < len(document)
+    assert decode_json_bytes(entry) == document
+    assert b"".join(iter_json_bytes(entry, 1024)) == document
+
+    # Pequeñas: sin comprimir; sin cabecera: JSON plano de entradas antiguas
+    small = encode_json_bytes(b'{"a":1}', compression=COMPRESSION_GZIP)
+    assert small[len(MAGIC) + 1 : len(MAGIC) + 2] == b"n"
+    assert decode_value(small) == {"a": 1}
+    assert decode_value('{"a":1}') == {"a": 1}
+
+    with pytest.raises(CacheCodecError):
+        decode_value(MAGIC + b"??{}")
+
+
+def test_stream_encoder_matches_one_shot_document():
+    chunks = [b'{"tree":[', b",".join(b"%d" % i for i in range(5000)), b"]}"]
+
+    for compression in (COMPRESSION_GZIP, COMPRESSION_NONE):
+        encoder = StreamEncoder(compression=compression)
+        for chunk in chunks:
+            encoder.write(chunk)
+        entry = encoder.finish()
+
+        assert decode_json_bytes(entry) == b"".join(chunks)
+        assert decode_value(entry)["tree"][-1] == 4999
+
+    summary = {"satisfiable": True, "estimated_configurations": 2**70}
+    assert decode_value(encode_value(summary)) == summary
+
+
+def test_zstd_falls_back_to_gzip_when_not_installed(monkeypatch):
+    monkeypatch.setattr(cache_codec.settings, "CACHE_COMPRESSION", COMPRESSION_ZSTD)
+    monkeypatch.setattr(cache_codec, "ZSTD_AVAILABLE", False)
+
+    codec = codec_settings()
+
+    assert codec["configured_compression"] == COMPRESSION_ZSTD
+    assert codec["compression"] == COMPRESSION_GZIP
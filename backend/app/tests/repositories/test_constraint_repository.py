@@ -2,7 +2,9 @@ import asyncio
 import uuid
 from unittest.mock import AsyncMock, Mock
 
+from app.enums import ModelStatus
 from app.repositories.constraint import ConstraintRepository
+from app.services.feature_model import fm_version_delta
 
 
 def run_async(coro):
@@ -39,8 +41,12 @@ def test_exists_returns_boolean() -> None:
     assert run_async(repo.exists(uuid.uuid4())) is False
 
 
-def test_activate_and_deactivate_toggle_flag() -> None:
+def test_activate_and_deactivate_toggle_flag(monkeypatch) -> None:
     session = _build_session()
+    delete_version_rows = AsyncMock()
+    monkeypatch.setattr(
+        fm_version_delta.cache_service, "delete_version_rows", delete_version_rows
+    )
     repo = ConstraintRepository(session)
     constraint = Mock(is_active=False)
 
@@ -51,3 +57,42 @@ def test_activate_and_deactivate_toggle_flag() -> None:
     deactivated = run_async(repo.deactivate(constraint))
     assert deactivated is constraint
     assert constraint.is_active is False
+    # La estructura compilada y las filas en caché de la versión se descartan
+    assert delete_version_rows.await_count == 2
+
+
+def test_delete_on_published_version_soft_deletes_clone() -> None:
+    session = _build_session()
+    source_version = Mock(id=uuid.uuid4(), status=ModelStatus.PUBLISHED)
+    new_version = Mock(id=uuid.uuid4(), status=ModelStatus.DRAFT)
+    db_constraint = Mock(
+        expr_text="A => B",
+        is_active=True,
+        feature_model_version_id=source_version.id,
+    )
+    cloned = Mock(is_active=True)
+    result = Mock()
+    result.scalars.return_value.first.return_value = cloned
+    session.execute.return_value = result
+    version_repo = Mock()
+    version_repo.ensure_not_shared = AsyncMock()
+    version_repo.get = AsyncMock(return_value=source_version)
+    version_repo.create_new_version_from_existing = AsyncMock(
+        return_value=(new_version, {}, {})
+    )
+    repo = ConstraintRepository(session)
+
+    new_version_id = run_async(
+        repo.delete(
+            db_constraint=db_constraint,
+            user=Mock(id=uuid.uuid4()),
+            feature_model_version_repo=version_repo,
+        )
+    )
+
+    assert new_version_id == new_version.id
+    version_repo.ensure_not_shared.assert_awaited_once_with(source_version.id)
+    version_repo.get.assert_awaited_once_with(source_version.id)
+    assert cloned.is_active is False
+    assert db_constraint.is_active is True
+    session.commit.assert_awaited_once()
@@ -3,6 +3,7 @@ import uuid
 from unittest.mock import AsyncMock, Mock
 
 from app.repositories.feature_group import FeatureGroupRepository
+from app.services.feature_model import fm_version_delta
 
 
 def run_async(coro):
@@ -39,8 +40,12 @@ def test_exists_returns_boolean() -> None:
     assert run_async(repo.exists(uuid.uuid4())) is False
 
 
-def test_activate_and_deactivate_toggle_flag() -> None:
+def test_activate_and_deactivate_toggle_flag(monkeypatch) -> None:
     session = _build_session()
+    delete_version_rows = AsyncMock()
+    monkeypatch.setattr(
+        fm_version_delta.cache_service, "delete_version_rows", delete_version_rows
+    )
     repo = FeatureGroupRepository(session)
     group = Mock(is_active=False)
 
@@ -51,3 +56,5 @@ def test_activate_and_deactivate_toggle_flag() -> None:
     deactivated = run_async(repo.deactivate(group))
     assert deactivated is group
     assert group.is_active is False
+    # La estructura compilada y las filas en caché de la versión se descartan
+    assert delete_version_rows.await_count == 2
@@ -3,14 +3,25 @@ import uuid
 
 from app.api.deps import SessionLocal
 from app.core.security import get_password_hash
-from app.enums import ModelStatus, UserRole
+from app.enums import (
+    FeatureGroupType,
+    FeatureRelationType,
+    FeatureType,
+    ModelStatus,
+    ResourceType,
+    UserRole,
+)
+from app.models import Constraint, Feature, FeatureGroup, FeatureRelation
 from app.models.domain import DomainCreate
 from app.models.feature_model import FeatureModelCreate
 from app.models.feature_model_version import FeatureModelVersion
+from app.models.resource import Resource
 from app.models.user import User
 from app.repositories.domain import DomainRepository
+from app.repositories.feature import FeatureRepository
 from app.repositories.feature_model import FeatureModelRepository
 from app.repositories.feature_model_version import FeatureModelVersionRepository
+from app.services.feature_model.fm_version_delta import compile_structure
 
 
 def run_async(coro):
@@ -85,3 +96,241 @@ def test_feature_model_version_repository_basic() -> None:
             await _delete_user(session, user.id)
 
     run_async(_test())
+
+
+def test_create_new_version_from_existing_clones_structure_in_sql() -> None:
+    async def _test() -> None:
+        async with SessionLocal() as session:
+            domain_repo = DomainRepository(session)
+            feature_model_repo = FeatureModelRepository(session)
+            version_repo = FeatureModelVersionRepository(session)
+
+            user = await _create_user(session, f"owner-{uuid.uuid4()}@example.com")
+            domain = await domain_repo.create(
+                DomainCreate(name=f"domain-{uuid.uuid4()}", description="repo test")
+            )
+            model = await feature_model_repo.create(
+                data=FeatureModelCreate(
+                    name=f"model-{uuid.uuid4()}",
+                    description="clone",
+                    domain_id=domain.id,
+                ),
+                owner_id=user.id,
+            )
+            source = FeatureModelVersion(
+                feature_model_id=model.id, version_number=1, status=ModelStatus.DRAFT
+            )
+            session.add(source)
+            await session.flush()
+
+            root = Feature(
+                name="Root",
+                type=FeatureType.MANDATORY,
+                feature_model_version_id=source.id,
+            )
+            session.add(root)
+            await session.flush()
+            group = FeatureGroup(
+                group_type=FeatureGroupType.ALTERNATIVE,
+                min_cardinality=1,
+                max_cardinality=1,
+                parent_feature_id=root.id,
+                feature_model_version_id=source.id,
+            )
+            session.add(group)
+            await session.flush()
+            a = Feature(
+                name="A",
+                type=FeatureType.OPTIONAL,
+                parent_id=root.id,
+                group_id=group.id,
+                feature_model_version_id=source.id,
+            )
+            b = Feature(
+                name="B",
+                type=FeatureType.OPTIONAL,
+                parent_id=root.id,
+                group_id=group.id,
+                feature_model_version_id=source.id,
+            )
+            session.add_all([a, b])
+            await session.flush()
+            session.add(
+                FeatureRelation(
+                    type=FeatureRelationType.EXCLUDES,
+                    source_feature_id=a.id,
+                    target_feature_id=b.id,
+                    feature_model_version_id=source.id,
+                )
+            )
+            session.add(
+                Constraint(expr_text="A | B", feature_model_version_id=source.id)
+            )
+            await session.commit()
+
+            (
+                clone,
+                feature_map,
+                group_map,
+            ) = await version_repo.create_new_version_from_existing(
+                source_version=source, user=user, return_id_map=True
+            )
+            await session.commit()
+
+            assert clone.version_number == 2
+            assert set(feature_map) == {root.id, a.id, b.id}
+            assert set(group_map) == {group.id}
+
+            cloned = await version_repo.get_complete_with_relations(clone.id)
+            by_name = {f.name: f for f in cloned.features}
+            assert by_name["A"].id == feature_map[a.id]
+            assert by_name["A"].parent_id == feature_map[root.id]
+            assert by_name["A"].group_id == group_map[group.id]
+            (cloned_group,) = cloned.feature_groups
+            assert cloned_group.parent_feature_id == feature_map[root.id]
+            (relation,) = cloned.feature_relations
+            assert (relation.source_feature_id, relation.target_feature_id) == (
+                feature_map[a.id],
+                feature_map[b.id],
+            )
+            assert [c.expr_text for c in cloned.constraints] == ["A | B"]
+
+            await feature_model_repo.delete(model)
+            await domain_repo.delete(domain)
+            await _delete_user(session, user.id)
+
+    run_async(_test())
+
+
+def test_version_ids_by_domain_and_resource_include_delta_children() -> None:
+    async def _test() -> None:
+        async with SessionLocal() as session:
+            domain_repo = DomainRepository(session)
+            feature_model_repo = FeatureModelRepository(session)
+            version_repo = FeatureModelVersionRepository(session)
+
+            user = await _create_user(session, f"owner-{uuid.uuid4()}@example.com")
+            domain = await domain_repo.create(
+                DomainCreate(name=f"domain-{uuid.uuid4()}", description="repo test")
+            )
+            model = await feature_model_repo.create(
+                data=FeatureModelCreate(
+                    name=f"model-{uuid.uuid4()}",
+                    description="etag",
+                    domain_id=domain.id,
+                ),
+                owner_id=user.id,
+            )
+            resource = Resource(
+                title="Guía",
+                type=ResourceType.PDF,
+                content_url_or_data={"url": "https://example.com/guia.pdf"},
+                owner_id=user.id,
+            )
+            session.add(resource)
+            base = FeatureModelVersion(
+                feature_model_id=model.id, version_number=1, status=ModelStatus.DRAFT
+            )
+            unrelated = FeatureModelVersion(
+                feature_model_id=model.id, version_number=2, status=ModelStatus.DRAFT
+            )
+            session.add_all([base, unrelated])
+            await session.flush()
+            # Versión delta: comparte las filas de ``base``
+            delta = FeatureModelVersion(
+                feature_model_id=model.id,
+                version_number=3,
+                status=ModelStatus.DRAFT,
+                base_version_id=base.id,
+                structure_delta={"format": 1},
+            )
+            session.add(delta)
+            session.add(
+                Feature(
+                    name="Root",
+                    type=FeatureType.MANDATORY,
+                    resource_id=resource.id,
+                    feature_model_version_id=base.id,
+                )
+            )
+            await session.commit()
+
+            assert set(await version_repo.get_ids_by_domain(domain.id)) == {
+                base.id,
+                unrelated.id,
+                delta.id,
+            }
+            assert set(await version_repo.get_ids_using_resource(resource.id)) == {
+                base.id,
+                delta.id,
+            }
+
+            await feature_model_repo.delete(model)
+            await session.delete(resource)
+            await session.commit()
+            await domain_repo.delete(domain)
+            await _delete_user(session, user.id)
+
+    run_async(_test())
+
+
+def test_get_compiled_reflects_features_deactivated_in_place() -> None:
+    async def _test() -> None:
+        async with SessionLocal() as session:
+            domain_repo = DomainRepository(session)
+            feature_model_repo = FeatureModelRepository(session)
+            version_repo = FeatureModelVersionRepository(session)
+
+            user = await _create_user(session, f"owner-{uuid.uuid4()}@example.com")
+            domain = await domain_repo.create(
+                DomainCreate(name=f"domain-{uuid.uuid4()}", description="repo test")
+            )
+            model = await feature_model_repo.create(
+                data=FeatureModelCreate(
+                    name=f"model-{uuid.uuid4()}",
+                    description="compiled",
+                    domain_id=domain.id,
+                ),
+                owner_id=user.id,
+            )
+            version = FeatureModelVersion(
+                feature_model_id=model.id,
+                version_number=1,
+                status=ModelStatus.PUBLISHED,
+            )
+            session.add(version)
+            await session.flush()
+            root = Feature(
+                name="Root",
+                type=FeatureType.MANDATORY,
+                feature_model_version_id=version.id,
+            )
+            session.add(root)
+            await session.flush()
+            camera = Feature(
+                name="Camera",
+                type=FeatureType.OPTIONAL,
+                parent_id=root.id,
+                feature_model_version_id=version.id,
+            )
+            session.add(camera)
+            await session.commit()
+
+            complete = await version_repo.get_version_with_full_structure(version.id)
+            complete.snapshot = {"structure": compile_structure(complete)}
+            await session.commit()
+
+            await FeatureRepository(session).deactivate(camera)
+
+            async with SessionLocal() as reader:
+                compiled = await FeatureModelVersionRepository(reader).get_compiled(
+                    version.id
+                )
+                assert {f.name for f in compiled.features if f.is_active} == {"Root"}
+                assert "structure" not in (compiled.snapshot or {})
+
+            await feature_model_repo.delete(model)
+            await domain_repo.delete(domain)
+            await _delete_user(session, user.id)
+
+    run_async(_test())
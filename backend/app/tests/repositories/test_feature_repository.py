@@ -2,7 +2,14 @@ import asyncio
 import uuid
 from unittest.mock import AsyncMock, Mock
 
+import pytest
+
+from app.enums import FeatureType, ModelStatus
+from app.exceptions import SharedVersionRowsException
+from app.models import Feature, FeatureModelVersion, FeatureUpdate
 from app.repositories.feature import FeatureRepository
+from app.repositories.feature_model_version import FeatureModelVersionRepository
+from app.services.feature_model import fm_version_delta
 
 
 def run_async(coro):
@@ -39,8 +46,12 @@ def test_exists_returns_boolean() -> None:
     assert run_async(repo.exists(uuid.uuid4())) is False
 
 
-def test_activate_and_deactivate_toggle_flag() -> None:
+def test_activate_and_deactivate_toggle_flag(monkeypatch) -> None:
     session = _build_session()
+    delete_version_rows = AsyncMock()
+    monkeypatch.setattr(
+        fm_version_delta.cache_service, "delete_version_rows", delete_version_rows
+    )
     repo = FeatureRepository(session)
     feature = Mock(is_active=False)
 
@@ -51,3 +62,170 @@ def test_activate_and_deactivate_toggle_flag() -> None:
     deactivated = run_async(repo.deactivate(feature))
     assert deactivated is feature
     assert feature.is_active is False
+    # La estructura compilada y las filas en caché de la versión se descartan
+    assert delete_version_rows.await_count == 2
+
+
+def test_update_on_published_version_edits_clone_in_new_draft() -> None:
+    session = _build_session()
+    source_version = Mock(id=uuid.uuid4(), status=ModelStatus.PUBLISHED)
+    new_version = Mock(id=uuid.uuid4(), status=ModelStatus.DRAFT)
+    db_feature = Feature(
+        name="Camera",
+        type=FeatureType.OPTIONAL,
+        feature_model_version_id=source_version.id,
+    )
+    cloned = Feature(
+        name="Camera",
+        type=FeatureType.OPTIONAL,
+        feature_model_version_id=new_version.id,
+    )
+    session.get = AsyncMock(return_value=cloned)
+    version_repo = Mock()
+    version_repo.ensure_not_shared = AsyncMock()
+    version_repo.get = AsyncMock(return_value=source_version)
+    version_repo.create_new_version_from_existing = AsyncMock(
+        return_value=(new_version, {db_feature.id: cloned.id}, {})
+    )
+    user = Mock(id=uuid.uuid4())
+    repo = FeatureRepository(session)
+
+    updated = run_async(
+        repo.update(
+            db_feature=db_feature,
+            data=FeatureUpdate(name="Lens"),
+            user=user,
+            feature_model_version_repo=version_repo,
+        )
+    )
+
+    version_repo.ensure_not_shared.assert_awaited_once_with(source_version.id)
+    version_repo.create_new_version_from_existing.assert_awaited_once_with(
+        source_version=source_version, user=user, return_id_map=True
+    )
+    session.get.assert_awaited_once_with(Feature, cloned.id)
+    assert updated is cloned
+    assert cloned.name == "Lens"
+    assert cloned.feature_model_version_id == new_version.id
+    assert db_feature.name == "Camera"
+    session.commit.assert_awaited_once()
+
+
+def test_update_of_feature_seen_through_delta_tree_compacts_and_rejects(
+    monkeypatch,
+) -> None:
+    base_version_id = uuid.uuid4()
+    stored = Feature(
+        name="Camera",
+        type=FeatureType.OPTIONAL,
+        feature_model_version_id=base_version_id,
+    )
+    rows = fm_version_delta.empty_rows()
+    rows["features"][str(stored.id)] = fm_version_delta.json_row(stored.model_dump())
+    delta_version = FeatureModelVersion(
+        feature_model_id=uuid.uuid4(),
+        version_number=2,
+        base_version_id=base_version_id,
+        structure_delta={"format": 1},
+    )
+    fm_version_delta.build_structure(delta_version, rows)
+    # El árbol de la versión delta muestra el id de la fila de la base
+    (seen,) = delta_version.features
+    assert seen.id == stored.id
+    assert seen.feature_model_version_id == delta_version.id
+
+    session = _build_session()
+    result = Mock()
+    result.scalars.return_value.all.return_value = [delta_version.id]
+    session.execute.return_value = result
+    compacted = []
+
+    async def _ensure_full_version(_session, version_id):  # noqa: ANN001
+        compacted.append(version_id)
+        return True
+
+    monkeypatch.setattr(fm_version_delta, "ensure_full_version", _ensure_full_version)
+    version_repo = FeatureModelVersionRepository(session)
+    version_repo.create_new_version_from_existing = AsyncMock()
+    repo = FeatureRepository(session)
+
+    # La ruta carga por id la fila de la base: clonarla perdería el delta
+    with pytest.raises(SharedVersionRowsException):
+        run_async(
+            repo.update(
+                db_feature=stored,
+                data=FeatureUpdate(name="Lens"),
+                user=Mock(id=uuid.uuid4()),
+                feature_model_version_repo=version_repo,
+            )
+        )
+
+    assert compacted == [delta_version.id]
+    version_repo.create_new_version_from_existing.assert_not_awaited()
+    assert stored.name == "Camera"
+
+
+def test_get_compacts_delta_version_that_added_the_feature(monkeypatch) -> None:
+    session = _build_session()
+    feature = object()
+    missing, found = Mock(), Mock()
+    missing.scalar_one_or_none.return_value = None
+    found.scalar_one_or_none.return_value = feature
+    session.execute.side_effect = [missing, found]
+    owners = []
+
+    async def _compact_row_owner(_session, table, row_id):  # noqa: ANN001
+        owners.append((table, row_id))
+        return True
+
+    monkeypatch.setattr(fm_version_delta, "compact_row_owner", _compact_row_owner)
+    repo = FeatureRepository(session)
+    feature_id = uuid.uuid4()
+
+    assert run_async(repo.get(feature_id)) is feature
+    assert owners == [("features", feature_id)]
+
+
+def test_version_reads_compact_delta_versions_first(monkeypatch) -> None:
+    session = _build_session()
+    result = Mock()
+    result.scalars.return_value.all.return_value = []
+    session.execute.return_value = result
+    ensured = []
+
+    async def _ensure_full_version(_session, version_id):  # noqa: ANN001
+        ensured.append(version_id)
+        return False
+
+    monkeypatch.setattr(fm_version_delta, "ensure_full_version", _ensure_full_version)
+    repo = FeatureRepository(session)
+    version_id = uuid.uuid4()
+
+    run_async(repo.get_by_version(version_id))
+
+    assert ensured == [version_id]
+
+
+def test_get_depth_is_scoped_to_the_version(monkeypatch) -> None:
+    session = _build_session()
+    result = Mock()
+    result.scalar_one_or_none.return_value = 2
+    session.execute.return_value = result
+    ensured = []
+
+    async def _ensure_full_version(_session, version_id):  # noqa: ANN001
+        ensured.append(version_id)
+        return False
+
+    monkeypatch.setattr(fm_version_delta, "ensure_full_version", _ensure_full_version)
+    repo = FeatureRepository(session)
+    feature_id, version_id = uuid.uuid4(), uuid.uuid4()
+
+    depth = run_async(repo.get_depth(feature_id, version_id))
+
+    assert depth == 2
+    assert ensured == [version_id]
+    statement = session.execute.await_args.args[0]
+    params = statement.compile().params
+    # Ancla y paso recursivo filtran por la versión
+    assert list(params.values()).count(version_id) == 2
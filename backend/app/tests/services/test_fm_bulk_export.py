@@ -0,0 +1,50 @@
+import io
+
+from app.services.feature_model.fm_bulk_export import (
+    NDJSONGzipWriter,
+    iter_ndjson_gzip,
+)
+from app.services.feature_model.fm_configuration_metrics import (
+    ConfigurationSetMetrics,
+)
+
+
+def test_ndjson_gzip_writer_round_trip():
+    configurations = [["root", "A"], ["root", "A", "B"], ["root"]]
+
+    with NDJSONGzipWriter(spool_max_memory=64) as writer:
+        for selected in configurations:
+            writer.write_configuration(selected, score=len(selected) / 3)
+        fileobj = writer.finish()
+        data = fileobj.read()
+
+    records = list(iter_ndjson_gzip(io.BytesIO(data)))
+
+    assert writer.count == 3
+    assert [r["selected"] for r in records] == configurations
+    assert records[1]["score"] == 1.0
+
+
+def test_ndjson_gzip_writer_is_deterministic():
+    def _write() -> bytes:
+        with NDJSONGzipWriter() as writer:
+            writer.write_configuration(["root", "A"])
+            return writer.finish().read()
+
+    assert _write() == _write()
+
+
+def test_configuration_set_metrics_bounds_diversity_sample():
+    feature_ids = ["a", "b", "c", "d"]
+    configurations = [["a"], ["b"], ["a", "b"], ["c", "d"], ["a", "c"]]
+
+    sampled = ConfigurationSetMetrics(feature_ids, diversity_sample_size=2)
+    sampled.extend(configurations)
+    full = ConfigurationSetMetrics(feature_ids)
+    full.extend(configurations)
+
+    assert sampled.count == 5
+    assert sampled.rows.shape[0] == 2
+    assert sampled.diversity() == 1.0
+    assert sampled.covered_pairs() == full.covered_pairs()
+    assert sampled.snapshot()["objectives"] == full.snapshot()["objectives"]
@@ -1,7 +1,16 @@
+import pytest
+
 from app.enums import GenerationStrategy
 from app.services.feature_model.fm_configuration_generator import (
     FeatureModelConfigurationGenerator,
+    GenerationResult,
+)
+from app.services.feature_model.fm_configuration_metrics import (
+    ConfigurationSetMetrics,
+    FeatureBitIndex,
+    farthest_point_selection,
 )
+from app.services.feature_model.fm_model_hash import compute_model_hash
 
 
 def _simple_model() -> tuple[list[dict], list[dict], list[dict]]:
@@ -32,3 +41,121 @@ def test_generate_valid_configuration_greedy_includes_mandatory():
     assert result.success is True
     assert result.configuration.get("root") is True
     assert result.configuration.get("A") is True
+
+
+def test_compute_quality_metrics_matches_set_based_metrics():
+    features, _, _ = _simple_model()
+    feature_ids = [f["id"] for f in features]
+    generator = FeatureModelConfigurationGenerator()
+    results = [
+        GenerationResult(success=True, selected_features=["root", "A"]),
+        GenerationResult(success=True, selected_features=["root", "A", "B"]),
+        GenerationResult(success=True, selected_features=["root"]),
+    ]
+    sets = [set(r.selected_features) for r in results]
+
+    quality = generator.compute_quality_metrics(results, feature_ids)
+
+    assert quality["diversity"] == pytest.approx(
+        generator._average_jaccard_distance(sets)
+    )
+    assert quality["pairwise_coverage"] == pytest.approx(
+        generator._pairwise_coverage(sets, feature_ids)
+    )
+
+
+def test_configuration_set_metrics_incremental_matches_batch():
+    feature_ids = [f"f{i}" for i in range(130)]
+    configurations = [feature_ids[i::7] for i in range(7)] + [feature_ids[:3]]
+
+    incremental = ConfigurationSetMetrics(feature_ids)
+    for selected in configurations:
+        incremental.add(selected)
+    batch = ConfigurationSetMetrics(feature_ids)
+    batch.extend(configurations)
+
+    assert incremental.covered_pairs() == batch.covered_pairs()
+    assert incremental.diversity() == pytest.approx(batch.diversity())
+    assert incremental.snapshot()["objectives"]["max_selected"] == 19
+
+
+def test_farthest_point_selection_prefers_distant_configurations():
+    feature_ids = ["a", "b", "c", "d"]
+    index = FeatureBitIndex(feature_ids)
+    rows = index.pack_many([["a", "b"], ["a", "b", "c"], ["c", "d"], ["a"]])
+
+    chosen = farthest_point_selection(rows, 2)
+
+    assert chosen == [0, 2]
+
+
+def test_generate_multiple_configurations_diverse_strategy_returns_unique():
+    features, relations, constraints = _simple_model()
+    generator = FeatureModelConfigurationGenerator()
+
+    results = generator.generate_multiple_configurations(
+        features,
+        relations,
+        constraints,
+        count=2,
+        strategy=GenerationStrategy.DIVERSE,
+        pool_size=10,
+    )
+
+    selected = {frozenset(r.selected_features) for r in results}
+    assert all(r.success for r in results)
+    assert len(selected) == len(results)
+
+
+def test_seeded_generation_is_reproducible():
+    features, relations, constraints = _simple_model()
+
+    def _sample(seed: int) -> list[list[str]]:
+        generator = FeatureModelConfigurationGenerator(seed=seed)
+        results = generator.generate_multiple_configurations(
+            features,
+            relations,
+            constraints,
+            count=2,
+            strategy=GenerationStrategy.RANDOM,
+        )
+        return [r.selected_features for r in results]
+
+    assert _sample(7) == _sample(7)
+
+
+def test_iter_multiple_configurations_streams_sat_enumeration():
+    features, relations, constraints = _simple_model()
+    generator = FeatureModelConfigurationGenerator()
+
+    stream = generator.iter_multiple_configurations(
+        features,
+        relations,
+        constraints,
+        count=5,
+        strategy=GenerationStrategy.SAT_ENUM,
+    )
+    first = next(stream)
+    results = [first, *stream]
+
+    # Root y A obligatorias, B opcional: exactamente dos configuraciones
+    assert sorted(sorted(r.selected_features) for r in results) == [
+        ["A", "B", "root"],
+        ["A", "root"],
+    ]
+    assert all(r.success for r in results)
+    expected = generator.results_from_solutions(
+        features, [r.selected_features for r in results]
+    )
+    assert [r.score for r in results] == [r.score for r in expected]
+
+
+def test_compute_model_hash_ignores_payload_order():
+    features, relations, constraints = _simple_model()
+
+    original = compute_model_hash(features, relations, constraints)
+    reordered = compute_model_hash(features[::-1], relations[::-1], constraints)
+    changed = compute_model_hash(features[:2], relations[:1], constraints)
+
+    assert original == reordered
+    assert original != changed
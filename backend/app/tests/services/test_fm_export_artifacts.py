@@ -0,0 +1,158 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.enums import ExportFormat, ModelStatus
+from app.services.feature_model import fm_export_artifacts
+from app.services.feature_model.fm_export_artifacts import (
+    build_export_key,
+    open_export,
+)
+
+
+class _FakeStore:
+    """Redis (punteros y locks) y MinIO en memoria."""
+
+    def __init__(self):
+        self.pointers = {}
+        self.locks = set()
+        self.objects = {}
+
+    async def get_export_artifact(self, key):
+        return self.pointers.get(key)
+
+    async def set_export_artifact(self, key, entry, ttl=None):
+        self.pointers[key] = entry
+
+    async def delete_export_artifact(self, key):
+        self.pointers.pop(key, None)
+
+    async def acquire_export_build_lock(self, key):
+        if key in self.locks:
+            return False
+        self.locks.add(key)
+        return True
+
+    async def release_export_build_lock(self, key):
+        self.locks.discard(key)
+
+    async def exists(self, lock_key):
+        return any(lock_key.endswith(key) for key in self.locks)
+
+    async def upload_export_artifact(self, key, fileobj, *, fmt, content_type):
+        # Como put_object: lee el flujo desde otro hilo, por partes
+        def read_all():
+            data = b""
+            while chunk := fileobj.read(4):
+                data += chunk
+            return data
+
+        object_name = f"exports/artifacts/{key}.{fmt}"
+        self.objects[object_name] = await asyncio.to_thread(read_all)
+        return object_name
+
+    async def find_export_artifact(self, key, *, fmt):
+        object_name = f"exports/artifacts/{key}.{fmt}"
+        if object_name not in self.objects:
+            return None
+        return object_name, len(self.objects[object_name])
+
+    async def open_export_artifact(self, object_name):
+        return self.objects.get(object_name)
+
+    async def iter_object(self, response, chunk_size):
+        for start in range(0, len(response), chunk_size):
+            yield response[start : start + chunk_size]
+
+
+def _patched(store):
+    return (
+        patch.object(fm_export_artifacts, "cache_service", store),
+        patch.object(fm_export_artifacts, "minio_client", store),
+        patch.object(fm_export_artifacts, "redis_client", store),
+        patch.object(fm_export_artifacts, "EXPORT_BUILD_POLL_SECONDS", 0.01),
+    )
+
+
+def test_export_key_changes_with_content_inputs_only():
+    version = SimpleNamespace(
+        id=uuid.uuid4(), version_number=2, status=ModelStatus.PUBLISHED
+    )
+    model = SimpleNamespace(name="Model", description=None)
+
+    key = build_export_key(version, model, 0, ExportFormat.UVL)
+    assert key == build_export_key(version, model, 0, ExportFormat.UVL)
+    assert key != build_export_key(version, model, 1, ExportFormat.UVL)
+    assert key != build_export_key(version, model, 0, ExportFormat.JSON)
+    renamed = SimpleNamespace(name="Renamed", description=None)
+    assert key != build_export_key(version, renamed, 0, ExportFormat.UVL)
+
+
+async def _read(stream):
+    return b"".join([chunk async for chunk in stream.chunks])
+
+
+def test_concurrent_misses_build_once_and_hits_skip_build():
+    store = _FakeStore()
+    builds = []
+
+    async def produce():
+        builds.append(1)
+        await asyncio.sleep(0.05)
+        return iter([b"namespace ", b"Model"])
+
+    async def fetch(**kwargs):
+        stream = await open_export("k", ExportFormat.UVL, produce, **kwargs)
+        content = await _read(stream) if stream.chunks is not None else None
+        return stream, content
+
+    async def scenario():
+        first, second = await asyncio.gather(fetch(), fetch())
+        hit = await fetch()
+        redirect = await fetch(open_stored=False)
+        return first, second, hit, redirect
+
+    p1, p2, p3, p4 = _patched(store)
+    with p1, p2, p3, p4:
+        first, second, hit, redirect = asyncio.run(scenario())
+
+    # Un solo proceso genera; lo enviado y lo subido coinciden
+    assert len(builds) == 1
+    assert {first[0].built, second[0].built} == {True, False}
+    assert first[1] == second[1] == b"namespace Model"
+    assert store.objects["exports/artifacts/k.uvl"] == b"namespace Model"
+    assert not store.locks
+
+    stream, content = hit
+    assert not stream.built and content == b"namespace Model"
+    assert stream.artifact.object_name == "exports/artifacts/k.uvl"
+    assert stream.artifact.size == len(b"namespace Model")
+    assert redirect[0].chunks is None and not redirect[0].built
+
+    # Puntero expirado: se restaura desde MinIO sin reconstruir
+    store.pointers.clear()
+    with p1, p2, p3, p4:
+        restored, _ = asyncio.run(fetch())
+    assert not restored.built and "k" in store.pointers
+    assert len(builds) == 1
+
+
+def test_abandoned_stream_does_not_store_partial_export():
+    store = _FakeStore()
+
+    async def produce():
+        return iter([b"a", b"b", b"c"])
+
+    async def scenario():
+        stream = await open_export("k", ExportFormat.UVL, produce)
+        await stream.chunks.__anext__()
+        # El cliente se desconecta a mitad de la respuesta
+        await stream.chunks.aclose()
+        await asyncio.sleep(0.3)
+
+    p1, p2, p3, p4 = _patched(store)
+    with p1, p2, p3, p4:
+        asyncio.run(scenario())
+
+    assert not store.pointers and not store.locks and not store.objects
@@ -1,6 +1,6 @@
 import uuid
 
-from app.enums import FeatureType, ModelStatus
+from app.enums import ExportFormat, FeatureType, ModelStatus
 from app.models import Constraint, Feature, FeatureModel, FeatureModelVersion
 from app.models.domain import Domain
 from app.services.feature_model.fm_export import FeatureModelExportService
@@ -70,3 +70,54 @@ def test_export_to_uvl_uses_constraint_expr_text():
 
     assert "constraints" in uvl
     assert "Root & Child" in uvl
+
+
+def test_featureide_xml_is_streamed_with_minidom_layout():
+    version = _build_simple_version()
+    version.feature_model.name = 'My <Model> & "Co"'
+    version.features[1].properties = {"cost": "<5"}
+    version.constraints = [
+        Constraint(
+            description="Requires relationship",
+            expr_text="Root & Child",
+            feature_model_version_id=version.id,
+        )
+    ]
+
+    exporter = FeatureModelExportService(version)
+
+    assert exporter.export_to_featureide_xml() == (
+        '<?xml version="1.0" ?>\n'
+        "<featureModel>\n"
+        "  <properties>\n"
+        '    <property key="name" value="My &lt;Model&gt; &amp; &quot;Co&quot;"/>\n'
+        '    <property key="description" value="Desc"/>\n'
+        '    <property key="version" value="1"/>\n'
+        "  </properties>\n"
+        "  <struct>\n"
+        '    <and name="Root" mandatory="true">\n'
+        '      <feature name="Child" mandatory="false">\n'
+        '        <property key="cost" value="&lt;5"/>\n'
+        "      </feature>\n"
+        "    </and>\n"
+        "  </struct>\n"
+        "  <constraints>\n"
+        "    <rule>\n"
+        "      <description>Root &amp; Child</description>\n"
+        "    </rule>\n"
+        "  </constraints>\n"
+        "</featureModel>\n"
+    )
+
+
+def test_iter_export_bytes_matches_full_export():
+    version = _build_simple_version()
+    version.feature_groups = []
+    exporter = FeatureModelExportService(version)
+
+    for fmt in (ExportFormat.XML, ExportFormat.UVL, ExportFormat.DIMACS):
+        chunks = list(exporter.iter_export_bytes(fmt, chunk_size=16))
+
+        assert len(chunks) > 1
+        assert all(len(chunk) >= 16 for chunk in chunks[:-1])
+        assert b"".join(chunks) == exporter.export(fmt).encode("utf-8")
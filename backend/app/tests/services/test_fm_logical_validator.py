@@ -55,3 +55,27 @@ def test_validate_configuration_raises_on_excludes():
             constraints,
             selected_features=["root", "A", "B"],
         )
+
+
+def test_validate_feature_model_with_compiled_cnf_skips_encoding(monkeypatch):
+    features, relations, constraints = _simple_model_requires()
+    compiler = FeatureModelLogicalValidator()
+    variables, clauses = compiler.build_cnf(features, relations, constraints)
+    compiled = {
+        "variables": variables,
+        "clauses": clauses,
+        "errors": compiler.pysat_encoding_errors,
+    }
+    validator = FeatureModelLogicalValidator()
+
+    def _fail(*_args):  # noqa: ANN002
+        raise AssertionError("el modelo no debe volver a codificarse")
+
+    monkeypatch.setattr(validator, "_encode_pysat", _fail)
+    result = validator.validate_feature_model(
+        features, relations, constraints, compiled_cnf=compiled
+    )
+
+    assert result.is_valid is True
+    assert result.satisfying_assignment["A"] is True
+    assert result.satisfying_assignment["B"] is True
@@ -0,0 +1,73 @@
+from app.services.feature_model.fm_logical_validator import (
+    FeatureModelLogicalValidator,
+)
+from app.services.feature_model.fm_parallel_enumeration import (
+    build_enumeration_cubes,
+    enumerate_configurations_parallel,
+)
+
+
+def _xor_model() -> tuple[list[dict], list[dict], list[dict]]:
+    """Raíz con dos grupos XOR opcionales de dos hijos (3 × 3 configuraciones)."""
+    features = [{"id": "root", "name": "Root", "parent_id": None}]
+    relations = []
+    for group in ("G1", "G2"):
+        features.append({"id": group, "name": group, "parent_id": "root"})
+        relations.append(
+            {"parent_id": "root", "child_id": group, "relation_type": "optional"}
+        )
+        for child in ("a", "b"):
+            child_id = f"{group}{child}"
+            features.append(
+                {
+                    "id": child_id,
+                    "name": child_id,
+                    "parent_id": group,
+                    "group_id": f"{group}-xor",
+                    "group": {"group_type": "alternative", "min_cardinality": 1},
+                }
+            )
+            relations.append(
+                {
+                    "parent_id": group,
+                    "child_id": child_id,
+                    "relation_type": "optional",
+                    "group_id": f"{group}-xor",
+                    "group_type": "alternative",
+                }
+            )
+    return features, relations, []
+
+
+def test_build_enumeration_cubes_splits_on_xor_groups():
+    features, relations, _ = _xor_model()
+
+    cubes = build_enumeration_cubes(features, relations, max_cubes=9)
+
+    assert len(cubes) == 9
+    assert {"G1a": True, "G1b": False, "G2a": False, "G2b": False} in cubes
+
+
+def test_build_enumeration_cubes_drops_cubes_contradicting_partial():
+    features, relations, _ = _xor_model()
+
+    cubes = build_enumeration_cubes(
+        features, relations, max_cubes=9, partial_selection={"G1a": True}
+    )
+
+    assert len(cubes) == 3
+    assert all(cube["G1a"] for cube in cubes)
+
+
+def test_parallel_enumeration_matches_sequential():
+    features, relations, constraints = _xor_model()
+    sequential = FeatureModelLogicalValidator().enumerate_configurations(
+        features, relations, constraints, max_solutions=100
+    )
+
+    parallel = enumerate_configurations_parallel(
+        features, relations, constraints, max_solutions=100, workers=2
+    )
+
+    assert len(sequential) == 9
+    assert {frozenset(s) for s in parallel} == {frozenset(s) for s in sequential}
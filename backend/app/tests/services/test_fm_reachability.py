@@ -0,0 +1,68 @@
+from app.services.feature_model.fm_reachability import (
+    build_reachability,
+    clear_reachability_cache,
+)
+from app.services.feature_model.fm_structural_analyzer import (
+    FeatureModelStructuralAnalyzer,
+)
+
+
+def _dfs(graph: dict[str, list[str]], start: str) -> set[str]:
+    seen: set[str] = set()
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(graph.get(node, []))
+    return seen - {start}
+
+
+def test_reachability_matches_dfs_with_cycles():
+    graph = {
+        "r": ["a", "b"],
+        "a": ["c"],
+        "c": ["a", "d"],  # ciclo a <-> c
+        "b": ["d"],
+        "d": [],
+        "e": ["r"],
+    }
+
+    reachability = build_reachability(graph)
+
+    for node in graph:
+        assert reachability.dependents(node) == _dfs(graph, node)
+        assert reachability.dependents_count(node) == len(_dfs(graph, node))
+    assert [sorted(c) for c in reachability.cycles()] == [["a", "c"]]
+
+
+def test_reachability_handles_deep_chains_without_recursion():
+    graph = {f"n{i}": [f"n{i + 1}"] for i in range(5000)}
+
+    reachability = build_reachability(graph)
+
+    assert reachability.dependents_count("n0") == 5000
+
+
+def test_feature_impacts_use_cached_condensation():
+    clear_reachability_cache()
+    features = [
+        {"id": "root", "name": "Root", "parent_id": None},
+        {"id": "A", "name": "A", "parent_id": "root"},
+        {"id": "B", "name": "B", "parent_id": "root"},
+    ]
+    relations = [
+        {"parent_id": "root", "child_id": "A", "relation_type": "mandatory"},
+        {"parent_id": "root", "child_id": "B", "relation_type": "optional"},
+    ]
+    constraints = [{"id": "c1", "expr_text": "A REQUIRES B"}]
+
+    first = FeatureModelStructuralAnalyzer()
+    impacts = first.calculate_all_feature_impacts(features, relations, constraints)
+    second = FeatureModelStructuralAnalyzer()
+    single = second.calculate_feature_impact(features, relations, constraints, "A")
+
+    assert impacts["root"]["transitive_dependents"] == 2
+    assert impacts["A"] == single
+    assert impacts["A"]["transitive_dependents"] == 1  # A requires B
+    assert first._get_reachability() is second._get_reachability()
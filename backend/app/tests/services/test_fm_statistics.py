@@ -0,0 +1,136 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.enums import FeatureGroupType, FeatureRelationType, FeatureType
+from app.services.feature_model.fm_statistics import (
+    clear_statistics_cache,
+    compute_model_statistics,
+    get_model_statistics,
+)
+from app.services.feature_model import fm_statistics_store
+from app.services.feature_model.fm_statistics_store import (
+    apply_delta,
+    feature_delta,
+    group_delta,
+    merge_deltas,
+    publish_statistics_delta,
+    statistics_fields,
+    statistics_from_fields,
+)
+
+
+def _feature(fid, parent_id=None, ftype=FeatureType.MANDATORY, group_id=None):
+    return SimpleNamespace(id=fid, parent_id=parent_id, type=ftype, group_id=group_id)
+
+
+def _model():
+    features = [
+        _feature("root"),
+        _feature("A", "root"),
+        _feature("B", "root", FeatureType.OPTIONAL),
+        _feature("A1", "A", FeatureType.OPTIONAL, "g1"),
+        _feature("A2", "A", FeatureType.OPTIONAL, "g1"),
+        _feature("A2x", "A2", FeatureType.OPTIONAL),
+    ]
+    groups = [SimpleNamespace(id="g1", group_type=FeatureGroupType.ALTERNATIVE)]
+    relations = [
+        SimpleNamespace(type=FeatureRelationType.REQUIRED),
+        SimpleNamespace(type=FeatureRelationType.EXCLUDES),
+    ]
+    return features, groups, relations
+
+
+def test_compute_model_statistics_single_pass():
+    features, groups, relations = _model()
+
+    stats = compute_model_statistics(features, groups, relations, constraints_count=3)
+
+    assert stats.total_features == 6
+    assert stats.mandatory_features == 2
+    assert stats.optional_features == 4
+    assert stats.max_depth == 3
+    assert stats.tree_levels == 4
+    assert stats.depth_histogram == {0: 1, 1: 2, 2: 2, 3: 1}
+    assert stats.leaf_features == 3
+    assert stats.max_branching_factor == 2
+    assert stats.xor_groups == 1
+    assert stats.max_group_size == 2
+    assert stats.requires_relations == 1
+    assert stats.excludes_relations == 1
+    # 6·0.5 + 2·2 + 3·3 + 1·1.5 + 4 niveles
+    assert stats.complexity_score == 21.5
+
+
+def test_compute_model_statistics_handles_deep_chains():
+    features = [_feature("f0")] + [
+        _feature(f"f{i}", f"f{i - 1}") for i in range(1, 5000)
+    ]
+
+    stats = compute_model_statistics(features, [], [], constraints_count=0)
+
+    assert stats.max_depth == 4999
+
+
+def test_get_model_statistics_caches_by_content():
+    clear_statistics_cache()
+    features, groups, relations = _model()
+
+    first = get_model_statistics(features, groups, relations, 3)
+    second = get_model_statistics(list(features), groups, relations, 3)
+    changed = get_model_statistics(features[:-1], groups, relations, 3)
+
+    assert first is second
+    assert changed.max_depth == 2
+
+
+def test_statistics_deltas_match_full_recompute():
+    features, groups, relations = _model()
+    fields = statistics_fields(compute_model_statistics(features, groups, relations, 3))
+
+    # Quitar la hoja más profunda y el grupo XOR, añadir una hoja bajo B
+    delta = merge_deltas(
+        feature_delta(FeatureType.OPTIONAL, 3, -1),
+        feature_delta(FeatureType.MANDATORY, 2),
+        group_delta(FeatureGroupType.ALTERNATIVE, -1),
+    )
+    derived = statistics_from_fields(apply_delta(fields, delta))
+
+    expected = compute_model_statistics(
+        features[:-1] + [_feature("B1", "B")], [], relations, 3
+    )
+    assert derived == statistics_from_fields(statistics_fields(expected))
+    assert derived["max_tree_depth"] == 2
+    assert derived["mandatory_features"] == 3
+    assert derived["xor_groups"] == 0
+
+
+@pytest.mark.asyncio
+async def test_in_place_statistics_delta_uses_atomic_increment(monkeypatch):
+    version_id = uuid.uuid4()
+    calls = []
+
+    async def _increment(target_id, delta):  # noqa: ANN001
+        calls.append((target_id, delta))
+        return {"total_constraints": 4}
+
+    async def _replace(*_args, **_kwargs):  # noqa: ANN002, ANN003
+        raise AssertionError("in-place deltas must not rewrite the hash")
+
+    async def _invalidate_tag(_version_id):  # noqa: ANN001
+        return None
+
+    async def _broadcast(target_id, statistics):  # noqa: ANN001
+        calls.append((target_id, statistics["total_constraints"]))
+
+    cache = fm_statistics_store.cache_service
+    monkeypatch.setattr(cache, "increment_version_statistics", _increment)
+    monkeypatch.setattr(cache, "get_version_statistics", _replace)
+    monkeypatch.setattr(cache, "set_version_statistics", _replace)
+    monkeypatch.setattr(cache, "invalidate_version_tag", _invalidate_tag)
+    monkeypatch.setattr(fm_statistics_store.manager, "broadcast_statistics", _broadcast)
+
+    await publish_statistics_delta(version_id, None, {"total_constraints": -1})
+
+    assert calls == [(version_id, {"total_constraints": -1}), (version_id, 4)]
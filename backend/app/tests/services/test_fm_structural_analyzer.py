@@ -1,4 +1,7 @@
+import pytest
+
 from app.enums import AnalysisType
+from app.exceptions import CyclicDependencyException
 from app.services.feature_model.fm_structural_analyzer import (
     FeatureModelStructuralAnalyzer,
 )
@@ -41,3 +44,36 @@ def test_calculate_complexity_metrics_basic():
     metrics = results[AnalysisType.COMPLEXITY_METRICS].metrics
     assert metrics["total_features"] == 3
     assert metrics["leaf_features"] == 2
+
+
+def test_analyze_only_builds_requested_graph_views():
+    features, relations, constraints = _simple_model()
+    analyzer = FeatureModelStructuralAnalyzer()
+
+    analyzer.analyze_feature_model(
+        features,
+        relations,
+        constraints,
+        analysis_types=[AnalysisType.REDUNDANCIES],
+    )
+
+    assert analyzer._graph is None
+    assert analyzer._nx_graph is None
+    assert analyzer.graph["root"] == ["A", "B"]
+
+
+def test_strongly_connected_detects_requires_cycle():
+    features, relations, _ = _simple_model()
+    constraints = [
+        {"id": "c1", "expr_text": "A REQUIRES B"},
+        {"id": "c2", "expr_text": "B REQUIRES A"},
+    ]
+    analyzer = FeatureModelStructuralAnalyzer()
+
+    with pytest.raises(CyclicDependencyException):
+        analyzer.analyze_feature_model(
+            features,
+            relations,
+            constraints,
+            analysis_types=[AnalysisType.STRONGLY_CONNECTED],
+        )
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from app.enums import FeatureType
+from app.services.feature_model.fm_subtree import (
+    build_subtree,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def _row(fid, parent_id, name, level, position, children_count=0):
+    return {
+        "id": fid,
+        "parent_id": parent_id,
+        "name": name,
+        "type": FeatureType.OPTIONAL,
+        "properties": None,
+        "level": level,
+        "position": position,
+        "children_count": children_count,
+        "group_id": None,
+    }
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    feature_id = uuid.uuid4()
+
+    assert decode_cursor(encode_cursor("Matemática I", feature_id)) == (
+        "Matemática I",
+        feature_id,
+    )
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_build_subtree_pages_children_and_marks_depth_limit():
+    root, a, b, c, a1 = (uuid.uuid4() for _ in range(5))
+    rows = [
+        _row(root, None, "Root", 0, 1, children_count=3),
+        # page_size=2: la tercera fila solo indica que hay más hijos
+        _row(c, root, "C", 1, 3),
+        _row(a, root, "A", 1, 1, children_count=1),
+        _row(b, root, "B", 1, 2),
+        _row(a1, a, "A1", 2, 1, children_count=4),
+    ]
+
+    tree = build_subtree(rows, root, page_size=2, depth=2, base_depth=1)
+
+    assert [child.name for child in tree.children] == ["A", "B"]
+    assert tree.has_more_children
+    assert decode_cursor(tree.next_cursor) == ("B", b)
+    assert tree.children[0].depth == 2
+    leaf_page = tree.children[0].children[0]
+    assert leaf_page.name == "A1"
+    assert leaf_page.children == []
+    assert leaf_page.has_more_children and leaf_page.next_cursor is None
+    assert not tree.children[1].has_more_children and tree.children[1].is_leaf
@@ -1,8 +1,14 @@
+import json
 import uuid
 
+import pytest
+
 from app.enums import FeatureType, ModelStatus
 from app.models import Feature, FeatureModel, FeatureModelVersion
 from app.models.domain import Domain
+from app.core.cache_codec import COMPRESSION_GZIP, StreamEncoder, iter_json_bytes
+from app.services.feature_model.fm_complete_fields import CompleteFieldSet
+from app.services.feature_model.fm_json_stream import iter_chunks
 from app.services.feature_model.fm_tree_builder import FeatureModelTreeBuilder
 
 
@@ -57,3 +63,62 @@ def test_build_complete_response_tree_structure():
     assert len(response.tree.children) == 1
     assert response.tree.children[0].name == "Child"
     assert response.uvl.strip().startswith("namespace")
+
+
+def test_streamed_json_matches_complete_response():
+    version = _build_version_with_tree()
+    root, child = version.features
+    version.features.append(
+        Feature(
+            name="Grandchild",
+            type=FeatureType.OPTIONAL,
+            feature_model_version_id=version.id,
+            parent_id=child.id,
+        )
+    )
+    builder = FeatureModelTreeBuilder(version)
+
+    tee = StreamEncoder(compression=COMPRESSION_GZIP)
+    chunks = list(iter_chunks(builder.iter_complete_response_json(), 64))
+    for chunk in chunks:
+        tee.write(chunk)
+    streamed = json.loads(b"".join(chunks))
+    expected = json.loads(builder.build_complete_response().model_dump_json())
+
+    for document in (streamed, expected):
+        document["metadata"].pop("processing_time_ms")
+    assert streamed == expected
+    assert streamed["tree"]["children"][0]["children"][0]["depth"] == 2
+    assert b"".join(iter_json_bytes(tee.finish(), 16)) == b"".join(chunks)
+
+
+def test_sparse_fieldset_omits_unrequested_sections_and_node_fields():
+    version = _build_version_with_tree()
+    fieldset = CompleteFieldSet.parse(include="statistics", fields="name,type")
+    builder = FeatureModelTreeBuilder(version, fieldset=fieldset)
+
+    document = json.loads(b"".join(builder.iter_complete_response_json()))
+
+    assert set(document) == {
+        "feature_model",
+        "version",
+        "tree",
+        "statistics",
+        "metadata",
+    }
+    assert "uvl_content" not in document["version"]
+    assert "snapshot" not in document["version"]
+    assert set(document["tree"]) == {"id", "name", "type", "children"}
+    assert document["tree"]["children"][0]["name"] == "Child"
+    assert document["statistics"]["total_features"] == 2
+    assert fieldset.load_plan() == {
+        "groups",
+        "relations",
+        "constraints",
+        "configurations",
+    }
+    assert builder._cache_key != FeatureModelTreeBuilder(version)._cache_key
+
+    assert CompleteFieldSet.parse(include=None, fields=" ").is_full
+    with pytest.raises(ValueError, match="colour"):
+        CompleteFieldSet.parse(fields="name,colour")
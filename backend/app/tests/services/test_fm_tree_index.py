@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from app.services.feature_model.fm_tree_index import FeatureTreeIndex, get_tree_index
+
+
+def _feature(fid, parent_id=None, name=None):
+    return SimpleNamespace(id=fid, parent_id=parent_id, name=name or fid)
+
+
+def test_children_sorted_and_preorder():
+    index = FeatureTreeIndex(
+        [
+            _feature("root"),
+            _feature("b", "root"),
+            _feature("a", "root"),
+            _feature("a1", "a"),
+        ]
+    )
+
+    assert [child.id for child in index.children("root")] == ["a", "b"]
+    assert [(f.id, depth) for f, depth in index.iter_preorder(index.root)] == [
+        ("root", 0),
+        ("a", 1),
+        ("a1", 2),
+        ("b", 1),
+    ]
+
+
+def test_build_handles_deep_chains_without_recursion():
+    features = [_feature("f0")] + [
+        _feature(f"f{i}", f"f{i - 1}") for i in range(1, 20000)
+    ]
+    index = FeatureTreeIndex(features)
+
+    depth = index.build(
+        index.root, lambda feature, d, children: children[0] if children else d
+    )
+
+    assert depth == 19999
+    assert not index.has_cycle()
+
+
+def test_get_tree_index_is_built_once_per_version():
+    version = SimpleNamespace(features=[_feature("root"), _feature("x", "root")])
+
+    assert get_tree_index(version) is get_tree_index(version)
+
+    version.features = version.features + [_feature("y", "root")]
+    assert len(get_tree_index(version).children("root")) == 2
+    assert FeatureTreeIndex([_feature("a", "b"), _feature("b", "a")]).has_cycle()
@@ -0,0 +1,128 @@
+import asyncio
+import io
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.services.feature_model import fm_uvl_importer
+from app.services.feature_model.fm_uvl_import_job import (
+    ImportLineReader,
+    run_uvl_import,
+)
+from app.services.feature_model.fm_uvl_importer import (
+    FeatureModelUVLImporter,
+    UVLImportCancelled,
+)
+from app.services.feature_model.fm_uvl_parser import UVLParseError
+
+
+UVL = b"""features
+    Root
+        optional
+            A
+            B
+constraints
+    A => B
+"""
+
+
+class _Session:
+    def __init__(self):
+        self.batches = 0
+        self.deleted = []
+        self.rolled_back = False
+
+    async def execute(self, statement, params):
+        self.batches += 1
+
+    def add(self, obj):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        self.rolled_back = True
+
+    async def delete(self, obj):
+        self.deleted.append(obj)
+
+    async def refresh(self, obj):
+        pass
+
+
+class _Manager:
+    def __init__(self, **kwargs):
+        pass
+
+    async def create_new_version(self, source_version=None):
+        return SimpleNamespace(id=uuid.uuid4(), uvl_content=None)
+
+
+def _run(session, *, cancel_after_reports=None):
+    importer = FeatureModelUVLImporter(
+        session=session,
+        feature_model=SimpleNamespace(id=uuid.uuid4()),
+        user=SimpleNamespace(id=uuid.uuid4()),
+    )
+    reports = []
+
+    async def report(meta):
+        reports.append(meta)
+
+    async def is_cancelled():
+        return cancel_after_reports is not None and len(reports) >= cancel_after_reports
+
+    async def scenario():
+        return await run_uvl_import(
+            importer, io.BytesIO(UVL), report=report, is_cancelled=is_cancelled
+        )
+
+    with patch.object(fm_uvl_importer, "FeatureModelVersionManager", _Manager):
+        return asyncio.run(scenario()), reports
+
+
+def test_import_reports_parse_validate_and_insert_progress():
+    session = _Session()
+
+    version, reports = _run(session)
+
+    assert version.uvl_content == UVL.decode().strip()
+    steps = [r["step"] for r in reports]
+    assert steps[0] == "parse" and "validate" in steps and steps[-1] == "insert"
+    assert reports[-1]["percent"] == 100
+    # 3 features + 1 relación (sin grupos)
+    assert reports[-1]["total"] == 4
+    assert not session.deleted
+
+
+def test_cancel_during_insert_removes_the_new_version():
+    session = _Session()
+
+    # parse, validate y el lote de features informan; se cancela tras el
+    # lote de relaciones
+    with pytest.raises(UVLImportCancelled):
+        _run(session, cancel_after_reports=3)
+
+    assert session.batches == 2
+    assert session.rolled_back and len(session.deleted) == 1
+
+
+def test_cancel_before_insert_creates_nothing():
+    session = _Session()
+
+    with pytest.raises(UVLImportCancelled):
+        _run(session, cancel_after_reports=0)
+
+    assert session.batches == 0 and not session.deleted
+
+
+def test_line_reader_reports_invalid_utf8_position():
+    reader = ImportLineReader(io.BytesIO(b"features\n    R\xff\n"))
+
+    with pytest.raises(UVLParseError) as exc_info:
+        list(reader)
+
+    assert (exc_info.value.line, exc_info.value.column) == (2, 6)
@@ -1,9 +1,18 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
 import pytest
 
+from app.enums import FeatureGroupType, FeatureRelationType
+from app.models import Feature
+from app.services.feature_model import fm_uvl_importer
 from app.services.feature_model.fm_uvl_importer import (
+    BULK_INSERT_BATCH_SIZE,
     FeatureModelUVLImporter,
     UVLParseError,
 )
+from app.services.feature_model.fm_uvl_parser import parse_uvl
 
 
 VALID_UVL = """namespace Test
@@ -35,3 +44,286 @@ def test_validate_uvl_only_success():
 def test_validate_uvl_only_invalid_indentation():
     with pytest.raises(UVLParseError):
         FeatureModelUVLImporter.validate_uvl_only(INVALID_INDENT_UVL)
+
+
+GROUPED_UVL = """features
+    Root
+        alternative
+            A
+            B
+        optional
+            C
+
+constraints
+    A => C
+    !(B & C)
+    A | B
+"""
+
+
+def _importer(session=None):
+    return FeatureModelUVLImporter(
+        session=session,
+        feature_model=SimpleNamespace(id=uuid.uuid4()),
+        user=SimpleNamespace(id=uuid.uuid4()),
+    )
+
+
+def test_build_rows_resolves_references_in_memory():
+    importer = _importer()
+    version_id = uuid.uuid4()
+
+    rows = importer._build_rows(parse_uvl(GROUPED_UVL), version_id)
+
+    ids = {row["name"]: row["id"] for row in rows.features}
+    # BFS: el padre precede siempre a sus hijos
+    assert [row["name"] for row in rows.features] == ["Root", "A", "B", "C"]
+    assert {row["parent_id"] for row in rows.features[1:]} == {ids["Root"]}
+    assert all(row["feature_model_version_id"] == version_id for row in rows.features)
+
+    (group,) = rows.groups
+    assert group["group_type"] == FeatureGroupType.ALTERNATIVE
+    assert group["parent_feature_id"] == ids["Root"]
+    assert {m["id"] for m in rows.group_members} == {ids["A"], ids["B"]}
+    assert {m["group_id"] for m in rows.group_members} == {group["id"]}
+
+    relations = {
+        (r["type"], r["source_feature_id"], r["target_feature_id"])
+        for r in rows.relations
+    }
+    assert relations == {
+        (FeatureRelationType.REQUIRED, ids["A"], ids["C"]),
+        (FeatureRelationType.EXCLUDES, ids["B"], ids["C"]),
+    }
+    assert [c["expr_text"] for c in rows.constraints] == ["A | B"]
+
+
+def test_bulk_insert_uses_one_statement_per_batch():
+    class _Session:
+        def __init__(self):
+            self.batches = []
+
+        async def execute(self, statement, params):
+            self.batches.append(len(params))
+
+    session = _Session()
+    rows = [{"id": uuid.uuid4()} for _ in range(BULK_INSERT_BATCH_SIZE * 2 + 5)]
+
+    asyncio.run(_importer(session)._bulk_insert(Feature, rows))
+
+    assert session.batches == [BULK_INSERT_BATCH_SIZE, BULK_INSERT_BATCH_SIZE, 5]
+
+
+def _base_version(uvl: str):
+    """Versión base (SimpleNamespace) con la estructura importada de ``uvl``."""
+    rows = _importer()._build_rows(parse_uvl(uvl), uuid.uuid4())
+    group_of = {m["id"]: m["group_id"] for m in rows.group_members}
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        uvl_content=uvl,
+        features=[
+            SimpleNamespace(
+                **row, group_id=group_of.get(row["id"]), resource_id=None, tags=[]
+            )
+            for row in rows.features
+        ],
+        feature_groups=[SimpleNamespace(**row) for row in rows.groups],
+        feature_relations=[SimpleNamespace(**row) for row in rows.relations],
+        constraints=[SimpleNamespace(expr_cnf=None, **row) for row in rows.constraints],
+    )
+
+
+DELTA_BASE_UVL = """features
+    Root
+        mandatory
+            Engine
+                alternative
+                    Petrol
+                    Electric
+        optional
+            Radio
+            Gps
+
+constraints
+    Gps => Radio
+    Petrol | Electric
+"""
+
+
+def test_compute_delta_is_empty_for_same_structure():
+    base = _base_version(DELTA_BASE_UVL)
+
+    delta = _importer().compute_delta(parse_uvl(DELTA_BASE_UVL), base)
+
+    assert delta.is_empty
+    assert not delta.affects_logic
+    assert set(delta.matched) == {
+        "root",
+        "engine",
+        "petrol",
+        "electric",
+        "radio",
+        "gps",
+    }
+
+
+def test_compute_delta_detects_renames_moves_and_changes():
+    base = _base_version(DELTA_BASE_UVL)
+    ids = {f.name: f.id for f in base.features}
+    uvl = """features
+    Root
+        mandatory
+            Engine
+                alternative
+                    Petrol
+                    Electric
+                    Hybrid
+        optional
+            Navigation
+            Gps
+
+constraints
+    Gps => Navigation
+    Petrol | Electric
+"""
+
+    delta = _importer().compute_delta(parse_uvl(uvl), base)
+
+    # Radio es la única feature sin pareja bajo Root: renombrado
+    assert delta.matched["navigation"] == ids["Radio"]
+    assert delta.features_renamed == {ids["Radio"]}
+    assert delta.features_added == ["hybrid"]
+    assert delta.features_removed == []
+    # El grupo cambia de miembros: se sustituye
+    assert [g.members for g in delta.groups_added] == [["Petrol", "Electric", "Hybrid"]]
+    assert len(delta.groups_removed) == 1
+    # La relación apunta al mismo id: no cambia
+    assert delta.relations_added == [] and delta.relations_removed == []
+    assert delta.affects_logic
+
+
+def test_compute_delta_moves_and_removes_features():
+    base = _base_version(DELTA_BASE_UVL)
+    ids = {f.name: f.id for f in base.features}
+    uvl = """features
+    Root
+        mandatory
+            Engine
+                alternative
+                    Petrol
+                    Electric
+                optional
+                    Gps
+"""
+
+    delta = _importer().compute_delta(parse_uvl(uvl), base)
+
+    assert delta.features_moved == {ids["Gps"]}
+    assert delta.features_removed == [ids["Radio"]]
+    assert len(delta.relations_removed) == 1
+    assert len(delta.constraints_removed) == 1
+    assert delta.summary()["features_moved"] == 1
+
+
+def test_compute_delta_attribute_change_does_not_affect_logic():
+    base = _base_version(DELTA_BASE_UVL)
+    uvl = DELTA_BASE_UVL.replace(
+        "            Radio\n", "            Radio {price 30}\n"
+    )
+
+    delta = _importer().compute_delta(parse_uvl(uvl), base)
+
+    assert delta.features_updated == {
+        next(f.id for f in base.features if f.name == "Radio")
+    }
+    assert not delta.affects_logic
+
+
+def test_apply_uvl_delta_without_changes_keeps_base_version():
+    class _Session:
+        async def execute(self, statement, params=None):
+            raise AssertionError("no debe escribir")
+
+    base = _base_version(DELTA_BASE_UVL)
+
+    version, delta = asyncio.run(
+        _importer(_Session()).apply_uvl_delta(DELTA_BASE_UVL, base)
+    )
+
+    assert version is base
+    assert delta.is_empty
+
+
+def test_write_delta_only_touches_changed_rows():
+    class _Session:
+        def __init__(self):
+            self.statements = []
+
+        async def execute(self, statement, params=None):
+            self.statements.append((statement, params))
+
+    base = _base_version(DELTA_BASE_UVL)
+    uvl = DELTA_BASE_UVL.replace(
+        "            Gps\n", "            Gps\n            Wifi\n"
+    )
+    importer = _importer(_Session())
+    model = parse_uvl(uvl)
+    delta = importer.compute_delta(model, base)
+    id_map = {
+        "features": {f.id: uuid.uuid4() for f in base.features},
+        "feature_groups": {g.id: uuid.uuid4() for g in base.feature_groups},
+        "feature_relations": {r.id: uuid.uuid4() for r in base.feature_relations},
+        "constraints": {c.id: uuid.uuid4() for c in base.constraints},
+    }
+
+    asyncio.run(importer._write_delta(delta, model, id_map, uuid.uuid4()))
+
+    ((statement, params),) = importer.session.statements
+    assert statement.table.name == "features"
+    assert [row["name"] for row in params] == ["Wifi"]
+    assert params[0]["parent_id"] == id_map["features"][base.features[0].id]
+
+
+def test_write_delta_removes_subtree_in_one_statement(monkeypatch):
+    class _Session:
+        def __init__(self):
+            self.statements = []
+
+        async def execute(self, statement, params=None):
+            self.statements.append(statement)
+
+    # Lotes de una fila: un padre y sus hijos caerían en sentencias distintas
+    monkeypatch.setattr(fm_uvl_importer, "BULK_INSERT_BATCH_SIZE", 1)
+    base = _base_version(DELTA_BASE_UVL)
+    uvl = """features
+    Root
+        optional
+            Radio
+            Gps
+
+constraints
+    Gps => Radio
+"""
+    importer = _importer(_Session())
+    model = parse_uvl(uvl)
+    delta = importer.compute_delta(model, base)
+    id_map = {
+        "features": {f.id: uuid.uuid4() for f in base.features},
+        "feature_groups": {g.id: uuid.uuid4() for g in base.feature_groups},
+        "feature_relations": {r.id: uuid.uuid4() for r in base.feature_relations},
+        "constraints": {c.id: uuid.uuid4() for c in base.constraints},
+    }
+
+    asyncio.run(importer._write_delta(delta, model, id_map, uuid.uuid4()))
+
+    (feature_delete,) = [
+        statement
+        for statement in importer.session.statements
+        if statement.is_delete and statement.table.name == "features"
+    ]
+    removed = {
+        id_map["features"][f.id]
+        for f in base.features
+        if f.name in {"Engine", "Petrol", "Electric"}
+    }
+    assert set(feature_delete.compile().params["removed_ids"]) == removed
@@ -0,0 +1,162 @@
+import io
+
+import pytest
+
+from app.services.feature_model.fm_uvl_parser import UVLParseError, parse_uvl
+
+
+FULL_GRAMMAR_UVL = """namespace Curriculum
+
+include
+\tArithmetic-level
+
+features
+\t"Computer Science" {abstract, credits 240}
+\t\tmandatory
+\t\t\tProgramming {hours 120, langs ['python', 'c'], meta {level 1}}
+\t\t\tMath
+\t\toptional
+\t\t\tInteger Electives cardinality [0..5]
+\t\t[1..2]
+\t\t\t"Machine Learning"
+\t\t\tSecurity /* inline comment */ {
+\t\t\t\tlab true,
+\t\t\t\tcost -3.5
+\t\t\t}
+
+constraints
+\t"Machine Learning" => Math // comment
+\t!(Security & Electives)
+\t(Programming &
+\t\tMath) | Security
+\tsum(credits) > 100
+\tProgramming.hours >= 60
+"""
+
+
+def test_parses_full_grammar_into_compiled_model():
+    model = parse_uvl(FULL_GRAMMAR_UVL)
+
+    assert model.namespace == "Curriculum"
+    assert model.includes == ["Arithmetic-level"]
+    assert model.root == "Computer Science"
+    # Preorden: cada padre antes que sus hijos
+    assert [f.name for f in model.features.values()] == [
+        "Computer Science",
+        "Programming",
+        "Math",
+        "Electives",
+        "Machine Learning",
+        "Security",
+    ]
+
+    root = model.features["computer science"]
+    assert root.attributes == {"abstract": True, "credits": 240}
+    programming = model.features["programming"]
+    assert programming.parent == "Computer Science"
+    assert programming.relation_type == "mandatory"
+    assert programming.attributes == {
+        "hours": 120,
+        "langs": ["python", "c"],
+        "meta": {"level": 1},
+    }
+    electives = model.features["electives"]
+    assert electives.feature_type == "Integer"
+    assert electives.cardinality == (0, 5)
+    assert electives.relation_type == "optional"
+    assert model.features["security"].attributes == {"lab": True, "cost": -3.5}
+
+    (group,) = model.groups
+    assert (group.group_type, group.min_cardinality, group.max_cardinality) == (
+        "cardinality",
+        1,
+        2,
+    )
+    assert group.members == ["Machine Learning", "Security"]
+
+    texts = [c.text for c in model.constraints]
+    assert texts == [
+        '"Machine Learning" => Math',
+        "!(Security & Electives)",
+        "(Programming & Math) | Security",
+        "sum(credits) > 100",
+        "Programming.hours >= 60",
+    ]
+    relations = [c.relation for c in model.constraints]
+    assert relations[:2] == [
+        ("requires", "Machine Learning", "Math"),
+        ("excludes", "Security", "Electives"),
+    ]
+    assert relations[2:] == [None, None, None]
+    assert model.constraints[2].references == ["Programming", "Math", "Security"]
+    # Los argumentos de funciones agregadas son atributos, no features
+    assert model.constraints[3].references == []
+    assert model.constraints[4].references == ["Programming"]
+
+
+def test_parses_from_file_like_object_and_resolves_exported_names():
+    source = io.StringIO(
+        "features\n"
+        "  Root\n"
+        "    alternative\n"
+        "      Mobile App\n"
+        "      Web\n"
+        "constraints\n"
+        "  Mobile_App => Web\n"
+    )
+
+    model = parse_uvl(source)
+
+    assert model.root == "Root"
+    assert model.groups[0].group_type == "alternative"
+    assert model.constraints[0].relation == ("requires", "Mobile App", "Web")
+
+
+@pytest.mark.parametrize(
+    "uvl, line, column, reason",
+    [
+        ("features\n    A\n        B\n", 3, 9, "must be nested under a group"),
+        ("features\n    A\n    B\n", 3, 5, "Expected single root"),
+        (
+            "features\n    A\n        optional\n            B\n          C\n",
+            5,
+            1,
+            "Inconsistent indentation",
+        ),
+        (
+            "features\n    A\n        optional\n            B\n            b\n",
+            5,
+            13,
+            "Duplicate feature name",
+        ),
+        (
+            "features\n    A\n        optional\n            B\nconstraints\n"
+            "    B => Missing\n",
+            6,
+            10,
+            "Unknown feature in constraint: 'Missing'",
+        ),
+        (
+            "features\n    A\n        optional\n            B\nconstraints\n"
+            "    B => => A\n",
+            6,
+            10,
+            "Unexpected '=>'",
+        ),
+        (
+            "features\n    A\n        alternative\n            B\n",
+            3,
+            None,
+            "requires >= 2 children",
+        ),
+        ("features\n    A {cost 5\n", 2, 7, "Unclosed '{'"),
+        ("features\n    A $\n", 2, 7, "Unexpected character '$'"),
+    ],
+)
+def test_errors_report_line_and_column(uvl, line, column, reason):
+    with pytest.raises(UVLParseError) as exc_info:
+        parse_uvl(uvl)
+
+    error = exc_info.value
+    assert (error.line, error.column) == (line, column)
+    assert reason in error.reason
@@ -0,0 +1,338 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.enums import FeatureType, ModelStatus
+from app.exceptions import SharedVersionRowsException
+from app.models import FeatureModelVersion
+from app.services.feature_model import fm_version_delta
+from app.services.feature_model.fm_uvl_importer import FeatureModelUVLImporter
+from app.services.feature_model.fm_uvl_parser import parse_uvl
+from app.services.feature_model.fm_version_delta import (
+    TAG_IDS,
+    apply_delta,
+    build_structure,
+    compact_row_owner,
+    compile_structure,
+    compiled_rows,
+    encode_delta,
+    ensure_full_version,
+    ensure_not_shared,
+    remap_delta,
+    resolve_version_rows,
+    rows_from_import,
+    versions_to_compact,
+)
+
+BASE_UVL = """features
+    Root
+        alternative
+            A
+            B
+        optional
+            C
+
+constraints
+    A => C
+    A | B
+"""
+
+
+def _importer():
+    return FeatureModelUVLImporter(
+        session=None,
+        feature_model=SimpleNamespace(id=uuid.uuid4()),
+        user=SimpleNamespace(id=uuid.uuid4()),
+    )
+
+
+def _rows(uvl: str = BASE_UVL):
+    return rows_from_import(_importer()._build_rows(parse_uvl(uvl), uuid.uuid4()))
+
+
+def _feature_id(rows, name: str) -> str:
+    return next(i for i, row in rows["features"].items() if row["name"] == name)
+
+
+def test_encode_delta_only_keeps_changed_rows():
+    parent = _rows()
+    rows = {table: dict(table_rows) for table, table_rows in parent.items()}
+    c_id = _feature_id(parent, "C")
+    rows["features"][c_id] = {**parent["features"][c_id], "name": "Camera"}
+    del rows["constraints"][next(iter(parent["constraints"]))]
+
+    delta = encode_delta(parent, rows)
+
+    assert set(delta) == {"format", "features", "constraints"}
+    assert [row["name"] for row in delta["features"]["upsert"]] == ["Camera"]
+    assert delta["features"]["delete"] == []
+    assert delta["constraints"] == {
+        "upsert": [],
+        "delete": list(parent["constraints"]),
+    }
+
+    resolved = apply_delta(parent, delta)
+
+    assert resolved == rows
+    # Las tablas sin cambios se comparten con la base
+    assert resolved["feature_groups"] is parent["feature_groups"]
+
+
+def test_encode_delta_keeps_audit_columns_and_tags_of_base():
+    parent = _rows()
+    c_id = _feature_id(parent, "C")
+    parent["features"][c_id] = {
+        **parent["features"][c_id],
+        TAG_IDS: [str(uuid.uuid4())],
+    }
+    rows = {table: dict(table_rows) for table, table_rows in parent.items()}
+    # Fila recién construida: otra fecha de alta y sin tags
+    rows["features"][c_id] = {
+        **{k: v for k, v in parent["features"][c_id].items() if k != TAG_IDS},
+        "created_at": "2030-01-01T00:00:00",
+    }
+
+    assert encode_delta(parent, rows) == {"format": 1}
+
+
+def test_importer_reuses_base_ids_for_minimal_delta():
+    importer = _importer()
+    parent = _rows()
+    base = SimpleNamespace(
+        features=[
+            SimpleNamespace(**fm_version_delta.python_row("features", row))
+            for row in parent["features"].values()
+        ],
+        feature_groups=[
+            SimpleNamespace(**fm_version_delta.python_row("feature_groups", row))
+            for row in parent["feature_groups"].values()
+        ],
+        feature_relations=[
+            SimpleNamespace(**fm_version_delta.python_row("feature_relations", row))
+            for row in parent["feature_relations"].values()
+        ],
+        constraints=[
+            SimpleNamespace(**fm_version_delta.python_row("constraints", row))
+            for row in parent["constraints"].values()
+        ],
+    )
+    model = parse_uvl(
+        BASE_UVL.replace("            C\n", "            C\n            D\n")
+    )
+    delta = importer.compute_delta(model, base)
+
+    rows = rows_from_import(importer._build_rows(model, uuid.uuid4(), reuse=delta))
+    encoded = encode_delta(parent, rows)
+
+    assert set(encoded) == {"format", "features"}
+    assert [row["name"] for row in encoded["features"]["upsert"]] == ["D"]
+
+
+def test_remap_delta_translates_ids_and_references():
+    parent = _rows()
+    root_id = _feature_id(parent, "Root")
+    new_feature = {"id": str(uuid.uuid4()), "name": "D", "parent_id": root_id}
+    delta = {
+        "format": 1,
+        "features": {"upsert": [new_feature], "delete": [_feature_id(parent, "C")]},
+    }
+    id_map = {root_id: "new-root", _feature_id(parent, "C"): "new-c"}
+
+    remapped = remap_delta(delta, id_map)
+
+    assert remapped["features"]["upsert"][0]["parent_id"] == "new-root"
+    assert remapped["features"]["upsert"][0]["id"] == new_feature["id"]
+    assert remapped["features"]["delete"] == ["new-c"]
+
+
+def test_versions_to_compact_keeps_chains_under_limit():
+    full, v1, v2, v3, v4, branch = (uuid.uuid4() for _ in range(6))
+    bases = {v4: v3, v3: v2, v2: v1, v1: full, branch: v2}
+
+    # Profundidades: v1=1, v2=2, v3=3 (se compacta), v4=1, branch=3 (se compacta)
+    assert versions_to_compact(bases, max_chain=2) == [v3, branch]
+    assert versions_to_compact(bases, max_chain=8) == []
+
+
+def test_build_structure_links_objects_without_session():
+    rows = _rows()
+    version = FeatureModelVersion(
+        feature_model_id=uuid.uuid4(), version_number=2, status=ModelStatus.DRAFT
+    )
+
+    build_structure(version, rows)
+
+    features = {f.name: f for f in version.features}
+    assert features["A"].type == FeatureType.OPTIONAL
+    assert features["A"].parent is features["Root"]
+    assert {f.name for f in features["Root"].children} == {"A", "B", "C"}
+    (group,) = version.feature_groups
+    assert group.parent_feature is features["Root"]
+    assert {f.name for f in group.member_features} == {"A", "B"}
+    assert features["A"].group is group
+    (relation,) = version.feature_relations
+    assert relation.source_feature is features["A"]
+    assert features["C"].target_relations == [relation]
+    assert [c.expr_text for c in version.constraints] == ["A | B"]
+    assert isinstance(features["A"].id, uuid.UUID)
+
+
+def test_compiled_structure_roundtrip_for_immutable_versions():
+    rows = _rows()
+    version = FeatureModelVersion(
+        feature_model_id=uuid.uuid4(), version_number=1, status=ModelStatus.DRAFT
+    )
+    build_structure(version, rows)
+
+    version.snapshot = {"structure": compile_structure(version)}
+
+    # Las versiones DRAFT pueden cambiar: se cargan siempre desde las tablas
+    assert compiled_rows(version) is None
+    version.status = ModelStatus.PUBLISHED
+    compiled = compiled_rows(version)
+    for table, table_rows in rows.items():
+        assert compiled[table].keys() == table_rows.keys()
+        for row_id, row in table_rows.items():
+            assert row.items() <= compiled[table][row_id].items()
+    version.snapshot = {"structure": {"format": 0, "rows": rows}}
+    assert compiled_rows(version) is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_version_rows_starts_from_cached_ancestor(monkeypatch):
+    parent = _rows()
+    v1, v2, v3 = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    c_id = _feature_id(parent, "C")
+    delta = {
+        "format": 1,
+        "features": {"upsert": [], "delete": [c_id]},
+    }
+    stored = {}
+
+    async def _chain(_session, _version_id):  # noqa: ANN001
+        return [v3, v2, v1]
+
+    async def _get_rows(version_id):  # noqa: ANN001
+        return parent if version_id == v2 else None
+
+    async def _set_rows(version_id, rows):  # noqa: ANN001
+        stored[version_id] = rows
+
+    class _Session:
+        async def execute(self, statement):  # noqa: ANN001
+            return SimpleNamespace(all=lambda: [(v3, delta)])
+
+    monkeypatch.setattr(fm_version_delta, "load_version_chain", _chain)
+    monkeypatch.setattr(fm_version_delta.cache_service, "get_version_rows", _get_rows)
+    monkeypatch.setattr(fm_version_delta.cache_service, "set_version_rows", _set_rows)
+
+    rows = await resolve_version_rows(_Session(), v3)
+
+    assert c_id not in rows["features"]
+    assert len(rows["features"]) == len(parent["features"]) - 1
+    assert stored == {v3: rows}
+
+
+class _VersionsSession:
+    """Sesión falsa: responde a consultas por id de versión con ``values``."""
+
+    def __init__(self, values):
+        self.values = values
+        self.commits = 0
+
+    async def execute(self, statement):  # noqa: ANN001
+        version_id = next(iter(statement.compile().params.values()))
+        value = self.values.get(version_id)
+        return SimpleNamespace(
+            scalar_one_or_none=lambda: value,
+            first=lambda: None if value is None else (value,),
+            scalars=lambda: SimpleNamespace(
+                all=lambda: [] if value is None else [value]
+            ),
+        )
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+async def test_ensure_full_version_compacts_only_delta_versions(monkeypatch):
+    base, delta, full = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    compacted = []
+
+    async def _compact(_session, version_id):  # noqa: ANN001
+        compacted.append(version_id)
+
+    monkeypatch.setattr(fm_version_delta, "compact_version", _compact)
+    session = _VersionsSession({delta: base})
+
+    assert await ensure_full_version(session, full) is False
+    assert compacted == []
+    assert await ensure_full_version(session, delta) is True
+    assert compacted == [delta]
+
+
+@pytest.mark.asyncio
+async def test_ensure_not_shared_compacts_and_rejects_bases_of_delta_versions(
+    monkeypatch,
+):
+    base, delta, full = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    compacted = []
+
+    async def _ensure_full_version(_session, version_id):  # noqa: ANN001
+        compacted.append(version_id)
+        return True
+
+    monkeypatch.setattr(fm_version_delta, "ensure_full_version", _ensure_full_version)
+    # Consulta por base_version_id: la base tiene una versión delta que deriva de ella
+    session = _VersionsSession({base: delta})
+
+    await ensure_not_shared(session, full)
+    assert compacted == []
+    with pytest.raises(SharedVersionRowsException):
+        await ensure_not_shared(session, base)
+    # La versión delta ya tiene filas propias: reintentar no es ambiguo
+    assert compacted == [delta]
+
+
+@pytest.mark.asyncio
+async def test_write_full_rows_keeps_ids_of_rows_only_in_the_delta():
+    rows = _rows()
+    c_id = _feature_id(rows, "C")
+
+    class _Session:
+        async def execute(self, statement, params=None):  # noqa: ANN001
+            return None
+
+    id_map = await fm_version_delta.write_full_rows(
+        _Session(), uuid.uuid4(), rows, keep_ids={c_id}
+    )
+
+    assert id_map[c_id] == c_id
+    assert all(new_id != row_id for row_id, new_id in id_map.items() if row_id != c_id)
+
+
+@pytest.mark.asyncio
+async def test_compact_row_owner_compacts_the_version_that_added_the_row(
+    monkeypatch,
+):
+    owner, row_id = uuid.uuid4(), uuid.uuid4()
+    compacted = []
+    statements = []
+
+    async def _ensure_full_version(_session, version_id):  # noqa: ANN001
+        compacted.append(version_id)
+        return True
+
+    class _Session:
+        async def execute(self, statement):  # noqa: ANN001
+            statements.append(statement)
+            return SimpleNamespace(scalar_one_or_none=lambda: owner)
+
+    monkeypatch.setattr(fm_version_delta, "ensure_full_version", _ensure_full_version)
+
+    assert await compact_row_owner(_Session(), "features", row_id) is True
+    assert compacted == [owner]
+    params = statements[0].compile().params
+    assert {"features": {"upsert": [{"id": str(row_id)}]}} in params.values()
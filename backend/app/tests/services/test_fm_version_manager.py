@@ -77,6 +77,27 @@ async def test_publish_version_sets_status_and_snapshot(monkeypatch):
     assert session.commits == 1
 
 
+@pytest.mark.asyncio
+async def test_ensure_snapshot_rebuilds_snapshot_without_structure(monkeypatch):
+    feature_model = _build_feature_model()
+    session = _DummySession()
+    manager = FeatureModelVersionManager(session, feature_model)
+    version = _build_version(feature_model, 1)
+    version.status = ModelStatus.PUBLISHED
+    version.snapshot = {"tree": {}}
+    built = {"tree": {}, "structure": {"format": 1, "rows": {}}}
+
+    async def _fake_snapshot(_version):  # noqa: ANN001
+        return built
+
+    monkeypatch.setattr(manager, "_build_snapshot", _fake_snapshot)
+
+    assert await manager.ensure_snapshot(version) is True
+    assert version.snapshot is built
+    assert await manager.ensure_snapshot(version) is False
+    assert session.commits == 1
+
+
 @pytest.mark.asyncio
 async def test_archive_and_restore_transitions():
     feature_model = _build_feature_model()
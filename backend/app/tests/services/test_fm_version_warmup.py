@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.enums import AnalysisType
+from app.services.feature_model import fm_version_warmup
+from app.services.feature_model.fm_version_warmup import (
+    DEFAULT_ANALYSIS_PARAMS,
+    analysis_params,
+    get_cached_cnf,
+    get_precached_analysis,
+    is_version_warm,
+    mark_version_warm,
+    warmup_steps,
+)
+
+
+class _FakeCache:
+    def __init__(self):
+        self.warmup = {}
+        self.precache = {}
+        self.cnf = {}
+
+    async def set_version_warmup(self, version_id, record):
+        self.warmup[str(version_id)] = record
+
+    async def get_version_warmup(self, version_id):
+        return self.warmup.get(str(version_id))
+
+    async def get_analysis_precache(self, version_id):
+        return self.precache.get(str(version_id))
+
+    async def get_compiled_cnf(self, model_hash):
+        return self.cnf.get(model_hash)
+
+
+def test_warmup_steps_cover_every_artifact():
+    steps = warmup_steps()
+    assert steps[:4] == ["snapshot", "cnf", "analysis", "tree"]
+    assert {"export:uvl", "export:json", "export:xml", "export:dimacs"} <= set(steps)
+    assert len(steps) == len(set(steps))
+
+
+def test_analysis_params_are_order_insensitive():
+    first = analysis_params(
+        [AnalysisType.DEAD_FEATURES, AnalysisType.REDUNDANCIES], 10, True
+    )
+    second = analysis_params(["redundancies", "dead_features"], 10, True)
+    assert first == second
+    assert analysis_params(None, 10, True) != first
+
+
+def test_version_is_warm_only_when_no_step_failed():
+    cache = _FakeCache()
+    version_id = uuid.uuid4()
+    ok = [{"step": "tree", "status": "ok"}, {"step": "cnf", "status": "skipped"}]
+    failed = ok + [{"step": "export:xml", "status": "error", "error": "boom"}]
+
+    async def scenario():
+        partial = await mark_version_warm(version_id, failed)
+        partial_is_warm = await is_version_warm(version_id)
+        warm = await mark_version_warm(version_id, ok)
+        return partial, partial_is_warm, warm, await is_version_warm(version_id)
+
+    with patch.object(fm_version_warmup, "cache_service", cache):
+        partial, partial_is_warm, warm, is_warm = asyncio.run(scenario())
+
+    assert (partial, partial_is_warm) == ("partial", False)
+    assert (warm, is_warm) == ("warm", True)
+    assert cache.warmup[str(version_id)]["steps"]["cnf"] == "skipped"
+
+
+def test_precached_analysis_is_served_only_for_matching_params():
+    cache = _FakeCache()
+    version_id = uuid.uuid4()
+    params = analysis_params(**DEFAULT_ANALYSIS_PARAMS)
+    cache.precache[str(version_id)] = {"params": params, "summary": {"x": 1}}
+
+    async def scenario():
+        return (
+            await get_precached_analysis(version_id, params),
+            await get_precached_analysis(version_id, analysis_params(None, 5, False)),
+            await get_precached_analysis(uuid.uuid4(), params),
+        )
+
+    with patch.object(fm_version_warmup, "cache_service", cache):
+        hit, other_params, missing = asyncio.run(scenario())
+
+    assert hit == {"x": 1}
+    assert other_params is None and missing is None
+
+
+def test_cached_cnf_requires_recorded_encoding_errors():
+    cache = _FakeCache()
+    current = SimpleNamespace(id=uuid.uuid4(), hash="current")
+    legacy = SimpleNamespace(id=uuid.uuid4(), hash="legacy")
+    cache.cnf["current"] = {"variables": {"a": 1}, "clauses": [[1]], "errors": []}
+    # Entrada anterior al registro de errores: no se reutiliza
+    cache.cnf["legacy"] = {"variables": {"a": 1}, "clauses": [[1]]}
+
+    async def scenario():
+        return await get_cached_cnf(current), await get_cached_cnf(legacy)
+
+    with (
+        patch.object(fm_version_warmup, "cache_service", cache),
+        patch.object(fm_version_warmup, "PYSAT_AVAILABLE", True),
+        patch.object(fm_version_warmup, "version_model_hash", lambda v: v.hash),
+    ):
+        hit, legacy_hit = asyncio.run(scenario())
+
+    assert hit == cache.cnf["current"]
+    assert legacy_hit is None